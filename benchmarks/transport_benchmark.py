@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""Benchmark pooled HTTP/1.1 against multiplexed HTTP/2 for concurrent reads.
+
+Examples:
+    # Local stub server with 50 ms simulated latency (no network needed)
+    python benchmarks/transport_benchmark.py --target local --latency-ms 50
+
+    # Live endpoint (counts against the reads/minute quota of the key)
+    STABILITY_API_KEY=... python benchmarks/transport_benchmark.py --target live \\
+        --to 0x... --method getMessage --abi "function getMessage() view returns (string)"
+
+    # Record a live run once, then replay it offline with the recorded latencies
+    STABILITY_API_KEY=... python benchmarks/transport_benchmark.py --target live --cassette live.jsonl ...
+    python benchmarks/transport_benchmark.py --target replay --cassette live.jsonl
+
+Every transport runs under the same ``--driver`` (a thread pool by default, or
+asyncio), so the numbers differ only by transport. With ``--driver asyncio`` the
+requests-based ``http1`` transport runs each call in ``asyncio.to_thread`` and
+is capped by the default executor size.
+
+The local stub only speaks HTTP/1.1, so the ``http2`` run there measures the
+httpx client over HTTP/1.1; the ``http_version`` column shows what was negotiated.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import stability_toolkit  # noqa: E402
+from stability_cassette import RecordingTransport, ReplayTransport  # noqa: E402
+from stability_toolkit import ZKTClient  # noqa: E402
+
+
+def start_stub_server(latency_ms: float) -> ThreadingHTTPServer:
+    """Start a local ZKT stand-in that answers every POST after ``latency_ms``."""
+
+    class _Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):  # noqa: N802
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(latency_ms / 1000.0)
+            payload = json.loads(body or b"{}")
+            response = json.dumps({"success": True, "output": payload.get("method"), "id": payload.get("id")})
+            data = response.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _read_payload(call):
+    return {key: call[key] for key in ("to", "abi", "method", "arguments", "id")}
+
+
+def _probe_args(client: ZKTClient, calls):
+    return (
+        stability_toolkit.API_URL_TEMPLATE.format(client.api_key),
+        stability_toolkit.HEADERS,
+        json.dumps(_read_payload(calls[0])).encode("utf-8"),
+    )
+
+
+def run_threaded(client: ZKTClient, calls, concurrency: int):
+    """Blocking reads from a thread pool, ``concurrency`` at a time."""
+    latencies = []
+
+    def _one(call):
+        started = time.perf_counter()
+        client.call_contract_read(**call)
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(_one, calls))
+    elapsed = time.perf_counter() - started
+    probe = client.transport.post(*_probe_args(client, calls))
+    return elapsed, latencies, probe.http_version
+
+
+async def run_async(client: ZKTClient, calls, concurrency: int):
+    """Coroutines on one event loop, ``concurrency`` at a time."""
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _one(call):
+        async with semaphore:
+            started = time.perf_counter()
+            await client.apost(_read_payload(call))
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(_one(call) for call in calls))
+    elapsed = time.perf_counter() - started
+    probe = await client.transport.apost(*_probe_args(client, calls))
+    if hasattr(client.transport, "aclose"):
+        await client.transport.aclose()
+    return elapsed, latencies, probe.http_version
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=["local", "live", "replay"], default="local")
+    parser.add_argument("--cassette", help="record exchanges to this file, or (--target replay) replay it")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="stub latency (local target)")
+    parser.add_argument("--concurrency", default="1,8,32,128", help="comma-separated levels")
+    parser.add_argument("--requests", type=int, default=256, help="reads per level")
+    parser.add_argument("--transports", default="http1,http2")
+    parser.add_argument(
+        "--driver", choices=["threads", "asyncio"], default="threads",
+        help="concurrency model used for every transport, so only the transport varies",
+    )
+    parser.add_argument("--to", default="0x0000000000000000000000000000000000000000")
+    parser.add_argument("--method", default="getMessage")
+    parser.add_argument("--abi", default="function getMessage() view returns (string)")
+    args = parser.parse_args()
+
+    if args.target == "local":
+        server = start_stub_server(args.latency_ms)
+        stability_toolkit.API_URL_TEMPLATE = f"http://127.0.0.1:{server.server_address[1]}/zkt/{{}}"
+
+    calls = [
+        {"to": args.to, "abi": [args.abi], "method": args.method, "arguments": [], "id": i}
+        for i in range(args.requests)
+    ]
+    levels = [int(level) for level in args.concurrency.split(",")]
+    transports = args.transports.split(",")
+    if args.target == "replay":
+        if not args.cassette:
+            parser.error("--target replay needs --cassette")
+        transports = ["replay"]
+    recording = False
+
+    print(f"{'transport':<10} {'conc':>5} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  http_version")
+    for name in transports:
+        for concurrency in levels:
+            options = {"pool_maxsize": concurrency} if name == "http1" else {}
+            if name == "replay":
+                transport, options = ReplayTransport(args.cassette), {}
+            elif args.cassette:
+                transport = RecordingTransport(args.cassette, name, append=recording, **options)
+                recording, options = True, {}
+            else:
+                transport = name
+            with ZKTClient(transport=transport, max_concurrency=concurrency, **options) as client:
+                if args.driver == "threads":
+                    elapsed, latencies, version = run_threaded(client, calls, concurrency)
+                else:
+                    elapsed, latencies, version = asyncio.run(run_async(client, calls, concurrency))
+            quantiles = statistics.quantiles([l * 1000 for l in latencies], n=100)
+            print(
+                f"{name:<10} {concurrency:>5} {len(calls) / elapsed:>9.1f} "
+                f"{statistics.median(latencies) * 1000:>8.1f} {quantiles[94]:>8.1f} {quantiles[98]:>8.1f}  {version}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,9 @@
 """Stability API utility functions and wrapper."""
 
+import hashlib
 import json
 import os
-from typing import Any, List
+from typing import Any, Callable, Dict, Iterable, List, Optional
 
 # Environment variable support for API key
 DEFAULT_API_KEY = os.getenv("STABILITY_API_KEY", "try-it-out")
@@ -22,8 +23,21 @@ def _sanitize_api_key_for_logging(api_key: str) -> str:
     return f"{api_key[:8]}...{api_key[-4:]}" if len(api_key) > 12 else "***"
 
 
-def _post_request(payload: dict, api_key: str = DEFAULT_API_KEY) -> str:
-    """Send a POST request to the Stability API and return the response text."""
+def _post_request(
+    payload: dict,
+    api_key: str = DEFAULT_API_KEY,
+    headers: Dict[str, str] = HEADERS,
+    on_error: Optional[Callable[[Exception], Optional[str]]] = None,
+    endpoints: Optional[Any] = None,
+    failover: bool = False,
+) -> str:
+    """Send a POST request to the Stability API and return the response text.
+
+    ``on_error`` may turn a request exception into a result; otherwise it
+    becomes an ``"Error: ..."`` string. ``endpoints`` (an endpoint pool,
+    see ``StabilityAPIWrapper``) picks the URL, retrying other endpoints
+    when ``failover`` is set.
+    """
     if requests is None:
         raise RuntimeError("requests library is required")
     
@@ -33,16 +47,70 @@ def _post_request(payload: dict, api_key: str = DEFAULT_API_KEY) -> str:
         print("   For production use, get a FREE API key at: https://portal.stabilityprotocol.com/")
         print("   Free tier: 1000 writes/month, 200 reads/minute, up to 3 keys")
     
-    url = API_URL_TEMPLATE.format(api_key)
     try:
-        response = requests.post(url, headers=HEADERS, json=payload)
+        if endpoints is None:
+            response = requests.post(API_URL_TEMPLATE.format(api_key), headers=headers, json=payload)
+        else:
+            response = endpoints.post(
+                lambda url: requests.post(url, headers=headers, json=payload), api_key, failover=failover
+            )
         return response.text
     except Exception as e:  # pragma: no cover
+        recovered = on_error(e) if on_error is not None else None
+        if recovered is not None:
+            return recovered
         # Sanitize any potential API key exposure in error messages
         error_msg = str(e).replace(api_key, _sanitize_api_key_for_logging(api_key))
         return f"Error: {error_msg}"
 
 
+def _is_immutable_read(abi: Any, method: str, immutable_methods: Iterable[str]) -> bool:
+    """Whether a read targets a ``pure`` function or a known-constant method."""
+    if method in immutable_methods:
+        return True
+    for entry in abi if isinstance(abi, list) else [abi]:
+        if isinstance(entry, dict):
+            if entry.get("name") == method and entry.get("stateMutability") == "pure":
+                return True
+        elif isinstance(entry, str):
+            signature = entry.strip()
+            if signature.startswith("function "):
+                signature = signature[len("function "):]
+            name, _, rest = signature.partition("(")
+            if name.strip() == method and " pure" in rest.split(")", 1)[-1]:
+                return True
+    return False
+
+
+class _Request:
+    """One outgoing call as seen by middleware (mirrors ``stability_middleware.Request``)."""
+
+    __slots__ = ("payload", "api_key", "headers", "kind", "state")
+
+    def __init__(self, payload: dict, api_key: str, headers: Dict[str, str], kind: str):
+        self.payload = payload
+        self.api_key = api_key
+        self.headers = headers
+        self.kind = kind
+        self.state: Dict[str, Any] = {}
+
+
+def _cache_key(kind: str, payload: dict) -> str:
+    stable = {k: v for k, v in payload.items() if k not in ("id", "wait")}
+    canonical = json.dumps(stable, sort_keys=True, separators=(",", ":"), default=str)
+    return f"{kind}:{hashlib.sha256(canonical.encode('utf-8')).hexdigest()}"
+
+
+def _is_cacheable_response(result: str, require_address: bool = False) -> bool:
+    try:
+        data = json.loads(result)
+    except (TypeError, ValueError):
+        return False
+    if not isinstance(data, dict) or data.get("success") is False:
+        return False
+    return bool(data.get("contractAddress")) or not require_address
+
+
 class StabilityAPIWrapper:
     """Wrapper for Stability API.
     
@@ -67,16 +135,55 @@ class StabilityAPIWrapper:
     Support:
         Email: contact@stabilityprotocol.com
         Portal: https://portal.stabilityprotocol.com/
+    
+    Caching:
+        Pass any object with ``get(key)``/``set(key, value)`` as ``cache`` (for
+        example ``stability_cache.DiskCache``, which is shared across
+        processes) to keep immutable results: reads of ``pure`` functions or
+        ``immutable_methods``, and deployed addresses when ``cache_deploys``.
+    
+    Middleware:
+        Objects with ``before_send(request)``, ``after_receive(request, result)``
+        and/or ``on_error(request, error)`` methods (such as
+        ``stability_middleware.Middleware``) run around every call, in order
+        before it and in reverse after it; see ``use``. ``before_send`` may
+        change ``request.payload`` and ``request.headers``; the others may
+        return a replacement result.
+    
+    Endpoints:
+        Pass an endpoint pool as ``endpoints`` (such as
+        ``stability_endpoints.EndpointPool``, or any object with
+        ``post(send, api_key, failover)``) to send each call to the fastest
+        healthy endpoint instead of ``API_URL_TEMPLATE``. Failed reads are
+        retried on the next endpoint; writes are not.
     """
     
-    def __init__(self, api_key: str | None = None):
+    def __init__(
+        self,
+        api_key: str | None = None,
+        cache: Optional[Any] = None,
+        immutable_methods: Iterable[str] = (),
+        cache_deploys: bool = False,
+        middleware: Iterable[Any] = (),
+        endpoints: Optional[Any] = None,
+    ):
         """Initialize the Stability API wrapper.
         
         Args:
             api_key: Stability API key. If None, uses environment variable
                     STABILITY_API_KEY or defaults to "try-it-out"
+            cache: Optional persistent cache for immutable lookups.
+            immutable_methods: View methods whose results never change.
+            cache_deploys: Reuse the cached address for an identical deploy.
+            middleware: Ordered hooks run around every call.
+            endpoints: Optional endpoint pool for routing and failover.
         """
         self.api_key = api_key or DEFAULT_API_KEY
+        self.cache = cache
+        self.immutable_methods = frozenset(immutable_methods)
+        self.cache_deploys = cache_deploys
+        self.middleware: List[Any] = list(middleware)
+        self.endpoints = endpoints
         
         # Validate API key
         if not self.api_key:
@@ -85,10 +192,54 @@ class StabilityAPIWrapper:
                 "or set STABILITY_API_KEY environment variable"
             )
     
+    def use(self, middleware: Any, index: Optional[int] = None) -> Any:
+        """Add ``middleware`` to the hook chain (last, or at ``index``) and return it."""
+        if index is None:
+            self.middleware.append(middleware)
+        else:
+            self.middleware.insert(index, middleware)
+        return middleware
+    
+    def _hooks(self, name: str, reverse: bool = False) -> List[Any]:
+        items = reversed(self.middleware) if reverse else self.middleware
+        return [hook for hook in (getattr(item, name, None) for item in items) if callable(hook)]
+    
+    def _dispatch(
+        self,
+        kind: str,
+        payload: dict,
+        handler: Optional[Callable[[dict, Callable[[dict], str]], str]] = None,
+    ) -> str:
+        """Run ``handler(payload, post)`` (by default just ``post(payload)``) inside the middleware."""
+        handler = handler or (lambda payload, post: post(payload))
+        routing = {"endpoints": self.endpoints, "failover": kind == "call_contract_read"}
+        if not self.middleware:
+            return handler(payload, lambda payload: _post_request(payload, self.api_key, **routing))
+        request = _Request(payload, self.api_key, dict(HEADERS), kind)
+        for hook in self._hooks("before_send"):
+            hook(request)
+        
+        def on_error(error: Exception) -> Optional[str]:
+            for hook in self._hooks("on_error", reverse=True):
+                recovered = hook(request, error)
+                if recovered is not None:
+                    return recovered
+            return None
+        
+        result = handler(
+            request.payload,
+            lambda payload: _post_request(payload, request.api_key, request.headers, on_error, **routing),
+        )
+        for hook in self._hooks("after_receive", reverse=True):
+            replaced = hook(request, result)
+            if replaced is not None:
+                result = replaced
+        return result
+    
     def post_zkt_v1(self, arguments: str) -> str:
         """Send a simple string message to the blockchain."""
         payload = {"arguments": arguments}
-        return _post_request(payload, self.api_key)
+        return self._dispatch("post_zkt_v1", payload)
     
     def call_contract_read(
         self,
@@ -106,7 +257,19 @@ class StabilityAPIWrapper:
             "arguments": arguments,
             "id": id,
         }
-        return _post_request(payload, self.api_key)
+        return self._dispatch("call_contract_read", payload, self._cached_read)
+    
+    def _cached_read(self, payload: dict, post: Callable[[dict], str]) -> str:
+        if self.cache is None or not _is_immutable_read(payload["abi"], payload["method"], self.immutable_methods):
+            return post(payload)
+        key = _cache_key("call_contract_read", payload)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        result = post(payload)
+        if _is_cacheable_response(result):
+            self.cache.set(key, result)
+        return result
     
     def call_contract_write(
         self,
@@ -126,7 +289,7 @@ class StabilityAPIWrapper:
             "id": id,
             "wait": wait,
         }
-        return _post_request(payload, self.api_key)
+        return self._dispatch("call_contract_write", payload)
     
     def deploy_contract(
         self,
@@ -142,4 +305,16 @@ class StabilityAPIWrapper:
             "wait": wait,
             "id": id,
         }
-        return _post_request(payload, self.api_key) 
\ No newline at end of file
+        return self._dispatch("deploy_contract", payload, self._cached_deploy)
+    
+    def _cached_deploy(self, payload: dict, post: Callable[[dict], str]) -> str:
+        if self.cache is None or not self.cache_deploys:
+            return post(payload)
+        key = _cache_key("deploy_contract", payload)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        result = post(payload)
+        if _is_cacheable_response(result, require_address=True):
+            self.cache.set(key, result)
+        return result
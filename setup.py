@@ -39,7 +39,27 @@ setup(
         "Topic :: Scientific/Engineering :: Artificial Intelligence",
     ],
     keywords="langchain blockchain stability zkt web3 ai agents",
-    py_modules=["stability_toolkit"],
+    py_modules=[
+        "stability_toolkit",
+        "stability_transport",
+        "stability_multicall",
+        "stability_ledger",
+        "stability_cache",
+        "stability_ratelimit",
+        "stability_validation",
+        "stability_idempotency",
+        "stability_scheduler",
+        "stability_compression",
+        "stability_ingest",
+        "stability_snapshot",
+        "stability_concurrency",
+        "stability_hedging",
+        "stability_middleware",
+        "stability_cassette",
+        "stability_watch",
+        "stability_endpoints",
+        "stability_merkle",
+    ],
     python_requires=">=3.9",
     install_requires=[
         "requests>=2.25.0",
@@ -57,6 +77,24 @@ setup(
         "langchain": [
             "langchain-openai>=0.1.0",
         ],
+        "http2": [
+            "httpx[http2]>=0.24.0",
+        ],
+        "zstd": [
+            "zstandard>=0.21.0",
+        ],
+        "snapshot": [
+            "pyarrow>=12.0.0",
+        ],
+        "multicall": [
+            "eth-abi>=4.0.0",
+            "eth-hash[pycryptodome]>=0.5.0",
+        ],
+    },
+    entry_points={
+        "console_scripts": [
+            "stbl-ingest=stability_ingest:main",
+        ],
     },
     project_urls={
         "Bug Tracker": "https://github.com/nuljui/stability-toolkit/issues",
@@ -3,34 +3,48 @@
 Stability MCP Script
 
 A simple MCP script that provides Stability blockchain tools to AI agents.
-Can be executed directly by MCP clients like Claude Desktop.
+Can be executed directly by MCP clients like Claude Desktop (stdio), or run
+as a long-lived HTTP server that many clients share:
+
+    python stability_mcp.py --transport http --port 8000
 """
 
+import argparse
 import asyncio
+import contextlib
+import json
 import sys
 import os
 import logging
-from typing import Any, Dict
+import weakref
+from typing import Any, Dict, List, Optional
 
 # Add parent directory to path to import existing toolkit
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
     from mcp.server import Server
+    from mcp.server.sse import SseServerTransport
     from mcp.server.stdio import stdio_server
+    from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
     from mcp.types import (
         Tool, 
         TextContent, 
         CallToolResult,
         ListToolsResult,
     )
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse, Response
+    from starlette.routing import Mount, Route
 except ImportError:
     print("❌ MCP not installed. Run: pip install model-context-protocol")
     sys.exit(1)
 
 # Import the existing stability toolkit
 try:
-    from stability_toolkit import StabilityToolkit
+    from stability_toolkit import StabilityToolkit, ZKTClient, ClientMetrics, get_rate_limiter
+    from stability_cache import DiskCache
+    from stability_idempotency import IdempotencyStore, SQLiteIdempotencyStore
 except ImportError:
     print("❌ Stability toolkit not found. Make sure stability_toolkit.py is in parent directory")
     sys.exit(1)
@@ -43,13 +57,81 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Standard JSON-RPC endpoint, used to poll for transaction receipts
+RPC_URL_TEMPLATE = os.getenv("STABILITY_RPC_URL_TEMPLATE", "https://rpc.stabilityprotocol.com/zgt/{}")
+
+# Progress stages for writes and deploys: submitting, hash known, confirmed
+PROGRESS_STAGES = 2
+DEFAULT_CONFIRMATION_TIMEOUT = 120.0
+CONFIRMATION_POLL_INTERVAL = 2.0
+
+# Per-call deadline (overridable per call with "timeout_seconds") and the
+# number of tool calls allowed to hold network resources at once
+DEFAULT_CALL_TIMEOUT = float(os.getenv("STABILITY_MCP_CALL_TIMEOUT", "300"))
+MAX_CONCURRENT_CALLS = int(os.getenv("STABILITY_MCP_MAX_CONCURRENCY", "8"))
+
+# Tool calls one MCP client (session) may run at once; over HTTP many clients
+# share the server-wide slots, so this keeps one busy client from taking them all
+MAX_CONCURRENT_CALLS_PER_CLIENT = int(
+    os.getenv("STABILITY_MCP_MAX_CONCURRENCY_PER_CLIENT", str(MAX_CONCURRENT_CALLS))
+)
+
+# "stdio" (one client per process) or "http" (streamable HTTP at /mcp and
+# SSE at /sse, shared by every client); overridable with --transport
+SERVER_TRANSPORT = os.getenv("STABILITY_MCP_SERVER_TRANSPORT", "stdio")
+HTTP_HOST = os.getenv("STABILITY_MCP_HOST", "127.0.0.1")
+HTTP_PORT = int(os.getenv("STABILITY_MCP_PORT", "8000"))
+
+# Upper bounds for read_contracts_batch
+MAX_BATCH_READS = int(os.getenv("STABILITY_MCP_MAX_BATCH_READS", "100"))
+BATCH_READ_CONCURRENCY = int(os.getenv("STABILITY_MCP_BATCH_READ_CONCURRENCY", "8"))
+
+# httpx requests are cancellable, so a cancelled call closes its connection
+# instead of finishing in a background thread
+MCP_TRANSPORT = os.getenv("STABILITY_MCP_TRANSPORT", "httpx")
+
 # Initialize the MCP server
 app = Server("stability-mcp")
 
-# Create the toolkit instance
-toolkit = StabilityToolkit()
+# Optional on-disk cache shared by every server process on the host; read/write
+# limits are shared the same way through STABILITY_RATE_LIMIT_PATH
+CACHE_PATH = os.getenv("STABILITY_CACHE_PATH")
+
+# MCP clients retry after timeouts: a write resent with the same idempotency_key
+# returns the first result (marked "replayed"). Identical writes without a key
+# are sent again, since calling increment() twice is a legitimate repeat. Set
+# STABILITY_IDEMPOTENCY_PATH to share the store across processes and restarts
+IDEMPOTENCY_PATH = os.getenv("STABILITY_IDEMPOTENCY_PATH")
+
+# Create the pooled client the handlers share, and the toolkit around it
+client = ZKTClient(
+    transport=MCP_TRANSPORT,
+    cache=DiskCache(CACHE_PATH) if CACHE_PATH else None,
+    idempotency=SQLiteIdempotencyStore(IDEMPOTENCY_PATH) if IDEMPOTENCY_PATH else IdempotencyStore(),
+    derive_idempotency_keys=False,
+)
+toolkit = StabilityToolkit(client=client)
 stability_tools = toolkit.get_tools()
 
+metrics = ClientMetrics()
+# Shared slots, created inside each running loop: on Python 3.9 a semaphore made
+# at import time is bound to a different loop than the server's
+loop_call_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+# Per-session slots, dropped with the session; calls outside a session share one set
+session_slots: "weakref.WeakKeyDictionary[Any, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+default_session_slots: Optional[asyncio.Semaphore] = None
+
+TIMEOUT_PROPERTY = {
+    "type": "number",
+    "description": f"Deadline for the whole call in seconds (default: {int(DEFAULT_CALL_TIMEOUT)})"
+}
+
+IDEMPOTENCY_PROPERTY = {
+    "type": "string",
+    "description": "Optional key; send the same key when retrying and the original result is returned instead of a second transaction"
+}
+
 @app.list_tools()
 async def list_tools() -> ListToolsResult:
     """List available Stability tools."""
@@ -64,7 +146,9 @@ async def list_tools() -> ListToolsResult:
                         "message": {
                             "type": "string",
                             "description": "The message to post to the blockchain"
-                        }
+                        },
+                        "idempotency_key": IDEMPOTENCY_PROPERTY,
+                        "timeout_seconds": TIMEOUT_PROPERTY
                     },
                     "required": ["message"]
                 }
@@ -83,14 +167,54 @@ async def list_tools() -> ListToolsResult:
                             "type": "string",
                             "description": "The method name to call"
                         },
+                        "method_args": {
+                            "type": "string",
+                            "description": "Arguments for the method call as a JSON array (optional)"
+                        },
                         "abi": {
                             "type": "string",
                             "description": "Contract ABI (optional - will use default if not provided)"
-                        }
+                        },
+                        "timeout_seconds": TIMEOUT_PROPERTY
                     },
                     "required": ["contract_address", "method_name"]
                 }
             ),
+            Tool(
+                name="read_contracts_batch",
+                description="Read many contract values from Stability blockchain in one call",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "reads": {
+                            "type": "array",
+                            "description": f"Read specs, executed concurrently (max {MAX_BATCH_READS})",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "contract_address": {"type": "string"},
+                                    "method_name": {"type": "string"},
+                                    "method_args": {
+                                        "type": ["string", "array"],
+                                        "description": "Arguments as a JSON array (optional)"
+                                    },
+                                    "abi": {
+                                        "type": ["string", "array"],
+                                        "description": "Contract ABI (optional)"
+                                    }
+                                },
+                                "required": ["contract_address", "method_name"]
+                            }
+                        },
+                        "max_concurrency": {
+                            "type": "integer",
+                            "description": f"Reads in flight at once (default and max: {BATCH_READ_CONCURRENCY})"
+                        },
+                        "timeout_seconds": TIMEOUT_PROPERTY
+                    },
+                    "required": ["reads"]
+                }
+            ),
             Tool(
                 name="write_contract",
                 description="Write data to a smart contract on Stability blockchain",
@@ -112,7 +236,17 @@ async def list_tools() -> ListToolsResult:
                         "abi": {
                             "type": "string",
                             "description": "Contract ABI (optional - will use default if not provided)"
-                        }
+                        },
+                        "wait_for_confirmation": {
+                            "type": "boolean",
+                            "description": "Wait for the transaction to be mined (default: return as soon as the hash is known)"
+                        },
+                        "confirmation_timeout": {
+                            "type": "number",
+                            "description": "Seconds to wait for confirmation (default: 120)"
+                        },
+                        "idempotency_key": IDEMPOTENCY_PROPERTY,
+                        "timeout_seconds": TIMEOUT_PROPERTY
                     },
                     "required": ["contract_address", "method_name", "method_args"]
                 }
@@ -130,36 +264,79 @@ async def list_tools() -> ListToolsResult:
                         "constructor_args": {
                             "type": "string",
                             "description": "Constructor arguments (optional)"
-                        }
+                        },
+                        "wait_for_confirmation": {
+                            "type": "boolean",
+                            "description": "Wait for the deployment to be mined (default: return as soon as the hash is known)"
+                        },
+                        "confirmation_timeout": {
+                            "type": "number",
+                            "description": "Seconds to wait for confirmation (default: 120)"
+                        },
+                        "idempotency_key": IDEMPOTENCY_PROPERTY,
+                        "timeout_seconds": TIMEOUT_PROPERTY
                     },
                     "required": ["solidity_code"]
                 }
+            ),
+            Tool(
+                name="server_metrics",
+                description="Report call, cancellation and timeout counters for this MCP server",
+                inputSchema={
+                    "type": "object",
+                    "properties": {}
+                }
             )
         ]
     )
 
 @app.call_tool()
 async def call_tool(name: str, arguments: Dict[str, Any]) -> CallToolResult:
-    """Handle tool calls from MCP clients."""
+    """Handle tool calls from MCP clients.
+
+    Each call holds a concurrency slot and runs under a deadline. When the
+    client cancels the request (or the deadline passes) the in-flight HTTP
+    request is aborted and the slot is released immediately.
+    """
     logger.info(f"Tool called: {name} with arguments: {arguments}")
-    
+
+    if name == "server_metrics":
+        return await handle_server_metrics(arguments)
+
+    metrics.incr("calls")
     try:
-        if name == "post_message":
-            return await handle_post_message(arguments)
-        elif name == "read_contract":
-            return await handle_read_contract(arguments)
-        elif name == "write_contract":
-            return await handle_write_contract(arguments)
-        elif name == "deploy_contract":
-            return await handle_deploy_contract(arguments)
-        else:
-            return CallToolResult(
-                content=[TextContent(
-                    type="text",
-                    text=f"❌ Unknown tool: {name}"
-                )]
-            )
+        timeout = float(arguments.get("timeout_seconds") or DEFAULT_CALL_TIMEOUT)
+    except (TypeError, ValueError):
+        metrics.incr("errors")
+        return CallToolResult(
+            content=[TextContent(
+                type="text",
+                text=f"❌ Error: timeout_seconds must be a number, got {arguments.get('timeout_seconds')!r}"
+            )]
+        )
+    try:
+        # The client's own slot first, so a client waiting on its limit holds no shared slot
+        async with client_slots(), call_slots():
+            metrics.incr("in_flight")
+            try:
+                return await asyncio.wait_for(dispatch_tool(name, arguments), timeout)
+            finally:
+                metrics.incr("in_flight", -1)
+    except asyncio.TimeoutError:
+        metrics.incr("timeouts")
+        logger.warning(f"Tool {name} exceeded its {timeout}s deadline")
+        return CallToolResult(
+            content=[TextContent(
+                type="text",
+                text=f"❌ Error: '{name}' timed out after {timeout:g}s"
+            )]
+        )
+    except asyncio.CancelledError:
+        metrics.incr("cancelled")
+        logger.info(f"Tool {name} cancelled by client")
+        raise
     except Exception as e:
+        metrics.incr("errors")
         logger.error(f"Error in tool {name}: {str(e)}")
         return CallToolResult(
             content=[TextContent(
@@ -168,6 +345,69 @@ async def call_tool(name: str, arguments: Dict[str, Any]) -> CallToolResult:
             )]
         )
 
+def call_slots() -> asyncio.Semaphore:
+    """Concurrency slots shared by every call on the running loop."""
+    loop = asyncio.get_running_loop()
+    slots = loop_call_slots.get(loop)
+    if slots is None:
+        slots = loop_call_slots[loop] = asyncio.Semaphore(MAX_CONCURRENT_CALLS)
+    return slots
+
+def client_slots() -> asyncio.Semaphore:
+    """Concurrency slots of the MCP client session making the current call."""
+    global default_session_slots
+    try:
+        session = app.request_context.session
+    except LookupError:
+        session = None
+    if session is None:
+        if default_session_slots is None:
+            default_session_slots = asyncio.Semaphore(MAX_CONCURRENT_CALLS_PER_CLIENT)
+        return default_session_slots
+    slots = session_slots.get(session)
+    if slots is None:
+        slots = session_slots[session] = asyncio.Semaphore(MAX_CONCURRENT_CALLS_PER_CLIENT)
+    return slots
+
+async def dispatch_tool(name: str, arguments: Dict[str, Any]) -> CallToolResult:
+    """Route a tool call to its handler."""
+    if name == "post_message":
+        return await handle_post_message(arguments)
+    elif name == "read_contract":
+        return await handle_read_contract(arguments)
+    elif name == "read_contracts_batch":
+        return await handle_read_contracts_batch(arguments)
+    elif name == "write_contract":
+        return await handle_write_contract(arguments)
+    elif name == "deploy_contract":
+        return await handle_deploy_contract(arguments)
+    else:
+        return CallToolResult(
+            content=[TextContent(
+                type="text",
+                text=f"❌ Unknown tool: {name}"
+            )]
+        )
+
+async def handle_server_metrics(args: Dict[str, Any]) -> CallToolResult:
+    """Report server and client counters."""
+    report = {
+        "server": metrics.snapshot(),
+        "client": client.metrics.snapshot(),
+        "max_concurrent_calls": MAX_CONCURRENT_CALLS,
+        "max_concurrent_calls_per_client": MAX_CONCURRENT_CALLS_PER_CLIENT,
+        "clients": len(session_slots),
+    }
+    limiter = client.rate_limiter or get_rate_limiter()
+    if limiter is not None:
+        report["rate_limit"] = limiter.status(client.api_key)
+    return CallToolResult(
+        content=[TextContent(
+            type="text",
+            text=json.dumps(report, indent=2)
+        )]
+    )
+
 async def handle_post_message(args: Dict[str, Any]) -> CallToolResult:
     """Handle posting a message to the blockchain."""
     message = args.get("message")
@@ -179,11 +419,8 @@ async def handle_post_message(args: Dict[str, Any]) -> CallToolResult:
             )]
         )
     
-    # Find the write tool (first one should be StabilityWriteTool)
-    write_tool = stability_tools[0]
-    
     try:
-        result = write_tool.invoke({"message": message})
+        result = await client.apost({"arguments": message}, idempotency_key=args.get("idempotency_key"))
         return CallToolResult(
             content=[TextContent(
                 type="text",
@@ -202,7 +439,6 @@ async def handle_read_contract(args: Dict[str, Any]) -> CallToolResult:
     """Handle reading from a contract."""
     contract_address = args.get("contract_address")
     method_name = args.get("method_name")
-    abi = args.get("abi", "")
     
     if not contract_address or not method_name:
         return CallToolResult(
@@ -212,41 +448,210 @@ async def handle_read_contract(args: Dict[str, Any]) -> CallToolResult:
             )]
         )
     
-    # Find the read tool
-    read_tool = None
-    for tool in stability_tools:
-        if "read" in tool.name.lower():
-            read_tool = tool
-            break
-    
-    if not read_tool:
+    try:
+        result = await client.apost(_read_payload(args))
         return CallToolResult(
             content=[TextContent(
                 type="text",
-                text="❌ Error: Read tool not found"
+                text=f"✅ Contract read successful!\n\n{result}"
             )]
         )
-    
+    except Exception as e:
+        return CallToolResult(
+            content=[TextContent(
+                type="text",
+                text=f"❌ Failed to read contract: {str(e)}"
+            )]
+        )
+
+async def handle_read_contracts_batch(args: Dict[str, Any]) -> CallToolResult:
+    """Handle many contract reads in one round trip.
+
+    Reads run concurrently (bounded by ``max_concurrency``) and the result is
+    a compact JSON array in input order; one failed read does not fail the batch.
+    """
+    reads = args.get("reads") or []
+    if not reads:
+        return CallToolResult(
+            content=[TextContent(
+                type="text",
+                text="❌ Error: 'reads' must contain at least one read"
+            )]
+        )
+    if len(reads) > MAX_BATCH_READS:
+        return CallToolResult(
+            content=[TextContent(
+                type="text",
+                text=f"❌ Error: at most {MAX_BATCH_READS} reads per batch (got {len(reads)})"
+            )]
+        )
+    for index, read in enumerate(reads):
+        if not read.get("contract_address") or not read.get("method_name"):
+            return CallToolResult(
+                content=[TextContent(
+                    type="text",
+                    text=f"❌ Error: read {index} needs 'contract_address' and 'method_name'"
+                )]
+            )
+
+    limit = min(int(args.get("max_concurrency") or BATCH_READ_CONCURRENCY), BATCH_READ_CONCURRENCY)
+    calls = [_read_payload(read, index) for index, read in enumerate(reads)]
+    responses = await client.aread_many(calls, max_concurrency=max(limit, 1))
+
+    results = []
+    for response in responses:
+        if response.startswith("Error:"):
+            results.append({"ok": False, "error": response[len("Error:"):].strip()})
+            continue
+        try:
+            data = json.loads(response)
+        except ValueError:
+            results.append({"ok": True, "result": response})
+            continue
+        if isinstance(data, dict) and data.get("success") is False:
+            results.append({"ok": False, "error": data.get("error") or data})
+        else:
+            results.append({"ok": True, "result": data})
+
+    return CallToolResult(
+        content=[TextContent(
+            type="text",
+            text=json.dumps(results, separators=(",", ":"))
+        )]
+    )
+
+def _read_payload(args: Dict[str, Any], id: int = 1) -> Dict[str, Any]:
+    """Build a ZKT read payload from MCP read arguments."""
+    return {
+        "to": args.get("contract_address"),
+        "abi": _parse_list_arg(args.get("abi")),
+        "method": args.get("method_name"),
+        "arguments": _parse_list_arg(args.get("method_args")),
+        "id": id,
+    }
+
+def _parse_list_arg(value: Any) -> List[Any]:
+    """Parse a tool argument that may be a JSON array string, a list or a scalar."""
+    if value is None or value == "":
+        return []
+    if isinstance(value, list):
+        return value
+    if isinstance(value, str):
+        try:
+            parsed = json.loads(value)
+        except ValueError:
+            return [value]
+        return parsed if isinstance(parsed, list) else [parsed]
+    return [value]
+
+
+def _extract_tx_hash(result: str) -> Optional[str]:
+    """Pull the transaction hash out of a ZKT response, if present."""
+    try:
+        data = json.loads(result)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(data, dict):
+        return None
+    return data.get("hash") or data.get("transactionHash") or data.get("txHash")
+
+
+async def report_progress(progress: float, total: Optional[float], message: str) -> None:
+    """Send an MCP progress notification if the client asked for one."""
     try:
-        result = read_tool.invoke({
-            "contract_address": contract_address,
-            "method_name": method_name,
-            "abi": abi
-        })
+        ctx = app.request_context
+    except LookupError:
+        return
+    token = ctx.meta.progressToken if ctx.meta else None
+    if token is None:
+        return
+    await ctx.session.send_progress_notification(
+        token, progress, total, message, related_request_id=ctx.request_id
+    )
+
+
+async def _fetch_receipt(tx_hash: str) -> Optional[Dict[str, Any]]:
+    """Fetch a transaction receipt over JSON-RPC; None while pending or unreadable."""
+    payload = {
+        "jsonrpc": "2.0",
+        "method": "eth_getTransactionReceipt",
+        "params": [tx_hash],
+        "id": 1,
+    }
+    # Goes through the client so polls share its rate limit, slots and metrics
+    text = await client.arpc(RPC_URL_TEMPLATE.format(client.api_key), payload)
+    try:
+        body = json.loads(text)
+    except ValueError:
+        # "Error: ..." text or a non-JSON gateway page; try again next poll
+        return None
+    return body.get("result") if isinstance(body, dict) else None
+
+
+async def wait_for_confirmation(tx_hash: str, timeout: float) -> Optional[Dict[str, Any]]:
+    """Poll for a receipt, reporting progress between stage 1 and 2."""
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    while True:
+        receipt = await _fetch_receipt(tx_hash)
+        if receipt:
+            return receipt
+        elapsed = loop.time() - started
+        if elapsed >= timeout:
+            return None
+        await report_progress(
+            1 + min(elapsed / timeout, 0.99),
+            PROGRESS_STAGES,
+            f"Waiting for confirmation of {tx_hash} ({int(elapsed)}s)",
+        )
+        await asyncio.sleep(CONFIRMATION_POLL_INTERVAL)
+
+
+async def submit_transaction(payload: Dict[str, Any], args: Dict[str, Any], label: str) -> CallToolResult:
+    """Submit a write or deploy and stream its status as progress notifications.
+
+    The transaction is sent with ``wait=False`` so the hash comes back as soon
+    as the API accepts it. Confirmation is only awaited when the caller sets
+    ``wait_for_confirmation``; otherwise the call returns with the hash.
+    """
+    await report_progress(0, PROGRESS_STAGES, f"Submitting {label}")
+    result = await client.apost(dict(payload, wait=False, id=1), idempotency_key=args.get("idempotency_key"))
+
+    tx_hash = _extract_tx_hash(result)
+    if not tx_hash:
         return CallToolResult(
             content=[TextContent(
                 type="text",
-                text=f"✅ Contract read successful!\n\n{result}"
+                text=f"❌ Failed to submit {label}: {result}"
             )]
         )
-    except Exception as e:
+    await report_progress(1, PROGRESS_STAGES, f"Transaction hash: {tx_hash}")
+
+    if not args.get("wait_for_confirmation"):
         return CallToolResult(
             content=[TextContent(
                 type="text",
-                text=f"❌ Failed to read contract: {str(e)}"
+                text=f"✅ {label.capitalize()} submitted!\n\nTransaction hash: {tx_hash}\nStatus: pending\n\n{result}"
             )]
         )
 
+    timeout = float(args.get("confirmation_timeout", DEFAULT_CONFIRMATION_TIMEOUT))
+    receipt = await wait_for_confirmation(tx_hash, timeout)
+    if receipt is None:
+        return CallToolResult(
+            content=[TextContent(
+                type="text",
+                text=f"⏳ {label.capitalize()} not confirmed after {int(timeout)}s\n\nTransaction hash: {tx_hash}\nStatus: pending"
+            )]
+        )
+    await report_progress(PROGRESS_STAGES, PROGRESS_STAGES, f"Transaction {tx_hash} confirmed")
+    return CallToolResult(
+        content=[TextContent(
+            type="text",
+            text=f"✅ {label.capitalize()} confirmed!\n\nTransaction hash: {tx_hash}\nStatus: confirmed\n\n{json.dumps(receipt)}"
+        )]
+    )
+
 async def handle_write_contract(args: Dict[str, Any]) -> CallToolResult:
     """Handle writing to a contract."""
     contract_address = args.get("contract_address")
@@ -262,33 +667,16 @@ async def handle_write_contract(args: Dict[str, Any]) -> CallToolResult:
             )]
         )
     
-    # Find the write contract tool
-    write_tool = None
-    for tool in stability_tools:
-        if "write" in tool.name.lower() and "contract" in tool.name.lower():
-            write_tool = tool
-            break
-    
-    if not write_tool:
-        return CallToolResult(
-            content=[TextContent(
-                type="text",
-                text="❌ Error: Write contract tool not found"
-            )]
-        )
-    
     try:
-        result = write_tool.invoke({
-            "contract_address": contract_address,
-            "method_name": method_name,
-            "method_args": method_args,
-            "abi": abi
-        })
-        return CallToolResult(
-            content=[TextContent(
-                type="text",
-                text=f"✅ Contract write successful!\n\n{result}"
-            )]
+        return await submit_transaction(
+            {
+                "to": contract_address,
+                "abi": _parse_list_arg(abi),
+                "method": method_name,
+                "arguments": _parse_list_arg(method_args),
+            },
+            args,
+            "contract write",
         )
     except Exception as e:
         return CallToolResult(
@@ -311,31 +699,14 @@ async def handle_deploy_contract(args: Dict[str, Any]) -> CallToolResult:
             )]
         )
     
-    # Find the deploy tool
-    deploy_tool = None
-    for tool in stability_tools:
-        if "deploy" in tool.name.lower():
-            deploy_tool = tool
-            break
-    
-    if not deploy_tool:
-        return CallToolResult(
-            content=[TextContent(
-                type="text",
-                text="❌ Error: Deploy tool not found"
-            )]
-        )
-    
     try:
-        result = deploy_tool.invoke({
-            "solidity_code": solidity_code,
-            "constructor_args": constructor_args
-        })
-        return CallToolResult(
-            content=[TextContent(
-                type="text",
-                text=f"✅ Contract deployed successfully!\n\n{result}"
-            )]
+        return await submit_transaction(
+            {
+                "code": solidity_code,
+                "arguments": _parse_list_arg(constructor_args),
+            },
+            args,
+            "contract deployment",
         )
     except Exception as e:
         return CallToolResult(
@@ -345,8 +716,72 @@ async def handle_deploy_contract(args: Dict[str, Any]) -> CallToolResult:
             )]
         )
 
-async def main():
+class StreamableHTTPApp:
+    """ASGI endpoint handing ``/mcp`` requests to the session manager."""
+
+    def __init__(self, session_manager: StreamableHTTPSessionManager):
+        self.session_manager = session_manager
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.session_manager.handle_request(scope, receive, send)
+
+def create_http_app(json_response: bool = False) -> Starlette:
+    """ASGI app serving MCP to many clients from this process.
+
+    Streamable HTTP is served at ``/mcp`` and the older SSE transport at
+    ``/sse`` (messages posted to ``/messages/``); ``/health`` returns the
+    server metrics. Every client shares the module's toolkit, connection
+    pool, cache and idempotency store.
+    """
+    session_manager = StreamableHTTPSessionManager(app=app, json_response=json_response)
+    sse = SseServerTransport("/messages/")
+
+    async def handle_sse(request):
+        async with sse.connect_sse(request.scope, request.receive, request._send) as streams:
+            await app.run(streams[0], streams[1], app.create_initialization_options())
+        return Response()
+
+    async def handle_health(request):
+        return JSONResponse({"status": "ok", "server": metrics.snapshot(), "clients": len(session_slots)})
+
+    @contextlib.asynccontextmanager
+    async def lifespan(_app):
+        async with session_manager.run():
+            yield
+
+    return Starlette(
+        routes=[
+            Route("/mcp", endpoint=StreamableHTTPApp(session_manager), methods=["GET", "POST", "DELETE"]),
+            Route("/sse", endpoint=handle_sse, methods=["GET"]),
+            Mount("/messages/", app=sse.handle_post_message),
+            Route("/health", endpoint=handle_health, methods=["GET"]),
+        ],
+        lifespan=lifespan,
+    )
+
+async def serve_http(host: str = HTTP_HOST, port: int = HTTP_PORT) -> None:
+    """Run the shared HTTP server until interrupted."""
+    try:
+        import uvicorn
+    except ImportError:
+        print("❌ uvicorn not installed. Run: pip install uvicorn")
+        sys.exit(1)
+    logger.info(f"🌐 Serving MCP on http://{host}:{port}/mcp (SSE: /sse)")
+    config = uvicorn.Config(create_http_app(), host=host, port=port, log_level="info")
+    await uvicorn.Server(config).serve()
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Stability MCP server")
+    parser.add_argument("--transport", choices=["stdio", "http"], default=SERVER_TRANSPORT,
+                        help="stdio for a single client, http to share one process between many")
+    parser.add_argument("--host", default=HTTP_HOST, help="HTTP bind address")
+    parser.add_argument("--port", type=int, default=HTTP_PORT, help="HTTP port")
+    return parser.parse_args(argv)
+
+async def main(argv: Optional[List[str]] = None):
     """Main entry point for the MCP server."""
+    options = parse_args(argv)
+
     # Check for API key
     api_key = os.getenv("STABILITY_API_KEY")
     if not api_key:
@@ -356,6 +791,10 @@ async def main():
     
     logger.info("🚀 Starting Stability MCP script")
     
+    if options.transport == "http":
+        await serve_http(options.host, options.port)
+        return
+    
     # Run the server with stdio transport
     async with stdio_server() as streams:
         await app.run(
@@ -0,0 +1,201 @@
+# stability_cache.py
+
+"""Persistent, cross-process cache for immutable ZKT lookups."""
+
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+import json
+import sqlite3
+import threading
+import time
+
+__all__ = [
+    "DiskCache",
+    "is_immutable_read",
+]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_cache_accessed_at ON cache (accessed_at);
+"""
+
+# Re-touching a row on every hit would turn reads into cross-process writes
+TOUCH_INTERVAL = 60.0
+
+
+class DiskCache:
+    """SQLite-backed LRU cache shared by every process that opens ``path``.
+
+    Values are strings (ZKT response texts). A bounded in-memory layer serves
+    repeat hits without touching disk and is filled at construction with the
+    most recently used entries, so a restarted process starts warm.
+
+    Args:
+        path: SQLite database file shared between processes.
+        max_bytes: Evict least recently used entries above this total size.
+        max_entries: Optional cap on the number of entries.
+        memory_entries: Size of the in-process layer (also the warm-start count).
+
+    Example:
+        cache = DiskCache("~/.cache/stability/zkt.db")
+        toolkit = StabilityToolkit(cache=cache, immutable_methods={"name", "symbol", "decimals"})
+    """
+
+    def __init__(
+        self,
+        path: str = "stability-cache.db",
+        max_bytes: int = 64 * 1024 * 1024,
+        max_entries: Optional[int] = None,
+        memory_entries: int = 1024,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._touched: Dict[str, float] = {}
+        self._writes_since_evict = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30.0, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._warm_start()
+
+    def _warm_start(self) -> None:
+        rows = self._conn.execute(
+            "SELECT key, value FROM cache ORDER BY accessed_at DESC LIMIT ?",
+            (self.memory_entries,),
+        ).fetchall()
+        with self._lock:
+            for key, value in reversed(rows):
+                self._memory[key] = value
+
+    def _remember(self, key: str, value: str) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value, or None."""
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return value
+            row = self._conn.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, row[0])
+            now = time.time()
+            if now - self._touched.get(key, 0.0) > TOUCH_INTERVAL:
+                self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+                self._touched[key] = now
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        """Store a value and evict old entries if the cache is over its limits."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(key) + len(value.encode("utf-8")), now, now),
+            )
+            self._remember(key, value)
+            self._writes_since_evict += 1
+            if self._writes_since_evict >= 32 or len(value) > self.max_bytes // 64:
+                self._evict()
+
+    def _evict(self) -> None:
+        self._writes_since_evict = 0
+        total, count = self._conn.execute("SELECT COALESCE(SUM(size), 0), COUNT(*) FROM cache").fetchone()
+        if total <= self.max_bytes and (self.max_entries is None or count <= self.max_entries):
+            return
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = self._conn.execute("SELECT key, size FROM cache ORDER BY accessed_at ASC").fetchall()
+            doomed = []
+            for key, size in rows:
+                if total <= self.max_bytes * 0.9 and (self.max_entries is None or count <= self.max_entries):
+                    break
+                doomed.append((key,))
+                total -= size
+                count -= 1
+            self._conn.executemany("DELETE FROM cache WHERE key = ?", doomed)
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        for (key,) in doomed:
+            self._memory.pop(key, None)
+
+    def evict(self) -> None:
+        """Enforce the size limits now."""
+        with self._lock:
+            self._evict()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and on-disk totals."""
+        with self._lock:
+            total, count = self._conn.execute("SELECT COALESCE(SUM(size), 0), COUNT(*) FROM cache").fetchone()
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": count,
+                "bytes": total,
+                "memory_entries": len(self._memory),
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._memory.clear()
+            self._touched.clear()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _abi_entries(abi: Any) -> Iterable[Any]:
+    if isinstance(abi, str):
+        try:
+            abi = json.loads(abi)
+        except ValueError:
+            abi = [abi]
+    return abi if isinstance(abi, list) else []
+
+
+def is_immutable_read(abi: Any, method: str, immutable_methods: Iterable[str] = ()) -> bool:
+    """Whether a read's result can never change.
+
+    True for ``pure`` functions in the ABI and for any method the caller
+    lists in ``immutable_methods`` (e.g. ``name``, ``symbol``, ``decimals``).
+    """
+    if method in immutable_methods:
+        return True
+    for entry in _abi_entries(abi):
+        if isinstance(entry, dict):
+            if entry.get("name") == method and entry.get("stateMutability") == "pure":
+                return True
+        elif isinstance(entry, str):
+            text = entry.strip()
+            if text.startswith("function "):
+                text = text[len("function "):]
+            if text.split("(", 1)[0].strip() == method and " pure" in text.split(")", 1)[-1]:
+                return True
+    return False
@@ -0,0 +1,281 @@
+# stability_cassette.py
+
+"""Record ZKT traffic to cassette files and replay it without the network."""
+
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+
+from stability_compression import _header, decompress
+from stability_transport import TransportResponse, create_transport
+
+__all__ = [
+    "CassetteMiss",
+    "RecordedError",
+    "RecordingTransport",
+    "ReplayTransport",
+    "open_cassette",
+]
+
+SCRUBBED = "<SCRUBBED>"
+
+# ZKT carries the API key as the last path segment: /zkt/<key>
+_KEY_IN_URL = re.compile(r"/zkt/([^/?#]+)")
+
+SENSITIVE_HEADERS = frozenset({"authorization", "proxy-authorization", "cookie", "set-cookie", "x-api-key"})
+
+
+class CassetteMiss(LookupError):
+    """A replayed request has no recording left to answer it."""
+
+
+class RecordedError(ConnectionError):
+    """Replays a transport exception captured while recording."""
+
+    def __init__(self, message: str, error_type: str):
+        super().__init__(message)
+        self.error_type = error_type
+
+
+def _scrub(text: str, secrets: Iterable[str]) -> str:
+    for secret in secrets:
+        if secret:
+            text = text.replace(secret, SCRUBBED)
+    return text
+
+
+def _body(headers: Dict[str, str], content: bytes) -> Any:
+    """Request body as JSON (or text), decompressed if it was sent compressed."""
+    raw = decompress(content, _header(headers, "content-encoding"))
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return raw.decode("utf-8", "replace")
+
+
+def _match_key(url: str, body: Any, ignore: Iterable[str]) -> str:
+    path = _KEY_IN_URL.sub("/zkt/" + SCRUBBED, urlsplit(url).path)
+    if isinstance(body, dict):
+        body = {k: v for k, v in body.items() if k not in ignore}
+    return path + " " + json.dumps(body, sort_keys=True, separators=(",", ":"), default=str)
+
+
+class RecordingTransport:
+    """Wrap a real transport and append every exchange to a JSON-lines cassette.
+
+    Each line holds the request (URL, headers and decoded body), the
+    response (status, headers, text, HTTP version) or the exception raised,
+    and the measured latency. The API key found in the URL, plus any
+    ``secrets``, is replaced by ``<SCRUBBED>`` everywhere it appears, and
+    credential headers are blanked.
+
+    Args:
+        path: Cassette file to write.
+        transport: Transport (or name, see ``create_transport``) that does the real work.
+        secrets: Extra strings to scrub, such as tokens added by middleware.
+        append: Add to an existing cassette instead of starting a new one.
+
+    Example:
+        client = ZKTClient(api_key, transport=RecordingTransport("reads.jsonl", "http2"))
+    """
+
+    def __init__(
+        self,
+        path: str,
+        transport: Any = None,
+        secrets: Iterable[str] = (),
+        append: bool = False,
+        **transport_options: Any,
+    ):
+        self.path = path
+        self.transport = create_transport(transport, **transport_options)
+        self.secrets = tuple(secrets)
+        self.recorded = 0
+        self._lock = threading.Lock()
+        self._file = open(path, "a" if append else "w", encoding="utf-8")
+
+    @property
+    def decodable_encodings(self) -> Optional[Tuple[str, ...]]:
+        return getattr(self.transport, "decodable_encodings", None)
+
+    def _secrets(self, url: str) -> Tuple[str, ...]:
+        match = _KEY_IN_URL.search(urlsplit(url).path)
+        return ((match.group(1),) if match else ()) + self.secrets
+
+    def _write(
+        self, url: str, headers: Dict[str, str], content: bytes, elapsed: float,
+        response: Any = None, error: Optional[BaseException] = None,
+    ) -> None:
+        secrets = self._secrets(url)
+        entry: Dict[str, Any] = {
+            "request": {
+                "method": "POST",
+                "url": _scrub(url, secrets),
+                "headers": {
+                    name: SCRUBBED if name.lower() in SENSITIVE_HEADERS else _scrub(value, secrets)
+                    for name, value in headers.items()
+                },
+                "body": json.loads(_scrub(json.dumps(_body(headers, content)), secrets)),
+            },
+            "elapsed": round(elapsed, 6),
+        }
+        if error is not None:
+            entry["error"] = {"type": type(error).__name__, "message": _scrub(str(error), secrets)}
+        else:
+            entry["response"] = {
+                "status": response.status_code,
+                "headers": {
+                    name: SCRUBBED if name.lower() in SENSITIVE_HEADERS else _scrub(value, secrets)
+                    for name, value in (response.headers or {}).items()
+                },
+                "text": _scrub(response.text, secrets),
+                "http_version": response.http_version,
+            }
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self.recorded += 1
+
+    def post(self, url: str, headers: Dict[str, str], content: bytes) -> Any:
+        started = time.perf_counter()
+        try:
+            response = self.transport.post(url, headers, content)
+        except Exception as e:
+            self._write(url, headers, content, time.perf_counter() - started, error=e)
+            raise
+        self._write(url, headers, content, time.perf_counter() - started, response)
+        return response
+
+    async def apost(self, url: str, headers: Dict[str, str], content: bytes) -> Any:
+        started = time.perf_counter()
+        try:
+            response = await self.transport.apost(url, headers, content)
+        except Exception as e:
+            self._write(url, headers, content, time.perf_counter() - started, error=e)
+            raise
+        self._write(url, headers, content, time.perf_counter() - started, response)
+        return response
+
+    def close(self) -> None:
+        self.transport.close()
+        with self._lock:
+            self._file.close()
+
+    async def aclose(self) -> None:
+        aclose = getattr(self.transport, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+class ReplayTransport:
+    """Serve responses from a cassette, with the recorded latencies, and no network.
+
+    Requests are matched on the URL path (with the key scrubbed) and the
+    decoded body, ignoring the ``ignore`` fields (the JSON-RPC style ``id`` by
+    default). Identical requests get their recordings in order; once those
+    run out they cycle through them again, unless ``repeat`` is False, when
+    ``CassetteMiss`` is raised as for a request that was never recorded.
+    Recorded transport errors are raised again as ``RecordedError``.
+
+    Args:
+        path: Cassette written by ``RecordingTransport``.
+        latency_scale: Multiplier on the recorded latencies; 0 replays instantly.
+        repeat: Cycle through recordings when a request is replayed more often than it was recorded.
+        ignore: Body fields left out of request matching.
+
+    Example:
+        client = ZKTClient("test-key", transport=ReplayTransport("reads.jsonl", latency_scale=0))
+    """
+
+    def __init__(
+        self,
+        path: str,
+        latency_scale: float = 1.0,
+        repeat: bool = True,
+        ignore: Iterable[str] = ("id",),
+    ):
+        self.path = path
+        self.latency_scale = latency_scale
+        self.repeat = repeat
+        self.ignore = frozenset(ignore)
+        self._lock = threading.Lock()
+        self._recordings: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._served: Dict[str, int] = defaultdict(int)
+        self._stats = {"served": 0, "misses": 0}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                request = entry["request"]
+                self._recordings[_match_key(request["url"], request["body"], self.ignore)].append(entry)
+
+    def _next(self, url: str, headers: Dict[str, str], content: bytes) -> Dict[str, Any]:
+        key = _match_key(url, _body(headers, content), self.ignore)
+        with self._lock:
+            recordings = self._recordings.get(key)
+            served = self._served[key]
+            if not recordings or (served >= len(recordings) and not self.repeat):
+                self._stats["misses"] += 1
+                raise CassetteMiss(f"No recording left for POST {key[:200]}")
+            self._served[key] = served + 1
+            self._stats["served"] += 1
+            return recordings[served % len(recordings)]
+
+    @staticmethod
+    def _response(entry: Dict[str, Any]) -> TransportResponse:
+        if "error" in entry:
+            raise RecordedError(entry["error"]["message"], entry["error"]["type"])
+        response = entry["response"]
+        return TransportResponse(
+            response["status"], response["text"], response.get("headers"), response.get("http_version") or "HTTP/1.1"
+        )
+
+    def post(self, url: str, headers: Dict[str, str], content: bytes) -> TransportResponse:
+        entry = self._next(url, headers, content)
+        if self.latency_scale:
+            time.sleep(entry["elapsed"] * self.latency_scale)
+        return self._response(entry)
+
+    async def apost(self, url: str, headers: Dict[str, str], content: bytes) -> TransportResponse:
+        entry = self._next(url, headers, content)
+        if self.latency_scale:
+            await asyncio.sleep(entry["elapsed"] * self.latency_scale)
+        return self._response(entry)
+
+    def stats(self) -> Dict[str, int]:
+        """Requests served and missed, and recordings never replayed."""
+        with self._lock:
+            unused = sum(
+                max(0, len(recordings) - self._served.get(key, 0)) for key, recordings in self._recordings.items()
+            )
+            return dict(self._stats, unused=unused)
+
+    def close(self) -> None:
+        pass
+
+    async def aclose(self) -> None:
+        pass
+
+
+def open_cassette(path: str, mode: str = "auto", transport: Any = None, **options: Any) -> Any:
+    """Transport that records to or replays from ``path``.
+
+    ``mode`` is ``"record"``, ``"replay"``, or ``"auto"`` (replay if the
+    cassette exists, otherwise record through ``transport``). ``options`` go
+    to ``ReplayTransport`` or ``RecordingTransport``.
+    """
+    if mode == "auto":
+        mode = "replay" if os.path.exists(path) else "record"
+    if mode == "replay":
+        return ReplayTransport(path, **options)
+    if mode == "record":
+        return RecordingTransport(path, transport, **options)
+    raise ValueError(f"Unknown cassette mode: {mode!r} (expected 'auto', 'record' or 'replay')")
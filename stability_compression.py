@@ -0,0 +1,196 @@
+# stability_compression.py
+
+"""Negotiated request-body compression for large ZKT payloads."""
+
+from typing import Any, Dict, Iterable, Optional, Tuple
+from urllib.parse import urlsplit
+import gzip
+import threading
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None  # type: ignore
+
+__all__ = [
+    "RequestCompression",
+    "available_encodings",
+    "compress",
+    "decompress",
+]
+
+# Below this many bytes the CPU cost outweighs the bandwidth saved
+DEFAULT_THRESHOLD = 4096
+
+
+def available_encodings() -> Tuple[str, ...]:
+    """Content codings this process can produce and read, best first."""
+    return ("zstd", "gzip") if zstandard is not None else ("gzip",)
+
+
+def compress(content: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """Encode ``content`` with ``encoding`` (``"gzip"`` or ``"zstd"``)."""
+    if encoding == "gzip":
+        return gzip.compress(content, compresslevel=6 if level is None else level, mtime=0)
+    if encoding == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard library is required for zstd compression")
+        return zstandard.ZstdCompressor(level=3 if level is None else level).compress(content)
+    raise ValueError(f"Unsupported content encoding: {encoding!r}")
+
+
+def decompress(content: bytes, encoding: Optional[str]) -> bytes:
+    """Decode a body sent with ``Content-Encoding: encoding``."""
+    encoding = (encoding or "identity").strip().lower()
+    if encoding == "identity":
+        return content
+    if encoding in ("gzip", "x-gzip"):
+        return gzip.decompress(content)
+    if encoding == "deflate":
+        return zlib.decompress(content)
+    if encoding == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard library is required for zstd decompression")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(content)
+    raise ValueError(f"Unsupported content encoding: {encoding!r}")
+
+
+def _parse_accept_encoding(value: str) -> frozenset:
+    """Codings listed in an ``Accept-Encoding`` header, without ``q=0`` entries."""
+    codings = set()
+    for item in value.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        if params.replace(" ", "").lower() in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        codings.add(name)
+    return frozenset(codings)
+
+
+def _header(headers: Dict[str, str], name: str) -> Optional[str]:
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+class RequestCompression:
+    """Compress request bodies an endpoint has said it accepts.
+
+    Endpoints advertise the request codings they accept in an
+    ``Accept-Encoding`` response header (RFC 7694). Until an origin has done
+    so, bodies go out uncompressed, unless ``optimistic`` is set, in which
+    case the preferred coding is tried first. A ``415 Unsupported Media
+    Type`` reply means the coding was refused: the request is resent
+    uncompressed and the origin's advertised list (possibly empty) is
+    remembered. Bodies smaller than ``threshold`` bytes are never compressed.
+
+    Responses are requested with ``Accept-Encoding`` set to the transport's
+    ``decodable_encodings``, the codings it decodes before returning text;
+    transports without that attribute keep their own header.
+
+    Args:
+        encodings: Preferred request codings, best first; codings whose
+            library is not installed (``zstd`` needs ``zstandard``) are dropped.
+        threshold: Smallest body, in bytes, worth compressing.
+        level: Compression level passed to the codec.
+        optimistic: Compress for origins that have not advertised support yet.
+
+    Example:
+        client = ZKTClient(compression=RequestCompression(threshold=8192))
+        client.deploy_contract(large_source, [])
+    """
+
+    def __init__(
+        self,
+        encodings: Iterable[str] = ("zstd", "gzip"),
+        threshold: int = DEFAULT_THRESHOLD,
+        level: Optional[int] = None,
+        optimistic: bool = False,
+    ):
+        supported = available_encodings()
+        self.encodings = tuple(e for e in encodings if e in supported)
+        self.threshold = threshold
+        self.level = level
+        self.optimistic = optimistic
+        self._lock = threading.Lock()
+        self._accepted: Dict[str, frozenset] = {}
+        self._stats = {"compressed": 0, "uncompressed": 0, "bytes_in": 0, "bytes_out": 0, "refused": 0}
+
+    def _choose(self, origin: str, size: int) -> Optional[str]:
+        if size < self.threshold:
+            return None
+        with self._lock:
+            accepted = self._accepted.get(origin)
+        for encoding in self.encodings:
+            if accepted is None and self.optimistic:
+                return encoding
+            if accepted is not None and encoding in accepted:
+                return encoding
+        return None
+
+    def _observe(self, origin: str, response: Any, encoding: Optional[str]) -> bool:
+        """Learn from a response; return True if it must be resent uncompressed."""
+        advertised = _header(response.headers, "accept-encoding")
+        refused = encoding is not None and response.status_code == 415
+        with self._lock:
+            if advertised is not None:
+                self._accepted[origin] = _parse_accept_encoding(advertised)
+            if refused:
+                self._stats["refused"] += 1
+                accepted = self._accepted.get(origin, frozenset())
+                self._accepted[origin] = accepted - {encoding} if advertised is not None else frozenset()
+        return refused
+
+    def _encode(self, transport: Any, url: str, headers: Dict[str, str], content: bytes):
+        origin = urlsplit(url).netloc
+        encoding = self._choose(origin, len(content))
+        headers = dict(headers)
+        decodable = getattr(transport, "decodable_encodings", None)
+        if decodable is not None:
+            headers["Accept-Encoding"] = ", ".join(decodable) or "identity"
+        if encoding is None:
+            return origin, None, headers, content
+        body = compress(content, encoding, self.level)
+        if len(body) >= len(content):
+            return origin, None, headers, content
+        headers["Content-Encoding"] = encoding
+        return origin, encoding, headers, body
+
+    def _count(self, content: bytes, sent: bytes, encoding: Optional[str]) -> None:
+        with self._lock:
+            self._stats["compressed" if encoding else "uncompressed"] += 1
+            self._stats["bytes_in"] += len(content)
+            self._stats["bytes_out"] += len(sent)
+
+    def post(self, transport: Any, url: str, headers: Dict[str, str], content: bytes) -> Any:
+        """Send ``content`` through ``transport``, compressed when the origin accepts it."""
+        origin, encoding, sent_headers, body = self._encode(transport, url, headers, content)
+        response = transport.post(url, sent_headers, body)
+        if self._observe(origin, response, encoding):
+            sent_headers.pop("Content-Encoding")
+            body, encoding = content, None
+            response = transport.post(url, sent_headers, body)
+            self._observe(origin, response, None)
+        self._count(content, body, encoding)
+        return response
+
+    async def apost(self, transport: Any, url: str, headers: Dict[str, str], content: bytes) -> Any:
+        """Async variant of ``post``."""
+        origin, encoding, sent_headers, body = self._encode(transport, url, headers, content)
+        response = await transport.apost(url, sent_headers, body)
+        if self._observe(origin, response, encoding):
+            sent_headers.pop("Content-Encoding")
+            body, encoding = content, None
+            response = await transport.apost(url, sent_headers, body)
+            self._observe(origin, response, None)
+        self._count(content, body, encoding)
+        return response
+
+    def stats(self) -> Dict[str, int]:
+        """Requests sent compressed/uncompressed, bytes before/after, and 415 refusals."""
+        with self._lock:
+            return dict(self._stats)
@@ -0,0 +1,210 @@
+# stability_concurrency.py
+
+"""Adaptive in-flight limits for ZKT requests (AIMD on latency and throttling)."""
+
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Deque, Dict, Iterator, Optional
+import asyncio
+import threading
+import time
+
+__all__ = [
+    "AdaptiveConcurrency",
+    "THROTTLE_STATUS_CODES",
+]
+
+# Responses that mean "slow down" rather than "this request is wrong"
+THROTTLE_STATUS_CODES = frozenset({429, 503})
+
+
+class _Sample:
+    """Outcome of one request, filled in by the caller inside ``slot``."""
+
+    __slots__ = ("throttled",)
+
+    def __init__(self):
+        self.throttled = False
+
+    def observe(self, response: Any) -> None:
+        """Mark the sample throttled if ``response`` carries a throttling status."""
+        self.throttled = getattr(response, "status_code", None) in THROTTLE_STATUS_CODES
+
+
+class _Waiter:
+    """A queued request; ``granted`` and ``cancelled`` change only under the limiter's lock."""
+
+    __slots__ = ("event", "future", "loop", "granted", "cancelled")
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.loop = loop
+        self.future: Optional[asyncio.Future] = loop.create_future() if loop is not None else None
+        self.event: Optional[threading.Event] = None if loop is not None else threading.Event()
+        self.granted = False
+        self.cancelled = False
+
+    def wake(self) -> None:
+        if self.future is not None:
+            self.loop.call_soon_threadsafe(lambda: self.future.done() or self.future.set_result(None))
+        else:
+            self.event.set()
+
+
+class AdaptiveConcurrency:
+    """In-flight limit that grows while the endpoint is healthy and backs off when it is not.
+
+    Additive increase, multiplicative decrease: every successful request
+    made while the limit was fully used raises the limit by ``1/limit`` (one
+    per round of requests). A throttling response (429/503), a transport
+    error, or smoothed latency above ``latency_tolerance`` times the recent
+    minimum multiplies the limit by ``backoff``. Only requests started after
+    the previous decrease can trigger another, so one burst of 429s counts once.
+
+    Args:
+        initial_limit: Starting in-flight limit.
+        min_limit: Lowest the limit may fall.
+        max_limit: Highest the limit may grow.
+        backoff: Factor applied to the limit on congestion.
+        latency_tolerance: Smoothed/minimum latency ratio treated as queueing.
+        window: Recent samples the minimum latency is taken over.
+
+    Example:
+        client = ZKTClient(adaptive_concurrency=AdaptiveConcurrency(max_limit=128))
+        client.read_many(calls)
+        client.metrics.snapshot()["concurrency_limit"]
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        backoff: float = 0.5,
+        latency_tolerance: float = 2.0,
+        window: int = 100,
+    ):
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("Expected 1 <= min_limit <= initial_limit <= max_limit")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self._limit = float(initial_limit)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._waiters: Deque[_Waiter] = deque()
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._smoothed: Optional[float] = None
+        self._last_decrease = 0.0
+        self._stats = {"increases": 0, "decreases": 0, "congested": 0}
+
+    @property
+    def limit(self) -> int:
+        """Current in-flight limit."""
+        return int(self._limit)
+
+    # ---- Admission ----
+
+    def _grant(self) -> None:
+        """Wake waiters while there is room. Caller holds the lock."""
+        while self._waiters and self._in_flight < int(self._limit):
+            waiter = self._waiters.popleft()
+            if waiter.cancelled:
+                continue
+            waiter.granted = True
+            self._in_flight += 1
+            waiter.wake()
+
+    def _enter(self, waiter: _Waiter) -> bool:
+        """Take a slot now, or queue ``waiter`` to be woken with one."""
+        with self._lock:
+            if not self._waiters and self._in_flight < int(self._limit):
+                self._in_flight += 1
+                return True
+            self._waiters.append(waiter)
+            return False
+
+    def _release(self, started: float, sample: Optional[_Sample], failed: bool) -> None:
+        now = time.monotonic()
+        with self._lock:
+            saturated = self._in_flight >= int(self._limit) or bool(self._waiters)
+            self._in_flight -= 1
+            if sample is not None:
+                self._adjust(started, now, sample.throttled or failed, saturated)
+            self._grant()
+
+    def _adjust(self, started: float, now: float, congested: bool, saturated: bool) -> None:
+        latency = now - started
+        if not congested:
+            self._latencies.append(latency)
+            self._smoothed = latency if self._smoothed is None else 0.9 * self._smoothed + 0.1 * latency
+            if len(self._latencies) >= 10 and self._smoothed > min(self._latencies) * self.latency_tolerance:
+                congested = True
+        if congested:
+            self._stats["congested"] += 1
+            if started >= self._last_decrease:
+                self._limit = max(float(self.min_limit), self._limit * self.backoff)
+                self._last_decrease = now
+                # Queueing delay ended with the decrease; measure afresh
+                self._smoothed = None
+                self._stats["decreases"] += 1
+        elif saturated and self._limit < self.max_limit:
+            self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+            self._stats["increases"] += 1
+
+    @contextmanager
+    def slot(self) -> Iterator[_Sample]:
+        """Hold one in-flight slot; call ``sample.observe(response)`` inside."""
+        waiter = _Waiter()
+        if not self._enter(waiter):
+            waiter.event.wait()
+        sample, started = _Sample(), time.monotonic()
+        try:
+            yield sample
+        except Exception:
+            self._release(started, sample, failed=True)
+            raise
+        except BaseException:
+            self._release(started, None, failed=False)
+            raise
+        self._release(started, sample, failed=False)
+
+    @asynccontextmanager
+    async def aslot(self):
+        """Async variant of ``slot``; cancelled waiters leave the queue."""
+        waiter = _Waiter(asyncio.get_running_loop())
+        if not self._enter(waiter):
+            try:
+                await waiter.future
+            except asyncio.CancelledError:
+                # Granted or not is decided under the lock, never by queue membership
+                with self._lock:
+                    granted = waiter.granted
+                    waiter.cancelled = True
+                    if not granted:
+                        self._waiters.remove(waiter)
+                if granted:
+                    self._release(time.monotonic(), None, failed=False)
+                raise
+        sample, started = _Sample(), time.monotonic()
+        try:
+            yield sample
+        except Exception:
+            self._release(started, sample, failed=True)
+            raise
+        except BaseException:
+            self._release(started, None, failed=False)
+            raise
+        self._release(started, sample, failed=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Current limit, in-flight and queued requests, latency and adjustment counts."""
+        with self._lock:
+            return dict(
+                self._stats,
+                limit=int(self._limit),
+                in_flight=self._in_flight,
+                queued=len(self._waiters),
+                min_latency=min(self._latencies) if self._latencies else None,
+                smoothed_latency=self._smoothed,
+            )
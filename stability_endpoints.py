@@ -0,0 +1,324 @@
+# stability_endpoints.py
+
+"""Pool of ZKT endpoints: latency probing, fastest-healthy routing and failover."""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+import threading
+import time
+import urllib.error
+import urllib.request
+import weakref
+
+__all__ = [
+    "DEFAULT_ENDPOINT",
+    "Endpoint",
+    "EndpointPool",
+]
+
+DEFAULT_ENDPOINT = "https://rpc.stabilityprotocol.com/zkt/{}"
+
+# Gateway errors mean the endpoint (not the request) is in trouble
+UNHEALTHY_STATUS_CODES = frozenset({500, 502, 503, 504})
+
+
+def _template(url: str) -> str:
+    """URL template with ``{}`` for the API key; bare hosts get ``/zkt/{}``."""
+    if "{}" in url:
+        return url
+    return url.rstrip("/") + "/zkt/{}"
+
+
+def head_probe(url: str, timeout: float = 5.0) -> float:
+    """Seconds for a ``HEAD /`` round trip to ``url``'s host; raises if it is down.
+
+    Any HTTP answer other than a gateway error counts as reachable.
+    """
+    parts = urlsplit(url)
+    request = urllib.request.Request(f"{parts.scheme}://{parts.netloc}/", method="HEAD")
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout):
+            pass
+    except urllib.error.HTTPError as e:
+        if e.code in UNHEALTHY_STATUS_CODES:
+            raise
+    return time.perf_counter() - started
+
+
+class Endpoint:
+    """One ZKT endpoint and what the pool has learned about it."""
+
+    __slots__ = (
+        "template", "latency", "probe_latency", "failures", "down_until",
+        "requests", "errors", "failovers", "probes", "probe_errors", "last_error",
+    )
+
+    def __init__(self, url: str):
+        self.template = _template(url)
+        self.latency: Optional[float] = None
+        self.probe_latency: Optional[float] = None
+        self.failures = 0
+        self.down_until = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.failovers = 0
+        self.probes = 0
+        self.probe_errors = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        """The endpoint URL without any API key."""
+        return self.template.format("")
+
+    def url(self, api_key: str) -> str:
+        return self.template.format(api_key)
+
+    def healthy(self, now: Optional[float] = None) -> bool:
+        return (now or time.monotonic()) >= self.down_until
+
+    def rank_latency(self) -> float:
+        """Request latency, or probe RTT until a request has been measured."""
+        if self.latency is not None:
+            return self.latency
+        return self.probe_latency if self.probe_latency is not None else float("inf")
+
+    def __repr__(self) -> str:
+        return f"Endpoint({self.name!r})"
+
+
+class EndpointPool:
+    """Route ZKT requests to the fastest healthy endpoint and fail over on errors.
+
+    Real requests and background probes (``HEAD /`` every
+    ``probe_interval`` seconds) keep separate moving averages, since a HEAD
+    round trip says little about how long a ZKT call takes. Requests go to
+    the healthy endpoint with the lowest request latency; endpoints that
+    have not served a request yet are ranked by probe RTT, earlier
+    endpoints in the list win ties and unmeasured ones come last. After
+    ``failure_threshold`` consecutive errors (exceptions or 5xx responses)
+    an endpoint sits out for ``cooldown`` seconds, or until a probe succeeds.
+
+    ``post`` retries a failed request on the next endpoint only when
+    ``failover`` is set; callers pass it for reads, because a write that
+    timed out may still have been submitted. A failed write still marks
+    its endpoint, so the next request goes elsewhere.
+
+    Args:
+        endpoints: URL templates with ``{}`` for the API key, or base URLs
+                (``/zkt/{}`` is appended), e.g. a local stand-in.
+        probe_interval: Seconds between background probes; None disables them.
+        failure_threshold: Consecutive errors before an endpoint is skipped.
+        cooldown: Seconds a failing endpoint is skipped for.
+        smoothing: Weight of the newest latency sample in the moving average.
+        probe: ``probe(url) -> seconds`` raising when the endpoint is down;
+                defaults to ``head_probe``.
+
+    Example:
+        pool = EndpointPool(["https://rpc.stabilityprotocol.com", "http://127.0.0.1:8080"])
+        client = ZKTClient(endpoints=pool)
+        pool.stats()
+    """
+
+    def __init__(
+        self,
+        endpoints: Iterable[str] = (DEFAULT_ENDPOINT,),
+        probe_interval: Optional[float] = 30.0,
+        failure_threshold: int = 2,
+        cooldown: float = 30.0,
+        smoothing: float = 0.3,
+        probe: Optional[Callable[[str], float]] = None,
+    ):
+        self.endpoints = [Endpoint(url) for url in endpoints]
+        if not self.endpoints:
+            raise ValueError("EndpointPool needs at least one endpoint")
+        self.probe_interval = probe_interval
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.smoothing = smoothing
+        self.probe = probe or head_probe
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        if probe_interval:
+            threading.Thread(
+                target=_probe_loop,
+                args=(weakref.ref(self), self._stop, probe_interval),
+                name="stability-endpoint-probe",
+                daemon=True,
+            ).start()
+
+    # ---- Selection ----
+
+    def candidates(self) -> List[Endpoint]:
+        """Endpoints in the order requests should try them."""
+        now = time.monotonic()
+        with self._lock:
+            ranked = sorted(
+                enumerate(self.endpoints),
+                key=lambda item: (
+                    not item[1].healthy(now),
+                    # Down endpoints: the one back soonest first
+                    item[1].down_until if not item[1].healthy(now) else 0.0,
+                    item[1].rank_latency(),
+                    item[0],
+                ),
+            )
+        return [endpoint for _, endpoint in ranked]
+
+    def select(self) -> Endpoint:
+        """The endpoint the next request would use."""
+        return self.candidates()[0]
+
+    # ---- Feedback ----
+
+    def _average(self, current: Optional[float], sample: float) -> float:
+        return sample if current is None else current + self.smoothing * (sample - current)
+
+    def _observe(self, endpoint: Endpoint, latency: float, probe: bool = False) -> None:
+        """Fold a latency sample in and mark the endpoint healthy. Caller holds the lock."""
+        if probe:
+            endpoint.probe_latency = self._average(endpoint.probe_latency, latency)
+        else:
+            endpoint.latency = self._average(endpoint.latency, latency)
+        endpoint.failures = 0
+        endpoint.down_until = 0.0
+
+    def _fail(self, endpoint: Endpoint, error: str) -> None:
+        """Count a failure, taking the endpoint out at the threshold. Caller holds the lock."""
+        endpoint.failures += 1
+        endpoint.last_error = error
+        if endpoint.failures >= self.failure_threshold:
+            endpoint.down_until = time.monotonic() + self.cooldown
+
+    def record_success(self, endpoint: Endpoint, latency: float) -> None:
+        with self._lock:
+            endpoint.requests += 1
+            self._observe(endpoint, latency)
+
+    def record_failure(self, endpoint: Endpoint, error: str) -> None:
+        with self._lock:
+            endpoint.requests += 1
+            endpoint.errors += 1
+            self._fail(endpoint, error)
+
+    def _failed(self, response: Any) -> Optional[str]:
+        status = getattr(response, "status_code", None)
+        return f"HTTP {status}" if status in UNHEALTHY_STATUS_CODES else None
+
+    # ---- Sending ----
+
+    def post(self, send: Callable[[str], Any], api_key: str, failover: bool = True) -> Any:
+        """Call ``send(url)`` on the best endpoint, moving down the list on failure if ``failover``."""
+        candidates = self.candidates()
+        if not failover:
+            candidates = candidates[:1]
+        for attempt, endpoint in enumerate(candidates):
+            last = attempt == len(candidates) - 1
+            started = time.perf_counter()
+            try:
+                response = send(endpoint.url(api_key))
+            except Exception as e:
+                self.record_failure(endpoint, type(e).__name__)
+                if last:
+                    raise
+                self._failover(endpoint)
+                continue
+            failure = self._failed(response)
+            if failure is None:
+                self.record_success(endpoint, time.perf_counter() - started)
+                return response
+            self.record_failure(endpoint, failure)
+            if last:
+                return response
+            self._failover(endpoint)
+        raise AssertionError("unreachable")  # pragma: no cover
+
+    async def apost(self, send: Callable[[str], Awaitable[Any]], api_key: str, failover: bool = True) -> Any:
+        """Async variant of ``post``."""
+        candidates = self.candidates()
+        if not failover:
+            candidates = candidates[:1]
+        for attempt, endpoint in enumerate(candidates):
+            last = attempt == len(candidates) - 1
+            started = time.perf_counter()
+            try:
+                response = await send(endpoint.url(api_key))
+            except Exception as e:
+                self.record_failure(endpoint, type(e).__name__)
+                if last:
+                    raise
+                self._failover(endpoint)
+                continue
+            failure = self._failed(response)
+            if failure is None:
+                self.record_success(endpoint, time.perf_counter() - started)
+                return response
+            self.record_failure(endpoint, failure)
+            if last:
+                return response
+            self._failover(endpoint)
+        raise AssertionError("unreachable")  # pragma: no cover
+
+    def _failover(self, endpoint: Endpoint) -> None:
+        with self._lock:
+            endpoint.failovers += 1
+
+    # ---- Probing ----
+
+    def probe_now(self) -> None:
+        """Probe every endpoint once, in parallel."""
+
+        def _probe(endpoint: Endpoint) -> None:
+            try:
+                latency = self.probe(endpoint.name)
+            except Exception as e:
+                with self._lock:
+                    endpoint.probes += 1
+                    endpoint.probe_errors += 1
+                    self._fail(endpoint, f"probe: {type(e).__name__}")
+                return
+            with self._lock:
+                endpoint.probes += 1
+                self._observe(endpoint, latency, probe=True)
+
+        with ThreadPoolExecutor(max_workers=len(self.endpoints)) as executor:
+            list(executor.map(_probe, self.endpoints))
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per endpoint: health, request and probe latency, requests, errors, failovers and probes."""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                endpoint.name: {
+                    "healthy": endpoint.healthy(now),
+                    "latency_ms": None if endpoint.latency is None else round(endpoint.latency * 1000, 3),
+                    "probe_latency_ms": (
+                        None if endpoint.probe_latency is None else round(endpoint.probe_latency * 1000, 3)
+                    ),
+                    "requests": endpoint.requests,
+                    "errors": endpoint.errors,
+                    "failovers": endpoint.failovers,
+                    "probes": endpoint.probes,
+                    "probe_errors": endpoint.probe_errors,
+                    "last_error": endpoint.last_error,
+                }
+                for endpoint in self.endpoints
+            }
+
+    def close(self) -> None:
+        """Stop background probing."""
+        self._stop.set()
+
+
+def _probe_loop(pool_ref: Any, stop: threading.Event, interval: float) -> None:
+    """Probe a pool's endpoints now and every ``interval`` seconds until it closes."""
+    while True:
+        pool = pool_ref()
+        if pool is None:
+            return
+        pool.probe_now()
+        del pool
+        if stop.wait(interval):
+            return
@@ -0,0 +1,212 @@
+# stability_hedging.py
+
+"""Hedged read requests: race a late duplicate against a slow first attempt."""
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+import asyncio
+import threading
+import time
+
+__all__ = [
+    "HedgePolicy",
+]
+
+
+class HedgePolicy:
+    """When and how often to send a duplicate of a slow read.
+
+    A read that has not answered after the ``percentile`` latency of recent
+    reads gets a second, identical request; whichever answers first wins and
+    the other is cancelled (async) or its result discarded (sync, where a
+    blocking request cannot be interrupted). Hedges draw on a budget that
+    grows by ``max_extra_load`` per read, so they add at most that fraction
+    of extra requests (5% by default), and each hedge must also get a read
+    token from the rate limiter without waiting. Only reads are ever hedged.
+    While the budget cannot fund a hedge, reads are sent directly on the
+    caller's thread (or task); otherwise a sync read runs on a worker so
+    the caller can return whichever of it and its hedge answers first.
+
+    Args:
+        percentile: Latency percentile of recent reads used as the hedge delay.
+        min_delay: Lower bound on the hedge delay, in seconds.
+        max_extra_load: Hedges allowed per read, e.g. 0.05 for 5% extra.
+        window: Recent read latencies the percentile is taken over.
+        min_samples: Reads observed before hedging starts (unless ``initial_delay``).
+        initial_delay: Hedge delay to use before ``min_samples`` are observed.
+        max_budget: Most unused hedges that may accumulate during quiet periods.
+
+    Example:
+        client = ZKTClient(hedging=HedgePolicy(percentile=90, max_extra_load=0.1))
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        min_delay: float = 0.005,
+        max_extra_load: float = 0.05,
+        window: int = 200,
+        min_samples: int = 20,
+        initial_delay: Optional[float] = None,
+        max_budget: float = 10.0,
+    ):
+        if not 0 < percentile < 100:
+            raise ValueError("percentile must be between 0 and 100")
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_extra_load = max_extra_load
+        self.min_samples = min_samples
+        self.initial_delay = initial_delay
+        self.max_budget = max_budget
+        self._lock = threading.Lock()
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._budget = 0.0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stats = {"reads": 0, "hedged": 0, "hedge_won": 0, "budget_exhausted": 0}
+
+    def delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None while there is no estimate yet."""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return self.initial_delay
+            ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100.0))
+        return max(self.min_delay, ordered[index])
+
+    def _start(self) -> Optional[float]:
+        with self._lock:
+            self._stats["reads"] += 1
+            self._budget = min(self.max_budget, self._budget + self.max_extra_load)
+        return self.delay()
+
+    def _fundable(self) -> bool:
+        with self._lock:
+            return self._budget >= 1.0
+
+    def _unhedged(self, started: float, delay: float) -> None:
+        """Count a read that ran without a hedge budget but was slow enough to need one."""
+        if time.monotonic() - started > delay:
+            with self._lock:
+                self._stats["budget_exhausted"] += 1
+
+    def _may_hedge(self, can_hedge: Optional[Callable[[], bool]]) -> bool:
+        with self._lock:
+            if self._budget < 1.0:
+                self._stats["budget_exhausted"] += 1
+                return False
+            self._budget -= 1.0
+        if can_hedge is not None and not can_hedge():
+            with self._lock:
+                self._budget += 1.0
+            return False
+        with self._lock:
+            self._stats["hedged"] += 1
+        return True
+
+    def _won(self, hedge: bool) -> None:
+        if hedge:
+            with self._lock:
+                self._stats["hedge_won"] += 1
+
+    def _timed(self, send: Callable[[], Any]) -> Any:
+        started = time.monotonic()
+        result = send()
+        with self._lock:
+            self._latencies.append(time.monotonic() - started)
+        return result
+
+    async def _atimed(self, send: Callable[[], Awaitable[Any]]) -> Any:
+        started = time.monotonic()
+        result = await send()
+        with self._lock:
+            self._latencies.append(time.monotonic() - started)
+        return result
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=64, thread_name_prefix="stability-hedge")
+            return self._executor
+
+    def post(self, send: Callable[[], Any], can_hedge: Optional[Callable[[], bool]] = None) -> Any:
+        """Call ``send()``, hedging it with a second call if it is slow."""
+        delay = self._start()
+        if delay is None:
+            return self._timed(send)
+        if not self._fundable():
+            # No hedge can follow, so skip the hand-off to a worker thread
+            started = time.monotonic()
+            result = self._timed(send)
+            self._unhedged(started, delay)
+            return result
+        executor = self._pool()
+        primary = executor.submit(self._timed, send)
+        try:
+            return primary.result(timeout=delay)
+        except FutureTimeout:
+            pass
+        if not self._may_hedge(can_hedge):
+            return primary.result()
+        hedge = executor.submit(self._timed, send)
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                error = future.exception()
+                if error is None:
+                    for loser in pending:
+                        loser.cancel()
+                    self._won(future is hedge)
+                    return future.result()
+        raise error
+
+    async def apost(
+        self, send: Callable[[], Awaitable[Any]], can_hedge: Optional[Callable[[], bool]] = None
+    ) -> Any:
+        """Async variant of ``post``; the losing request is cancelled."""
+        delay = self._start()
+        if delay is None:
+            return await self._atimed(send)
+        if not self._fundable():
+            started = time.monotonic()
+            result = await self._atimed(send)
+            self._unhedged(started, delay)
+            return result
+        primary = asyncio.ensure_future(self._atimed(send))
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary.result()
+            if not self._may_hedge(can_hedge):
+                return await primary
+            hedge = asyncio.ensure_future(self._atimed(send))
+            pending.add(hedge)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    error = task.exception()
+                    if error is None:
+                        self._won(task is hedge)
+                        return task.result()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Reads seen, hedges sent and won, hedges refused for budget, and the current delay."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["delay"] = self.delay()
+        return stats
+
+    def close(self) -> None:
+        """Stop the worker threads used by synchronous hedging."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,256 @@
+# stability_idempotency.py
+
+"""Idempotency keys that stop retried writes from being submitted twice."""
+
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from stability_ledger import payload_hash
+
+__all__ = [
+    "IdempotencyConflict",
+    "IdempotencyStore",
+    "SQLiteIdempotencyStore",
+    "derive_idempotency_key",
+    "is_retryable_result",
+    "mark_replayed",
+    "request_fingerprint",
+    "scoped_idempotency_key",
+]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS idempotency (
+    key TEXT PRIMARY KEY,
+    result TEXT,
+    claimed_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    fingerprint TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_idempotency_expires_at ON idempotency (expires_at);
+"""
+
+_DONE, _PENDING, _CLAIMED, _MISMATCH = "done", "pending", "claimed", "mismatch"
+
+
+class IdempotencyConflict(RuntimeError):
+    """Raised when a key is still in flight after waiting, or was used for a different request."""
+
+
+def _tenant(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+def request_fingerprint(payload: Dict[str, Any]) -> str:
+    """Hash of a payload's content, ignoring the JSON-RPC style ``id``."""
+    return payload_hash({k: v for k, v in payload.items() if k != "id"})
+
+
+def derive_idempotency_key(payload: Dict[str, Any], api_key: str) -> str:
+    """Key for a payload: same API key and same content (ignoring ``id``) give the same key."""
+    return f"{_tenant(api_key)}:{request_fingerprint(payload)}"
+
+
+def scoped_idempotency_key(idempotency_key: str, api_key: str) -> str:
+    """A caller-chosen key, scoped to the API key so tenants sharing a store never collide."""
+    return f"{_tenant(api_key)}:key:{idempotency_key}"
+
+
+def is_retryable_result(result: str) -> bool:
+    """Whether a response means nothing was applied, so a retry should go through."""
+    if result.startswith("Error:"):
+        return True
+    try:
+        data = json.loads(result)
+    except ValueError:
+        return False
+    return isinstance(data, dict) and data.get("success") is False
+
+
+def mark_replayed(result: str) -> str:
+    """An earlier result returned for a duplicate, flagged with ``"replayed": true`` when it is a JSON object."""
+    try:
+        data = json.loads(result)
+    except ValueError:
+        return result
+    if not isinstance(data, dict):
+        return result
+    data["replayed"] = True
+    return json.dumps(data)
+
+
+class IdempotencyStore:
+    """In-memory idempotency store for one process.
+
+    ``begin(key)`` claims a key and returns None, or returns the result of an
+    earlier submission with the same key. A concurrent duplicate waits for the
+    first submission to finish instead of sending its own. Successful results
+    are kept for ``window`` seconds; errors release the key so a retry is sent.
+    A ``fingerprint`` (see ``request_fingerprint``) is stored with the claim;
+    reusing the key for a request with another fingerprint raises
+    ``IdempotencyConflict`` instead of replaying an unrelated result.
+
+    Args:
+        window: Seconds a completed result is replayed for duplicates.
+        pending_timeout: Seconds after which an unfinished claim is considered
+            abandoned (e.g. its process died) and may be taken over.
+        wait_timeout: Longest a duplicate waits on an in-flight submission
+            before ``IdempotencyConflict`` is raised.
+    """
+
+    def __init__(self, window: float = 600.0, pending_timeout: float = 120.0, wait_timeout: float = 60.0):
+        self.window = window
+        self.pending_timeout = pending_timeout
+        self.wait_timeout = wait_timeout
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[Any]] = {}
+        self._ops = 0
+
+    def _try_begin(self, key: str, fingerprint: Optional[str] = None) -> Tuple[str, Optional[str]]:
+        now = time.time()
+        with self._lock:
+            self._ops += 1
+            if self._ops % 256 == 0:
+                self._entries = {k: e for k, e in self._entries.items() if e[2] > now}
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] > now:
+                if _mismatched(entry[3], fingerprint):
+                    return _MISMATCH, None
+                return (_DONE, entry[0]) if entry[0] is not None else (_PENDING, None)
+            self._entries[key] = [None, now, now + self.pending_timeout, fingerprint]
+            return _CLAIMED, None
+
+    def _finish(self, key: str, result: Optional[str]) -> None:
+        with self._lock:
+            if result is None:
+                self._entries.pop(key, None)
+            else:
+                now = time.time()
+                fingerprint = self._entries[key][3] if key in self._entries else None
+                self._entries[key] = [result, now, now + self.window, fingerprint]
+
+    def begin(self, key: str, fingerprint: Optional[str] = None) -> Optional[str]:
+        """Claim ``key`` (returns None) or return the earlier result for it."""
+        deadline = time.monotonic() + self.wait_timeout
+        delay = 0.05
+        while True:
+            state, result = self._try_begin(key, fingerprint)
+            if state != _PENDING:
+                return _outcome(state, result)
+            if time.monotonic() >= deadline:
+                raise IdempotencyConflict("A submission with this idempotency key is still in flight")
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+    async def abegin(self, key: str, fingerprint: Optional[str] = None) -> Optional[str]:
+        """Async variant of ``begin``."""
+        deadline = time.monotonic() + self.wait_timeout
+        delay = 0.05
+        while True:
+            state, result = self._try_begin(key, fingerprint)
+            if state != _PENDING:
+                return _outcome(state, result)
+            if time.monotonic() >= deadline:
+                raise IdempotencyConflict("A submission with this idempotency key is still in flight")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+    def complete(self, key: str, result: str) -> None:
+        """Store the result for ``key``, or release it if the submission failed."""
+        self._finish(key, None if is_retryable_result(result) else result)
+
+    def release(self, key: str) -> None:
+        """Drop a claim without a result so the next attempt is sent."""
+        self._finish(key, None)
+
+    def close(self) -> None:
+        pass
+
+
+def _mismatched(stored: Optional[str], fingerprint: Optional[str]) -> bool:
+    return stored is not None and fingerprint is not None and stored != fingerprint
+
+
+def _outcome(state: str, result: Optional[str]) -> Optional[str]:
+    if state == _MISMATCH:
+        raise IdempotencyConflict("This idempotency key was already used for a different request")
+    return result
+
+
+class SQLiteIdempotencyStore(IdempotencyStore):
+    """Idempotency store in an SQLite file, shared across processes and restarts.
+
+    Args:
+        path: Database file; every process using it deduplicates together.
+        window, pending_timeout, wait_timeout: See ``IdempotencyStore``.
+
+    Example:
+        store = SQLiteIdempotencyStore("stability-idempotency.db")
+        client = ZKTClient(idempotency=store)
+        client.call_contract_write(to, abi, "mint", [holder, 1], idempotency_key="order-1842")
+    """
+
+    def __init__(
+        self,
+        path: str = "stability-idempotency.db",
+        window: float = 600.0,
+        pending_timeout: float = 120.0,
+        wait_timeout: float = 60.0,
+    ):
+        super().__init__(window, pending_timeout, wait_timeout)
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=30.0, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(idempotency)")}
+        if "fingerprint" not in columns:
+            # Files created before fingerprints were stored
+            self._conn.execute("ALTER TABLE idempotency ADD COLUMN fingerprint TEXT")
+
+    def _try_begin(self, key: str, fingerprint: Optional[str] = None) -> Tuple[str, Optional[str]]:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._ops += 1
+                if self._ops % 256 == 0:
+                    self._conn.execute("DELETE FROM idempotency WHERE expires_at <= ?", (now,))
+                row = self._conn.execute(
+                    "SELECT result, expires_at, fingerprint FROM idempotency WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[1] > now:
+                    self._conn.execute("COMMIT")
+                    if _mismatched(row[2], fingerprint):
+                        return _MISMATCH, None
+                    return (_DONE, row[0]) if row[0] is not None else (_PENDING, None)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO idempotency (key, result, claimed_at, expires_at, fingerprint) "
+                    "VALUES (?, NULL, ?, ?, ?)",
+                    (key, now, now + self.pending_timeout, fingerprint),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return _CLAIMED, None
+
+    def _finish(self, key: str, result: Optional[str]) -> None:
+        with self._lock:
+            if result is None:
+                self._conn.execute("DELETE FROM idempotency WHERE key = ? AND result IS NULL", (key,))
+            else:
+                now = time.time()
+                self._conn.execute(
+                    "UPDATE idempotency SET result = ?, expires_at = ? WHERE key = ?",
+                    (result, now + self.window, key),
+                )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+# stability_ingest.py
+
+"""Resumable bulk anchoring of JSONL records with ``post_zkt_v1``.
+
+Examples:
+    # Anchor every line, writing one result per line
+    python stability_ingest.py records.jsonl --results records.results.jsonl
+
+    # Interrupted? Run the same command again; it resumes where it stopped
+    python stability_ingest.py records.jsonl --results records.results.jsonl \\
+        --concurrency 8 --requests-per-minute 120 --field digest
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, Optional, Tuple
+import argparse
+import json
+import os
+import sys
+import time
+
+from stability_scheduler import RequestScheduler, request_class
+from stability_toolkit import ZKTClient
+
+__all__ = [
+    "BulkIngest",
+    "iter_jsonl",
+]
+
+
+def iter_jsonl(path: str, offset: int = 0, line: int = 1) -> Iterator[Tuple[int, int, int, str]]:
+    """Yield ``(line_number, start_offset, end_offset, text)`` for every line, lazily.
+
+    Starts at byte ``offset``, which must be the start of line ``line``.
+    Blank lines are yielded with empty ``text``.
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for raw in f:
+            yield line, offset, offset + len(raw), raw.decode("utf-8").strip()
+            offset += len(raw)
+            line += 1
+
+
+def _tx_hash(result: str) -> Optional[str]:
+    try:
+        data = json.loads(result)
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    return data.get("hash") or data.get("transactionHash") or data.get("txHash")
+
+
+def _ok(result: str) -> bool:
+    if result.startswith("Error:"):
+        return False
+    try:
+        data = json.loads(result)
+    except ValueError:
+        return True
+    return not (isinstance(data, dict) and data.get("success") is False)
+
+
+class BulkIngest:
+    """Anchor every record of a JSONL file on-chain, resumably.
+
+    The input is read lazily and each non-blank line is sent with
+    ``post_zkt_v1``, at most ``max_concurrency`` at a time, as ``bulk``
+    priority for the client's scheduler and rate limiter. Each settled line
+    is appended to ``results_path`` as
+    ``{"line": n, "ok": ..., "tx_hash": ..., "response": ..., "offset": ..., "end_offset": ...}``.
+
+    Progress is checkpointed to ``checkpoint_path`` (default
+    ``<results_path>.checkpoint``): the byte offset below which every line has
+    settled, the settled lines past it, and the failed lines. Running again
+    with the same paths retries failed lines, then continues from the
+    checkpoint offset without rereading the file from the start. Results
+    appended after the last checkpoint are honoured too, so a crash between
+    the two never resubmits a finished line; with an idempotency store on the
+    client, lines in flight during a crash are not submitted twice either.
+
+    Args:
+        path: JSONL input file.
+        results_path: JSONL file receiving one result per line.
+        client: ``ZKTClient`` to send with; one is created (and closed) if omitted.
+        api_key: Key for the created client.
+        max_concurrency: Lines in flight at once.
+        requests_per_minute: Optional pace for this ingest's submissions.
+        field: Send ``record[field]`` instead of the whole line.
+        checkpoint_path: Where progress is saved.
+        checkpoint_every: Settled lines between checkpoints.
+        max_consecutive_errors: Stop (resumably) after this many failures in a
+            row, e.g. when the write quota runs out.
+
+    Example:
+        summary = BulkIngest("records.jsonl", "records.results.jsonl", max_concurrency=8).run()
+    """
+
+    def __init__(
+        self,
+        path: str,
+        results_path: str,
+        client: Optional[ZKTClient] = None,
+        api_key: Optional[str] = None,
+        max_concurrency: int = 8,
+        requests_per_minute: Optional[float] = None,
+        field: Optional[str] = None,
+        checkpoint_path: Optional[str] = None,
+        checkpoint_every: int = 100,
+        max_consecutive_errors: int = 25,
+    ):
+        self.path = path
+        self.results_path = results_path
+        self.checkpoint_path = checkpoint_path or f"{results_path}.checkpoint"
+        self.client = client
+        self.api_key = api_key
+        self.max_concurrency = max_concurrency
+        self.field = field
+        self.checkpoint_every = checkpoint_every
+        self.max_consecutive_errors = max_consecutive_errors
+        self._pacer = (
+            RequestScheduler(max_in_flight=max_concurrency, requests_per_minute=requests_per_minute)
+            if requests_per_minute else None
+        )
+        # Every line before _line (starting at byte _offset) has settled
+        self._line, self._offset = 1, 0
+        # Settled lines past the watermark -> end offset; failed lines -> (start, end)
+        self._settled: Dict[int, int] = {}
+        self._failed: Dict[int, Tuple[int, int]] = {}
+        self._results_size = 0
+
+    # ---- Checkpointing ----
+
+    def _settle(self, line: int, start: int, end: int, ok: bool) -> None:
+        if line >= self._line:
+            self._settled[line] = end
+        if ok:
+            self._failed.pop(line, None)
+        else:
+            self._failed[line] = (start, end)
+
+    def _advance(self) -> None:
+        """Move the watermark past contiguously settled lines."""
+        while self._line in self._settled:
+            self._offset = self._settled.pop(self._line)
+            self._line += 1
+
+    def _load(self) -> None:
+        checkpoint = None
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, encoding="utf-8") as f:
+                checkpoint = json.load(f)
+            if checkpoint.get("input") != os.path.abspath(self.path):
+                raise ValueError(f"{self.checkpoint_path} belongs to {checkpoint.get('input')}, not {self.path}")
+            self._line, self._offset = checkpoint["line"], checkpoint["offset"]
+            self._settled = {int(k): v for k, v in checkpoint["settled"].items()}
+            self._failed = {int(k): tuple(v) for k, v in checkpoint["failed"].items()}
+            self._results_size = checkpoint["results_size"]
+        if not os.path.exists(self.results_path):
+            self._results_size = 0
+            return
+        with open(self.results_path, "rb+") as f:
+            f.seek(self._results_size)
+            data = f.read()
+            # Drop a half-written last result from an interrupted run
+            end = data.rfind(b"\n") + 1
+            if end < len(data):
+                f.truncate(self._results_size + end)
+        for raw in data[:end].splitlines():
+            entry = json.loads(raw)
+            self._settle(entry["line"], entry["offset"], entry["end_offset"], entry["ok"])
+        self._results_size += end
+        self._advance()
+
+    def _save(self) -> None:
+        checkpoint = {
+            "input": os.path.abspath(self.path),
+            "line": self._line,
+            "offset": self._offset,
+            "settled": self._settled,
+            "failed": self._failed,
+            "results_size": self._results_size,
+            "saved_at": time.time(),
+        }
+        tmp = f"{self.checkpoint_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp, self.checkpoint_path)
+
+    # ---- Submission ----
+
+    def _message(self, text: str) -> str:
+        if self.field is None:
+            return text
+        value = json.loads(text)[self.field]
+        return value if isinstance(value, str) else json.dumps(value, separators=(",", ":"))
+
+    def _submit(self, client: ZKTClient, text: str) -> str:
+        try:
+            message = self._message(text)
+        except (ValueError, KeyError, TypeError) as e:
+            return f"Error: invalid record: {e}"
+        with request_class(priority="bulk", tenant="ingest"):
+            if self._pacer is None:
+                return client.post_zkt_v1(message)
+            with self._pacer.slot():
+                return client.post_zkt_v1(message)
+
+    def _pending_lines(self) -> Iterator[Tuple[int, int, int, str]]:
+        """Earlier failures first, then the rest of the file from the watermark."""
+        if self._failed:
+            with open(self.path, "rb") as f:
+                for line, (start, end) in sorted(self._failed.items()):
+                    f.seek(start)
+                    yield line, start, end, f.read(end - start).decode("utf-8").strip()
+        for line, start, end, text in iter_jsonl(self.path, self._offset, self._line):
+            if line not in self._settled:
+                yield line, start, end, text
+
+    def run(self) -> Dict[str, Any]:
+        """Ingest the file and return counts for this run."""
+        self._load()
+        summary = {"submitted": 0, "succeeded": 0, "failed": 0, "resumed_from_line": self._line, "aborted": False}
+        client = self.client or ZKTClient(self.api_key, pool_maxsize=self.max_concurrency)
+        consecutive_errors = 0
+        since_checkpoint = 0
+        try:
+            with open(self.results_path, "ab") as results, ThreadPoolExecutor(self.max_concurrency) as executor:
+                pending = {}
+                lines = self._pending_lines()
+                exhausted = False
+                while pending or not exhausted:
+                    while not exhausted and len(pending) < self.max_concurrency * 2:
+                        item = next(lines, None)
+                        if item is None:
+                            exhausted = True
+                        elif not item[3]:
+                            self._settle(item[0], item[1], item[2], ok=True)
+                        else:
+                            pending[executor.submit(self._submit, client, item[3])] = item
+                            summary["submitted"] += 1
+                    if not pending:
+                        break
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        line, start, end, _ = pending.pop(future)
+                        result = future.result()
+                        ok = _ok(result)
+                        entry = {
+                            "line": line,
+                            "ok": ok,
+                            "tx_hash": _tx_hash(result) if ok else None,
+                            "response": result,
+                            "offset": start,
+                            "end_offset": end,
+                        }
+                        data = (json.dumps(entry) + "\n").encode("utf-8")
+                        results.write(data)
+                        self._results_size += len(data)
+                        self._settle(line, start, end, ok)
+                        summary["succeeded" if ok else "failed"] += 1
+                        consecutive_errors = 0 if ok else consecutive_errors + 1
+                    if consecutive_errors >= self.max_consecutive_errors and not summary["aborted"]:
+                        # Let in-flight lines finish, submit nothing new
+                        summary["aborted"] = exhausted = True
+                    self._advance()
+                    since_checkpoint += len(done)
+                    if since_checkpoint >= self.checkpoint_every:
+                        results.flush()
+                        self._save()
+                        since_checkpoint = 0
+                self._advance()
+                results.flush()
+                self._save()
+        finally:
+            if self.client is None:
+                client.close()
+        summary["remaining_failed"] = len(self._failed)
+        return summary
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="JSONL file, one record per line")
+    parser.add_argument("--results", help="JSONL results file (default: <input>.results.jsonl)")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <results>.checkpoint)")
+    parser.add_argument("--api-key", default=None, help="Stability API key (default: STABILITY_API_KEY)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests-per-minute", type=float, default=None)
+    parser.add_argument("--field", help="Anchor this field of each record instead of the whole line")
+    parser.add_argument("--checkpoint-every", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    results_path = args.results or f"{os.path.splitext(args.input)[0]}.results.jsonl"
+    summary = BulkIngest(
+        args.input,
+        results_path,
+        api_key=args.api_key,
+        max_concurrency=args.concurrency,
+        requests_per_minute=args.requests_per_minute,
+        field=args.field,
+        checkpoint_path=args.checkpoint,
+        checkpoint_every=args.checkpoint_every,
+    ).run()
+    print(json.dumps(summary))
+    return 1 if summary["aborted"] or summary["remaining_failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
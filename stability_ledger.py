@@ -0,0 +1,239 @@
+# stability_ledger.py
+
+"""Local SQLite ledger of submitted ZKT transactions."""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
+import hashlib
+import json
+import sqlite3
+import threading
+
+__all__ = [
+    "TransactionLedger",
+    "api_key_alias",
+    "payload_hash",
+    "payload_kind",
+]
+
+TimeLike = Union[float, int, datetime, str, None]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    kind TEXT NOT NULL,
+    contract_address TEXT,
+    method TEXT,
+    payload_hash TEXT NOT NULL,
+    payload TEXT,
+    response TEXT,
+    tx_hash TEXT,
+    success INTEGER,
+    duration_ms REAL,
+    api_key_alias TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_contract_method_time
+    ON transactions (contract_address, method, created_at);
+CREATE INDEX IF NOT EXISTS idx_transactions_kind_time
+    ON transactions (kind, created_at);
+CREATE INDEX IF NOT EXISTS idx_transactions_time
+    ON transactions (created_at);
+CREATE INDEX IF NOT EXISTS idx_transactions_tx_hash
+    ON transactions (tx_hash);
+CREATE INDEX IF NOT EXISTS idx_transactions_payload_hash
+    ON transactions (payload_hash);
+"""
+
+_COLUMNS = (
+    "id", "created_at", "kind", "contract_address", "method", "payload_hash",
+    "payload", "response", "tx_hash", "success", "duration_ms", "api_key_alias",
+)
+
+
+def payload_hash(payload: Dict[str, Any]) -> str:
+    """Stable SHA-256 of a request payload (key order does not matter)."""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def api_key_alias(api_key: str) -> str:
+    """Short digest that tells API keys apart in the ledger without storing them."""
+    return "key-" + hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+
+
+def payload_kind(payload: Dict[str, Any]) -> str:
+    """Name the ZKT operation a payload was built for."""
+    if "code" in payload:
+        return "deploy_contract"
+    if "to" in payload:
+        return "call_contract_write" if "wait" in payload else "call_contract_read"
+    return "post_zkt_v1"
+
+
+def _timestamp(value: TimeLike) -> Optional[float]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str):
+        return datetime.fromisoformat(value).timestamp()
+    return float(value)
+
+
+class TransactionLedger:
+    """Append-only record of writes, indexed for contract/method/time queries.
+
+    Every ``post_zkt_v1``, ``call_contract_write`` and ``deploy_contract``
+    request is stored with its payload hash, response, transaction hash,
+    duration and a sanitized API key alias. Reads are never recorded.
+
+    Args:
+        path: SQLite database file (``":memory:"`` for a throwaway ledger).
+        store_payloads: Also keep the full request payload, not just its hash.
+
+    Example:
+        ledger = TransactionLedger("stability-ledger.db")
+        set_ledger(ledger)  # from stability_toolkit
+        ...
+        ledger.query(contract="0x1234...", method="setMessage",
+                     since=datetime.now() - timedelta(days=7))
+    """
+
+    def __init__(self, path: str = "stability-ledger.db", store_payloads: bool = True):
+        self.path = path
+        self.store_payloads = store_payloads
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def record(
+        self,
+        payload: Dict[str, Any],
+        response: str,
+        started_at: float,
+        duration: float,
+        api_key_alias: Optional[str] = None,
+        kind: Optional[str] = None,
+    ) -> int:
+        """Store one submitted request and return its row id."""
+        kind = kind or payload_kind(payload)
+        contract_address = payload.get("to")
+        tx_hash = None
+        success = None
+        try:
+            data = json.loads(response)
+        except (TypeError, ValueError):
+            data = None
+        if isinstance(data, dict):
+            tx_hash = data.get("hash") or data.get("transactionHash") or data.get("txHash")
+            contract_address = contract_address or data.get("contractAddress")
+            if "success" in data:
+                success = 1 if data["success"] else 0
+        elif isinstance(response, str) and response.startswith("Error:"):
+            success = 0
+
+        row = (
+            started_at,
+            kind,
+            contract_address.lower() if contract_address else None,
+            payload.get("method"),
+            payload_hash(payload),
+            json.dumps(payload, default=str) if self.store_payloads else None,
+            response,
+            tx_hash,
+            success,
+            duration * 1000.0,
+            api_key_alias,
+        )
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO transactions (created_at, kind, contract_address, method, payload_hash, "
+                "payload, response, tx_hash, success, duration_ms, api_key_alias) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                row,
+            )
+            return cursor.lastrowid
+
+    def _where(
+        self,
+        contract: Optional[str],
+        method: Optional[str],
+        kind: Optional[str],
+        since: TimeLike,
+        until: TimeLike,
+        tx_hash: Optional[str],
+        api_key_alias: Optional[str],
+    ):
+        clauses, params = [], []
+        for column, value in (
+            ("contract_address", contract.lower() if contract else None),
+            ("method", method),
+            ("kind", kind),
+            ("tx_hash", tx_hash),
+            ("api_key_alias", api_key_alias),
+        ):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(_timestamp(since))
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(_timestamp(until))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(
+        self,
+        contract: Optional[str] = None,
+        method: Optional[str] = None,
+        kind: Optional[str] = None,
+        since: TimeLike = None,
+        until: TimeLike = None,
+        tx_hash: Optional[str] = None,
+        api_key_alias: Optional[str] = None,
+        limit: Optional[int] = 100,
+        offset: int = 0,
+    ) -> List[Dict[str, Any]]:
+        """Return matching records, newest first.
+
+        ``since``/``until`` accept unix timestamps, datetimes or ISO strings.
+        Filters on contract, method and time are served by indexes.
+        """
+        where, params = self._where(contract, method, kind, since, until, tx_hash, api_key_alias)
+        sql = f"SELECT {', '.join(_COLUMNS)} FROM transactions{where} ORDER BY created_at DESC"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [limit, offset]
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [dict(zip(_COLUMNS, row)) for row in rows]
+
+    def count(
+        self,
+        contract: Optional[str] = None,
+        method: Optional[str] = None,
+        kind: Optional[str] = None,
+        since: TimeLike = None,
+        until: TimeLike = None,
+        tx_hash: Optional[str] = None,
+        api_key_alias: Optional[str] = None,
+    ) -> int:
+        """Count matching records."""
+        where, params = self._where(contract, method, kind, since, until, tx_hash, api_key_alias)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM transactions{where}", params).fetchone()[0]
+
+    def get_by_tx_hash(self, tx_hash: str) -> Optional[Dict[str, Any]]:
+        """Return the record for a transaction hash, if any."""
+        rows = self.query(tx_hash=tx_hash, limit=1)
+        return rows[0] if rows else None
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+# stability_merkle.py
+
+"""Anchor many messages with one write: a Merkle root on-chain, proofs kept locally.
+
+Examples:
+    # Anchor every line of a file in batches of up to 10 000 (one write each)
+    python stability_merkle.py anchor records.jsonl --db anchors.db
+
+    # Check that a record was anchored
+    python stability_merkle.py verify '{"id": 1, "digest": "d1"}' --db anchors.db
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+import argparse
+import hashlib
+import json
+import sqlite3
+import sys
+import threading
+import time
+
+from stability_toolkit import ZKTClient
+
+__all__ = [
+    "MerkleAnchor",
+    "build_tree",
+    "leaf_hash",
+    "merkle_root",
+    "verify_proof",
+]
+
+Message = Union[str, bytes]
+# One proof step: ("L" or "R", sibling hash in hex), the side the sibling is on
+ProofStep = Tuple[str, str]
+
+# Leaves and inner nodes are hashed with different prefixes (as in RFC 6962)
+# so an inner node can never be passed off as a leaf
+_LEAF, _NODE = b"\x00", b"\x01"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS batches (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    root TEXT NOT NULL,
+    leaves INTEGER NOT NULL,
+    anchored INTEGER NOT NULL DEFAULT 0,
+    anchored_at REAL,
+    tx_hash TEXT,
+    response TEXT
+);
+CREATE TABLE IF NOT EXISTS leaves (
+    id INTEGER PRIMARY KEY,
+    added_at REAL NOT NULL,
+    leaf TEXT NOT NULL,
+    message TEXT,
+    batch_id INTEGER REFERENCES batches (id),
+    leaf_index INTEGER,
+    proof TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_leaves_leaf ON leaves (leaf);
+CREATE INDEX IF NOT EXISTS idx_leaves_pending ON leaves (batch_id, id);
+CREATE INDEX IF NOT EXISTS idx_batches_root ON batches (root);
+"""
+
+
+def _bytes(message: Message) -> bytes:
+    return message if isinstance(message, bytes) else message.encode("utf-8")
+
+
+def leaf_hash(message: Message) -> bytes:
+    """SHA-256 leaf hash of a message (str is UTF-8 encoded)."""
+    return hashlib.sha256(_LEAF + _bytes(message)).digest()
+
+
+def _node(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(_NODE + left + right).digest()
+
+
+def build_tree(leaves: Sequence[bytes]) -> List[List[bytes]]:
+    """Every level of the tree over ``leaves``, leaves first and the root last.
+
+    Nodes are paired left to right; an unpaired last node moves up a level
+    unchanged (it is never paired with itself).
+    """
+    if not leaves:
+        raise ValueError("A Merkle tree needs at least one leaf")
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [_node(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+
+def merkle_root(leaves: Sequence[bytes]) -> bytes:
+    return build_tree(leaves)[-1][0]
+
+
+def _proof(levels: List[List[bytes]], index: int) -> List[ProofStep]:
+    steps: List[ProofStep] = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            steps.append(("L" if sibling < index else "R", level[sibling].hex()))
+        index //= 2
+    return steps
+
+
+def verify_proof(message: Message, proof: Iterable[Sequence[str]], root: str) -> bool:
+    """Whether ``proof`` links ``message`` to the hex ``root``; no database needed."""
+    node = leaf_hash(message)
+    for side, sibling in proof:
+        node = _node(bytes.fromhex(sibling), node) if side == "L" else _node(node, bytes.fromhex(sibling))
+    return node.hex() == root.lower().removeprefix("0x")
+
+
+def _anchor_result(result: str) -> Tuple[bool, Optional[str]]:
+    """``(ok, tx_hash)`` for a ``post_zkt_v1`` or contract write response."""
+    if result.startswith("Error:"):
+        return False, None
+    try:
+        data = json.loads(result)
+    except ValueError:
+        return True, None
+    if not isinstance(data, dict):
+        return True, None
+    if data.get("success") is False:
+        return False, None
+    return True, data.get("hash") or data.get("transactionHash") or data.get("txHash")
+
+
+class MerkleAnchor:
+    """Batch messages under a Merkle root and anchor only the root on-chain.
+
+    ``add`` hashes a message and saves the leaf (durably, in SQLite); no
+    request is sent. ``flush`` builds a tree over the pending leaves, stores
+    every leaf's inclusion proof, and anchors the root with one
+    ``post_zkt_v1`` (``{"merkle_root": ..., "leaves": n}``) or, with
+    ``contract``, one ``call_contract_write`` passing ``"0x" + root``. So
+    10 000 records cost one write instead of 10 000.
+
+    A batch is recorded before its root is sent, so a failed or interrupted
+    anchor can be sent again with ``retry`` (under the same idempotency
+    key) without changing any proof. Give the client a
+    ``SQLiteIdempotencyStore`` for that protection to span processes, as
+    with the CLI's ``retry``; otherwise it holds within this process. ``verify`` recomputes a message's
+    path to its anchored root: about log2(batch size) hashes and one
+    indexed lookup.
+
+    Args:
+        path: SQLite database for leaves, proofs and batches.
+        client: ``ZKTClient`` used for anchoring; created (and closed) if omitted.
+        api_key: Key for the created client.
+        contract: ``(to, abi, method)`` to anchor with a contract write
+                instead of a message.
+        max_batch: Flush automatically once this many leaves are pending.
+        max_age: Flush automatically on ``add`` once the oldest pending leaf
+                is this many seconds old.
+        store_messages: Also keep each message's text, not only its hash.
+
+    Example:
+        with MerkleAnchor("anchors.db") as anchor:
+            for record in records:
+                anchor.add(record)
+        anchor.verify(records[0])  # True once the batch is anchored
+    """
+
+    def __init__(
+        self,
+        path: str = "stability-anchors.db",
+        client: Optional[ZKTClient] = None,
+        api_key: Optional[str] = None,
+        contract: Optional[Tuple[str, Any, str]] = None,
+        max_batch: int = 10_000,
+        max_age: Optional[float] = None,
+        store_messages: bool = False,
+    ):
+        self.path = path
+        self.client = client
+        self.api_key = api_key
+        self.contract = contract
+        self.max_batch = max_batch
+        self.max_age = max_age
+        self.store_messages = store_messages
+        self._client: Optional[ZKTClient] = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._pending, self._oldest = self._conn.execute(
+            "SELECT COUNT(*), MIN(added_at) FROM leaves WHERE batch_id IS NULL"
+        ).fetchone()
+
+    # ---- Collecting ----
+
+    def add(self, message: Message) -> str:
+        """Queue a message for the next batch and return its leaf hash (hex)."""
+        return self.add_many([message])[0]
+
+    def add_many(self, messages: Iterable[Message]) -> List[str]:
+        """Queue many messages in one transaction; returns their leaf hashes."""
+        now = time.time()
+        rows = [
+            (now, leaf_hash(message).hex(), _bytes(message).decode("utf-8", "replace") if self.store_messages else None)
+            for message in messages
+        ]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany("INSERT INTO leaves (added_at, leaf, message) VALUES (?, ?, ?)", rows)
+            self._conn.execute("COMMIT")
+            self._pending += len(rows)
+            if self._oldest is None and rows:
+                self._oldest = now
+            aged = self.max_age is not None and self._oldest is not None and now - self._oldest >= self.max_age
+        while self.pending() >= self.max_batch:
+            self.flush()
+        if aged:
+            self.flush()
+        return [row[1] for row in rows]
+
+    def pending(self) -> int:
+        """Leaves waiting for the next batch."""
+        with self._lock:
+            return self._pending
+
+    # ---- Anchoring ----
+
+    def _anchor_client(self) -> ZKTClient:
+        if self.client is not None:
+            return self.client
+        if self._client is None:
+            self._client = ZKTClient(self.api_key)
+        return self._client
+
+    def _send(self, root: str, count: int) -> str:
+        client = self._anchor_client()
+        # The root names the batch, so a retried anchor is recognised as a retry
+        idempotency_key = f"merkle:{root}"
+        if self.contract is not None:
+            to, abi, method = self.contract
+            return client.call_contract_write(to, abi, method, ["0x" + root], idempotency_key=idempotency_key)
+        message = json.dumps({"merkle_root": root, "leaves": count}, separators=(",", ":"))
+        return client.post_zkt_v1(message, idempotency_key=idempotency_key)
+
+    def _anchor(self, batch_id: int, root: str, count: int) -> Dict[str, Any]:
+        try:
+            result = self._send(root, count)
+        except Exception as e:
+            result = f"Error: {e}"
+        ok, tx_hash = _anchor_result(result)
+        with self._lock:
+            self._conn.execute(
+                "UPDATE batches SET anchored = ?, anchored_at = ?, tx_hash = ?, response = ? WHERE id = ?",
+                (int(ok), time.time() if ok else None, tx_hash, result, batch_id),
+            )
+        return {"batch": batch_id, "root": root, "leaves": count, "ok": ok, "tx_hash": tx_hash, "response": result}
+
+    def flush(self) -> Optional[Dict[str, Any]]:
+        """Anchor the pending leaves (up to ``max_batch``) as one batch.
+
+        Returns ``{"batch", "root", "leaves", "ok", "tx_hash", "response"}``,
+        or None when nothing is pending.
+        """
+        with self._flush_lock:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, leaf FROM leaves WHERE batch_id IS NULL ORDER BY id LIMIT ?", (self.max_batch,)
+                ).fetchall()
+            if not rows:
+                return None
+            levels = build_tree([bytes.fromhex(leaf) for _, leaf in rows])
+            root = levels[-1][0].hex()
+            proofs = [json.dumps(_proof(levels, index), separators=(",", ":")) for index in range(len(rows))]
+            with self._lock:
+                self._conn.execute("BEGIN")
+                batch_id = self._conn.execute(
+                    "INSERT INTO batches (created_at, root, leaves) VALUES (?, ?, ?)", (time.time(), root, len(rows))
+                ).lastrowid
+                self._conn.executemany(
+                    "UPDATE leaves SET batch_id = ?, leaf_index = ?, proof = ? WHERE id = ?",
+                    [(batch_id, index, proof, row_id) for index, (proof, (row_id, _)) in enumerate(zip(proofs, rows))],
+                )
+                self._conn.execute("COMMIT")
+                self._pending, self._oldest = self._conn.execute(
+                    "SELECT COUNT(*), MIN(added_at) FROM leaves WHERE batch_id IS NULL"
+                ).fetchone()
+            return self._anchor(batch_id, root, len(rows))
+
+    def flush_all(self) -> List[Dict[str, Any]]:
+        """Flush until nothing is pending; one batch per ``max_batch`` leaves."""
+        batches = []
+        while True:
+            batch = self.flush()
+            if batch is None:
+                return batches
+            batches.append(batch)
+
+    def retry(self) -> List[Dict[str, Any]]:
+        """Send the roots of batches whose anchor failed or was interrupted again."""
+        with self._flush_lock:
+            with self._lock:
+                failed = self._conn.execute(
+                    "SELECT id, root, leaves FROM batches WHERE anchored = 0 ORDER BY id"
+                ).fetchall()
+            return [self._anchor(batch_id, root, count) for batch_id, root, count in failed]
+
+    # ---- Proofs ----
+
+    def proof(self, message: Message) -> Optional[Dict[str, Any]]:
+        """Inclusion proof for a message's most recent batch, or None if it is not batched yet.
+
+        The result is self-contained: ``verify_proof(message, p["proof"], p["root"])``
+        checks it without this database.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT l.leaf, l.leaf_index, l.proof, b.id, b.root, b.leaves, b.anchored, b.tx_hash "
+                "FROM leaves l JOIN batches b ON b.id = l.batch_id WHERE l.leaf = ? ORDER BY b.id DESC LIMIT 1",
+                (leaf_hash(message).hex(),),
+            ).fetchone()
+        if row is None:
+            return None
+        leaf, index, proof, batch_id, root, count, anchored, tx_hash = row
+        return {
+            "leaf": leaf,
+            "index": index,
+            "proof": [tuple(step) for step in json.loads(proof)],
+            "batch": batch_id,
+            "root": root,
+            "leaves": count,
+            "anchored": bool(anchored),
+            "tx_hash": tx_hash,
+        }
+
+    def verify(self, message: Message) -> bool:
+        """Whether ``message`` is in a batch whose root was anchored, checked against that root."""
+        proof = self.proof(message)
+        return proof is not None and proof["anchored"] and verify_proof(message, proof["proof"], proof["root"])
+
+    def batches(self, limit: Optional[int] = 100) -> List[Dict[str, Any]]:
+        """Batches, newest first."""
+        columns = ("id", "created_at", "root", "leaves", "anchored", "anchored_at", "tx_hash", "response")
+        sql = f"SELECT {', '.join(columns)} FROM batches ORDER BY id DESC"
+        params: Tuple[Any, ...] = ()
+        if limit is not None:
+            sql += " LIMIT ?"
+            params = (limit,)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [dict(zip(columns, row), anchored=bool(row[4])) for row in rows]
+
+    def close(self) -> None:
+        """Close the database (and the client this anchor created). Pending leaves stay queued."""
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "MerkleAnchor":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        try:
+            if exc_info[0] is None:
+                self.flush_all()
+        finally:
+            self.close()
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="stability-anchors.db", help="Leaf, proof and batch database")
+    parser.add_argument("--api-key", default=None, help="Stability API key (default: STABILITY_API_KEY)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    anchor = commands.add_parser("anchor", help="Batch every non-blank line of a file and anchor the roots")
+    anchor.add_argument("input", help="Text or JSONL file, one message per line")
+    anchor.add_argument("--max-batch", type=int, default=10_000)
+    anchor.add_argument("--store-messages", action="store_true", help="Keep message text, not only hashes")
+    verify = commands.add_parser("verify", help="Print a message's inclusion proof; exit 1 if not anchored")
+    verify.add_argument("message")
+    commands.add_parser("retry", help="Re-send roots whose anchoring failed")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    anchor = MerkleAnchor(args.db, api_key=args.api_key, max_batch=getattr(args, "max_batch", 10_000),
+                          store_messages=getattr(args, "store_messages", False))
+    try:
+        if args.command == "anchor":
+            with open(args.input, encoding="utf-8") as f:
+                anchor.add_many(line.strip() for line in f if line.strip())
+            batches = anchor.flush_all()
+            for batch in batches:
+                batch.pop("response")
+            print(json.dumps(batches))
+            return 0 if all(batch["ok"] for batch in batches) else 1
+        if args.command == "retry":
+            batches = anchor.retry()
+            print(json.dumps([{k: v for k, v in batch.items() if k != "response"} for batch in batches]))
+            return 0 if all(batch["ok"] for batch in batches) else 1
+        proof = anchor.proof(args.message)
+        print(json.dumps(proof))
+        return 0 if anchor.verify(args.message) else 1
+    finally:
+        anchor.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
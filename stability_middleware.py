@@ -0,0 +1,178 @@
+# stability_middleware.py
+
+"""Ordered before-send / after-receive / on-error hooks around ZKT requests."""
+
+from typing import Any, Dict, Iterable, List, Optional
+
+__all__ = [
+    "Middleware",
+    "MiddlewareChain",
+    "Request",
+]
+
+HOOKS = ("before_send", "after_receive", "on_error")
+
+
+class Request:
+    """One outgoing ZKT call as seen by middleware.
+
+    ``before_send`` hooks may replace ``payload`` or add ``headers`` (the
+    payload is serialized after they run). ``kind`` is the payload kind, for
+    example ``"call_contract_read"``, and ``state`` is free space for hooks to
+    carry values such as start times from ``before_send`` to ``after_receive``.
+    """
+
+    __slots__ = ("payload", "api_key", "headers", "kind", "state")
+
+    def __init__(self, payload: dict, api_key: str, headers: Dict[str, str], kind: str):
+        self.payload = payload
+        self.api_key = api_key
+        self.headers = headers
+        self.kind = kind
+        self.state: Dict[str, Any] = {}
+
+
+class Middleware:
+    """Base class for middleware; override any of the hooks.
+
+    Hooks run in registration order before a request and in reverse order
+    after it, so the first middleware added wraps all the others.
+    ``after_receive`` sees every result returned to the caller (including
+    cached results and ``"Error: ..."`` strings) and may return a replacement;
+    ``on_error`` sees exceptions raised while sending and may return a string
+    to use instead of the usual error message. Returning None keeps the
+    result unchanged. The async hooks default to the sync ones.
+
+    Example:
+        class AuthHeader(Middleware):
+            def before_send(self, request):
+                request.headers["Authorization"] = f"Bearer {token()}"
+
+        client = ZKTClient(middleware=[AuthHeader()])
+    """
+
+    def before_send(self, request: Request) -> None:
+        """Called before the request is sent; may modify ``request``."""
+
+    def after_receive(self, request: Request, result: str) -> Optional[str]:
+        """Called with the result text; return a replacement or None."""
+        return None
+
+    def on_error(self, request: Request, error: Exception) -> Optional[str]:
+        """Called when sending raised; return a result to use or None."""
+        return None
+
+    async def abefore_send(self, request: Request) -> None:
+        self.before_send(request)
+
+    async def aafter_receive(self, request: Request, result: str) -> Optional[str]:
+        return self.after_receive(request, result)
+
+    async def aon_error(self, request: Request, error: Exception) -> Optional[str]:
+        return self.on_error(request, error)
+
+
+class MiddlewareChain:
+    """Ordered middleware shared by a client; empty chains cost one truth test.
+
+    Any object with some of the ``Middleware`` hook methods may be added;
+    missing hooks are skipped, and async callers use ``a``-prefixed hooks
+    where defined and the sync ones otherwise (sync callers skip hooks that
+    only exist in async form). Hook lists are resolved when middleware is
+    added, not per request.
+    """
+
+    def __init__(self, middleware: Iterable[Any] = ()):
+        self._middleware: List[Any] = []
+        self._hooks: Dict[str, List[Any]] = {}
+        for item in middleware:
+            self.add(item)
+
+    def add(self, middleware: Any, index: Optional[int] = None) -> Any:
+        """Register ``middleware`` (last, or at ``index``) and return it."""
+        if not any(callable(getattr(middleware, prefix + hook, None)) for hook in HOOKS for prefix in ("", "a")):
+            raise TypeError(f"{middleware!r} defines none of {', '.join(HOOKS)}")
+        if index is None:
+            self._middleware.append(middleware)
+        else:
+            self._middleware.insert(index, middleware)
+        self._resolve()
+        return middleware
+
+    def remove(self, middleware: Any) -> None:
+        """Unregister ``middleware``."""
+        self._middleware.remove(middleware)
+        self._resolve()
+
+    def _resolve(self) -> None:
+        hooks: Dict[str, List[Any]] = {}
+        for hook in HOOKS:
+            sync, async_ = [], []
+            for item in self._middleware:
+                method, amethod = getattr(item, hook, None), getattr(item, "a" + hook, None)
+                if callable(method):
+                    sync.append(method)
+                if callable(amethod):
+                    async_.append((amethod, True))
+                elif callable(method):
+                    async_.append((method, False))
+            if hook != "before_send":
+                # Results flow back through the chain in reverse
+                sync.reverse()
+                async_.reverse()
+            hooks[hook], hooks["a" + hook] = sync, async_
+        self._hooks = hooks
+
+    def __bool__(self) -> bool:
+        return bool(self._middleware)
+
+    def __len__(self) -> int:
+        return len(self._middleware)
+
+    def __iter__(self):
+        return iter(list(self._middleware))
+
+    # ---- Sync ----
+
+    def before_send(self, request: Request) -> Request:
+        for method in self._hooks["before_send"]:
+            method(request)
+        return request
+
+    def after_receive(self, request: Request, result: str) -> str:
+        for method in self._hooks["after_receive"]:
+            replaced = method(request, result)
+            if replaced is not None:
+                result = replaced
+        return result
+
+    def on_error(self, request: Request, error: Exception) -> Optional[str]:
+        for method in self._hooks["on_error"]:
+            recovered = method(request, error)
+            if recovered is not None:
+                return recovered
+        return None
+
+    # ---- Async ----
+
+    async def abefore_send(self, request: Request) -> Request:
+        for method, is_async in self._hooks["abefore_send"]:
+            if is_async:
+                await method(request)
+            else:
+                method(request)
+        return request
+
+    async def aafter_receive(self, request: Request, result: str) -> str:
+        for method, is_async in self._hooks["aafter_receive"]:
+            replaced = await method(request, result) if is_async else method(request, result)
+            if replaced is not None:
+                result = replaced
+        return result
+
+    async def aon_error(self, request: Request, error: Exception) -> Optional[str]:
+        for method, is_async in self._hooks["aon_error"]:
+            recovered = await method(request, error) if is_async else method(request, error)
+            if recovered is not None:
+                return recovered
+        return None
@@ -0,0 +1,394 @@
+# stability_multicall.py
+
+"""Aggregate many contract reads into one ``call_contract_read``.
+
+Each read is ABI-encoded locally and sent to a Multicall3-compatible
+aggregator contract in a single ZKT read, so N reads cost one HTTP round trip
+and one unit of the reads/minute quota. Results are decoded per call.
+
+Requires the optional ``eth-abi`` package (``pip install "stability-toolkit[multicall]"``).
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import re
+import threading
+
+import stability_toolkit
+from stability_toolkit import DEFAULT_API_KEY
+from stability_validation import _split_top_level, find_function, parse_function_abi
+
+try:
+    import eth_abi
+    from eth_utils import keccak
+except ImportError:  # pragma: no cover
+    eth_abi = None  # type: ignore
+    keccak = None  # type: ignore
+
+__all__ = [
+    "AGGREGATE3_ABI",
+    "MULTICALL_SOURCE",
+    "MulticallReader",
+    "parse_function_abi",
+    "encode_call",
+    "decode_result",
+]
+
+AGGREGATE3_ABI = (
+    "function aggregate3((address target, bool allowFailure, bytes callData)[] calls) "
+    "payable returns ((bool success, bytes returnData)[] returnData)"
+)
+
+# Minimal aggregator with the same ABI as Multicall3.aggregate3, deployed by
+# MulticallReader.ensure_aggregator() when no aggregator address is configured.
+MULTICALL_SOURCE = """// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.0;
+
+contract StabilityMulticall {
+    struct Call3 {
+        address target;
+        bool allowFailure;
+        bytes callData;
+    }
+
+    struct Result {
+        bool success;
+        bytes returnData;
+    }
+
+    function aggregate3(Call3[] calldata calls) public payable returns (Result[] memory returnData) {
+        returnData = new Result[](calls.length);
+        for (uint256 i = 0; i < calls.length; i++) {
+            (bool success, bytes memory data) = calls[i].target.call(calls[i].callData);
+            require(success || calls[i].allowFailure, "StabilityMulticall: call failed");
+            returnData[i] = Result(success, data);
+        }
+    }
+}
+"""
+
+# Aggregators deployed by ensure_aggregator(), per API key, shared by every reader
+_deployed: Dict[str, str] = {}
+_deploy_lock = threading.Lock()
+
+# Rejections a smaller batch may get past: an oversized request (HTTP 413,
+# size or calldata limits), the gas limit, or the aggregate3 call itself reverting
+_SPLITTABLE_ERROR = re.compile(
+    r"\b413\b|too (large|big|long)"
+    r"|\b(request|body|payload|calldata|data|size|length) (size )?(limit|exceeded|too)"
+    r"|gas limit|out of gas|execution reverted|StabilityMulticall: call failed",
+    re.I,
+)
+
+
+# ---- Encoding and decoding ----
+
+def _coerce(abi_type: str, value: Any) -> Any:
+    """Convert JSON-style values (numeric strings, hex strings) to eth-abi inputs."""
+    if abi_type.endswith("]"):
+        inner = abi_type[:abi_type.rindex("[")]
+        return [_coerce(inner, item) for item in value]
+    if abi_type.startswith("("):
+        types = _split_top_level(abi_type[1:-1])
+        return tuple(_coerce(t, v) for t, v in zip(types, value))
+    if abi_type.startswith(("uint", "int")) and isinstance(value, str):
+        return int(value, 16) if value.lower().startswith("0x") else int(value)
+    if abi_type.startswith("bytes") and isinstance(value, str):
+        return bytes.fromhex(value[2:] if value.startswith("0x") else value)
+    if abi_type == "bool" and isinstance(value, str):
+        return value.lower() == "true"
+    return value
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, bytes):
+        return "0x" + value.hex()
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    return value
+
+
+def encode_call(name: str, inputs: Sequence[str], arguments: Sequence[Any]) -> str:
+    """ABI-encode a function call and return its calldata as a hex string."""
+    if eth_abi is None:
+        raise RuntimeError("eth-abi is required for multicall aggregation")
+    selector = keccak(text=f"{name}({','.join(inputs)})")[:4]
+    encoded = eth_abi.encode(list(inputs), [_coerce(t, v) for t, v in zip(inputs, arguments)])
+    return "0x" + (selector + encoded).hex()
+
+
+def decode_result(outputs: Sequence[str], return_data: Any) -> Any:
+    """Decode return data; a single output is returned unwrapped."""
+    if eth_abi is None:
+        raise RuntimeError("eth-abi is required for multicall aggregation")
+    if isinstance(return_data, str):
+        return_data = bytes.fromhex(return_data[2:] if return_data.startswith("0x") else return_data)
+    values = _jsonable(eth_abi.decode(list(outputs), return_data))
+    return values[0] if len(values) == 1 else values
+
+
+def _normalize(abi_type: str, value: Any) -> Any:
+    """Bring an endpoint-decoded value to ``decode_result``'s shape.
+
+    Integers become ints, addresses and bytes lowercase hex, bools bools,
+    and tuples and arrays lists.
+    """
+    if abi_type.endswith("]") and isinstance(value, (list, tuple)):
+        inner = abi_type[:abi_type.rindex("[")]
+        return [_normalize(inner, item) for item in value]
+    if abi_type.startswith("(") and isinstance(value, (list, tuple)):
+        types = _split_top_level(abi_type[1:-1])
+        return [_normalize(t, v) for t, v in zip(types, value)]
+    if abi_type.startswith(("uint", "int")) and isinstance(value, str):
+        try:
+            return int(value, 16) if value.lower().startswith(("0x", "-0x")) else int(value)
+        except ValueError:
+            return value
+    if (abi_type == "address" or abi_type.startswith("bytes")) and isinstance(value, str):
+        return value.lower()
+    if abi_type == "bool" and isinstance(value, str):
+        return value.lower() == "true"
+    return value
+
+
+def _normalize_output(outputs: Sequence[str], output: Any) -> Any:
+    """``_normalize`` a plain read's output; a single output is returned unwrapped."""
+    if len(outputs) == 1:
+        # Some endpoints wrap even a single output in a list
+        if isinstance(output, list) and len(output) == 1 and not outputs[0].endswith("]") \
+                and not outputs[0].startswith("("):
+            output = output[0]
+        return _normalize(outputs[0], output)
+    if isinstance(output, (list, tuple)) and len(output) == len(outputs):
+        return [_normalize(t, v) for t, v in zip(outputs, output)]
+    return output
+
+
+def _parse_aggregate_output(response: str, expected: int) -> Optional[List[Tuple[bool, Any]]]:
+    """Extract ``(success, returnData)`` pairs from an aggregate3 read, or None on failure."""
+    try:
+        data = json.loads(response)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("success") is False:
+        return None
+    output = data.get("output")
+    if isinstance(output, str):
+        try:
+            output = json.loads(output)
+        except ValueError:
+            return None
+    if not isinstance(output, list):
+        return None
+    # The single array output may come back wrapped in an outer list
+    if len(output) == 1 and isinstance(output[0], list) and output[0] \
+            and isinstance(output[0][0], (list, dict)):
+        output = output[0]
+    if len(output) != expected:
+        return None
+    pairs = []
+    for item in output:
+        if isinstance(item, dict):
+            success, payload = item.get("success"), item.get("returnData")
+        else:
+            success, payload = item[0], item[1]
+        if isinstance(success, str):
+            success = success.lower() == "true"
+        pairs.append((bool(success), payload))
+    return pairs
+
+
+def _batch_error(response: str) -> Tuple[Any, bool]:
+    """Why an aggregate3 read failed, and whether halving the batch may help.
+
+    Only refusals for size and reverts are worth splitting. Transport errors
+    and quota refusals come back as ``Error: ...`` strings and would fail
+    the same way for every half.
+    """
+    try:
+        data = json.loads(response)
+    except (TypeError, ValueError):
+        if not isinstance(response, str) or response.startswith("Error:"):
+            return response, False
+        return response, _SPLITTABLE_ERROR.search(response) is not None
+    if isinstance(data, dict) and data.get("success") is False:
+        error = data.get("error", data)
+        return error, _SPLITTABLE_ERROR.search(str(error)) is not None
+    return f"unexpected aggregate3 output: {response}", False
+
+
+class MulticallReader:
+    """Read many contract values through one aggregated ``call_contract_read``.
+
+    Batches larger than ``max_calls_per_batch`` or ``max_calldata_bytes`` are
+    split automatically. If the endpoint rejects a batch as too large, or it
+    reverts, it is halved and retried, down to a plain ``call_contract_read``
+    for a single call; its output is normalized to the shape of aggregated
+    results (see ``decode_result``). Any other failure, such as a transport error or an
+    endpoint outage, is reported on every call in the batch without retrying.
+
+    Args:
+        aggregator: Address of a Multicall3-compatible contract. If None,
+                   ``ensure_aggregator()`` deploys ``MULTICALL_SOURCE`` on first use,
+                   once per API key: later readers in the process, and in
+                   other processes sharing ``cache``, reuse that address.
+        api_key: Stability API key used when no ``client`` is given.
+        client: Optional ``ZKTClient``; its pool is used for every request.
+        cache: ``DiskCache`` remembering deployed aggregators across
+               processes; defaults to the client's cache.
+        max_calls_per_batch: Upper bound on calls packed into one read.
+        max_calldata_bytes: Upper bound on encoded calldata per read.
+
+    Example:
+        reader = MulticallReader(aggregator="0xcA11bde05977b3631167028862bE2a173976CA11")
+        results = reader.read([
+            {"to": token, "abi": abi, "method": "balanceOf", "arguments": [holder]}
+            for holder in holders
+        ])
+        # [{"ok": True, "result": 1000}, ...]
+    """
+
+    def __init__(
+        self,
+        aggregator: Optional[str] = None,
+        api_key: str = DEFAULT_API_KEY,
+        client: Any = None,
+        max_calls_per_batch: int = 100,
+        max_calldata_bytes: int = 32_000,
+        cache: Any = None,
+    ):
+        if eth_abi is None:
+            raise RuntimeError("eth-abi is required for multicall aggregation")
+        self.aggregator = aggregator
+        self.api_key = api_key
+        self.client = client
+        self.max_calls_per_batch = max_calls_per_batch
+        self.max_calldata_bytes = max_calldata_bytes
+        self.cache = cache if cache is not None else getattr(client, "cache", None)
+
+    def _call_read(self, **kwargs: Any) -> str:
+        if self.client is not None:
+            return self.client.call_contract_read(**kwargs, api_key=self.api_key)
+        return stability_toolkit.call_contract_read(**kwargs, api_key=self.api_key)
+
+    def _call_deploy(self, **kwargs: Any) -> str:
+        if self.client is not None:
+            return self.client.deploy_contract(**kwargs, api_key=self.api_key)
+        return stability_toolkit.deploy_contract(**kwargs, api_key=self.api_key)
+
+    def ensure_aggregator(self) -> str:
+        """Return the aggregator address, deploying one if this API key has none yet."""
+        if self.aggregator:
+            return self.aggregator
+        cache_key = "multicall_aggregator:" + hashlib.sha256(self.api_key.encode("utf-8")).hexdigest()[:16]
+        # Held across the deploy so concurrent readers spend one write between them
+        with _deploy_lock:
+            address = _deployed.get(cache_key)
+            if address is None and self.cache is not None:
+                address = self.cache.get(cache_key)
+            if address is None:
+                response = self._call_deploy(code=MULTICALL_SOURCE, arguments=[], wait=True)
+                try:
+                    address = json.loads(response).get("contractAddress")
+                except (TypeError, ValueError, AttributeError):
+                    address = None
+                if not address:
+                    raise RuntimeError(f"Failed to deploy multicall aggregator: {response}")
+                if self.cache is not None:
+                    self.cache.set(cache_key, address)
+            _deployed[cache_key] = address
+        self.aggregator = address
+        return address
+
+    def _prepare(self, calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        prepared = []
+        for call in calls:
+            arguments = call.get("arguments", [])
+            name, inputs, outputs = find_function(call["abi"], call["method"], len(arguments))
+            prepared.append({
+                "call": call,
+                "outputs": outputs,
+                "calldata": encode_call(name, inputs, arguments),
+            })
+        return prepared
+
+    def _chunks(self, prepared: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        chunks: List[List[Dict[str, Any]]] = []
+        current: List[Dict[str, Any]] = []
+        size = 0
+        for item in prepared:
+            item_size = len(item["calldata"]) // 2
+            if current and (
+                len(current) >= self.max_calls_per_batch or size + item_size > self.max_calldata_bytes
+            ):
+                chunks.append(current)
+                current, size = [], 0
+            current.append(item)
+            size += item_size
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def _read_single(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        call = item["call"]
+        response = self._call_read(
+            to=call["to"], abi=call["abi"], method=call["method"],
+            arguments=call.get("arguments", []), id=call.get("id", 1),
+        )
+        try:
+            data = json.loads(response)
+        except (TypeError, ValueError):
+            return {"ok": False, "error": response}
+        if not isinstance(data, dict) or data.get("success") is False:
+            return {"ok": False, "error": data.get("error", data) if isinstance(data, dict) else data}
+        # Same shape as an aggregated result, however the batch was split
+        return {"ok": True, "result": _normalize_output(item["outputs"], data.get("output"))}
+
+    def _read_chunk(self, chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        response = self._call_read(
+            to=self.ensure_aggregator(),
+            abi=[AGGREGATE3_ABI],
+            method="aggregate3",
+            arguments=[[[item["call"]["to"], True, item["calldata"]] for item in chunk]],
+        )
+        pairs = _parse_aggregate_output(response, len(chunk))
+        if pairs is None:
+            error, splittable = _batch_error(response)
+            if not splittable:
+                return [{"ok": False, "error": error} for _ in chunk]
+            if len(chunk) == 1:
+                # Even one call is too much for aggregate3: read it directly
+                return [self._read_single(chunk[0])]
+            # Oversized or reverted batch: split in half and retry each side
+            middle = len(chunk) // 2
+            return self._read_chunk(chunk[:middle]) + self._read_chunk(chunk[middle:])
+
+        results = []
+        for item, (success, return_data) in zip(chunk, pairs):
+            if not success:
+                results.append({"ok": False, "error": "call reverted", "returnData": return_data})
+                continue
+            try:
+                results.append({"ok": True, "result": decode_result(item["outputs"], return_data)})
+            except Exception as e:
+                results.append({"ok": False, "error": f"decode failed: {e}"})
+        return results
+
+    def read(self, calls: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Read every call and return ``{"ok", "result"|"error"}`` dicts in input order.
+
+        Each call holds the keyword arguments of ``call_contract_read``
+        (``to``, ``abi``, ``method``, ``arguments``).
+        """
+        prepared = self._prepare(list(calls))
+        chunks = self._chunks(prepared)
+        if self.client is not None and len(chunks) > 1:
+            self.ensure_aggregator()
+            workers = min(self.client.max_concurrency, len(chunks))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                chunk_results = list(executor.map(self._read_chunk, chunks))
+        else:
+            chunk_results = [self._read_chunk(chunk) for chunk in chunks]
+        return [result for results in chunk_results for result in results]
@@ -0,0 +1,234 @@
+# stability_ratelimit.py
+
+"""Host-wide read rate limiting and write quota tracking.
+
+State lives in a small SQLite file, so every process on the machine that
+opens the same path (toolkits, workers, MCP servers) draws from one budget
+per API key.
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+import asyncio
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+__all__ = [
+    "RateLimitExceeded",
+    "WriteQuotaExceeded",
+    "SharedRateLimiter",
+    "DEFAULT_RATE_LIMIT_PATH",
+]
+
+# Free tier limits: 200 reads/minute and 1000 writes/month per key
+DEFAULT_READS_PER_MINUTE = 200
+DEFAULT_WRITES_PER_MONTH = 1000
+DEFAULT_RATE_LIMIT_PATH = os.path.join(tempfile.gettempdir(), "stability-ratelimit.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS read_buckets (
+    key TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS write_quotas (
+    key TEXT NOT NULL,
+    period TEXT NOT NULL,
+    used INTEGER NOT NULL,
+    PRIMARY KEY (key, period)
+);
+"""
+
+
+class RateLimitExceeded(RuntimeError):
+    """Raised when a read cannot get a token within ``max_wait`` seconds."""
+
+
+class WriteQuotaExceeded(RateLimitExceeded):
+    """Raised when the monthly write quota for a key is used up."""
+
+
+def _key_id(api_key: str) -> str:
+    # Never store the raw API key on disk
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:32]
+
+
+def _current_period() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m")
+
+
+class SharedRateLimiter:
+    """Token bucket for reads and a monthly counter for writes, shared via SQLite.
+
+    Args:
+        path: State file; every process using the same path shares limits.
+        reads_per_minute: Sustained read rate per API key.
+        read_burst: Bucket capacity (defaults to ``reads_per_minute``).
+        writes_per_month: Writes allowed per API key per calendar month (UTC).
+        max_wait: Longest a read waits for a token before ``RateLimitExceeded``.
+
+    Writes are counted before they are sent. When the transport raises, the
+    toolkit gives the write back with ``release_write``, so a write that timed
+    out after reaching the API goes uncounted here (the API still counts it).
+
+    Example:
+        limiter = SharedRateLimiter()   # same default file for all processes
+        set_rate_limiter(limiter)       # from stability_toolkit
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_RATE_LIMIT_PATH,
+        reads_per_minute: float = DEFAULT_READS_PER_MINUTE,
+        read_burst: Optional[float] = None,
+        writes_per_month: int = DEFAULT_WRITES_PER_MONTH,
+        max_wait: float = 60.0,
+    ):
+        self.path = path
+        self.read_rate = reads_per_minute / 60.0
+        self.read_burst = float(read_burst if read_burst is not None else reads_per_minute)
+        self.writes_per_month = writes_per_month
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30.0, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def _try_read(self, api_key: str) -> float:
+        """Take a read token if available; otherwise return seconds to wait."""
+        key = _key_id(api_key)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = self._conn.execute(
+                    "SELECT tokens, updated_at FROM read_buckets WHERE key = ?", (key,)
+                ).fetchone()
+                tokens = self.read_burst if row is None else min(
+                    self.read_burst, row[0] + (now - row[1]) * self.read_rate
+                )
+                wait = 0.0
+                if tokens >= 1.0:
+                    tokens -= 1.0
+                else:
+                    wait = (1.0 - tokens) / self.read_rate
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO read_buckets (key, tokens, updated_at) VALUES (?, ?, ?)",
+                    (key, tokens, now),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return wait
+
+    def try_acquire_read(self, api_key: str) -> bool:
+        """Take a read token only if one is available right now."""
+        return self._try_read(api_key) == 0.0
+
+    def acquire_read(self, api_key: str) -> float:
+        """Block until a read token is available; return the time waited."""
+        waited = 0.0
+        while True:
+            wait = self._try_read(api_key)
+            if wait == 0.0:
+                return waited
+            if waited + wait > self.max_wait:
+                raise RateLimitExceeded(
+                    f"Read rate limit reached; no token available within {self.max_wait:g}s"
+                )
+            time.sleep(wait)
+            waited += wait
+
+    async def aacquire_read(self, api_key: str) -> float:
+        """Async variant of ``acquire_read``; the SQLite work runs off the event loop."""
+        waited = 0.0
+        while True:
+            wait = await asyncio.to_thread(self._try_read, api_key)
+            if wait == 0.0:
+                return waited
+            if waited + wait > self.max_wait:
+                raise RateLimitExceeded(
+                    f"Read rate limit reached; no token available within {self.max_wait:g}s"
+                )
+            await asyncio.sleep(wait)
+            waited += wait
+
+    def acquire_write(self, api_key: str) -> int:
+        """Count one write against this month's quota; return writes remaining."""
+        key, period = _key_id(api_key), _current_period()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT used FROM write_quotas WHERE key = ? AND period = ?", (key, period)
+                ).fetchone()
+                used = row[0] if row else 0
+                if used >= self.writes_per_month:
+                    self._conn.execute("COMMIT")
+                    raise WriteQuotaExceeded(
+                        f"Monthly write quota of {self.writes_per_month} used up for {period}"
+                    )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO write_quotas (key, period, used) VALUES (?, ?, ?)",
+                    (key, period, used + 1),
+                )
+                self._conn.execute("COMMIT")
+            except WriteQuotaExceeded:
+                raise
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self.writes_per_month - used - 1
+
+    async def aacquire_write(self, api_key: str) -> int:
+        """Async variant of ``acquire_write``; the SQLite work runs off the event loop."""
+        return await asyncio.to_thread(self.acquire_write, api_key)
+
+    def release_write(self, api_key: str) -> None:
+        """Give back a write counted by ``acquire_write`` whose request never completed."""
+        key, period = _key_id(api_key), _current_period()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE write_quotas SET used = used - 1 WHERE key = ? AND period = ? AND used > 0",
+                (key, period),
+            )
+
+    async def arelease_write(self, api_key: str) -> None:
+        """Async variant of ``release_write``."""
+        await asyncio.to_thread(self.release_write, api_key)
+
+    def writes_used(self, api_key: str) -> int:
+        """Writes counted for this key in the current month."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT used FROM write_quotas WHERE key = ? AND period = ?",
+                (_key_id(api_key), _current_period()),
+            ).fetchone()
+        return row[0] if row else 0
+
+    def status(self, api_key: str) -> Dict[str, Any]:
+        """Current read tokens and write usage for a key."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT tokens, updated_at FROM read_buckets WHERE key = ?", (_key_id(api_key),)
+            ).fetchone()
+        tokens = self.read_burst if row is None else min(
+            self.read_burst, row[0] + (time.time() - row[1]) * self.read_rate
+        )
+        used = self.writes_used(api_key)
+        return {
+            "read_tokens": tokens,
+            "writes_used": used,
+            "writes_remaining": max(self.writes_per_month - used, 0),
+            "period": _current_period(),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,430 @@
+# stability_scheduler.py
+
+"""Priority lanes and per-tenant fair scheduling for outgoing ZKT requests."""
+
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Union
+import asyncio
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+
+from stability_ledger import api_key_alias
+
+__all__ = [
+    "PRIORITIES",
+    "RequestScheduler",
+    "request_class",
+]
+
+# Lower value is served first
+PRIORITIES = {"interactive": 0, "normal": 1, "bulk": 2}
+
+_priority: ContextVar[int] = ContextVar("stability_priority", default=PRIORITIES["normal"])
+_tenant: ContextVar[str] = ContextVar("stability_tenant", default="default")
+
+Priority = Union[str, int]
+
+
+def _priority_value(priority: Priority) -> int:
+    if isinstance(priority, int):
+        return priority
+    try:
+        return PRIORITIES[priority]
+    except KeyError:
+        raise ValueError(f"Unknown priority: {priority!r} (expected one of {', '.join(PRIORITIES)})") from None
+
+
+@contextmanager
+def request_class(priority: Optional[Priority] = None, tenant: Optional[str] = None) -> Iterator[None]:
+    """Tag every request made inside the block with a priority and tenant.
+
+    Works for module functions, ``ZKTClient`` and tools alike, in threads and
+    asyncio tasks started inside the block.
+
+    Example:
+        with request_class(priority="bulk", tenant="nightly-export"):
+            client.read_many(calls)
+    """
+    tokens = []
+    if priority is not None:
+        tokens.append((_priority, _priority.set(_priority_value(priority))))
+    if tenant is not None:
+        tokens.append((_tenant, _tenant.set(tenant)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def _period(timestamp: float) -> str:
+    """Calendar month (UTC) of ``timestamp``, the write quota window."""
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m")
+
+
+def _next_month(now: datetime) -> datetime:
+    if now.month == 12:
+        return datetime(now.year + 1, 1, 1, tzinfo=timezone.utc)
+    return datetime(now.year, now.month + 1, 1, tzinfo=timezone.utc)
+
+
+class _Waiter:
+    __slots__ = ("priority", "tenant", "start", "finish", "event", "future", "loop", "granted", "cancelled")
+
+    def __init__(self, priority: int, tenant: str):
+        self.priority = priority
+        self.tenant = tenant
+        self.start = 0.0
+        self.finish = 0.0
+        self.event: Optional[threading.Event] = None
+        self.future: Optional[asyncio.Future] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.granted = False
+        self.cancelled = False
+
+    def wake(self) -> None:
+        if self.future is not None:
+            self.loop.call_soon_threadsafe(lambda: self.future.done() or self.future.set_result(None))
+        else:
+            self.event.set()
+
+
+class RequestScheduler:
+    """Admission control in front of every ZKT request.
+
+    Waiting requests are served strictly by priority class (``interactive``,
+    then ``normal``, then ``bulk``); within a class, tenants share capacity in
+    proportion to their weights (start-time fair queueing), so one tenant's
+    backlog cannot starve another's. ``max_in_flight`` bounds concurrent
+    requests and ``requests_per_minute`` paces admissions, so a quota-sized
+    pace hands the reads/minute budget to high-priority requests first.
+
+    When a ``rate_limiter`` is given, ``bulk`` writes are deferred once the
+    month's remaining writes drop to ``write_reserve``. Each deferred write
+    keeps its tenant and API key, and ``ZKTClient`` resubmits a key's
+    deferred writes itself on its first send in a later month
+    (``flush_due``); ``flush_deferred`` resubmits them on demand. With
+    ``deferred_path`` set they are also appended there as JSON lines,
+    reloaded by a scheduler opened on the same file, and dropped from it
+    once flushed. The file holds an alias of the key, not the key, so after
+    a restart a write goes out once a client sends with its key again.
+
+    Args:
+        max_in_flight: Requests allowed to run at once.
+        requests_per_minute: Optional admission pace across all lanes.
+        tenant_weights: Relative share per tenant name (default weight 1).
+        rate_limiter: ``SharedRateLimiter`` consulted for remaining writes.
+        write_reserve: Writes kept back for ``interactive``/``normal`` work.
+        deferred_path: Optional JSONL file keeping deferred writes across restarts.
+
+    Example:
+        scheduler = RequestScheduler(
+            max_in_flight=8,
+            requests_per_minute=200,
+            tenant_weights={"agents": 4, "backfill": 1},
+            rate_limiter=SharedRateLimiter(),
+        )
+        set_scheduler(scheduler)  # from stability_toolkit
+        with request_class(priority="interactive", tenant="agents"):
+            ...
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 16,
+        requests_per_minute: Optional[float] = None,
+        tenant_weights: Optional[Dict[str, float]] = None,
+        rate_limiter: Any = None,
+        write_reserve: int = 50,
+        deferred_path: Optional[str] = None,
+    ):
+        self.max_in_flight = max_in_flight
+        self.requests_per_minute = requests_per_minute
+        self.tenant_weights = dict(tenant_weights or {})
+        self.rate_limiter = rate_limiter
+        self.write_reserve = write_reserve
+        self.deferred_path = deferred_path
+        self._lock = threading.Lock()
+        self._queues: Dict[int, List[Any]] = {}
+        self._seq = itertools.count()
+        self._virtual_time: Dict[int, float] = {}
+        self._last_finish: Dict[tuple, float] = {}
+        self._in_flight = 0
+        self._tokens = 1.0
+        self._refilled_at = time.monotonic()
+        self._timer: Optional[threading.Timer] = None
+        self._granted: Dict[str, int] = {}
+        self._deferred: List[Dict[str, Any]] = self._load_deferred()
+        # Alias -> API key for deferred writes; kept in memory only
+        self._api_keys: Dict[str, str] = {}
+
+    # ---- Fair queueing ----
+
+    def _enqueue(self, waiter: _Waiter) -> None:
+        weight = self.tenant_weights.get(waiter.tenant, 1.0)
+        virtual_time = self._virtual_time.get(waiter.priority, 0.0)
+        waiter.start = max(virtual_time, self._last_finish.get((waiter.priority, waiter.tenant), 0.0))
+        waiter.finish = waiter.start + 1.0 / weight
+        self._last_finish[(waiter.priority, waiter.tenant)] = waiter.finish
+        heapq.heappush(
+            self._queues.setdefault(waiter.priority, []),
+            (waiter.start, waiter.finish, next(self._seq), waiter),
+        )
+
+    def _take_token(self) -> float:
+        """Consume an admission token; return 0 or the seconds until one is available."""
+        if not self.requests_per_minute:
+            return 0.0
+        rate = self.requests_per_minute / 60.0
+        now = time.monotonic()
+        self._tokens = min(1.0, self._tokens + (now - self._refilled_at) * rate)
+        self._refilled_at = now
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return 0.0
+        return (1.0 - self._tokens) / rate
+
+    def _next_waiter(self) -> Optional[_Waiter]:
+        for priority in sorted(self._queues):
+            queue = self._queues[priority]
+            while queue and queue[0][3].cancelled:
+                heapq.heappop(queue)
+            if queue:
+                return queue[0][3]
+        return None
+
+    def _dispatch(self) -> None:
+        """Grant waiting requests while capacity allows. Caller holds the lock."""
+        while self._in_flight < self.max_in_flight:
+            waiter = self._next_waiter()
+            if waiter is None:
+                return
+            wait = self._take_token()
+            if wait:
+                if self._timer is None:
+                    self._timer = threading.Timer(wait, self._on_timer)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+            heapq.heappop(self._queues[waiter.priority])
+            self._virtual_time[waiter.priority] = waiter.start
+            self._in_flight += 1
+            self._granted[waiter.tenant] = self._granted.get(waiter.tenant, 0) + 1
+            waiter.granted = True
+            waiter.wake()
+
+    def _on_timer(self) -> None:
+        with self._lock:
+            self._timer = None
+            self._dispatch()
+
+    def _release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self._dispatch()
+
+    @staticmethod
+    def current_class() -> tuple:
+        """``(priority, tenant)`` of the calling context."""
+        return _priority.get(), _tenant.get()
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Block until this context's request is admitted, then hold a slot."""
+        waiter = _Waiter(*self.current_class())
+        waiter.event = threading.Event()
+        with self._lock:
+            self._enqueue(waiter)
+            self._dispatch()
+        waiter.event.wait()
+        try:
+            yield
+        finally:
+            self._release()
+
+    @asynccontextmanager
+    async def aslot(self):
+        """Async variant of ``slot``; a cancelled waiter leaves the queue."""
+        waiter = _Waiter(*self.current_class())
+        waiter.loop = asyncio.get_running_loop()
+        waiter.future = waiter.loop.create_future()
+        with self._lock:
+            self._enqueue(waiter)
+            self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                granted = waiter.granted
+                waiter.cancelled = True
+            if granted:
+                self._release()
+            raise
+        try:
+            yield
+        finally:
+            self._release()
+
+    # ---- Write deferral ----
+
+    def defer_reason(self, kind: str, api_key: str) -> Optional[str]:
+        """Why a write from this context should wait for the next quota window, if it should."""
+        if self.rate_limiter is None or kind == "call_contract_read":
+            return None
+        if _priority.get() < PRIORITIES["bulk"]:
+            return None
+        remaining = self.rate_limiter.status(api_key)["writes_remaining"]
+        if remaining > self.write_reserve:
+            return None
+        resume_at = _next_month(datetime.now(timezone.utc)).isoformat()
+        return (
+            f"Error: low-priority write deferred until {resume_at}; {remaining} write(s) left "
+            f"this month are reserved for higher-priority work"
+        )
+
+    def _load_deferred(self) -> List[Dict[str, Any]]:
+        """Deferred writes left in ``deferred_path`` by an earlier run."""
+        if not self.deferred_path or not os.path.exists(self.deferred_path):
+            return []
+        entries = []
+        with open(self.deferred_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    # Blank, or torn by a crash mid-append
+                    continue
+        return entries
+
+    def _save_deferred(self) -> None:
+        """Rewrite ``deferred_path`` to hold exactly the pending writes. Caller holds the lock."""
+        if not self.deferred_path:
+            return
+        tmp = f"{self.deferred_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for entry in self._deferred:
+                f.write(json.dumps(entry, default=str) + "\n")
+        os.replace(tmp, self.deferred_path)
+
+    def defer(self, payload: Dict[str, Any], tenant: Optional[str] = None, api_key: Optional[str] = None) -> None:
+        """Keep a deferred write for ``flush_due``/``flush_deferred``."""
+        entry = {"payload": payload, "tenant": tenant or _tenant.get(), "deferred_at": time.time()}
+        if api_key is not None:
+            entry["api_key_alias"] = api_key_alias(api_key)
+        with self._lock:
+            if api_key is not None:
+                self._api_keys[entry["api_key_alias"]] = api_key
+            self._deferred.append(entry)
+            if self.deferred_path:
+                with open(self.deferred_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, default=str) + "\n")
+
+    def deferred(self) -> List[Dict[str, Any]]:
+        """Writes waiting for the next quota window."""
+        with self._lock:
+            return list(self._deferred)
+
+    def _take(self, api_key: Optional[str], due_only: bool) -> List[tuple]:
+        """Remove and return ``(entry, api_key)`` for the writes to resubmit."""
+        alias = api_key_alias(api_key) if api_key is not None else None
+        period = _period(time.time())
+        with self._lock:
+            if alias is not None:
+                self._api_keys[alias] = api_key
+            taken, kept = [], []
+            for entry in self._deferred:
+                mine = alias is None or entry.get("api_key_alias") == alias
+                if mine and (not due_only or _period(entry["deferred_at"]) < period):
+                    taken.append((entry, self._api_keys.get(entry.get("api_key_alias"))))
+                else:
+                    kept.append(entry)
+            self._deferred = kept
+        return taken
+
+    def _requeue(self, unsent: List[tuple]) -> None:
+        with self._lock:
+            self._deferred[:0] = [entry for entry, _ in unsent]
+
+    def has_due(self, api_key: str) -> bool:
+        """Whether ``api_key`` has writes deferred in an earlier quota window."""
+        if not self._deferred:
+            return False
+        alias, period = api_key_alias(api_key), _period(time.time())
+        with self._lock:
+            return any(
+                entry.get("api_key_alias") == alias and _period(entry["deferred_at"]) < period
+                for entry in self._deferred
+            )
+
+    def flush_deferred(self, send: Any, api_key: Optional[str] = None, due_only: bool = False) -> List[str]:
+        """Resubmit deferred writes through ``send(payload, api_key)`` (e.g. ``client.post``).
+
+        ``api_key`` limits the flush to that key's writes; otherwise each
+        write goes out with the key it was deferred under, or None when
+        that is unknown (e.g. after a restart). Writes that are deferred
+        again stay queued. If ``send`` raises, the write it was given and
+        those after it stay queued too. ``deferred_path`` keeps every entry
+        until the flush ends, so a crash mid-flush resends rather than
+        loses writes.
+        """
+        pending = self._take(api_key, due_only)
+        results: List[str] = []
+        try:
+            for entry, key in pending:
+                with request_class(priority="bulk", tenant=entry["tenant"]):
+                    results.append(send(entry["payload"], key))
+        except BaseException:
+            self._requeue(pending[len(results):])
+            raise
+        finally:
+            with self._lock:
+                self._save_deferred()
+        return results
+
+    async def aflush_deferred(self, send: Any, api_key: Optional[str] = None, due_only: bool = False) -> List[str]:
+        """Async variant of ``flush_deferred`` for a coroutine ``send`` (e.g. ``client.apost``)."""
+        pending = self._take(api_key, due_only)
+        results: List[str] = []
+        try:
+            for entry, key in pending:
+                with request_class(priority="bulk", tenant=entry["tenant"]):
+                    results.append(await send(entry["payload"], key))
+        except BaseException:
+            self._requeue(pending[len(results):])
+            raise
+        finally:
+            with self._lock:
+                self._save_deferred()
+        return results
+
+    def flush_due(self, send: Any, api_key: str) -> List[str]:
+        """Resubmit ``api_key``'s writes deferred in an earlier month; ``ZKTClient`` calls this on send."""
+        if not self.has_due(api_key):
+            return []
+        return self.flush_deferred(send, api_key, due_only=True)
+
+    async def aflush_due(self, send: Any, api_key: str) -> List[str]:
+        """Async variant of ``flush_due``."""
+        if not self.has_due(api_key):
+            return []
+        return await self.aflush_deferred(send, api_key, due_only=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth per priority, in-flight count, grants per tenant and deferrals."""
+        with self._lock:
+            names = {value: name for name, value in PRIORITIES.items()}
+            return {
+                "in_flight": self._in_flight,
+                "queued": {
+                    names.get(priority, str(priority)): sum(1 for item in queue if not item[3].cancelled)
+                    for priority, queue in self._queues.items()
+                },
+                "granted": dict(self._granted),
+                "deferred": len(self._deferred),
+            }
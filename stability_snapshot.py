@@ -0,0 +1,280 @@
+# stability_snapshot.py
+
+"""Stream one contract read across many arguments into CSV, Parquet or Arrow files.
+
+Parquet and Arrow output need the optional ``pyarrow`` package
+(``pip install "stability-toolkit[snapshot]"``); CSV needs nothing extra.
+"""
+
+from decimal import Decimal
+from itertools import count, islice
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import csv
+import json
+import os
+
+from stability_toolkit import ZKTClient
+from stability_validation import _INT_RE, _functions, find_function
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover
+    pyarrow = None  # type: ignore
+
+__all__ = [
+    "SnapshotJob",
+    "decode_read",
+]
+
+FORMATS = {".csv": "csv", ".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow"}
+
+# Widest integer a decimal256 column holds exactly
+_DECIMAL_DIGITS = 76
+
+
+def _to_value(abi_type: str, value: Any) -> Any:
+    """Convert one JSON-style ABI value to the Python type of its column."""
+    if value is None:
+        return None
+    if _INT_RE.match(abi_type):
+        if isinstance(value, str):
+            return int(value, 16) if value.lower().startswith(("0x", "-0x")) else int(value)
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"expected an integer for {abi_type}, got {value!r}")
+        return int(value)
+    if abi_type == "bool":
+        return value.lower() == "true" if isinstance(value, str) else bool(value)
+    if isinstance(value, (list, tuple, dict)):
+        return json.dumps(value, separators=(",", ":"))
+    return str(value)
+
+
+def decode_read(outputs: Sequence[str], response: str) -> Tuple[Optional[List[Any]], Optional[str]]:
+    """Turn a ``call_contract_read`` response into typed output values.
+
+    Returns ``(values, None)`` on success or ``(None, error)``.
+    """
+    try:
+        data = json.loads(response)
+    except (TypeError, ValueError):
+        return None, response
+    if not isinstance(data, dict) or data.get("success") is False:
+        error = data.get("error", data) if isinstance(data, dict) else data
+        return None, error if isinstance(error, str) else json.dumps(error)
+    output = data.get("output")
+    if len(outputs) == 1:
+        # A single output may come back wrapped in a one-item list
+        if isinstance(output, list) and len(output) == 1 and not outputs[0].endswith("]"):
+            output = output[0]
+        output = [output]
+    elif isinstance(output, str):
+        try:
+            output = json.loads(output)
+        except ValueError:
+            pass
+    if not isinstance(output, list) or len(output) != len(outputs):
+        return None, f"unexpected output: {json.dumps(output)}"
+    try:
+        return [_to_value(t, v) for t, v in zip(outputs, output)], None
+    except ValueError as e:
+        return None, f"decode failed: {e}"
+
+
+def _arrow_type(abi_type: str) -> Any:
+    match = _INT_RE.match(abi_type)
+    if match:
+        unsigned, bits = match.groups()
+        if int(bits or 256) <= 64:
+            return pyarrow.uint64() if unsigned else pyarrow.int64()
+        return pyarrow.decimal256(_DECIMAL_DIGITS, 0)
+    if abi_type == "bool":
+        return pyarrow.bool_()
+    return pyarrow.string()
+
+
+class _CsvWriter:
+    def __init__(self, path: str, columns: List[Tuple[str, str]]):
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow([name for name, _ in columns])
+
+    def write(self, rows: List[List[Any]]) -> None:
+        self._writer.writerows(
+            [["" if v is None else ("true" if v is True else "false" if v is False else v) for v in row]
+             for row in rows]
+        )
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class _ArrowWriter:
+    def __init__(self, path: str, columns: List[Tuple[str, str]], parquet: bool):
+        if pyarrow is None:
+            raise RuntimeError("pyarrow is required for Parquet and Arrow snapshots")
+        self._types = [_arrow_type(abi_type) for _, abi_type in columns]
+        self._schema = pyarrow.schema([(name, t) for (name, _), t in zip(columns, self._types)])
+        if parquet:
+            self._writer = pyarrow.parquet.ParquetWriter(path, self._schema)
+        else:
+            self._writer = pyarrow.ipc.new_file(path, self._schema)
+
+    def write(self, rows: List[List[Any]]) -> None:
+        arrays = []
+        for i, arrow_type in enumerate(self._types):
+            values = [row[i] for row in rows]
+            if pyarrow.types.is_decimal(arrow_type):
+                values = [None if v is None else Decimal(v) for v in values]
+            arrays.append(pyarrow.array(values, type=arrow_type))
+        self._writer.write_batch(pyarrow.RecordBatch.from_arrays(arrays, schema=self._schema))
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+class SnapshotJob:
+    """Read ``method`` for every item of a generator and stream typed rows to disk.
+
+    Items are pulled lazily ``chunk_size`` at a time, read concurrently with
+    ``ZKTClient.read_many``, decoded and written as one chunk, so memory stays
+    bounded however long the generator is. Each item is the argument list, a
+    single argument for one-argument methods, or a dict with ``to`` and/or
+    ``arguments`` to read a different contract per row.
+
+    Rows have ``index`` and ``to`` columns, one column per argument, ``ok``,
+    one column per output and ``error``. Integer outputs up to 64 bits become
+    ``int64``/``uint64`` columns and wider ones ``decimal256(76, 0)`` in
+    Parquet/Arrow (values beyond 76 digits are left null with an error); CSV
+    writes exact decimal integers.
+
+    Args:
+        to: Contract address, unless every item gives its own.
+        abi: ABI containing ``method``.
+        method: View function to read.
+        items: Iterable of argument lists (may be a generator).
+        client: ``ZKTClient`` to read with; one is created (and closed) if omitted.
+        api_key: Key for the created client.
+        max_concurrency: Reads in flight at once.
+        chunk_size: Items read and written per chunk.
+        argument_names: Column names for the arguments (default ``arg0``...).
+        output_names: Column names for the outputs (default ``value`` or ``value0``...).
+
+    Example:
+        job = SnapshotJob(token, abi, "balanceOf", holders, output_names=["balance"])
+        job.export("balances.parquet")
+    """
+
+    def __init__(
+        self,
+        to: Optional[str],
+        abi: Any,
+        method: str,
+        items: Iterable[Any],
+        client: Optional[ZKTClient] = None,
+        api_key: Optional[str] = None,
+        max_concurrency: int = 16,
+        chunk_size: int = 1000,
+        argument_names: Optional[Sequence[str]] = None,
+        output_names: Optional[Sequence[str]] = None,
+    ):
+        self.to = to
+        self.abi = abi
+        self.method = method
+        self.items = items
+        self.client = client
+        self.api_key = api_key
+        self.max_concurrency = max_concurrency
+        self.chunk_size = chunk_size
+        self.argument_names = argument_names
+        self.output_names = output_names
+
+    def _call(self, item: Any) -> Dict[str, Any]:
+        if isinstance(item, dict):
+            to, arguments = item.get("to", self.to), item.get("arguments", [])
+        else:
+            to, arguments = self.to, list(item) if isinstance(item, (list, tuple)) else [item]
+        return {"to": to, "abi": self.abi, "method": self.method, "arguments": arguments}
+
+    def _columns(self, inputs: List[str], outputs: List[str]) -> List[Tuple[str, str]]:
+        argument_names = self.argument_names or [f"arg{i}" for i in range(len(inputs))]
+        output_names = self.output_names or (
+            ["value"] if len(outputs) == 1 else [f"value{i}" for i in range(len(outputs))]
+        )
+        return (
+            [("index", "int64"), ("to", "string")]
+            + list(zip(argument_names, inputs))
+            + [("ok", "bool")]
+            + list(zip(output_names, outputs))
+            + [("error", "string")]
+        )
+
+    def _row(self, index: int, call: Dict[str, Any], inputs: List[str], outputs: List[str],
+             response: str, wide: bool) -> List[Any]:
+        values, error = decode_read(outputs, response)
+        if values is not None and wide:
+            limit = 10 ** _DECIMAL_DIGITS
+            too_wide = [i for i, t in enumerate(outputs) if _INT_RE.match(t) and values[i] is not None
+                        and abs(values[i]) >= limit]
+            if too_wide:
+                values = [None if i in too_wide else v for i, v in enumerate(values)]
+                error = f"value exceeds {_DECIMAL_DIGITS} digits"
+        try:
+            arguments = [_to_value(t, v) for t, v in zip(inputs, call["arguments"])]
+        except ValueError:
+            arguments = [None] * len(inputs)
+            error = error or f"invalid arguments: {json.dumps(call['arguments'], default=str)}"
+        return (
+            [index, call["to"]]
+            + arguments
+            + [values is not None]
+            + (values if values is not None else [None] * len(outputs))
+            + [error]
+        )
+
+    def export(self, path: str, format: Optional[str] = None) -> Dict[str, Any]:
+        """Write the snapshot to ``path`` and return row, error and chunk counts.
+
+        ``format`` is ``"csv"``, ``"parquet"`` or ``"arrow"``; by default it
+        follows the file extension.
+        """
+        format = format or FORMATS.get(os.path.splitext(path)[1].lower())
+        if format not in ("csv", "parquet", "arrow"):
+            raise ValueError(f"Unknown snapshot format for {path!r} (use .csv, .parquet or .arrow)")
+
+        items = iter(self.items)
+        first = list(islice(items, 1))
+        if first:
+            _, inputs, outputs = find_function(self.abi, self.method, len(self._call(first[0])["arguments"]))
+        else:
+            # Nothing to read: still write an empty file with the method's columns
+            overloads = [f for f in _functions(self.abi) if f[0] == self.method]
+            _, inputs, outputs = overloads[0] if overloads else find_function(self.abi, self.method, 0)
+        columns = self._columns(inputs, outputs)
+        writer = _CsvWriter(path, columns) if format == "csv" else _ArrowWriter(path, columns, format == "parquet")
+
+        client = self.client or ZKTClient(self.api_key, pool_maxsize=self.max_concurrency)
+        stats = {"rows": 0, "errors": 0, "chunks": 0, "format": format}
+        indexes = count()
+        pending = iter(first)
+        try:
+            while True:
+                chunk = [self._call(item) for item in islice(pending, self.chunk_size)]
+                chunk += [self._call(item) for item in islice(items, self.chunk_size - len(chunk))]
+                if not chunk:
+                    break
+                responses = client.read_many(chunk, self.max_concurrency)
+                rows = [
+                    self._row(next(indexes), call, inputs, outputs, response, format != "csv")
+                    for call, response in zip(chunk, responses)
+                ]
+                writer.write(rows)
+                stats["rows"] += len(rows)
+                stats["errors"] += sum(1 for row in rows if row[-1] is not None)
+                stats["chunks"] += 1
+        finally:
+            writer.close()
+            if self.client is None:
+                client.close()
+        return stats
@@ -2,9 +2,41 @@
 
 """Core Stability Toolkit implementation."""
 
-from typing import Any, List
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+import asyncio
+import contextvars
 import json
+import logging
 import os
+import threading
+import time
+import weakref
+
+from stability_cache import DiskCache, is_immutable_read
+from stability_compression import RequestCompression
+from stability_concurrency import AdaptiveConcurrency, _Sample
+from stability_endpoints import EndpointPool
+from stability_hedging import HedgePolicy
+from stability_idempotency import (
+    IdempotencyConflict,
+    IdempotencyStore,
+    SQLiteIdempotencyStore,
+    derive_idempotency_key,
+    mark_replayed,
+    request_fingerprint,
+    scoped_idempotency_key,
+)
+from stability_ledger import TransactionLedger, api_key_alias, payload_hash, payload_kind
+from stability_middleware import MiddlewareChain, Request
+from stability_ratelimit import RateLimitExceeded, SharedRateLimiter
+from stability_scheduler import RequestScheduler, request_class
+from stability_transport import create_transport
+from stability_validation import ValidationError, validate_contract_call, validate_deploy
+
+# Default in-flight limit for batched tool reads
+BATCH_READ_CONCURRENCY = 64
 
 # Environment variable support for API key
 DEFAULT_API_KEY = os.getenv("STABILITY_API_KEY", "try-it-out")
@@ -16,7 +48,19 @@ __all__ = [
     "call_contract_read",
     "call_contract_write",
     "deploy_contract",
+    "ZKTClient",
     "StabilityToolkit",
+    "set_ledger",
+    "get_ledger",
+    "set_rate_limiter",
+    "get_rate_limiter",
+    "set_idempotency_store",
+    "get_idempotency_store",
+    "set_scheduler",
+    "get_scheduler",
+    "set_endpoint_pool",
+    "get_endpoint_pool",
+    "request_class",
 ]
 
 try:
@@ -24,6 +68,8 @@ try:
 except ImportError:  # pragma: no cover
     requests = None  # type: ignore
 
+logger = logging.getLogger(__name__)
+
 
 def _sanitize_api_key_for_logging(api_key: str) -> str:
     """Sanitize API key for logging to prevent exposure."""
@@ -32,6 +78,200 @@ def _sanitize_api_key_for_logging(api_key: str) -> str:
     return f"{api_key[:8]}...{api_key[-4:]}" if len(api_key) > 12 else "***"
 
 
+# Optional transaction ledger; set_ledger() or STABILITY_LEDGER_PATH enables it
+_ledger: Optional[TransactionLedger] = None
+
+
+def set_ledger(ledger: Optional[TransactionLedger]) -> None:
+    """Record every write, message and deploy in ``ledger`` (None disables)."""
+    global _ledger
+    _ledger = ledger
+
+
+def get_ledger() -> Optional[TransactionLedger]:
+    """Return the active ledger, opening STABILITY_LEDGER_PATH on first use."""
+    global _ledger
+    if _ledger is None and os.getenv("STABILITY_LEDGER_PATH"):
+        _ledger = TransactionLedger(os.environ["STABILITY_LEDGER_PATH"])
+    return _ledger
+
+
+def _record_submission(
+    payload: dict,
+    response: str,
+    started_at: float,
+    duration: float,
+    api_key: str,
+    ledger: Optional[TransactionLedger] = None,
+) -> None:
+    """Store a non-read request in the ledger, if one is configured."""
+    ledger = ledger or get_ledger()
+    if ledger is None or payload_kind(payload) == "call_contract_read":
+        return
+    try:
+        ledger.record(
+            payload,
+            response,
+            started_at=started_at,
+            duration=duration,
+            api_key_alias=api_key_alias(api_key),
+        )
+    except Exception as e:  # pragma: no cover
+        # The ledger is bookkeeping; never fail the submission because of it.
+        # Log rather than print: stdout may be an MCP stdio channel.
+        logger.warning("Failed to record transaction in ledger: %s", e)
+
+
+async def _arecord_submission(
+    payload: dict,
+    response: str,
+    started_at: float,
+    duration: float,
+    api_key: str,
+    ledger: Optional[TransactionLedger] = None,
+) -> None:
+    """Async variant of ``_record_submission``; the SQLite insert runs off the event loop."""
+    ledger = ledger or get_ledger()
+    if ledger is None or payload_kind(payload) == "call_contract_read":
+        return
+    await asyncio.to_thread(_record_submission, payload, response, started_at, duration, api_key, ledger)
+
+
+# Optional host-wide limiter; set_rate_limiter() or STABILITY_RATE_LIMIT_PATH enables it
+_rate_limiter: Optional[SharedRateLimiter] = None
+
+
+def set_rate_limiter(limiter: Optional[SharedRateLimiter]) -> None:
+    """Throttle reads and count writes through ``limiter`` (None disables)."""
+    global _rate_limiter
+    _rate_limiter = limiter
+
+
+def get_rate_limiter() -> Optional[SharedRateLimiter]:
+    """Return the active limiter, opening STABILITY_RATE_LIMIT_PATH on first use."""
+    global _rate_limiter
+    if _rate_limiter is None and os.getenv("STABILITY_RATE_LIMIT_PATH"):
+        _rate_limiter = SharedRateLimiter(os.environ["STABILITY_RATE_LIMIT_PATH"])
+    return _rate_limiter
+
+
+def _acquire_quota(
+    payload: dict, api_key: str, limiter: Optional[SharedRateLimiter] = None
+) -> Optional[str]:
+    """Take a read token or a write from the quota; return an error text if refused."""
+    limiter = limiter or get_rate_limiter()
+    if limiter is None:
+        return None
+    try:
+        if payload_kind(payload) == "call_contract_read":
+            limiter.acquire_read(api_key)
+        else:
+            limiter.acquire_write(api_key)
+    except RateLimitExceeded as e:
+        return f"Error: {e}"
+    return None
+
+
+async def _aacquire_quota(
+    payload: dict, api_key: str, limiter: Optional[SharedRateLimiter] = None
+) -> Optional[str]:
+    """Async variant of ``_acquire_quota``; waits for read tokens without blocking the loop."""
+    limiter = limiter or get_rate_limiter()
+    if limiter is None:
+        return None
+    try:
+        if payload_kind(payload) == "call_contract_read":
+            await limiter.aacquire_read(api_key)
+        else:
+            await limiter.aacquire_write(api_key)
+    except RateLimitExceeded as e:
+        return f"Error: {e}"
+    return None
+
+
+def _refund_quota(payload: dict, api_key: str, limiter: Optional[SharedRateLimiter] = None) -> None:
+    """Give back the write counted for a send the transport failed to complete."""
+    limiter = limiter or get_rate_limiter()
+    if limiter is not None and payload_kind(payload) != "call_contract_read":
+        limiter.release_write(api_key)
+
+
+async def _arefund_quota(payload: dict, api_key: str, limiter: Optional[SharedRateLimiter] = None) -> None:
+    limiter = limiter or get_rate_limiter()
+    if limiter is not None and payload_kind(payload) != "call_contract_read":
+        await limiter.arelease_write(api_key)
+
+
+# Optional duplicate-write suppression; set_idempotency_store() or
+# STABILITY_IDEMPOTENCY_PATH enables it for module functions and clients
+_idempotency_store: Optional[IdempotencyStore] = None
+
+# Honours explicit idempotency_key arguments when no store is configured
+_fallback_idempotency_store = IdempotencyStore()
+
+
+def set_idempotency_store(store: Optional[IdempotencyStore]) -> None:
+    """Deduplicate writes, messages and deploys through ``store`` (None disables)."""
+    global _idempotency_store
+    _idempotency_store = store
+
+
+def get_idempotency_store() -> Optional[IdempotencyStore]:
+    """Return the active store, opening STABILITY_IDEMPOTENCY_PATH on first use."""
+    global _idempotency_store
+    if _idempotency_store is None and os.getenv("STABILITY_IDEMPOTENCY_PATH"):
+        _idempotency_store = SQLiteIdempotencyStore(os.environ["STABILITY_IDEMPOTENCY_PATH"])
+    return _idempotency_store
+
+
+# Optional request scheduler (priority lanes, tenant fairness); see set_scheduler()
+_scheduler: Optional[RequestScheduler] = None
+
+
+def set_scheduler(scheduler: Optional[RequestScheduler]) -> None:
+    """Admit every request through ``scheduler`` (None disables)."""
+    global _scheduler
+    _scheduler = scheduler
+
+
+def get_scheduler() -> Optional[RequestScheduler]:
+    """Return the active request scheduler, if any."""
+    return _scheduler
+
+
+# Optional pool of ZKT endpoints (latency routing, failover); see set_endpoint_pool()
+_endpoint_pool: Optional[EndpointPool] = None
+
+
+def set_endpoint_pool(pool: Optional[EndpointPool]) -> None:
+    """Route requests through ``pool`` instead of API_URL_TEMPLATE (None disables)."""
+    global _endpoint_pool
+    _endpoint_pool = pool
+
+
+def get_endpoint_pool() -> Optional[EndpointPool]:
+    """Return the active pool, built from comma-separated STABILITY_ENDPOINTS on first use."""
+    global _endpoint_pool
+    if _endpoint_pool is None and os.getenv("STABILITY_ENDPOINTS"):
+        _endpoint_pool = EndpointPool(url.strip() for url in os.environ["STABILITY_ENDPOINTS"].split(",") if url.strip())
+    return _endpoint_pool
+
+
+def _flush_due(scheduler: RequestScheduler, send: Callable[[dict, Optional[str]], str], api_key: str) -> None:
+    """Resubmit writes deferred for ``api_key`` in an earlier quota window; failures stay queued."""
+    try:
+        scheduler.flush_due(send, api_key)
+    except Exception as e:
+        logger.warning("Failed to resubmit deferred writes: %s", e)
+
+
+async def _aflush_due(scheduler: RequestScheduler, send: Callable[..., Any], api_key: str) -> None:
+    try:
+        await scheduler.aflush_due(send, api_key)
+    except Exception as e:
+        logger.warning("Failed to resubmit deferred writes: %s", e)
+
+
 def _post_request(payload: dict, api_key: str = DEFAULT_API_KEY) -> str:
     """Send a POST request to the Stability API and return the response text."""
     if requests is None:
@@ -43,17 +283,798 @@ def _post_request(payload: dict, api_key: str = DEFAULT_API_KEY) -> str:
         print("   For production use, get a FREE API key at: https://portal.stabilityprotocol.com/")
         print("   Free tier: 1000 writes/month, 200 reads/minute, up to 3 keys")
     
-    url = API_URL_TEMPLATE.format(api_key)
+    # Retried writes within the store's window return the first result
+    store = get_idempotency_store()
+    claim = None
+    if store is not None and payload_kind(payload) != "call_contract_read":
+        claim = derive_idempotency_key(payload, api_key)
+        try:
+            earlier = store.begin(claim)
+        except IdempotencyConflict as e:
+            return f"Error: {e}"
+        if earlier is not None:
+            return mark_replayed(earlier)
+
     try:
-        response = requests.post(url, headers=HEADERS, json=payload)
+        result = _send_request(payload, api_key)
+    except BaseException:  # pragma: no cover
+        if claim is not None:
+            store.release(claim)
+        raise
+    if claim is not None:
+        store.complete(claim, result)
+    return result
+
+
+def _send_request(payload: dict, api_key: str) -> str:
+    """Defer, schedule, rate-limit and send one request for ``_post_request``."""
+    scheduler = get_scheduler()
+    if scheduler is not None:
+        _flush_due(scheduler, lambda payload, key: _post_request(payload, key or api_key), api_key)
+        deferred = scheduler.defer_reason(payload_kind(payload), api_key)
+        if deferred:
+            scheduler.defer(payload, api_key=api_key)
+            return deferred
+    with scheduler.slot() if scheduler is not None else nullcontext():
+        refused = _acquire_quota(payload, api_key)
+        if refused:
+            return refused
+
+        pool = get_endpoint_pool()
+        started_at, started = time.time(), time.perf_counter()
+        try:
+            if pool is None:
+                response = requests.post(API_URL_TEMPLATE.format(api_key), headers=HEADERS, json=payload)
+            else:
+                response = pool.post(
+                    lambda url: requests.post(url, headers=HEADERS, json=payload),
+                    api_key,
+                    failover=payload_kind(payload) == "call_contract_read",
+                )
+            result = response.text
+        except Exception as e:  # pragma: no cover
+            _refund_quota(payload, api_key)
+            # Sanitize any potential API key exposure in error messages
+            error_msg = str(e).replace(api_key, _sanitize_api_key_for_logging(api_key))
+            result = f"Error: {error_msg}"
+    _record_submission(payload, result, started_at, time.perf_counter() - started, api_key)
+    return result
+
+
+class ClientMetrics:
+    """Thread-safe counters and gauges for a ZKT client."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values: Dict[str, float] = {}
+
+    def incr(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + value
+
+    def set(self, name: str, value: float) -> None:
+        with self._lock:
+            self._values[name] = value
+
+    def snapshot(self) -> Dict[str, float]:
+        """Return a copy of all current values."""
+        with self._lock:
+            return dict(self._values)
+
+
+def _keepalive_loop(client_ref: Any, stop: threading.Event, interval: float) -> None:
+    """Ping an idle client's connections every ``interval`` seconds until it closes."""
+    while not stop.wait(interval):
+        client = client_ref()
+        if client is None:
+            return
+        if time.monotonic() - client._last_used >= interval:
+            client.warm(ping=True)
+            client.metrics.incr("keepalive_pings")
+        del client
+
+
+class ZKTClient:
+    """Reusable ZKT API client that keeps connections open between calls.
+
+    The module-level functions open a fresh connection per request. A client
+    instead holds a connection pool (``transport="http1"``, the default) or a
+    small set of multiplexed HTTP/2 connections (``transport="http2"``), which
+    is what you want for many concurrent ``call_contract_read`` requests.
+
+    Args:
+        api_key: Default Stability API key; every method accepts an override.
+        transport: ``"http1"``, ``"http2"``, ``"httpx"`` or a transport object
+                  (see ``stability_transport``).
+        max_concurrency: Default in-flight limit for ``read_many``/``aread_many``.
+        ledger: ``TransactionLedger`` for writes; defaults to the module ledger
+               (see ``set_ledger``).
+        cache: ``DiskCache`` for immutable results: reads of ``pure`` functions
+              or of ``immutable_methods``, and (with ``cache_deploys``) deployed
+              addresses per source and constructor arguments.
+        immutable_methods: View methods whose results never change.
+        cache_deploys: Return the cached address instead of redeploying the
+                      same source with the same arguments.
+        rate_limiter: ``SharedRateLimiter`` shared with other processes on the
+                     host; defaults to the module limiter (see ``set_rate_limiter``).
+        idempotency: ``IdempotencyStore`` (or ``SQLiteIdempotencyStore``) used to
+                    suppress duplicate writes; defaults to the module store
+                    (see ``set_idempotency_store``), and for writes given an
+                    explicit ``idempotency_key`` to an in-memory store.
+        derive_idempotency_keys: Without an explicit ``idempotency_key``, treat
+                    identical writes within the store's window as retries.
+        scheduler: ``RequestScheduler`` admitting requests by priority and
+                  tenant (see ``request_class``); defaults to the module
+                  scheduler (see ``set_scheduler``). Bulk writes it defers
+                  near the quota are resubmitted on this client's first
+                  send with the same key in the next month.
+        compression: ``RequestCompression`` (or ``True`` for the defaults) to
+                    gzip/zstd large bodies such as deploy sources and ABIs
+                    once the endpoint advertises support.
+        adaptive_concurrency: ``AdaptiveConcurrency`` (or ``True`` for the
+                    defaults) that raises the in-flight limit while the
+                    endpoint is healthy and cuts it on 429s, errors or rising
+                    latency; ``read_many``/``aread_many`` then run up to its
+                    ``max_limit`` workers. The limit is the
+                    ``concurrency_limit`` metric.
+        hedging: ``HedgePolicy`` (or ``True`` for the defaults) that re-sends
+                reads slower than the recent p95 and keeps the first answer,
+                within a small extra-load budget. Writes are never hedged.
+        warm_connections: Pooled connections to open at construction so the
+                first calls skip DNS, TCP and TLS setup. The httpx
+                transports warm their async client on its loop before its
+                first request.
+        keepalive_interval: Seconds of idleness after which pooled
+                connections are pinged (``HEAD /``) and dropped ones reopened.
+                Requests served on reused vs newly opened connections are
+                counted as ``connections_warm``/``connections_cold``.
+        middleware: Ordered ``Middleware`` objects whose ``before_send``,
+                ``after_receive`` and ``on_error`` hooks run around every
+                request (see ``use``).
+        endpoints: ``EndpointPool`` (or a list of endpoint URLs) to route
+                each request to the fastest healthy endpoint, failing reads
+                over to the next one; defaults to the module pool (see
+                ``set_endpoint_pool``), else ``API_URL_TEMPLATE``.
+        **transport_options: Passed to the transport constructor.
+
+    Example:
+        with ZKTClient(transport="http2") as client:
+            results = client.read_many([
+                {"to": token, "abi": abi, "method": "balanceOf", "arguments": [holder]}
+                for holder in holders
+            ])
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        transport: Any = None,
+        max_concurrency: int = 16,
+        ledger: Optional[TransactionLedger] = None,
+        cache: Optional[DiskCache] = None,
+        immutable_methods: Iterable[str] = (),
+        cache_deploys: bool = False,
+        rate_limiter: Optional[SharedRateLimiter] = None,
+        idempotency: Optional[IdempotencyStore] = None,
+        derive_idempotency_keys: bool = True,
+        scheduler: Optional[RequestScheduler] = None,
+        compression: Any = None,
+        adaptive_concurrency: Any = None,
+        hedging: Any = None,
+        warm_connections: int = 0,
+        keepalive_interval: Optional[float] = None,
+        middleware: Iterable[Any] = (),
+        endpoints: Any = None,
+        **transport_options: Any,
+    ):
+        self.api_key = api_key or DEFAULT_API_KEY
+        if not self.api_key:
+            raise ValueError(
+                "API key is required. Get a FREE API key at https://portal.stabilityprotocol.com/ "
+                "or set STABILITY_API_KEY environment variable"
+            )
+        self.transport = create_transport(transport, **transport_options)
+        self.max_concurrency = max_concurrency
+        self.ledger = ledger
+        self.cache = cache
+        self.immutable_methods = frozenset(immutable_methods)
+        self.cache_deploys = cache_deploys
+        self.rate_limiter = rate_limiter
+        self.idempotency = idempotency
+        self.derive_idempotency_keys = derive_idempotency_keys
+        self.scheduler = scheduler
+        self.compression = RequestCompression() if compression is True else compression or None
+        self.adaptive_concurrency = (
+            AdaptiveConcurrency() if adaptive_concurrency is True else adaptive_concurrency or None
+        )
+        self.hedging = HedgePolicy() if hedging is True else hedging or None
+        self.middleware = MiddlewareChain(middleware)
+        self._owns_endpoints = endpoints is not None and not isinstance(endpoints, EndpointPool)
+        self.endpoints = EndpointPool(endpoints) if self._owns_endpoints else endpoints
+        self.metrics = ClientMetrics()
+        if self.adaptive_concurrency is not None:
+            self.metrics.set("concurrency_limit", self.adaptive_concurrency.limit)
+        self.warm_connections = warm_connections
+        self.keepalive_interval = keepalive_interval
+        self._last_used = time.monotonic()
+        self._keepalive_stop = threading.Event()
+        if warm_connections:
+            self.warm()
+        if keepalive_interval:
+            threading.Thread(
+                target=_keepalive_loop,
+                args=(weakref.ref(self), self._keepalive_stop, keepalive_interval),
+                name="stability-keepalive",
+                daemon=True,
+            ).start()
+
+    def use(self, middleware: Any, index: Optional[int] = None) -> Any:
+        """Add ``middleware`` to the hook chain (last, or at ``index``) and return it."""
+        return self.middleware.add(middleware, index)
+
+    def _prepare(self, payload: dict, api_key: Optional[str]):
+        key = api_key or self.api_key
+        return key, API_URL_TEMPLATE.format(key), json.dumps(payload).encode("utf-8")
+
+    def _record(self, started: float, failed: bool, response: Any = None) -> None:
+        self._last_used = time.monotonic()
+        self.metrics.incr("requests")
+        self.metrics.incr("latency_seconds_total", time.perf_counter() - started)
+        if failed:
+            self.metrics.incr("errors")
+        reused = getattr(response, "connection_reused", None)
+        if reused is not None:
+            self.metrics.incr("connections_warm" if reused else "connections_cold")
+
+    def warm(self, connections: Optional[int] = None, ping: bool = False) -> int:
+        """Open pooled connections to the ZKT endpoint ahead of use; return how many were opened.
+
+        With ``ping``, already-open connections also send a lightweight
+        ``HEAD /`` to keep them alive. Failures are counted, never raised.
+        """
+        warm = getattr(self.transport, "warm", None)
+        if warm is None:
+            return 0
+        try:
+            pool = self._endpoint_pool()
+            url = pool.select().url("") if pool is not None else API_URL_TEMPLATE.format("")
+            opened = warm(url, connections or self.warm_connections or 1, ping=ping)
+        except Exception:
+            self.metrics.incr("warm_errors")
+            return 0
+        self.metrics.incr("connections_prewarmed", opened)
+        return opened
+
+    def _cache_key(self, payload: dict) -> Optional[str]:
+        """Cache key for payloads whose result is immutable, else None."""
+        if self.cache is None:
+            return None
+        kind = payload_kind(payload)
+        if kind == "call_contract_read":
+            if not is_immutable_read(payload.get("abi"), payload.get("method"), self.immutable_methods):
+                return None
+        elif kind != "deploy_contract" or not self.cache_deploys:
+            return None
+        stable = {k: v for k, v in payload.items() if k not in ("id", "wait")}
+        return f"{kind}:{payload_hash(stable)}"
+
+    def _cache_lookup(self, cache_key: Optional[str]) -> Optional[str]:
+        if cache_key is None:
+            return None
+        hit = self.cache.get(cache_key)
+        self.metrics.incr("cache_hits" if hit is not None else "cache_misses")
+        return hit
+
+    def _cache_store(self, cache_key: Optional[str], result: str) -> None:
+        if cache_key is None or result.startswith("Error:"):
+            return
+        try:
+            data = json.loads(result)
+        except ValueError:
+            return
+        if not isinstance(data, dict) or data.get("success") is False:
+            return
+        if cache_key.startswith("deploy_contract:") and not data.get("contractAddress"):
+            return
+        self.cache.set(cache_key, result)
+
+    def _idempotency_claim(self, payload: dict, api_key: str, idempotency_key: Optional[str]):
+        """Return ``(store, key, fingerprint)`` for a deduplicated write, else ``(None, None, None)``.
+
+        Explicit keys are scoped to ``api_key`` and carry the payload's
+        fingerprint, so reusing one for another request is a conflict.
+        Without a configured store they go to an in-memory one for this process.
+        """
+        if payload_kind(payload) == "call_contract_read":
+            return None, None, None
+        store = self.idempotency or get_idempotency_store()
+        if idempotency_key is None:
+            if store is None or not self.derive_idempotency_keys:
+                return None, None, None
+            return store, derive_idempotency_key(payload, api_key), None
+        if store is None:
+            store = _fallback_idempotency_store
+        return store, scoped_idempotency_key(idempotency_key, api_key), request_fingerprint(payload)
+
+    def _deferred(self, scheduler: Optional[RequestScheduler], payload: dict, key: str) -> Optional[str]:
+        if scheduler is None:
+            return None
+        deferred = scheduler.defer_reason(payload_kind(payload), key)
+        if deferred:
+            scheduler.defer(payload, api_key=key)
+            self.metrics.incr("writes_deferred")
+        return deferred
+
+    def _transport_post(self, url: str, content: bytes, headers: Dict[str, str] = HEADERS) -> Any:
+        if self.compression is not None:
+            return self.compression.post(self.transport, url, headers, content)
+        return self.transport.post(url, headers, content)
+
+    async def _atransport_post(self, url: str, content: bytes, headers: Dict[str, str] = HEADERS) -> Any:
+        if self.compression is not None:
+            return await self.compression.apost(self.transport, url, headers, content)
+        return await self.transport.apost(url, headers, content)
+
+    def _hedge_quota(self, key: str) -> bool:
+        """Take a read token for a hedge without waiting."""
+        limiter = self.rate_limiter or get_rate_limiter()
+        return limiter is None or limiter.try_acquire_read(key)
+
+    def _endpoint_pool(self) -> Optional[EndpointPool]:
+        return self.endpoints if self.endpoints is not None else get_endpoint_pool()
+
+    def _post_payload(self, payload: dict, key: str, url: str, content: bytes, headers: Dict[str, str]) -> Any:
+        pool = self._endpoint_pool()
+        if pool is None:
+            return self._hedged_post(payload, key, url, content, headers)
+        # Only reads are re-sent elsewhere: a write that failed may still have landed
+        return pool.post(
+            lambda url: self._hedged_post(payload, key, url, content, headers),
+            key,
+            failover=payload_kind(payload) == "call_contract_read",
+        )
+
+    async def _apost_payload(self, payload: dict, key: str, url: str, content: bytes, headers: Dict[str, str]) -> Any:
+        pool = self._endpoint_pool()
+        if pool is None:
+            return await self._ahedged_post(payload, key, url, content, headers)
+        return await pool.apost(
+            lambda url: self._ahedged_post(payload, key, url, content, headers),
+            key,
+            failover=payload_kind(payload) == "call_contract_read",
+        )
+
+    def _hedged_post(self, payload: dict, key: str, url: str, content: bytes, headers: Dict[str, str]) -> Any:
+        if self.hedging is None or payload_kind(payload) != "call_contract_read":
+            return self._transport_post(url, content, headers)
+        return self.hedging.post(
+            lambda: self._transport_post(url, content, headers), lambda: self._hedge_quota(key)
+        )
+
+    async def _ahedged_post(self, payload: dict, key: str, url: str, content: bytes, headers: Dict[str, str]) -> Any:
+        if self.hedging is None or payload_kind(payload) != "call_contract_read":
+            return await self._atransport_post(url, content, headers)
+        return await self.hedging.apost(
+            lambda: self._atransport_post(url, content, headers), lambda: self._hedge_quota(key)
+        )
+
+    @contextmanager
+    def _concurrency_slot(self):
+        """Hold an adaptive concurrency slot, if configured, around one transport call."""
+        if self.adaptive_concurrency is None:
+            yield _Sample()
+            return
+        try:
+            with self.adaptive_concurrency.slot() as sample:
+                yield sample
+        finally:
+            self.metrics.set("concurrency_limit", self.adaptive_concurrency.limit)
+
+    @asynccontextmanager
+    async def _aconcurrency_slot(self):
+        if self.adaptive_concurrency is None:
+            yield _Sample()
+            return
+        try:
+            async with self.adaptive_concurrency.aslot() as sample:
+                yield sample
+        finally:
+            self.metrics.set("concurrency_limit", self.adaptive_concurrency.limit)
+
+    def _workers(self, max_concurrency: Optional[int]) -> int:
+        """Worker count for fan-out helpers; the adaptive limit gates them further."""
+        if max_concurrency:
+            return max_concurrency
+        if self.adaptive_concurrency is not None:
+            return self.adaptive_concurrency.max_limit
+        return self.max_concurrency
+
+    def _send(self, payload: dict, key: str, url: str, content: bytes, request: Optional[Request] = None) -> str:
+        scheduler = self.scheduler or get_scheduler()
+        if scheduler is not None:
+            # First send in a new quota window resubmits writes deferred in the last one
+            _flush_due(scheduler, self.post, key)
+        deferred = self._deferred(scheduler, payload, key)
+        if deferred:
+            return deferred
+        with scheduler.slot() if scheduler is not None else nullcontext():
+            refused = _acquire_quota(payload, key, self.rate_limiter)
+            if refused:
+                self.metrics.incr("rate_limited")
+                return refused
+            started_at, started = time.time(), time.perf_counter()
+            try:
+                with self._concurrency_slot() as sample:
+                    response = self._post_payload(
+                        payload, key, url, content, request.headers if request is not None else HEADERS
+                    )
+                    sample.observe(response)
+                result = response.text
+            except Exception as e:
+                self._record(started, failed=True)
+                _refund_quota(payload, key, self.rate_limiter)
+                recovered = self.middleware.on_error(request, e) if request is not None else None
+                if recovered is not None:
+                    result = recovered
+                else:
+                    error_msg = str(e).replace(key, _sanitize_api_key_for_logging(key))
+                    result = f"Error: {error_msg}"
+            else:
+                self._record(started, failed=False, response=response)
+        _record_submission(payload, result, started_at, time.perf_counter() - started, key, self.ledger)
+        return result
+
+    async def _asend(
+        self, payload: dict, key: str, url: str, content: bytes, request: Optional[Request] = None
+    ) -> str:
+        scheduler = self.scheduler or get_scheduler()
+        if scheduler is not None:
+            await _aflush_due(scheduler, self.apost, key)
+        deferred = self._deferred(scheduler, payload, key)
+        if deferred:
+            return deferred
+        async with scheduler.aslot() if scheduler is not None else nullcontext():
+            refused = await _aacquire_quota(payload, key, self.rate_limiter)
+            if refused:
+                self.metrics.incr("rate_limited")
+                return refused
+            started_at, started = time.time(), time.perf_counter()
+            try:
+                async with self._aconcurrency_slot() as sample:
+                    response = await self._apost_payload(
+                        payload, key, url, content, request.headers if request is not None else HEADERS
+                    )
+                    sample.observe(response)
+                result = response.text
+            except asyncio.CancelledError:
+                # Caller gave up; the transport has already dropped the request
+                self.metrics.incr("cancelled")
+                raise
+            except Exception as e:
+                self._record(started, failed=True)
+                await _arefund_quota(payload, key, self.rate_limiter)
+                recovered = await self.middleware.aon_error(request, e) if request is not None else None
+                if recovered is not None:
+                    result = recovered
+                else:
+                    error_msg = str(e).replace(key, _sanitize_api_key_for_logging(key))
+                    result = f"Error: {error_msg}"
+            else:
+                self._record(started, failed=False, response=response)
+        await _arecord_submission(payload, result, started_at, time.perf_counter() - started, key, self.ledger)
+        return result
+
+    def post(self, payload: dict, api_key: Optional[str] = None, idempotency_key: Optional[str] = None) -> str:
+        """Send a payload to the ZKT endpoint and return the response text.
+
+        Writes with the same ``idempotency_key`` (or, with derived keys, the
+        same content) within the store's window return the first result
+        instead of being submitted again, flagged ``"replayed": true``.
+        Reusing a key for a different payload returns an ``Error: ...``
+        conflict.
+        """
+        if not self.middleware:
+            return self._post(payload, api_key, idempotency_key)
+        request = self.middleware.before_send(
+            Request(payload, api_key or self.api_key, dict(HEADERS), payload_kind(payload))
+        )
+        result = self._post(request.payload, request.api_key, idempotency_key, request)
+        return self.middleware.after_receive(request, result)
+
+    def _post(
+        self, payload: dict, api_key: Optional[str], idempotency_key: Optional[str], request: Optional[Request] = None
+    ) -> str:
+        cache_key = self._cache_key(payload)
+        cached = self._cache_lookup(cache_key)
+        if cached is not None:
+            return cached
+        key, url, content = self._prepare(payload, api_key)
+        store, claim, fingerprint = self._idempotency_claim(payload, key, idempotency_key)
+        if claim is not None:
+            try:
+                earlier = store.begin(claim, fingerprint)
+            except IdempotencyConflict as e:
+                return f"Error: {e}"
+            if earlier is not None:
+                self.metrics.incr("duplicates_suppressed")
+                return mark_replayed(earlier)
+        try:
+            result = self._send(payload, key, url, content, request)
+        except BaseException:
+            if claim is not None:
+                store.release(claim)
+            raise
+        if claim is not None:
+            store.complete(claim, result)
+        self._cache_store(cache_key, result)
+        return result
+
+    async def apost(self, payload: dict, api_key: Optional[str] = None, idempotency_key: Optional[str] = None) -> str:
+        """Async variant of ``post``."""
+        if not self.middleware:
+            return await self._apost(payload, api_key, idempotency_key)
+        request = await self.middleware.abefore_send(
+            Request(payload, api_key or self.api_key, dict(HEADERS), payload_kind(payload))
+        )
+        result = await self._apost(request.payload, request.api_key, idempotency_key, request)
+        return await self.middleware.aafter_receive(request, result)
+
+    async def _apost(
+        self, payload: dict, api_key: Optional[str], idempotency_key: Optional[str], request: Optional[Request] = None
+    ) -> str:
+        cache_key = self._cache_key(payload)
+        cached = self._cache_lookup(cache_key)
+        if cached is not None:
+            return cached
+        key, url, content = self._prepare(payload, api_key)
+        store, claim, fingerprint = self._idempotency_claim(payload, key, idempotency_key)
+        if claim is not None:
+            try:
+                earlier = await store.abegin(claim, fingerprint)
+            except IdempotencyConflict as e:
+                return f"Error: {e}"
+            if earlier is not None:
+                self.metrics.incr("duplicates_suppressed")
+                return mark_replayed(earlier)
+        try:
+            result = await self._asend(payload, key, url, content, request)
+        except BaseException:
+            if claim is not None:
+                store.release(claim)
+            raise
+        if claim is not None:
+            store.complete(claim, result)
+        self._cache_store(cache_key, result)
+        return result
+
+    def post_zkt_v1(
+        self, arguments: str, api_key: Optional[str] = None, idempotency_key: Optional[str] = None
+    ) -> str:
+        """Send a simple string message to the blockchain."""
+        return self.post({"arguments": arguments}, api_key, idempotency_key)
+
+    def call_contract_read(
+        self,
+        to: str,
+        abi: List[str],
+        method: str,
+        arguments: List[Any],
+        id: int = 1,
+        api_key: Optional[str] = None,
+    ) -> str:
+        """Execute a read-only smart contract call."""
+        payload = {
+            "to": to,
+            "abi": abi,
+            "method": method,
+            "arguments": arguments,
+            "id": id,
+        }
+        return self.post(payload, api_key)
+
+    def call_contract_write(
+        self,
+        to: str,
+        abi: List[str],
+        method: str,
+        arguments: List[Any],
+        wait: bool = True,
+        id: int = 1,
+        api_key: Optional[str] = None,
+        idempotency_key: Optional[str] = None,
+    ) -> str:
+        """Execute a state-changing smart contract call."""
+        payload = {
+            "to": to,
+            "abi": abi,
+            "method": method,
+            "arguments": arguments,
+            "id": id,
+            "wait": wait,
+        }
+        return self.post(payload, api_key, idempotency_key)
+
+    def deploy_contract(
+        self,
+        code: str,
+        arguments: List[Any] | None = None,
+        wait: bool = False,
+        id: int = 1,
+        api_key: Optional[str] = None,
+        idempotency_key: Optional[str] = None,
+    ) -> str:
+        """Deploy a Solidity contract to the blockchain."""
+        payload = {
+            "code": code,
+            "arguments": arguments or [],
+            "wait": wait,
+            "id": id,
+        }
+        return self.post(payload, api_key, idempotency_key)
+
+    async def apost_zkt_v1(
+        self, arguments: str, api_key: Optional[str] = None, idempotency_key: Optional[str] = None
+    ) -> str:
+        """Async variant of ``post_zkt_v1``."""
+        return await self.apost({"arguments": arguments}, api_key, idempotency_key)
+
+    async def acall_contract_read(
+        self,
+        to: str,
+        abi: List[str],
+        method: str,
+        arguments: List[Any],
+        id: int = 1,
+        api_key: Optional[str] = None,
+    ) -> str:
+        """Async variant of ``call_contract_read``."""
+        payload = {
+            "to": to,
+            "abi": abi,
+            "method": method,
+            "arguments": arguments,
+            "id": id,
+        }
+        return await self.apost(payload, api_key)
+
+    async def acall_contract_write(
+        self,
+        to: str,
+        abi: List[str],
+        method: str,
+        arguments: List[Any],
+        wait: bool = True,
+        id: int = 1,
+        api_key: Optional[str] = None,
+        idempotency_key: Optional[str] = None,
+    ) -> str:
+        """Async variant of ``call_contract_write``."""
+        payload = {
+            "to": to,
+            "abi": abi,
+            "method": method,
+            "arguments": arguments,
+            "id": id,
+            "wait": wait,
+        }
+        return await self.apost(payload, api_key, idempotency_key)
+
+    async def adeploy_contract(
+        self,
+        code: str,
+        arguments: List[Any] | None = None,
+        wait: bool = False,
+        id: int = 1,
+        api_key: Optional[str] = None,
+        idempotency_key: Optional[str] = None,
+    ) -> str:
+        """Async variant of ``deploy_contract``."""
+        payload = {
+            "code": code,
+            "arguments": arguments or [],
+            "wait": wait,
+            "id": id,
+        }
+        return await self.apost(payload, api_key, idempotency_key)
+
+    def read_many(
+        self, calls: Iterable[Dict[str, Any]], max_concurrency: Optional[int] = None
+    ) -> List[str]:
+        """Run many ``call_contract_read`` calls concurrently, preserving order.
+
+        Each item holds the keyword arguments of ``call_contract_read``.
+        """
+        calls = list(calls)
+        if not calls:
+            return []
+        workers = min(self._workers(max_concurrency), len(calls))
+        # Each worker runs in a copy of the caller's context, so request_class() applies
+        contexts = [contextvars.copy_context() for _ in calls]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(
+                lambda context, call: context.run(self.call_contract_read, **call), contexts, calls
+            ))
+
+    async def aread_many(
+        self, calls: Iterable[Dict[str, Any]], max_concurrency: Optional[int] = None
+    ) -> List[str]:
+        """Async variant of ``read_many`` driven by ``apost``."""
+        semaphore = asyncio.Semaphore(self._workers(max_concurrency))
+
+        async def _read(call: Dict[str, Any]) -> str:
+            payload = {
+                "to": call["to"],
+                "abi": call["abi"],
+                "method": call["method"],
+                "arguments": call.get("arguments", []),
+                "id": call.get("id", 1),
+            }
+            async with semaphore:
+                return await self.apost(payload, call.get("api_key"))
+
+        return list(await asyncio.gather(*(_read(call) for call in calls)))
+
+    async def arpc(self, url: str, payload: dict, api_key: Optional[str] = None) -> str:
+        """Send a plain JSON-RPC read (e.g. ``eth_getTransactionReceipt``) to ``url``.
+
+        The ZKT-only layers (cache, idempotency, ledger, endpoint pool) are
+        skipped, but the call takes a read token, holds a concurrency slot and
+        is counted in ``metrics``. Failures come back as ``Error: ...`` text.
+        """
+        key = api_key or self.api_key
+        limiter = self.rate_limiter or get_rate_limiter()
+        if limiter is not None:
+            try:
+                await limiter.aacquire_read(key)
+            except RateLimitExceeded as e:
+                self.metrics.incr("rate_limited")
+                return f"Error: {e}"
+        started = time.perf_counter()
+        try:
+            async with self._aconcurrency_slot() as sample:
+                response = await self.transport.apost(url, HEADERS, json.dumps(payload).encode("utf-8"))
+                sample.observe(response)
+        except asyncio.CancelledError:
+            self.metrics.incr("cancelled")
+            raise
+        except Exception as e:
+            self._record(started, failed=True)
+            error_msg = str(e).replace(key, _sanitize_api_key_for_logging(key))
+            return f"Error: {error_msg}"
+        self._record(started, failed=False, response=response)
         return response.text
-    except Exception as e:  # pragma: no cover
-        # Sanitize any potential API key exposure in error messages
-        error_msg = str(e).replace(api_key, _sanitize_api_key_for_logging(api_key))
-        return f"Error: {error_msg}"
+
+    def close(self) -> None:
+        """Close pooled connections held by the transport."""
+        self._keepalive_stop.set()
+        self.transport.close()
+        if self._owns_endpoints:
+            self.endpoints.close()
+        if self.hedging is not None:
+            self.hedging.close()
+
+    async def aclose(self) -> None:
+        """Like ``close``, also closing the transport's async connections on this loop."""
+        aclose = getattr(self.transport, "aclose", None)
+        if aclose is not None:
+            await aclose()
+        self.close()
+
+    def __enter__(self) -> "ZKTClient":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    async def __aenter__(self) -> "ZKTClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
 
 try:
-    from langchain_core.tools import BaseToolkit, tool
+    from langchain_core.tools import BaseToolkit, StructuredTool
+    from pydantic import BaseModel, Field
     _LANGCHAIN_AVAILABLE = True
 
     # ---- Tool 1: Write ZKTv1 message ----
@@ -119,35 +1140,360 @@ try:
         }
         return _post_request(payload, api_key)
 
-    # ---- LangChain tool wrappers using @tool decorator ----
-    def create_stability_tools(api_key: str = DEFAULT_API_KEY):
-        """Create Stability tools with specified API key."""
-        
-        @tool("StabilityWriteTool")
+    # ---- Shared client for async tools without their own client ----
+    _async_client: Optional[ZKTClient] = None
+    _async_client_lock = threading.Lock()
+
+    def _default_async_client() -> ZKTClient:
+        """Return the process-wide client used by async tools, creating it on first use."""
+        global _async_client
+        with _async_client_lock:
+            if _async_client is None:
+                try:
+                    _async_client = ZKTClient(
+                        transport="httpx",
+                        max_concurrency=BATCH_READ_CONCURRENCY,
+                        max_connections=BATCH_READ_CONCURRENCY,
+                    )
+                except RuntimeError:
+                    # No httpx: pooled requests, run in worker threads
+                    _async_client = ZKTClient(
+                        max_concurrency=BATCH_READ_CONCURRENCY,
+                        pool_maxsize=BATCH_READ_CONCURRENCY,
+                    )
+            return _async_client
+
+    class BatchedReadTool(StructuredTool):
+        """Read tool whose ``batch``/``abatch`` share one pooled read engine.
+
+        Instead of one ``invoke`` per input, a batch is validated up front,
+        identical reads are coalesced into a single request, and the rest run
+        concurrently through ``ZKTClient.read_many``/``aread_many`` with
+        results returned in input order. Inputs that fail validation yield an
+        ``Error: ...`` string in their slot. ``max_concurrency`` from the
+        runnable config bounds in-flight requests. Tool-call inputs fall back
+        to the standard per-input path.
+        """
+
+        parse_call: Callable[[Any], Dict[str, Any]] = Field(exclude=True)
+        get_client: Callable[[], ZKTClient] = Field(exclude=True)
+        batch_api_key: str = Field(default=DEFAULT_API_KEY, exclude=True)
+
+        def _prepare_batch(self, inputs: List[Any]):
+            calls: List[Dict[str, Any]] = []
+            slots: List[Any] = []
+            seen: Dict[str, int] = {}
+            for raw in inputs:
+                try:
+                    call = self.parse_call(raw)
+                except (ValueError, TypeError, KeyError) as e:
+                    slots.append(f"Error: {e}")
+                    continue
+                payload = {
+                    "to": call["to"],
+                    "abi": call["abi"],
+                    "method": call["method"],
+                    "arguments": call.get("arguments") or [],
+                }
+                key = payload_hash(payload)
+                if key not in seen:
+                    seen[key] = len(calls)
+                    calls.append({**payload, "api_key": self.batch_api_key})
+                slots.append(seen[key])
+            return calls, slots
+
+        @staticmethod
+        def _max_concurrency(config: Any) -> int:
+            if isinstance(config, list):
+                config = config[0] if config else None
+            return (config or {}).get("max_concurrency") or BATCH_READ_CONCURRENCY
+
+        @staticmethod
+        def _is_tool_call(raw: Any) -> bool:
+            return isinstance(raw, dict) and raw.get("type") == "tool_call"
+
+        def batch(self, inputs: List[Any], config: Any = None, *, return_exceptions: bool = False, **kwargs: Any):
+            if not inputs or any(self._is_tool_call(raw) for raw in inputs):
+                return super().batch(inputs, config, return_exceptions=return_exceptions, **kwargs)
+            calls, slots = self._prepare_batch(inputs)
+            results = self.get_client().read_many(calls, self._max_concurrency(config)) if calls else []
+            return [slot if isinstance(slot, str) else results[slot] for slot in slots]
+
+        async def abatch(self, inputs: List[Any], config: Any = None, *, return_exceptions: bool = False, **kwargs: Any):
+            if not inputs or any(self._is_tool_call(raw) for raw in inputs):
+                return await super().abatch(inputs, config, return_exceptions=return_exceptions, **kwargs)
+            calls, slots = self._prepare_batch(inputs)
+            results = await self.get_client().aread_many(calls, self._max_concurrency(config)) if calls else []
+            return [slot if isinstance(slot, str) else results[slot] for slot in slots]
+
+    # ---- LangChain tool wrappers ----
+    def create_stability_tools(api_key: str = DEFAULT_API_KEY, client: Optional[ZKTClient] = None):
+        """Create Stability tools with specified API key.
+
+        When ``client`` is given the tools send through its pooled transport
+        instead of opening a new connection per call. Every tool also has a
+        coroutine implementation, so ``ainvoke`` awaits ``client.apost`` (or a
+        shared httpx-backed client) instead of borrowing an executor thread.
+        """
+
+        def _aclient() -> ZKTClient:
+            return client if client is not None else _default_async_client()
+
+        def _parse_call(arguments: str) -> Dict[str, Any]:
+            call = json.loads(arguments)
+            validate_contract_call(call.get("to"), call.get("abi"), call.get("method"), call.get("arguments", []))
+            return call
+
+        def _parse_deploy(arguments: str) -> Dict[str, Any]:
+            call = json.loads(arguments)
+            validate_deploy(call.get("code"), call.get("arguments"))
+            return call
+
         def stability_write_tool(arguments: str) -> str:
             """Send a plain text message to the Stability blockchain using ZKT v1."""
+            if client is not None:
+                return client.post_zkt_v1(arguments, api_key)
             return post_zkt_v1(arguments, api_key)
 
-        @tool("StabilityReadTool")
+        async def astability_write_tool(arguments: str) -> str:
+            return await _aclient().apost_zkt_v1(arguments, api_key)
+
         def stability_read_tool(arguments: str) -> str:
             """Read data from a Stability smart contract using ZKT v2 read request. JSON input must include: to, abi, method, arguments."""
-            return call_contract_read(**json.loads(arguments), api_key=api_key)
+            try:
+                call = _parse_call(arguments)
+            except ValidationError as e:
+                return f"Error: {e}"
+            if client is not None:
+                return client.call_contract_read(**call, api_key=api_key)
+            return call_contract_read(**call, api_key=api_key)
+
+        async def astability_read_tool(arguments: str) -> str:
+            try:
+                call = _parse_call(arguments)
+            except ValidationError as e:
+                return f"Error: {e}"
+            return await _aclient().acall_contract_read(**call, api_key=api_key)
 
-        @tool("StabilityWriteContractTool")
         def stability_write_contract_tool(arguments: str) -> str:
-            """Write data to a Stability smart contract using ZKT v2 write request. JSON input must include: to, abi, method, arguments, id, wait."""
-            return call_contract_write(**json.loads(arguments), api_key=api_key)
+            """Write data to a Stability smart contract using ZKT v2 write request. JSON input must include: to, abi, method, arguments, id, wait. Optional: idempotency_key (reuse it when retrying)."""
+            try:
+                call = _parse_call(arguments)
+            except ValidationError as e:
+                return f"Error: {e}"
+            idempotency_key = call.pop("idempotency_key", None)
+            if client is not None or idempotency_key:
+                return _aclient().call_contract_write(**call, api_key=api_key, idempotency_key=idempotency_key)
+            return call_contract_write(**call, api_key=api_key)
+
+        async def astability_write_contract_tool(arguments: str) -> str:
+            try:
+                call = _parse_call(arguments)
+            except ValidationError as e:
+                return f"Error: {e}"
+            idempotency_key = call.pop("idempotency_key", None)
+            return await _aclient().acall_contract_write(**call, api_key=api_key, idempotency_key=idempotency_key)
 
-        @tool("StabilityDeployTool")
         def stability_deploy_tool(arguments: str) -> str:
-            """Deploy a Solidity smart contract to the Stability blockchain. JSON input must include: code, arguments."""
-            return deploy_contract(**json.loads(arguments), api_key=api_key)
-        
+            """Deploy a Solidity smart contract to the Stability blockchain. JSON input must include: code, arguments. Optional: idempotency_key (reuse it when retrying)."""
+            try:
+                call = _parse_deploy(arguments)
+            except ValidationError as e:
+                return f"Error: {e}"
+            idempotency_key = call.pop("idempotency_key", None)
+            if client is not None or idempotency_key:
+                return _aclient().deploy_contract(**call, api_key=api_key, idempotency_key=idempotency_key)
+            return deploy_contract(**call, api_key=api_key)
+
+        async def astability_deploy_tool(arguments: str) -> str:
+            try:
+                call = _parse_deploy(arguments)
+            except ValidationError as e:
+                return f"Error: {e}"
+            idempotency_key = call.pop("idempotency_key", None)
+            return await _aclient().adeploy_contract(**call, api_key=api_key, idempotency_key=idempotency_key)
+
+        return [
+            StructuredTool.from_function(
+                func=stability_write_tool, coroutine=astability_write_tool, name="StabilityWriteTool"
+            ),
+            BatchedReadTool.from_function(
+                func=stability_read_tool,
+                coroutine=astability_read_tool,
+                name="StabilityReadTool",
+                parse_call=lambda raw: _parse_call(raw["arguments"] if isinstance(raw, dict) else raw),
+                get_client=_aclient,
+                batch_api_key=api_key,
+            ),
+            StructuredTool.from_function(
+                func=stability_write_contract_tool,
+                coroutine=astability_write_contract_tool,
+                name="StabilityWriteContractTool",
+            ),
+            StructuredTool.from_function(
+                func=stability_deploy_tool, coroutine=astability_deploy_tool, name="StabilityDeployTool"
+            ),
+        ]
+
+    # ---- Structured tools: typed arguments instead of a JSON string ----
+    class MessageInput(BaseModel):
+        message: str = Field(description="Plain text message to record on the Stability blockchain")
+
+    class ContractReadInput(BaseModel):
+        to: str = Field(description="Contract address: 0x followed by 40 hex characters")
+        abi: List[Union[str, Dict[str, Any]]] = Field(
+            description="Function signatures such as 'function balanceOf(address owner) view returns (uint256)', or JSON ABI entries"
+        )
+        method: str = Field(description="Name of the function to call")
+        arguments: List[Any] = Field(default_factory=list, description="Function arguments in ABI order")
+
+    _IDEMPOTENCY_KEY_DESCRIPTION = "Optional key; reuse it when retrying so the write is applied at most once"
+
+    class ContractWriteInput(ContractReadInput):
+        wait: bool = Field(default=True, description="Wait for the transaction to be mined")
+        idempotency_key: Optional[str] = Field(default=None, description=_IDEMPOTENCY_KEY_DESCRIPTION)
+
+    class DeployInput(BaseModel):
+        code: str = Field(description="Solidity source code of the contract")
+        arguments: List[Any] = Field(default_factory=list, description="Constructor arguments in order")
+        wait: bool = Field(default=False, description="Wait for the deployment to be mined")
+        idempotency_key: Optional[str] = Field(default=None, description=_IDEMPOTENCY_KEY_DESCRIPTION)
+
+    def create_structured_stability_tools(api_key: str = DEFAULT_API_KEY, client: Optional[ZKTClient] = None):
+        """Create Stability tools with typed ``args_schema`` inputs.
+
+        Same names as ``create_stability_tools``, but arguments arrive as
+        fields instead of a JSON string, and every call is checked locally
+        (address, ABI, method, argument count and types) before any request
+        is sent. Rejected calls return an ``Error: ...`` string.
+        """
+
+        def _aclient() -> ZKTClient:
+            return client if client is not None else _default_async_client()
+
+        def stability_write_tool(message: str) -> str:
+            """Send a plain text message to the Stability blockchain using ZKT v1."""
+            if client is not None:
+                return client.post_zkt_v1(message, api_key)
+            return post_zkt_v1(message, api_key)
+
+        async def astability_write_tool(message: str) -> str:
+            return await _aclient().apost_zkt_v1(message, api_key)
+
+        def stability_read_tool(to: str, abi: List[Any], method: str, arguments: Optional[List[Any]] = None) -> str:
+            """Read data from a Stability smart contract using a ZKT v2 read request."""
+            arguments = arguments or []
+            try:
+                validate_contract_call(to, abi, method, arguments)
+            except ValidationError as e:
+                return f"Error: {e}"
+            if client is not None:
+                return client.call_contract_read(to, abi, method, arguments, api_key=api_key)
+            return call_contract_read(to, abi, method, arguments, api_key=api_key)
+
+        async def astability_read_tool(to: str, abi: List[Any], method: str, arguments: Optional[List[Any]] = None) -> str:
+            arguments = arguments or []
+            try:
+                validate_contract_call(to, abi, method, arguments)
+            except ValidationError as e:
+                return f"Error: {e}"
+            return await _aclient().acall_contract_read(to, abi, method, arguments, api_key=api_key)
+
+        def stability_write_contract_tool(
+            to: str,
+            abi: List[Any],
+            method: str,
+            arguments: Optional[List[Any]] = None,
+            wait: bool = True,
+            idempotency_key: Optional[str] = None,
+        ) -> str:
+            """Write data to a Stability smart contract using a ZKT v2 write request."""
+            arguments = arguments or []
+            try:
+                validate_contract_call(to, abi, method, arguments)
+            except ValidationError as e:
+                return f"Error: {e}"
+            if client is not None or idempotency_key:
+                return _aclient().call_contract_write(
+                    to, abi, method, arguments, wait, api_key=api_key, idempotency_key=idempotency_key
+                )
+            return call_contract_write(to, abi, method, arguments, wait, api_key=api_key)
+
+        async def astability_write_contract_tool(
+            to: str,
+            abi: List[Any],
+            method: str,
+            arguments: Optional[List[Any]] = None,
+            wait: bool = True,
+            idempotency_key: Optional[str] = None,
+        ) -> str:
+            arguments = arguments or []
+            try:
+                validate_contract_call(to, abi, method, arguments)
+            except ValidationError as e:
+                return f"Error: {e}"
+            return await _aclient().acall_contract_write(
+                to, abi, method, arguments, wait, api_key=api_key, idempotency_key=idempotency_key
+            )
+
+        def stability_deploy_tool(
+            code: str, arguments: Optional[List[Any]] = None, wait: bool = False, idempotency_key: Optional[str] = None
+        ) -> str:
+            """Deploy a Solidity smart contract to the Stability blockchain."""
+            try:
+                validate_deploy(code, arguments)
+            except ValidationError as e:
+                return f"Error: {e}"
+            if client is not None or idempotency_key:
+                return _aclient().deploy_contract(code, arguments, wait, api_key=api_key, idempotency_key=idempotency_key)
+            return deploy_contract(code, arguments, wait, api_key=api_key)
+
+        async def astability_deploy_tool(
+            code: str, arguments: Optional[List[Any]] = None, wait: bool = False, idempotency_key: Optional[str] = None
+        ) -> str:
+            try:
+                validate_deploy(code, arguments)
+            except ValidationError as e:
+                return f"Error: {e}"
+            return await _aclient().adeploy_contract(
+                code, arguments, wait, api_key=api_key, idempotency_key=idempotency_key
+            )
+
+        def _parse_read(raw: Dict[str, Any]) -> Dict[str, Any]:
+            model = ContractReadInput(**raw)
+            # pydantic v2 renamed .dict() to .model_dump(); the pin still allows v1
+            call = (getattr(model, "model_dump", None) or model.dict)()
+            validate_contract_call(call["to"], call["abi"], call["method"], call["arguments"])
+            return call
+
         return [
-            stability_write_tool,
-            stability_read_tool,
-            stability_write_contract_tool,
-            stability_deploy_tool
+            StructuredTool.from_function(
+                func=stability_write_tool,
+                coroutine=astability_write_tool,
+                name="StabilityWriteTool",
+                args_schema=MessageInput,
+            ),
+            BatchedReadTool.from_function(
+                func=stability_read_tool,
+                coroutine=astability_read_tool,
+                name="StabilityReadTool",
+                args_schema=ContractReadInput,
+                parse_call=_parse_read,
+                get_client=_aclient,
+                batch_api_key=api_key,
+            ),
+            StructuredTool.from_function(
+                func=stability_write_contract_tool,
+                coroutine=astability_write_contract_tool,
+                name="StabilityWriteContractTool",
+                args_schema=ContractWriteInput,
+            ),
+            StructuredTool.from_function(
+                func=stability_deploy_tool,
+                coroutine=astability_deploy_tool,
+                name="StabilityDeployTool",
+                args_schema=DeployInput,
+            ),
         ]
 
     # ---- Toolkit class ----
@@ -160,6 +1506,25 @@ try:
         Args:
             api_key: Stability API key. If not provided, will use STABILITY_API_KEY 
                     environment variable or default to "try-it-out"
+            transport: Optional ZKT client transport ("http1", "http2", "httpx").
+                    When set, tools share one pooled ``ZKTClient``.
+            cache: Optional ``DiskCache`` for immutable lookups, shared with
+                    other processes that open the same file.
+            immutable_methods: View methods safe to serve from ``cache``.
+            idempotency: Optional ``IdempotencyStore`` that suppresses retried
+                    writes (tools accept an ``idempotency_key``).
+            compression: Optional ``RequestCompression`` (or ``True``) for
+                    large deploy sources and ABIs.
+            warm_connections: Pooled connections to open up front so the
+                    first tool calls skip connection setup.
+            keepalive_interval: Seconds idle before pooled connections are pinged.
+            middleware: Ordered ``Middleware`` run around every tool request
+                    (auth headers, audit logging, redaction); see ``use``.
+            endpoints: ``EndpointPool`` or endpoint URLs to route requests to
+                    the fastest healthy endpoint with failover for reads.
+            structured: Return tools with typed ``args_schema`` inputs that are
+                    validated locally before sending (see
+                    ``create_structured_stability_tools``).
         
         Environment Variables:
             STABILITY_API_KEY: Your Stability API key (recommended for production)
@@ -186,16 +1551,50 @@ try:
             
             # Development/testing (limited functionality)
             toolkit = StabilityToolkit()  # Uses "try-it-out" key
+            
+            # Many concurrent reads over multiplexed HTTP/2 connections
+            toolkit = StabilityToolkit(transport="http2")
+            
+            # Typed tool inputs, checked locally before any request is sent
+            toolkit = StabilityToolkit(structured=True)
+            
+            # Tools are async-native: ainvoke/astream await the client directly
+            await toolkit.get_tools()[1].ainvoke({"arguments": read_call_json})
         """
         
         api_key: str = DEFAULT_API_KEY
+        client: Optional[Any] = None
+        structured: bool = False
         
-        def __init__(self, api_key: str | None = None, **kwargs):
+        def __init__(
+            self,
+            api_key: str | None = None,
+            transport: Any = None,
+            cache: Optional[DiskCache] = None,
+            immutable_methods: Iterable[str] = (),
+            idempotency: Optional[IdempotencyStore] = None,
+            compression: Any = None,
+            warm_connections: int = 0,
+            keepalive_interval: Optional[float] = None,
+            middleware: Iterable[Any] = (),
+            endpoints: Any = None,
+            **kwargs,
+        ):
             """Initialize the Stability toolkit.
             
             Args:
                 api_key: Stability API key. If None, uses environment variable
                         STABILITY_API_KEY or defaults to "try-it-out"
+                transport: Optional ZKT client transport. If None, each call
+                        opens its own connection.
+                cache: Optional ``DiskCache`` for immutable lookups.
+                immutable_methods: View methods safe to serve from ``cache``.
+                idempotency: Optional ``IdempotencyStore`` for duplicate writes.
+                compression: Optional ``RequestCompression`` for large bodies.
+                warm_connections: Pooled connections to open at construction.
+                keepalive_interval: Seconds idle before connections are pinged.
+                middleware: Ordered ``Middleware`` for the shared client.
+                endpoints: Optional ``EndpointPool`` or endpoint URLs.
             """
             # Set the api_key before calling super().__init__
             final_api_key = api_key or DEFAULT_API_KEY
@@ -208,6 +1607,21 @@ try:
                 )
             
             super().__init__(api_key=final_api_key, **kwargs)
+            options = (transport, cache, idempotency, compression, keepalive_interval, endpoints)
+            if (any(option is not None for option in options) or warm_connections) and self.client is None:
+                self.client = ZKTClient(
+                    self.api_key,
+                    transport=transport,
+                    cache=cache,
+                    immutable_methods=immutable_methods,
+                    idempotency=idempotency,
+                    compression=compression,
+                    warm_connections=warm_connections,
+                    keepalive_interval=keepalive_interval,
+                    endpoints=endpoints,
+                )
+            for item in middleware:
+                self.use(item)
             
             # Log API key status (sanitized)
             if self.api_key == "try-it-out":
@@ -216,9 +1630,21 @@ try:
             else:
                 print(f"🔧 Stability Toolkit initialized with API key: {_sanitize_api_key_for_logging(self.api_key)}")
         
+        def use(self, middleware: Any, index: Optional[int] = None) -> Any:
+            """Add ``middleware`` to the hook chain of the toolkit's client and return it.
+
+            Creates a pooled ``ZKTClient`` if the toolkit has none yet, so call
+            this before ``get_tools``.
+            """
+            if self.client is None:
+                self.client = ZKTClient(self.api_key)
+            return self.client.use(middleware, index)
+
         def get_tools(self):
             """Get all Stability tools configured with this toolkit's API key."""
-            return create_stability_tools(self.api_key)
+            if self.structured:
+                return create_structured_stability_tools(self.api_key, client=self.client)
+            return create_stability_tools(self.api_key, client=self.client)
 
 
 
@@ -0,0 +1,361 @@
+# stability_transport.py
+
+"""HTTP transports used by the ZKT client."""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+import asyncio
+import threading
+import weakref
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+    from urllib3.util.wait import wait_for_read
+except ImportError:  # pragma: no cover
+    requests = None  # type: ignore
+    HTTPAdapter = None  # type: ignore
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None  # type: ignore
+
+__all__ = [
+    "TransportResponse",
+    "RequestsTransport",
+    "HttpxTransport",
+    "create_transport",
+]
+
+DEFAULT_TIMEOUT = 30.0
+
+# Set by connections opened on this thread; read by RequestsTransport.post
+_opened = threading.local()
+
+if requests is not None:
+
+    class _TrackedHTTPConnection(HTTPConnection):
+        def connect(self) -> None:
+            _opened.flag = True
+            super().connect()
+
+    class _TrackedHTTPSConnection(HTTPSConnection):
+        def connect(self) -> None:
+            _opened.flag = True
+            super().connect()
+
+    class _TrackedHTTPConnectionPool(HTTPConnectionPool):
+        ConnectionCls = _TrackedHTTPConnection
+
+    class _TrackedHTTPSConnectionPool(HTTPSConnectionPool):
+        ConnectionCls = _TrackedHTTPSConnection
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}/"
+
+
+def _codings(accept_encoding: str) -> Tuple[str, ...]:
+    """Content codings listed in an ``Accept-Encoding`` header value."""
+    return tuple(item.split(";")[0].strip().lower() for item in accept_encoding.split(",") if item.strip())
+
+
+def _is_connected(conn: Any) -> bool:
+    """Whether a pooled urllib3 connection has a live socket.
+
+    ``is_connected`` only exists from urllib3 2.0. On 1.x an unopened
+    connection has no ``sock``, and an idle one that is readable was closed
+    by the server.
+    """
+    connected = getattr(conn, "is_connected", None)
+    if connected is not None:
+        return connected
+    sock = getattr(conn, "sock", None)
+    return sock is not None and not wait_for_read(sock, timeout=0.0)
+
+
+class TransportResponse:
+    """Minimal response returned by every transport."""
+
+    __slots__ = ("status_code", "text", "headers", "http_version", "connection_reused")
+
+    def __init__(
+        self,
+        status_code: int,
+        text: str,
+        headers: Optional[Dict[str, str]] = None,
+        http_version: str = "HTTP/1.1",
+        connection_reused: Optional[bool] = None,
+    ):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+        self.http_version = http_version
+        # True if served on an already-open connection, False if one was opened, None if unknown
+        self.connection_reused = connection_reused
+
+
+class RequestsTransport:
+    """Pooled HTTP/1.1 keep-alive transport backed by ``requests.Session``.
+
+    Args:
+        pool_maxsize: Maximum number of keep-alive connections kept per host.
+        timeout: Per-request timeout in seconds.
+    """
+
+    name = "http1"
+
+    def __init__(self, pool_maxsize: int = 32, timeout: float = DEFAULT_TIMEOUT):
+        if requests is None:
+            raise RuntimeError("requests library is required")
+        self.timeout = timeout
+        self.pool_maxsize = pool_maxsize
+        self.session = requests.Session()
+        # urllib3 lists what it can decode; zstd and br depend on optional libraries and versions
+        self.decodable_encodings = _codings(self.session.headers.get("Accept-Encoding", ""))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        adapter.poolmanager.pool_classes_by_scheme = {
+            "http": _TrackedHTTPConnectionPool,
+            "https": _TrackedHTTPSConnectionPool,
+        }
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def post(self, url: str, headers: Dict[str, str], content: bytes) -> TransportResponse:
+        _opened.flag = False
+        response = self.session.post(url, headers=headers, data=content, timeout=self.timeout)
+        return TransportResponse(
+            response.status_code, response.text, dict(response.headers), connection_reused=not _opened.flag
+        )
+
+    async def apost(self, url: str, headers: Dict[str, str], content: bytes) -> TransportResponse:
+        # requests has no async API; run the blocking call off the event loop
+        return await asyncio.to_thread(self.post, url, headers, content)
+
+    def _pool(self, url: str) -> Any:
+        """The urllib3 pool ``session.post(url)`` would use."""
+        adapter = self.session.get_adapter(url)
+        # Same environment merge as session.post (e.g. REQUESTS_CA_BUNDLE), or the pool keys differ
+        settings = self.session.merge_environment_settings(url, {}, None, None, None)
+        if hasattr(adapter, "get_connection_with_tls_context"):
+            request = requests.Request("POST", url).prepare()
+            return adapter.get_connection_with_tls_context(
+                request, settings["verify"], proxies=settings["proxies"], cert=settings["cert"]
+            )
+        return adapter.get_connection(url, settings["proxies"])  # pragma: no cover - requests < 2.32
+
+    def warm(self, url: str, connections: int, ping: bool = False) -> int:
+        """Open up to ``connections`` pooled connections to ``url``'s host.
+
+        With ``ping``, connections that are already open each send a ``HEAD /``
+        so idle timeouts on the server or in between do not close them.
+        Returns the number of connections newly opened.
+        """
+        pool = self._pool(url)
+        checked_out: List[Any] = []
+        try:
+            for _ in range(min(connections, self.pool_maxsize)):
+                checked_out.append(pool._get_conn())
+
+            def _prepare(conn: Any) -> bool:
+                if ping and _is_connected(conn):
+                    try:
+                        conn.request("HEAD", "/", headers={"Connection": "keep-alive"})
+                        conn.getresponse().read()
+                        return False
+                    except Exception:
+                        conn.close()
+                if _is_connected(conn):
+                    return False
+                conn.connect()
+                return True
+
+            with ThreadPoolExecutor(max_workers=max(1, len(checked_out))) as executor:
+                return sum(executor.map(_prepare, checked_out))
+        finally:
+            for conn in checked_out:
+                pool._put_conn(conn)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class HttpxTransport:
+    """httpx-backed transport with optional HTTP/2 multiplexing.
+
+    With ``http2=True`` many concurrent requests share a handful of
+    connections instead of each holding a keep-alive socket. HTTP/2 needs
+    the ``h2`` package (``pip install "httpx[http2]"``); the server may still
+    negotiate HTTP/1.1 over ALPN.
+
+    Args:
+        http2: Negotiate HTTP/2 when the server supports it.
+        max_connections: Upper bound on open connections to the host.
+        timeout: Per-request timeout in seconds.
+    """
+
+    def __init__(
+        self,
+        http2: bool = True,
+        max_connections: int = 8,
+        timeout: float = DEFAULT_TIMEOUT,
+    ):
+        if httpx is None:
+            raise RuntimeError("httpx library is required for the httpx transport")
+        self.http2 = http2
+        self.name = "http2" if http2 else "httpx"
+        self.timeout = timeout
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        )
+        self._client = httpx.Client(http2=http2, limits=self._limits, timeout=timeout)
+        self.decodable_encodings = _codings(self._client.headers.get("Accept-Encoding", ""))
+        # httpx async connections are bound to the loop that opened them, so
+        # each loop gets its own client; it goes away with the loop
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._async_lock = threading.Lock()
+        # (url, connections) from the last warm(), replayed on each new async client
+        self._warm_target: Optional[Tuple[str, int]] = None
+
+    def post(self, url: str, headers: Dict[str, str], content: bytes) -> TransportResponse:
+        opened: List[str] = []
+
+        def trace(event: str, info: Any) -> None:
+            if event == "connection.connect_tcp.complete":
+                opened.append(event)
+
+        response = self._client.post(url, headers=headers, content=content, extensions={"trace": trace})
+        return TransportResponse(
+            response.status_code, response.text, dict(response.headers), response.http_version,
+            connection_reused=not opened,
+        )
+
+    def _loop_client(self) -> Tuple[Any, bool]:
+        """The async client for the running loop and whether it was just created."""
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            client = self._async_clients.get(loop)
+            if client is not None:
+                return client, False
+            client = httpx.AsyncClient(http2=self.http2, limits=self._limits, timeout=self.timeout)
+            self._async_clients[loop] = client
+        return client, True
+
+    async def apost(self, url: str, headers: Dict[str, str], content: bytes) -> TransportResponse:
+        client, created = self._loop_client()
+        if created and self._warm_target is not None:
+            try:
+                await self._awarm(client, *self._warm_target)
+            except Exception:
+                pass  # Warming is best effort; the request opens its own connection
+        opened: List[str] = []
+
+        async def trace(event: str, info: Any) -> None:
+            if event == "connection.connect_tcp.complete":
+                opened.append(event)
+
+        response = await client.post(url, headers=headers, content=content, extensions={"trace": trace})
+        return TransportResponse(
+            response.status_code, response.text, dict(response.headers), response.http_version,
+            connection_reused=not opened,
+        )
+
+    def _warm_count(self, connections: int) -> int:
+        # Over HTTP/2 one multiplexed connection serves every request
+        return 1 if self.http2 else max(1, connections)
+
+    def warm(self, url: str, connections: int, ping: bool = False) -> int:
+        """Open connections to ``url``'s host with concurrent ``HEAD /`` requests.
+
+        Over HTTP/2 only one is opened. The sync client is warmed here; an
+        async client is warmed on its own loop, by ``apost`` when it first
+        opens one and, when it already exists, by a ``HEAD`` batch scheduled
+        on that loop (which keeps it alive for keep-alive pings). Returns the
+        number of sync connections newly opened.
+        """
+        self._warm_target = (url, connections)
+        with self._async_lock:
+            live = list(self._async_clients.items())
+        for loop, client in live:
+            if loop.is_running():
+                asyncio.run_coroutine_threadsafe(self._awarm(client, url, connections), loop)
+        opened: List[str] = []
+
+        def trace(event: str, info: Any) -> None:
+            if event == "connection.connect_tcp.complete":
+                opened.append(event)
+
+        def head(_: int) -> None:
+            self._client.head(_origin(url), extensions={"trace": trace})
+
+        count = self._warm_count(connections)
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            list(executor.map(head, range(count)))
+        return len(opened)
+
+    async def awarm(self, url: str, connections: int, ping: bool = False) -> int:
+        """Async variant of ``warm`` for the running loop's client."""
+        self._warm_target = (url, connections)
+        client, _ = self._loop_client()
+        return await self._awarm(client, url, connections)
+
+    async def _awarm(self, client: Any, url: str, connections: int) -> int:
+        opened: List[str] = []
+
+        async def trace(event: str, info: Any) -> None:
+            if event == "connection.connect_tcp.complete":
+                opened.append(event)
+
+        count = self._warm_count(connections)
+        await asyncio.gather(*(
+            client.head(_origin(url), extensions={"trace": trace}) for _ in range(count)
+        ))
+        return len(opened)
+
+    def _release_async_clients(self) -> None:
+        """Drop every async client, closing each on its own loop if that loop still runs."""
+        with self._async_lock:
+            live = list(self._async_clients.items())
+            self._async_clients.clear()
+        for loop, client in live:
+            if loop.is_running():
+                asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+
+    def close(self) -> None:
+        """Close the sync client; async ones can only be closed on their loops (see ``aclose``)."""
+        self._client.close()
+        self._release_async_clients()
+
+    async def aclose(self) -> None:
+        """Close the async clients, awaiting the one that belongs to the running loop."""
+        with self._async_lock:
+            client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+        self._release_async_clients()
+
+
+def create_transport(spec: Any = None, **kwargs: Any) -> Any:
+    """Build a transport from a short name, or return ``spec`` unchanged.
+
+    ``None``/``"http1"`` give the pooled ``requests`` transport, ``"http2"``
+    the multiplexed httpx transport and ``"httpx"`` httpx over HTTP/1.1.
+    Any other object is assumed to already implement ``post``/``apost``.
+    """
+    if spec is None or spec == "http1":
+        return RequestsTransport(**kwargs)
+    if spec == "http2":
+        return HttpxTransport(http2=True, **kwargs)
+    if spec == "httpx":
+        return HttpxTransport(http2=False, **kwargs)
+    if isinstance(spec, str):
+        raise ValueError(f"Unknown transport: {spec!r} (expected 'http1', 'http2' or 'httpx')")
+    return spec
@@ -0,0 +1,278 @@
+# stability_validation.py
+
+"""Local pre-flight checks for ZKT contract calls and deploys.
+
+Addresses, ABI signatures, method names and argument arity/types are checked
+before anything is sent, so a malformed call costs no round trip and no quota.
+"""
+
+from typing import Any, Dict, List, Sequence, Tuple
+import json
+import re
+
+__all__ = [
+    "ValidationError",
+    "parse_function_abi",
+    "find_function",
+    "validate_address",
+    "validate_arguments",
+    "validate_contract_call",
+    "validate_deploy",
+]
+
+ADDRESS_RE = re.compile(r"^0x[0-9a-fA-F]{40}$")
+_HEX_RE = re.compile(r"^0x(?:[0-9a-fA-F]{2})*$")
+_INT_RE = re.compile(r"^(u?)int(\d*)$")
+_BYTES_RE = re.compile(r"^bytes(\d+)$")
+
+
+class ValidationError(ValueError):
+    """Raised when a call is rejected locally, before any request is sent."""
+
+
+# ---- Human-readable ABI parsing ----
+
+def _matching_paren(text: str, start: int) -> int:
+    """Return the index of the parenthesis closing the one at ``start``."""
+    depth = 0
+    for i in range(start, len(text)):
+        if text[i] == "(":
+            depth += 1
+        elif text[i] == ")":
+            depth -= 1
+            if depth == 0:
+                return i
+    raise ValueError(f"Unbalanced parentheses in {text!r}")
+
+
+def _split_top_level(text: str) -> List[str]:
+    parts, depth, current = [], 0, []
+    for char in text:
+        if char == "," and depth == 0:
+            parts.append("".join(current))
+            current = []
+            continue
+        depth += char == "("
+        depth -= char == ")"
+        current.append(char)
+    if "".join(current).strip():
+        parts.append("".join(current))
+    return [part.strip() for part in parts if part.strip()]
+
+
+def _canonical_type(param: str) -> str:
+    """Reduce ``"uint amount"`` or ``"(address to, uint v)[] calls"`` to its ABI type."""
+    param = param.strip()
+    if param.startswith("tuple("):
+        param = param[len("tuple"):]
+    if param.startswith("("):
+        end = _matching_paren(param, 0)
+        inner = ",".join(_canonical_type(p) for p in _split_top_level(param[1:end]))
+        suffix = param[end + 1:].split()[0] if param[end + 1:].strip() else ""
+        suffix = suffix if suffix.startswith("[") else ""
+        return f"({inner}){suffix}"
+    base = param.split()[0]
+    for short, full in (("uint", "uint256"), ("int", "int256")):
+        if base == short or base.startswith(short + "["):
+            base = full + base[len(short):]
+    return base
+
+
+def _json_abi_type(param: Dict[str, Any]) -> str:
+    kind = param["type"]
+    if kind.startswith("tuple"):
+        inner = ",".join(_json_abi_type(c) for c in param.get("components", []))
+        return f"({inner}){kind[len('tuple'):]}"
+    return _canonical_type(kind)
+
+
+def parse_function_abi(entry: Any) -> Tuple[str, List[str], List[str]]:
+    """Return ``(name, input_types, output_types)`` for one ABI entry.
+
+    Accepts human-readable signatures (``"function f(uint a) view returns (bool)"``)
+    and JSON ABI fragments.
+    """
+    if isinstance(entry, dict):
+        inputs = [_json_abi_type(p) for p in entry.get("inputs", [])]
+        outputs = [_json_abi_type(p) for p in entry.get("outputs", [])]
+        return entry["name"], inputs, outputs
+
+    text = entry.strip()
+    if text.startswith("function "):
+        text = text[len("function "):]
+    open_at = text.index("(")
+    name = text[:open_at].strip()
+    close_at = _matching_paren(text, open_at)
+    inputs = [_canonical_type(p) for p in _split_top_level(text[open_at + 1:close_at])]
+    outputs: List[str] = []
+    rest = text[close_at + 1:]
+    if "returns" in rest:
+        rest = rest[rest.index("returns") + len("returns"):]
+        start = rest.index("(")
+        outputs = [_canonical_type(p) for p in _split_top_level(rest[start + 1:_matching_paren(rest, start)])]
+    return name, inputs, outputs
+
+
+def _abi_entries(abi: Any) -> List[Any]:
+    if isinstance(abi, str):
+        if abi.strip().startswith("["):
+            try:
+                abi = json.loads(abi)
+            except ValueError as e:
+                raise ValidationError(f"ABI is not valid JSON: {e}") from e
+        else:
+            abi = [abi]
+    if not isinstance(abi, list) or not abi:
+        raise ValidationError("ABI must be a non-empty list of signatures or JSON ABI entries")
+    return abi
+
+
+def _functions(abi: Any) -> List[Tuple[str, List[str], List[str]]]:
+    functions = []
+    for entry in _abi_entries(abi):
+        if isinstance(entry, dict):
+            if entry.get("type", "function") != "function":
+                continue
+        elif isinstance(entry, str):
+            text = entry.strip()
+            # Events, errors and constructors are not callable
+            if text.split(" ", 1)[0] in ("event", "error", "constructor", "fallback", "receive"):
+                continue
+        else:
+            raise ValidationError(f"Invalid ABI entry: {entry!r}")
+        try:
+            functions.append(parse_function_abi(entry))
+        except (KeyError, ValueError) as e:
+            raise ValidationError(f"Invalid ABI entry {entry!r}: {e}") from e
+    return functions
+
+
+def find_function(abi: Any, method: str, arity: int) -> Tuple[str, List[str], List[str]]:
+    """Return ``(name, input_types, output_types)`` of the overload of ``method`` taking ``arity`` arguments."""
+    functions = _functions(abi)
+    overloads = [f for f in functions if f[0] == method]
+    if not overloads:
+        available = ", ".join(sorted({f[0] for f in functions})) or "none"
+        raise ValidationError(f"Method {method!r} not found in ABI (available: {available})")
+    for function in overloads:
+        if len(function[1]) == arity:
+            return function
+    expected = " or ".join(str(n) for n in sorted({len(f[1]) for f in overloads}))
+    raise ValidationError(f"Method {method!r} takes {expected} argument(s), got {arity}")
+
+
+def validate_address(value: Any, field: str = "to") -> str:
+    """Check a 20-byte hex address and return it."""
+    if not isinstance(value, str) or not ADDRESS_RE.match(value):
+        raise ValidationError(f"{field} must be a 0x-prefixed 20-byte hex address, got {value!r}")
+    return value
+
+
+def _check_int(abi_type: str, value: Any, field: str) -> None:
+    unsigned, bits = _INT_RE.match(abi_type).groups()
+    bits = int(bits or 256)
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValidationError(f"{field} must be an integer for {abi_type}, got {value!r}")
+    if isinstance(value, str):
+        try:
+            value = int(value, 16) if value.lower().startswith(("0x", "-0x")) else int(value)
+        except ValueError:
+            raise ValidationError(f"{field} must be an integer for {abi_type}, got {value!r}") from None
+    low, high = (0, 2 ** bits - 1) if unsigned else (-(2 ** (bits - 1)), 2 ** (bits - 1) - 1)
+    if not low <= value <= high:
+        raise ValidationError(f"{field} is out of range for {abi_type}: {value}")
+
+
+def _check_value(abi_type: str, value: Any, field: str) -> None:
+    if abi_type.endswith("]"):
+        inner, size = abi_type[:abi_type.rindex("[")], abi_type[abi_type.rindex("[") + 1:-1]
+        if not isinstance(value, (list, tuple)):
+            raise ValidationError(f"{field} must be a list for {abi_type}, got {value!r}")
+        if size and len(value) != int(size):
+            raise ValidationError(f"{field} must have {size} item(s) for {abi_type}, got {len(value)}")
+        for i, item in enumerate(value):
+            _check_value(inner, item, f"{field}[{i}]")
+    elif abi_type.startswith("("):
+        types = _split_top_level(abi_type[1:-1])
+        if not isinstance(value, (list, tuple)) or len(value) != len(types):
+            raise ValidationError(f"{field} must be a list of {len(types)} item(s) for {abi_type}")
+        for i, (item_type, item) in enumerate(zip(types, value)):
+            _check_value(item_type, item, f"{field}[{i}]")
+    elif abi_type == "address":
+        validate_address(value, field)
+    elif abi_type == "bool":
+        if not isinstance(value, bool) and str(value).lower() not in ("true", "false"):
+            raise ValidationError(f"{field} must be true or false, got {value!r}")
+    elif abi_type == "string":
+        if not isinstance(value, str):
+            raise ValidationError(f"{field} must be a string, got {value!r}")
+    elif _INT_RE.match(abi_type):
+        _check_int(abi_type, value, field)
+    elif abi_type == "bytes" or _BYTES_RE.match(abi_type):
+        if not isinstance(value, str) or not _HEX_RE.match(value):
+            raise ValidationError(f"{field} must be 0x-prefixed hex for {abi_type}, got {value!r}")
+        size = _BYTES_RE.match(abi_type)
+        if size and len(value) != 2 + 2 * int(size.group(1)):
+            raise ValidationError(f"{field} must be {size.group(1)} byte(s) for {abi_type}")
+    # Other types (fixed-point, function) are left to the endpoint
+
+
+def validate_arguments(types: Sequence[str], arguments: Sequence[Any]) -> None:
+    """Check each argument against its ABI type."""
+    for i, (abi_type, value) in enumerate(zip(types, arguments)):
+        _check_value(abi_type, value, f"arguments[{i}]")
+
+
+def validate_contract_call(to: Any, abi: Any, method: Any, arguments: Any) -> Dict[str, Any]:
+    """Validate a read or write call and return the resolved function.
+
+    Raises:
+        ValidationError: On a bad address, ABI, unknown method, wrong argument
+            count or an argument that does not fit its type.
+    """
+    validate_address(to)
+    if not isinstance(method, str) or not method:
+        raise ValidationError("method must be a non-empty string")
+    if not isinstance(arguments, (list, tuple)):
+        raise ValidationError(f"arguments must be a list, got {type(arguments).__name__}")
+    name, inputs, outputs = find_function(abi, method, len(arguments))
+    validate_arguments(inputs, arguments)
+    return {"name": name, "inputs": inputs, "outputs": outputs}
+
+
+def _constructor_inputs(code: str) -> Any:
+    """Constructor parameter types in Solidity ``code``, or None if they cannot be pinned down.
+
+    Only a single contract with a single constructor is unambiguous; with
+    several contracts the one deployed may be another, or inherit it.
+    """
+    # Drop comments so a commented-out constructor is not picked up
+    code = re.sub(r"//[^\n]*|/\*.*?\*/", "", code, flags=re.S)
+    matches = list(re.finditer(r"\bconstructor\s*\(", code))
+    if len(matches) != 1 or len(re.findall(r"\bcontract\s+\w+", code)) != 1:
+        return None
+    open_at = matches[0].end() - 1
+    return [_canonical_type(p) for p in _split_top_level(code[open_at + 1:_matching_paren(code, open_at)])]
+
+
+def validate_deploy(code: Any, arguments: Any = None) -> None:
+    """Validate a deploy: non-empty Solidity source and constructor arguments.
+
+    Constructor arity and types are only checked when the source is a single
+    contract declaring its constructor, since one may also be inherited or
+    belong to a contract other than the one deployed.
+    """
+    if not isinstance(code, str) or "contract" not in code:
+        raise ValidationError("code must be Solidity source containing a contract")
+    arguments = arguments or []
+    if not isinstance(arguments, (list, tuple)):
+        raise ValidationError(f"arguments must be a list, got {type(arguments).__name__}")
+    try:
+        inputs = _constructor_inputs(code)
+    except ValueError as e:
+        raise ValidationError(f"Could not parse constructor: {e}") from e
+    if inputs is None:
+        return
+    if len(inputs) != len(arguments):
+        raise ValidationError(f"Constructor takes {len(inputs)} argument(s), got {len(arguments)}")
+    validate_arguments(inputs, arguments)
@@ -0,0 +1,382 @@
+# stability_watch.py
+
+"""Poll contract reads on schedules and emit events when their values change."""
+
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import asyncio
+import hashlib
+import inspect
+import json
+import threading
+import time
+
+from stability_toolkit import ZKTClient
+
+__all__ = [
+    "ChangeEvent",
+    "ContractWatcher",
+    "Subscription",
+]
+
+Callback = Callable[["ChangeEvent"], Union[None, Awaitable[None]]]
+
+
+class ChangeEvent:
+    """A watched read returned a different value than before.
+
+    ``previous`` is None for the first value a subscription sees.
+    """
+
+    __slots__ = ("to", "method", "arguments", "value", "previous", "digest", "response", "observed_at")
+
+    def __init__(
+        self, to: str, method: str, arguments: List[Any], value: Any, previous: Any, digest: str, response: str
+    ):
+        self.to = to
+        self.method = method
+        self.arguments = arguments
+        self.value = value
+        self.previous = previous
+        self.digest = digest
+        self.response = response
+        self.observed_at = time.time()
+
+    def __repr__(self) -> str:
+        return f"ChangeEvent({self.to}.{self.method}{tuple(self.arguments)}: {self.previous!r} -> {self.value!r})"
+
+
+def _decode(response: str) -> Tuple[bool, Any]:
+    """``(ok, value)`` for a read response; the value is ``output`` when present."""
+    try:
+        data = json.loads(response)
+    except (TypeError, ValueError):
+        return False, None
+    if not isinstance(data, dict) or data.get("success") is False:
+        return False, None
+    return True, data.get("output", data)
+
+
+def _digest(value: Any) -> str:
+    canonical = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class Subscription:
+    """One subscriber's view of a watched read.
+
+    Events go to the callback if one was given; otherwise they queue (up to
+    ``max_pending``, oldest dropped first) for ``get``, plain iteration or
+    ``async for``. Iteration ends when the subscription or watcher closes.
+    """
+
+    def __init__(self, watcher: "ContractWatcher", target: "_Target", interval: float,
+                 callback: Optional[Callback], max_pending: int):
+        self.watcher = watcher
+        self.interval = interval
+        self.callback = callback
+        self.dropped = 0
+        self.closed = False
+        self._target = target
+        self._digest: Optional[str] = None
+        self._value: Any = None
+        self._events: Deque[ChangeEvent] = deque()
+        self._max_pending = max_pending
+        self._cond = threading.Condition()
+        self._waiters: List[asyncio.Future] = []
+
+    def _deliver(self, event: ChangeEvent) -> Optional[Awaitable[None]]:
+        if self.callback is not None:
+            return self.callback(event)
+        with self._cond:
+            if len(self._events) >= self._max_pending:
+                self._events.popleft()
+                self.dropped += 1
+            self._events.append(event)
+            self._cond.notify_all()
+            self._wake()
+        return None
+
+    def _wake(self) -> None:
+        """Resolve async waiters. Caller holds ``_cond``."""
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            waiter.get_loop().call_soon_threadsafe(lambda w=waiter: w.done() or w.set_result(None))
+
+    def get(self, timeout: Optional[float] = None) -> Optional[ChangeEvent]:
+        """Next queued event, waiting up to ``timeout``; None on timeout or close."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._events or self.closed, timeout)
+            return self._events.popleft() if self._events else None
+
+    def __iter__(self) -> Iterator[ChangeEvent]:
+        while True:
+            event = self.get()
+            if event is None:
+                return
+            yield event
+
+    def __aiter__(self) -> "Subscription":
+        return self
+
+    async def __anext__(self) -> ChangeEvent:
+        while True:
+            with self._cond:
+                if self._events:
+                    return self._events.popleft()
+                if self.closed:
+                    raise StopAsyncIteration
+                waiter = asyncio.get_running_loop().create_future()
+                self._waiters.append(waiter)
+            await waiter
+
+    def close(self) -> None:
+        """Stop receiving events; the read stops being polled once nobody watches it."""
+        if not self.closed:
+            self.watcher._unsubscribe(self)
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+            self._wake()
+
+
+class _Target:
+    """One distinct read shared by every subscription to it."""
+
+    def __init__(self, key: str, to: str, abi: Any, method: str, arguments: List[Any]):
+        self.key = key
+        self.to = to
+        self.abi = abi
+        self.method = method
+        self.arguments = arguments
+        self.subscriptions: List[Subscription] = []
+        self.interval = 0.0
+        self.base_interval = 0.0
+        self.next_poll = 0.0
+        self.digest: Optional[str] = None
+        self.failed = False
+        self.polling = False
+
+
+class ContractWatcher:
+    """Watch contract reads and deliver change events to subscribers.
+
+    Subscriptions to the same ``(to, abi, method, arguments)`` share one
+    poll, run at the shortest interval any of them asked for. Each result is
+    hashed and each subscriber hears about it only when the hash differs from
+    the last value it was sent, so a new subscriber gets the current value
+    from the next poll (which happens straight away). While a value
+    stays the same its poll interval grows by ``backoff`` up to
+    ``max_interval``; a change, a new subscriber or a failed read's recovery
+    returns it to the base interval. Failed reads back off the same way and
+    never emit events.
+
+    Run it with ``await watcher.run()`` in an event loop, or ``start()`` it
+    on a background thread. Callbacks may be plain functions or coroutines;
+    they run on the watcher's loop, so slow ones should hand work off.
+
+    Args:
+        client: ``ZKTClient`` used for reads (its cache, rate limiter and
+                transport apply); a default one is created if omitted.
+        api_key: API key for the default client.
+        interval: Default poll interval in seconds.
+        max_interval: Longest interval a stable value backs off to.
+        backoff: Factor applied to the interval after each unchanged poll.
+        max_concurrency: Reads polled at once.
+        max_pending: Events queued per iterator-style subscription.
+
+    Example:
+        watcher = ContractWatcher(client, interval=2.0)
+        sub = watcher.watch(token, abi, "balanceOf", [holder])
+        async for event in sub:
+            print(event.previous, "->", event.value)
+    """
+
+    def __init__(
+        self,
+        client: Optional[ZKTClient] = None,
+        api_key: Optional[str] = None,
+        interval: float = 5.0,
+        max_interval: float = 60.0,
+        backoff: float = 1.5,
+        max_concurrency: int = 8,
+        max_pending: int = 1000,
+    ):
+        self.client = client or ZKTClient(api_key)
+        self.interval = interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._targets: Dict[str, _Target] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {"polls": 0, "changes": 0, "unchanged": 0, "errors": 0, "callback_errors": 0}
+
+    # ---- Subscriptions ----
+
+    def watch(
+        self,
+        to: str,
+        abi: Any,
+        method: str,
+        arguments: Iterable[Any] = (),
+        interval: Optional[float] = None,
+        callback: Optional[Callback] = None,
+    ) -> Subscription:
+        """Subscribe to a read; returns a ``Subscription`` to iterate or close."""
+        arguments = list(arguments)
+        key = json.dumps([to.lower(), abi, method, arguments], sort_keys=True, default=str)
+        with self._lock:
+            target = self._targets.get(key)
+            if target is None:
+                target = self._targets[key] = _Target(key, to, abi, method, arguments)
+            subscription = Subscription(self, target, interval or self.interval, callback, self.max_pending)
+            target.subscriptions.append(subscription)
+            self._reschedule(target)
+        self._wake()
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            target = subscription._target
+            if subscription in target.subscriptions:
+                target.subscriptions.remove(subscription)
+            if not target.subscriptions:
+                self._targets.pop(target.key, None)
+            else:
+                self._reschedule(target)
+
+    def _reschedule(self, target: _Target) -> None:
+        """Poll at the shortest subscriber interval, starting now. Caller holds the lock."""
+        target.base_interval = min(s.interval for s in target.subscriptions)
+        target.interval = target.base_interval
+        target.next_poll = 0.0
+
+    # ---- Polling ----
+
+    def _wake(self) -> None:
+        loop, wakeup = self._loop, self._wakeup
+        if loop is not None and wakeup is not None:
+            loop.call_soon_threadsafe(wakeup.set)
+
+    async def _poll(self, target: _Target, semaphore: asyncio.Semaphore) -> None:
+        try:
+            async with semaphore:
+                response = await self.client.acall_contract_read(
+                    target.to, target.abi, target.method, target.arguments
+                )
+        except Exception as e:
+            response = f"Error: {e}"
+        ok, value = _decode(response)
+        events: List[Tuple[Subscription, ChangeEvent]] = []
+        with self._lock:
+            self._stats["polls"] += 1
+            target.polling = False
+            if not ok:
+                self._stats["errors"] += 1
+                target.failed = True
+                target.interval = min(self.max_interval, target.interval * self.backoff)
+            else:
+                digest = _digest(value)
+                recovered, target.failed = target.failed, False
+                if digest != target.digest:
+                    self._stats["changes"] += 1
+                    target.digest = digest
+                    target.interval = target.base_interval
+                elif recovered:
+                    self._stats["unchanged"] += 1
+                    target.interval = target.base_interval
+                else:
+                    self._stats["unchanged"] += 1
+                    target.interval = min(self.max_interval, target.interval * self.backoff)
+                for subscription in target.subscriptions:
+                    if subscription._digest != digest:
+                        events.append((subscription, ChangeEvent(
+                            target.to, target.method, target.arguments, value, subscription._value, digest, response
+                        )))
+                        subscription._digest, subscription._value = digest, value
+            target.next_poll = time.monotonic() + target.interval
+        if self._wakeup is not None:
+            self._wakeup.set()
+        for subscription, event in events:
+            await self._adeliver(subscription, event)
+
+    async def _adeliver(self, subscription: Subscription, event: ChangeEvent) -> None:
+        try:
+            result = subscription._deliver(event)
+            if inspect.isawaitable(result):
+                await result
+        except Exception:
+            # A failing callback must not stop the other subscribers or the poll loop
+            with self._lock:
+                self._stats["callback_errors"] += 1
+
+    async def run(self) -> None:
+        """Poll until ``stop()``; call from the event loop that should run callbacks."""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        tasks = set()
+        try:
+            while not self._stopped:
+                now = time.monotonic()
+                with self._lock:
+                    targets = list(self._targets.values())
+                    due = [t for t in targets if not t.polling and t.next_poll <= now]
+                    for target in due:
+                        target.polling = True
+                    pending = [t.next_poll for t in targets if not t.polling]
+                for target in due:
+                    task = asyncio.ensure_future(self._poll(target, semaphore))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                timeout = max(0.0, min(pending) - time.monotonic()) if pending else None
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            self._loop = self._wakeup = None
+            self._stopped = False
+
+    def start(self) -> "ContractWatcher":
+        """Run the watcher on a background thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped = False
+            self._thread = threading.Thread(target=asyncio.run, args=(self.run(),), name="stability-watch", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop polling and end every subscription's iteration."""
+        self._stopped = True
+        self._wake()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+            self._thread = None
+        with self._lock:
+            subscriptions = [s for t in self._targets.values() for s in t.subscriptions]
+        for subscription in subscriptions:
+            subscription.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Polls made, changes and unchanged results seen, errors, and what is being watched."""
+        with self._lock:
+            return dict(
+                self._stats,
+                targets=len(self._targets),
+                subscriptions=sum(len(t.subscriptions) for t in self._targets.values()),
+            )
+
+    def __enter__(self) -> "ContractWatcher":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+
+"""Unit tests for the persistent disk cache."""
+
+import importlib.util
+import multiprocessing
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, '.')
+
+from stability_cache import DiskCache, is_immutable_read
+from stability_toolkit import ZKTClient
+from test_toolkit_units import FakeTransport
+
+# Load the community wrapper by path so it cannot clash with an installed langchain_community
+_WRAPPER_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    'libs', 'community', 'langchain_community', 'utilities', 'stability.py',
+)
+_spec = importlib.util.spec_from_file_location("stability_community_wrapper", _WRAPPER_PATH)
+stability_wrapper = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(stability_wrapper)
+
+PURE_ABI = ["function version() pure returns (string)"]
+VIEW_ABI = ["function balanceOf(address owner) view returns (uint256)"]
+
+
+def _write_entries(path, worker):
+    cache = DiskCache(path)
+    for i in range(50):
+        cache.set(f"worker{worker}:{i}", "x" * 100)
+    cache.close()
+
+
+class TestDiskCache(unittest.TestCase):
+    """Tests for DiskCache and its client/wrapper integration."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, "cache.db")
+
+    def test_values_survive_restart_and_warm_start(self):
+        """Test that a new instance sees old entries and preloads them."""
+        cache = DiskCache(self.path)
+        cache.set("a", "1")
+        cache.close()
+
+        restarted = DiskCache(self.path)
+
+        self.assertEqual(restarted.stats()["memory_entries"], 1)
+        self.assertEqual(restarted.get("a"), "1")
+        self.assertIsNone(restarted.get("missing"))
+
+    def test_eviction_drops_least_recently_used(self):
+        """Test that size limits evict the oldest entries first."""
+        cache = DiskCache(self.path, max_entries=10)
+        for i in range(40):
+            cache.set(f"k{i}", "v")
+        cache.evict()
+
+        self.assertLessEqual(cache.stats()["entries"], 10)
+        self.assertEqual(cache.get("k39"), "v")
+        self.assertIsNone(DiskCache(self.path, memory_entries=0).get("k0"))
+
+    def test_concurrent_processes(self):
+        """Test that several processes can write the same cache file."""
+        DiskCache(self.path).close()
+        workers = [multiprocessing.Process(target=_write_entries, args=(self.path, w)) for w in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(30)
+
+        self.assertEqual([w.exitcode for w in workers], [0] * 4)
+        self.assertEqual(DiskCache(self.path).stats()["entries"], 200)
+
+    def test_is_immutable_read(self):
+        """Test detection of pure and explicitly constant methods."""
+        self.assertTrue(is_immutable_read(PURE_ABI, "version"))
+        self.assertFalse(is_immutable_read(VIEW_ABI, "balanceOf"))
+        self.assertTrue(is_immutable_read(VIEW_ABI, "balanceOf", {"balanceOf"}))
+        self.assertTrue(is_immutable_read([{"name": "f", "stateMutability": "pure"}], "f"))
+
+    def test_client_caches_only_immutable_reads(self):
+        """Test that the client serves pure reads from the cache across restarts."""
+        transport = FakeTransport('{"success": true, "output": "1.0"}')
+        client = ZKTClient("test-api-key", transport=transport, cache=DiskCache(self.path))
+
+        client.call_contract_read("0x1", PURE_ABI, "version", [], id=1)
+        client.call_contract_read("0x1", PURE_ABI, "version", [], id=2)
+        client.call_contract_read("0x1", VIEW_ABI, "balanceOf", ["0x2"])
+        client.call_contract_read("0x1", VIEW_ABI, "balanceOf", ["0x2"])
+        self.assertEqual(len(transport.requests), 3)
+
+        restarted = ZKTClient("test-api-key", transport=transport, cache=DiskCache(self.path))
+        restarted.call_contract_read("0x1", PURE_ABI, "version", [])
+        self.assertEqual(len(transport.requests), 3)
+        self.assertEqual(restarted.metrics.snapshot()["cache_hits"], 1)
+
+    def test_deploys_cached_per_source(self):
+        """Test that identical deploys reuse the cached address when enabled."""
+        transport = FakeTransport('{"success": true, "contractAddress": "0xabc"}')
+        client = ZKTClient("test-api-key", transport=transport, cache=DiskCache(self.path), cache_deploys=True)
+
+        first = client.deploy_contract("contract A {}", wait=True)
+        second = client.deploy_contract("contract A {}", wait=True)
+        client.deploy_contract("contract B {}", wait=True)
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(transport.requests), 2)
+
+    @patch.object(stability_wrapper, '_post_request')
+    def test_wrapper_shares_cache_with_client(self, mock_post):
+        """Test that StabilityAPIWrapper reads entries written by ZKTClient."""
+        client = ZKTClient("test-api-key", transport=FakeTransport('{"success": true, "output": "1.0"}'),
+                           cache=DiskCache(self.path))
+        client.call_contract_read("0x1", PURE_ABI, "version", [])
+
+        wrapper = stability_wrapper.StabilityAPIWrapper(api_key="test-api-key", cache=DiskCache(self.path))
+        result = wrapper.call_contract_read("0x1", PURE_ABI, "version", [])
+
+        mock_post.assert_not_called()
+        self.assertEqual(result, '{"success": true, "output": "1.0"}')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
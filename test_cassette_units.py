@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+
+"""Unit tests for cassette record/replay transports."""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, '.')
+
+from stability_cassette import CassetteMiss, RecordingTransport, ReplayTransport, open_cassette
+from stability_compression import RequestCompression, decompress
+from stability_middleware import Middleware
+from stability_toolkit import ZKTClient
+from stability_transport import TransportResponse
+
+API_KEY = "sk-live-0123456789abcdef"
+TOKEN = "0x" + "ab" * 20
+ABI = ["function balanceOf(address owner) view returns (uint256)"]
+
+
+class EchoEndpoint:
+    """Answers reads with a per-call counter after ``delay``; fails for ``"0xdead"``."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+
+    def post(self, url, headers, content):
+        time.sleep(self.delay)
+        self.calls += 1
+        payload = json.loads(decompress(content, headers.get("Content-Encoding")))
+        if payload.get("arguments") == ["0xdead"]:
+            raise ConnectionError(f"connection reset while posting to {url}")
+        body = {"success": True, "output": str(self.calls), "url": url}
+        return TransportResponse(200, json.dumps(body), {"Accept-Encoding": "gzip", "Set-Cookie": "s=1"})
+
+    async def apost(self, url, headers, content):
+        return self.post(url, headers, content)
+
+    def close(self):
+        pass
+
+
+class Bearer(Middleware):
+    def before_send(self, request):
+        request.headers["Authorization"] = "Bearer secret-token"
+
+
+class TestCassette(unittest.TestCase):
+    """Tests for RecordingTransport and ReplayTransport with ZKTClient."""
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.path = os.path.join(tmpdir.name, "zkt.jsonl")
+
+    def record(self, calls, delay=0.0, **options):
+        endpoint = EchoEndpoint(delay)
+        client = ZKTClient(API_KEY, transport=RecordingTransport(self.path, endpoint), **options)
+        with client:
+            results = [client.call_contract_read(TOKEN, ABI, "balanceOf", [holder]) for holder in calls]
+        return results
+
+    def replay(self, **options):
+        transport = ReplayTransport(self.path, **options)
+        return transport, ZKTClient("replay-key", transport=transport)
+
+    def test_recording_scrubs_credentials(self):
+        """Test that the key and credential headers never reach the cassette."""
+        results = self.record(["0x01", "0xdead"], middleware=[Bearer()])
+        self.assertIn(API_KEY[:8], results[1])  # sanitized, but the live error names the key prefix
+        with open(self.path) as f:
+            text = f.read()
+        self.assertNotIn(API_KEY, text)
+        self.assertNotIn("secret-token", text)
+        entries = [json.loads(line) for line in text.splitlines()]
+        self.assertEqual(len(entries), 2)
+        self.assertTrue(entries[0]["request"]["url"].endswith("/zkt/<SCRUBBED>"))
+        self.assertEqual(entries[0]["request"]["headers"]["Authorization"], "<SCRUBBED>")
+        self.assertEqual(entries[0]["request"]["body"]["arguments"], ["0x01"])
+        self.assertEqual(entries[0]["response"]["headers"]["Set-Cookie"], "<SCRUBBED>")
+        self.assertEqual(entries[1]["error"]["type"], "ConnectionError")
+
+    def test_replay_matches_requests_and_errors(self):
+        """Test replay returns what was recorded, per request and in order, including errors."""
+        recorded = self.record(["0x01", "0x02", "0x01", "0xdead"])
+        transport, client = self.replay(latency_scale=0)
+        replayed = [client.call_contract_read(TOKEN, ABI, "balanceOf", [h], id=7) for h in ["0x02", "0x01", "0x01"]]
+        self.assertEqual([json.loads(r)["output"] for r in replayed], ["2", "1", "3"])
+        self.assertEqual(replayed[0], recorded[1].replace(API_KEY, "<SCRUBBED>"))
+        error = client.call_contract_read(TOKEN, ABI, "balanceOf", ["0xdead"])
+        self.assertEqual(error, "Error: connection reset while posting to https://rpc.stabilityprotocol.com/zkt/<SCRUBBED>")
+        self.assertEqual(transport.stats(), {"served": 4, "misses": 0, "unused": 0})
+
+    def test_misses_and_repeats(self):
+        """Test unrecorded requests miss, and exhausted ones cycle unless repeat is off."""
+        self.record(["0x01"])
+        transport, client = self.replay(latency_scale=0)
+        self.assertEqual(client.call_contract_read(TOKEN, ABI, "balanceOf", ["0x01"]),
+                         client.call_contract_read(TOKEN, ABI, "balanceOf", ["0x01"]))
+        self.assertTrue(client.call_contract_read(TOKEN, ABI, "balanceOf", ["0x09"]).startswith("Error: No recording"))
+
+        strict = ReplayTransport(self.path, latency_scale=0, repeat=False)
+        strict.post("https://x/zkt/k", {}, json.dumps({"to": TOKEN, "abi": ABI, "method": "balanceOf",
+                                                        "arguments": ["0x01"], "id": 1}).encode())
+        with self.assertRaises(CassetteMiss):
+            strict.post("https://x/zkt/k", {}, json.dumps({"to": TOKEN, "abi": ABI, "method": "balanceOf",
+                                                            "arguments": ["0x01"], "id": 1}).encode())
+
+    def test_recorded_latency_is_replayed(self):
+        """Test replay waits the recorded latency, scaled."""
+        self.record(["0x01"], delay=0.1)
+        _, client = self.replay()
+        started = time.perf_counter()
+        client.call_contract_read(TOKEN, ABI, "balanceOf", ["0x01"])
+        self.assertGreaterEqual(time.perf_counter() - started, 0.09)
+
+        _, fast = self.replay(latency_scale=0.1)
+        started = time.perf_counter()
+        fast.call_contract_read(TOKEN, ABI, "balanceOf", ["0x01"])
+        self.assertLess(time.perf_counter() - started, 0.05)
+
+    def test_async_replay_of_compressed_bodies(self):
+        """Test compressed request bodies are recorded decoded and matched on replay."""
+        compression = RequestCompression(encodings=("gzip",), threshold=16, optimistic=True)
+        endpoint = EchoEndpoint()
+        with ZKTClient(API_KEY, transport=RecordingTransport(self.path, endpoint), compression=compression) as client:
+            client.call_contract_read(TOKEN, ABI, "balanceOf", ["0x01"])
+        with open(self.path) as f:
+            entry = json.loads(f.readline())
+        self.assertEqual(entry["request"]["headers"]["Content-Encoding"], "gzip")
+        self.assertEqual(entry["request"]["body"]["method"], "balanceOf")
+
+        transport, client = self.replay(latency_scale=0)
+        result = asyncio.run(client.acall_contract_read(TOKEN, ABI, "balanceOf", ["0x01"]))
+        self.assertEqual(json.loads(result)["output"], "1")
+
+    def test_open_cassette_auto(self):
+        """Test auto mode records the first time and replays afterwards."""
+        endpoint = EchoEndpoint()
+        first = open_cassette(self.path, transport=endpoint)
+        self.assertIsInstance(first, RecordingTransport)
+        first.close()
+        self.assertIsInstance(open_cassette(self.path), ReplayTransport)
+        with self.assertRaises(ValueError):
+            open_cassette(self.path, mode="rewind")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+
+"""Unit tests for negotiated request compression against a local stub endpoint."""
+
+import asyncio
+import gzip
+import json
+import sys
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+sys.path.insert(0, '.')
+
+from stability_compression import RequestCompression, available_encodings, compress, decompress
+from stability_toolkit import ZKTClient
+from stability_transport import TransportResponse
+
+ABI = ["function f%d(uint256 v) view returns (uint256)" % i for i in range(200)]
+
+
+class StubEndpoint(BaseHTTPRequestHandler):
+    """ZKT stand-in that accepts ``server.accepts`` request codings and gzips its replies."""
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        encoding = self.headers.get("Content-Encoding")
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.seen.append((encoding, len(body)))
+        self.server.asked.append(self.headers.get("Accept-Encoding"))
+        advertised = ", ".join(sorted(self.server.accepts))
+        if encoding and encoding not in self.server.accepts:
+            self.send_response(415)
+            self.send_header("Accept-Encoding", advertised)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        payload = json.loads(decompress(body, encoding))
+        reply = json.dumps({"success": True, "abi_entries": len(payload.get("abi", []))}).encode()
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            reply = gzip.compress(reply)
+            self.send_response(200)
+            self.send_header("Content-Encoding", "gzip")
+        else:
+            self.send_response(200)
+        if advertised:
+            self.send_header("Accept-Encoding", advertised)
+        self.send_header("Content-Length", str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+
+class TestCodecs(unittest.TestCase):
+    """Tests for compress/decompress."""
+
+    def test_round_trip(self):
+        """Test every available coding round-trips."""
+        body = json.dumps({"abi": ABI}).encode()
+        for encoding in available_encodings():
+            with self.subTest(encoding=encoding):
+                self.assertEqual(decompress(compress(body, encoding), encoding), body)
+        self.assertEqual(decompress(body, None), body)
+        with self.assertRaises(ValueError):
+            compress(body, "br")
+
+
+class TestNegotiatedCompression(unittest.TestCase):
+    """Tests for RequestCompression with ZKTClient and a local endpoint."""
+
+    def start_stub(self, accepts):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), StubEndpoint)
+        server.accepts, server.seen, server.asked = set(accepts), [], []
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = "http://127.0.0.1:%d/zkt/{}" % server.server_address[1]
+        patcher = patch("stability_toolkit.API_URL_TEMPLATE", url)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return server
+
+    def test_compresses_after_endpoint_advertises_support(self):
+        """Test first call is plain, later large calls are gzipped, small ones never are."""
+        server = self.start_stub({"gzip"})
+        compression = RequestCompression(encodings=("gzip",), threshold=1024)
+        client = ZKTClient(api_key="test-key", compression=compression)
+        self.addCleanup(client.close)
+
+        first = client.call_contract_read("0x" + "ab" * 20, ABI, "f1", [1])
+        second = client.call_contract_read("0x" + "ab" * 20, ABI, "f1", [1])
+        client.call_contract_read("0x" + "ab" * 20, ABI[:1], "f0", [1])
+
+        self.assertEqual(json.loads(first), {"success": True, "abi_entries": 200})
+        self.assertEqual(first, second)
+        self.assertEqual([encoding for encoding, _ in server.seen], [None, "gzip", None])
+        self.assertLess(server.seen[1][1], server.seen[0][1] / 4)
+        stats = compression.stats()
+        self.assertEqual((stats["compressed"], stats["uncompressed"]), (1, 2))
+
+    def test_refused_coding_is_resent_plain(self):
+        """Test a 415 reply falls back to an uncompressed resend and is remembered."""
+        server = self.start_stub(set())
+        compression = RequestCompression(encodings=("gzip",), threshold=1024, optimistic=True)
+        client = ZKTClient(api_key="test-key", compression=compression)
+        self.addCleanup(client.close)
+
+        for _ in range(2):
+            result = client.call_contract_read("0x" + "ab" * 20, ABI, "f1", [1])
+            self.assertEqual(json.loads(result)["abi_entries"], 200)
+
+        self.assertEqual([encoding for encoding, _ in server.seen], ["gzip", None, None])
+        self.assertEqual(compression.stats()["refused"], 1)
+
+    def test_accepts_only_what_the_transport_decodes(self):
+        """Test Accept-Encoding follows the transport, so zstd is not asked for unless it can be read."""
+        server = self.start_stub({"gzip"})
+        client = ZKTClient(api_key="test-key", compression=RequestCompression(encodings=("gzip",)))
+        self.addCleanup(client.close)
+        client.call_contract_read("0x" + "ab" * 20, ABI, "f1", [1])
+        self.assertEqual(server.asked, [", ".join(client.transport.decodable_encodings)])
+        self.assertIn("gzip", client.transport.decodable_encodings)
+
+        class Custom:
+            """Transport that says nothing about the codings it decodes."""
+
+            def __init__(self):
+                self.headers = []
+
+            def post(self, url, headers, content):
+                self.headers.append(headers)
+                return TransportResponse(200, "{}")
+
+        class GzipOnly(Custom):
+            decodable_encodings = ("gzip",)
+
+        compression = RequestCompression()
+        for transport, expected in ((GzipOnly(), "gzip"), (Custom(), None)):
+            compression.post(transport, "https://example.com/zkt/k", {}, b"{}")
+            self.assertEqual(transport.headers[0].get("Accept-Encoding"), expected)
+
+    def test_async_path_compresses(self):
+        """Test apost goes through the same negotiation."""
+        server = self.start_stub({"gzip"})
+        client = ZKTClient(
+            api_key="test-key", compression=RequestCompression(encodings=("gzip",), threshold=1024, optimistic=True)
+        )
+        self.addCleanup(client.close)
+        result = asyncio.run(client.acall_contract_read("0x" + "ab" * 20, ABI, "f1", [1]))
+        self.assertEqual(json.loads(result)["abi_entries"], 200)
+        self.assertEqual(server.seen[0][0], "gzip")
+
+
+if __name__ == '__main__':
+    unittest.main()
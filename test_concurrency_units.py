@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+
+"""Unit tests for adaptive (AIMD) concurrency control."""
+
+import asyncio
+import json
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, '.')
+
+from stability_concurrency import AdaptiveConcurrency
+from stability_toolkit import ZKTClient
+from stability_transport import TransportResponse
+from test_toolkit_units import FakeTransport
+
+CALL = {"to": "0x" + "ab" * 20, "abi": ["function get() view returns (uint256)"], "method": "get", "arguments": []}
+
+
+class GaugeTransport:
+    """Sleeps per request, answers with ``status`` and records peak concurrency."""
+
+    def __init__(self, delay=0.005, status=200, barrier=None):
+        self.delay = delay
+        self.status = status
+        self.barrier = barrier
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def post(self, url, headers, content):
+        with self._lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            if self.barrier is not None:
+                self.barrier.wait(timeout=5)
+            time.sleep(self.delay)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+        body = '{"success": true}' if self.status == 200 else json.dumps({"error": "Too Many Requests"})
+        return TransportResponse(self.status, body)
+
+    def close(self):
+        pass
+
+
+class TestAdaptiveConcurrency(unittest.TestCase):
+    """Tests for AdaptiveConcurrency with ZKTClient."""
+
+    def test_limit_caps_in_flight_requests(self):
+        """Test that no more than the limit are ever in flight."""
+        transport = GaugeTransport()
+        limiter = AdaptiveConcurrency(initial_limit=3, max_limit=3)
+        client = ZKTClient(transport=transport, adaptive_concurrency=limiter)
+        client.read_many([CALL] * 30)
+        self.assertEqual(transport.peak, 3)
+        self.assertEqual(limiter.stats()["in_flight"], 0)
+
+    def test_limit_grows_while_healthy(self):
+        """Test additive increase when the limit is the bottleneck."""
+        limiter = AdaptiveConcurrency(initial_limit=2, max_limit=8, latency_tolerance=50)
+        client = ZKTClient(transport=GaugeTransport(), adaptive_concurrency=limiter)
+        client.read_many([CALL] * 150)
+        self.assertGreater(limiter.limit, 2)
+        self.assertLessEqual(limiter.limit, 8)
+        self.assertEqual(client.metrics.snapshot()["concurrency_limit"], limiter.limit)
+
+    def test_throttling_burst_halves_once(self):
+        """Test that a burst of 429s started together cuts the limit a single time."""
+        limiter = AdaptiveConcurrency(initial_limit=8, max_limit=8)
+        transport = GaugeTransport(status=429, barrier=threading.Barrier(8))
+        client = ZKTClient(transport=transport, adaptive_concurrency=limiter)
+        client.read_many([CALL] * 8)
+        stats = limiter.stats()
+        self.assertEqual((stats["limit"], stats["decreases"], stats["congested"]), (4, 1, 8))
+
+        # The next 429 comes from a request started after the cut, so it cuts again
+        transport.barrier = None
+        client.call_contract_read(**CALL)
+        self.assertEqual(limiter.limit, 2)
+
+    def test_transport_errors_count_as_congestion(self):
+        """Test that exceptions back off and still return an error string."""
+        limiter = AdaptiveConcurrency(initial_limit=4, min_limit=2)
+        client = ZKTClient(transport=FakeTransport(error=ConnectionError("reset")), adaptive_concurrency=limiter)
+        for _ in range(3):
+            self.assertTrue(client.call_contract_read(**CALL).startswith("Error:"))
+        self.assertEqual(limiter.limit, 2)
+
+    def test_cancelled_async_waiter_leaves_queue(self):
+        """Test that cancelling a queued aread does not leak a slot."""
+        limiter = AdaptiveConcurrency(initial_limit=1, max_limit=1)
+
+        async def _run():
+            async with limiter.aslot():
+                task = asyncio.create_task(limiter.aslot().__aenter__())
+                await asyncio.sleep(0.01)
+                self.assertEqual(limiter.stats()["queued"], 1)
+                task.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await task
+            async with limiter.aslot():
+                pass
+
+        asyncio.run(_run())
+        stats = limiter.stats()
+        self.assertEqual((stats["in_flight"], stats["queued"]), (0, 0))
+
+    def test_cancel_racing_a_release_keeps_count(self):
+        """Test that a waiter cancelled while another thread releases is never released twice."""
+        for cancel_first in (True, False):
+            with self.subTest(cancel_first=cancel_first):
+                limiter = AdaptiveConcurrency(initial_limit=1, max_limit=1)
+                holding, release = threading.Event(), threading.Event()
+
+                def _hold():
+                    with limiter.slot():
+                        holding.set()
+                        release.wait()
+
+                holder = threading.Thread(target=_hold)
+                holder.start()
+                holding.wait()
+
+                async def _run():
+                    waiting = limiter.aslot()
+                    task = asyncio.create_task(waiting.__aenter__())
+                    await asyncio.sleep(0.01)
+                    # Both steps happen before the waiting task runs again
+                    if cancel_first:
+                        task.cancel()
+                    release.set()
+                    holder.join()
+                    if not cancel_first:
+                        task.cancel()
+                    with self.assertRaises(asyncio.CancelledError):
+                        await task
+                    self.assertEqual(limiter.stats()["in_flight"], 0)
+
+                    # The limit still holds afterwards
+                    async with limiter.aslot():
+                        second = asyncio.create_task(limiter.aslot().__aenter__())
+                        await asyncio.sleep(0.01)
+                        self.assertFalse(second.done())
+                        second.cancel()
+                        with self.assertRaises(asyncio.CancelledError):
+                            await second
+
+                asyncio.run(_run())
+                stats = limiter.stats()
+                self.assertEqual((stats["in_flight"], stats["queued"]), (0, 0))
+
+    def test_async_reads_use_the_limit(self):
+        """Test aread_many against the adaptive limit."""
+
+        class AsyncGauge(GaugeTransport):
+            async def apost(self, url, headers, content):
+                return await asyncio.to_thread(self.post, url, headers, content)
+
+        transport = AsyncGauge()
+        client = ZKTClient(transport=transport, adaptive_concurrency=AdaptiveConcurrency(initial_limit=2, max_limit=2))
+        results = asyncio.run(client.aread_many([CALL] * 10))
+        self.assertEqual(results, ['{"success": true}'] * 10)
+        self.assertEqual(transport.peak, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+
+"""Unit tests for endpoint pools: latency routing, failover and health."""
+
+import json
+import sys
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+sys.path.insert(0, '.')
+
+import stability_toolkit
+from stability_endpoints import EndpointPool
+from stability_toolkit import ZKTClient
+from stability_transport import TransportResponse
+
+CALL = {"to": "0x" + "ab" * 20, "abi": ["function get() view returns (uint256)"], "method": "get", "arguments": []}
+PRIMARY = "https://rpc.example.com"
+LOCAL = "http://127.0.0.1:8545"
+
+
+class RoutingTransport:
+    """Answers per host: a status code, an exception, or 200; records the hosts hit."""
+
+    def __init__(self, **behaviour):
+        self.behaviour = behaviour
+        self.hosts = []
+
+    def post(self, url, headers, content):
+        host = url.split("/")[2]
+        self.hosts.append(host)
+        outcome = self.behaviour.get(host, 200)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return TransportResponse(outcome, json.dumps({"success": outcome == 200, "host": host}))
+
+    async def apost(self, url, headers, content):
+        return self.post(url, headers, content)
+
+    def close(self):
+        pass
+
+
+def fixed_probe(latencies):
+    """Probe returning ``latencies[url]`` seconds, raising for missing or exception values."""
+
+    def probe(url):
+        latency = latencies.get(url)
+        if latency is None or isinstance(latency, Exception):
+            raise latency or ConnectionError(url)
+        return latency
+
+    return probe
+
+
+class TestEndpointPool(unittest.TestCase):
+    """Tests for EndpointPool."""
+
+    def pool(self, urls=(PRIMARY, LOCAL), **options):
+        options.setdefault("probe_interval", None)
+        pool = EndpointPool(urls, **options)
+        self.addCleanup(pool.close)
+        return pool
+
+    def test_templates_and_default_order(self):
+        """Test URL normalization and that unmeasured endpoints keep list order."""
+        pool = self.pool((PRIMARY + "/", "https://other.example.com/zkt/{}"))
+        self.assertEqual(pool.endpoints[0].url("k"), PRIMARY + "/zkt/k")
+        self.assertEqual(pool.endpoints[1].url("k"), "https://other.example.com/zkt/k")
+        self.assertEqual(pool.select().name, PRIMARY + "/zkt/")
+        with self.assertRaises(ValueError):
+            EndpointPool([], probe_interval=None)
+
+    def test_probes_route_to_fastest(self):
+        """Test that probing measures latency and requests follow the fastest endpoint."""
+        latencies = {PRIMARY + "/zkt/": 0.120, LOCAL + "/zkt/": 0.004}
+        pool = self.pool(probe=fixed_probe(latencies))
+        pool.probe_now()
+        self.assertEqual(pool.select().name, LOCAL + "/zkt/")
+        self.assertEqual(pool.stats()[LOCAL + "/zkt/"]["probe_latency_ms"], 4.0)
+        self.assertIsNone(pool.stats()[LOCAL + "/zkt/"]["latency_ms"])
+
+        transport = RoutingTransport()
+        client = ZKTClient("test-key", transport=transport, endpoints=pool)
+        client.call_contract_read(**CALL)
+        self.assertEqual(transport.hosts, ["127.0.0.1:8545"])
+        self.assertEqual(pool.stats()[LOCAL + "/zkt/"]["requests"], 1)
+
+    def test_reads_fail_over(self):
+        """Test that a read failing on one endpoint is answered by the next."""
+        pool = self.pool()
+        transport = RoutingTransport(**{"rpc.example.com": ConnectionError("refused")})
+        client = ZKTClient("test-key", transport=transport, endpoints=pool)
+
+        result = json.loads(client.call_contract_read(**CALL))
+        self.assertEqual(result["host"], "127.0.0.1:8545")
+        stats = pool.stats()[PRIMARY + "/zkt/"]
+        self.assertEqual((stats["errors"], stats["failovers"], stats["last_error"]), (1, 1, "ConnectionError"))
+
+        # The local endpoint has now answered, so it is preferred over the unmeasured primary
+        transport.hosts.clear()
+        client.call_contract_read(**CALL)
+        self.assertEqual(transport.hosts, ["127.0.0.1:8545"])
+
+        transport = RoutingTransport(**{"rpc.example.com": 503})
+        client = ZKTClient("test-key", transport=transport, endpoints=self.pool())
+        self.assertEqual(json.loads(client.call_contract_read(**CALL))["host"], "127.0.0.1:8545")
+        self.assertEqual(transport.hosts, ["rpc.example.com", "127.0.0.1:8545"])
+
+    def test_writes_are_not_resent(self):
+        """Test that a failed write is not retried elsewhere but steers the next call away."""
+        pool = self.pool(failure_threshold=1)
+        transport = RoutingTransport(**{"rpc.example.com": 502})
+        client = ZKTClient("test-key", transport=transport, endpoints=pool, derive_idempotency_keys=False)
+
+        client.post_zkt_v1("hello")
+        self.assertEqual(transport.hosts, ["rpc.example.com"])
+        client.post_zkt_v1("hello again")
+        self.assertEqual(transport.hosts, ["rpc.example.com", "127.0.0.1:8545"])
+
+    def test_cooldown_and_probe_recovery(self):
+        """Test that a failing endpoint sits out its cooldown and a good probe restores it."""
+        latencies = {PRIMARY + "/zkt/": 0.010, LOCAL + "/zkt/": 0.050}
+        pool = self.pool(probe=fixed_probe(latencies), failure_threshold=2, cooldown=60)
+        pool.probe_now()
+        primary = pool.select()
+        self.assertEqual(primary.name, PRIMARY + "/zkt/")
+
+        pool.record_failure(primary, "HTTP 503")
+        self.assertIs(pool.select(), primary)
+        pool.record_failure(primary, "HTTP 503")
+        self.assertEqual(pool.select().name, LOCAL + "/zkt/")
+        self.assertFalse(pool.stats()[PRIMARY + "/zkt/"]["healthy"])
+
+        pool.probe_now()
+        self.assertIs(pool.select(), primary)
+        self.assertTrue(pool.stats()[PRIMARY + "/zkt/"]["healthy"])
+
+    def test_request_latency_outranks_probe_rtt(self):
+        """Test that a fast HEAD does not hide slow requests, and probes only rank unused endpoints."""
+        latencies = {PRIMARY + "/zkt/": 0.005, LOCAL + "/zkt/": 0.050}
+        pool = self.pool(probe=fixed_probe(latencies), smoothing=1.0)
+        primary, local = pool.endpoints
+        pool.probe_now()
+        self.assertIs(pool.select(), primary)
+
+        pool.record_success(primary, 0.300)
+        self.assertIs(pool.select(), local)
+        pool.probe_now()
+        self.assertEqual(pool.stats()[PRIMARY + "/zkt/"]["latency_ms"], 300.0)
+        self.assertIs(pool.select(), local)
+
+        pool.record_success(local, 0.400)
+        self.assertIs(pool.select(), primary)
+
+    def test_all_down_still_tries_soonest_back(self):
+        """Test that with every endpoint cooling down, the one back first is used."""
+        pool = self.pool(failure_threshold=1, cooldown=60)
+        pool.record_failure(pool.endpoints[1], "HTTP 503")
+        time.sleep(0.01)
+        pool.record_failure(pool.endpoints[0], "HTTP 503")
+        self.assertIs(pool.select(), pool.endpoints[1])
+
+    def test_background_probe_against_local_stand_in(self):
+        """Test the default HEAD probe and module-level routing against a local server."""
+
+        class StandIn(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers["Content-Length"]))
+                reply = b'{"success": true, "output": "local"}'
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(reply)))
+                self.end_headers()
+                self.wfile.write(reply)
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        local = "http://127.0.0.1:%d" % server.server_address[1]
+
+        # Port 1 refuses connections; the stand-in answers HEAD with 501, which still counts as up
+        pool = self.pool(("http://127.0.0.1:1", local), probe_interval=0.05)
+        deadline = time.monotonic() + 2
+        while pool.stats()[local + "/zkt/"]["probes"] < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        stats = pool.stats()
+        self.assertIsNotNone(stats[local + "/zkt/"]["probe_latency_ms"])
+        self.assertEqual(stats["http://127.0.0.1:1/zkt/"]["probe_errors"], stats["http://127.0.0.1:1/zkt/"]["probes"])
+        self.assertEqual(pool.select().name, local + "/zkt/")
+
+        stability_toolkit.set_endpoint_pool(pool)
+        self.addCleanup(stability_toolkit.set_endpoint_pool, None)
+        with patch("builtins.print"):
+            result = stability_toolkit._post_request(dict(CALL, id=1), "test-key")
+        self.assertEqual(json.loads(result)["output"], "local")
+
+    def test_env_configures_module_pool(self):
+        """Test that STABILITY_ENDPOINTS builds the module pool on first use."""
+        stability_toolkit.set_endpoint_pool(None)
+        self.addCleanup(stability_toolkit.set_endpoint_pool, None)
+        with patch.dict("os.environ", {"STABILITY_ENDPOINTS": f"{PRIMARY}, {LOCAL}"}), \
+                patch("stability_endpoints.head_probe", fixed_probe({})):
+            pool = stability_toolkit.get_endpoint_pool()
+        self.addCleanup(pool.close)
+        self.assertEqual([e.name for e in pool.endpoints], [PRIMARY + "/zkt/", LOCAL + "/zkt/"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+
+"""Unit tests for hedged reads."""
+
+import asyncio
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, '.')
+
+from stability_hedging import HedgePolicy
+from stability_ratelimit import SharedRateLimiter
+from stability_toolkit import ZKTClient
+from stability_transport import TransportResponse
+
+TOKEN = "0x" + "ab" * 20
+ABI = ["function get() view returns (uint256)", "function set(uint256 v)"]
+
+
+class StallingTransport:
+    """The first ``stall`` requests take ``slow`` seconds, the rest ``fast``."""
+
+    def __init__(self, stall=1, slow=1.0, fast=0.01):
+        self.stall = stall
+        self.slow = slow
+        self.fast = fast
+        self.calls = 0
+        self.cancelled = 0
+        self._lock = threading.Lock()
+
+    def _delay(self):
+        with self._lock:
+            self.calls += 1
+            return self.slow if self.calls <= self.stall else self.fast
+
+    def post(self, url, headers, content):
+        time.sleep(self._delay())
+        return TransportResponse(200, '{"success": true, "output": "1"}')
+
+    async def apost(self, url, headers, content):
+        try:
+            await asyncio.sleep(self._delay())
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return TransportResponse(200, '{"success": true, "output": "1"}')
+
+    def close(self):
+        pass
+
+
+class TestHedgePolicy(unittest.TestCase):
+    """Tests for HedgePolicy on its own and in ZKTClient."""
+
+    def test_delay_tracks_percentile(self):
+        """Test the hedge delay follows the recent latency percentile."""
+        policy = HedgePolicy(percentile=90, min_samples=10, min_delay=0.0)
+        self.assertIsNone(policy.delay())
+        for i in range(1, 101):
+            policy._latencies.append(i / 1000.0)
+        self.assertAlmostEqual(policy.delay(), 0.091)
+
+    def test_slow_read_is_hedged(self):
+        """Test that a stalled read is answered by its hedge."""
+        policy = HedgePolicy(initial_delay=0.05, max_extra_load=1.0)
+        transport = StallingTransport()
+        with ZKTClient(transport=transport, hedging=policy) as client:
+            started = time.perf_counter()
+            result = client.call_contract_read(TOKEN, ABI, "get", [])
+            elapsed = time.perf_counter() - started
+        self.assertEqual(result, '{"success": true, "output": "1"}')
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual(transport.calls, 2)
+        self.assertEqual((policy.stats()["hedged"], policy.stats()["hedge_won"]), (1, 1))
+
+    def test_writes_are_never_hedged(self):
+        """Test that state-changing calls are sent once however slow."""
+        policy = HedgePolicy(initial_delay=0.01, max_extra_load=1.0)
+        transport = StallingTransport(slow=0.1)
+        with ZKTClient(transport=transport, hedging=policy) as client:
+            client.call_contract_write(TOKEN, ABI, "set", [1])
+        self.assertEqual(transport.calls, 1)
+        self.assertEqual(policy.stats()["reads"], 0)
+
+    def test_extra_load_is_capped(self):
+        """Test that hedges stay within max_extra_load of reads."""
+        policy = HedgePolicy(initial_delay=0.005, max_extra_load=0.25)
+        transport = StallingTransport(stall=100, slow=0.03)
+        with ZKTClient(transport=transport, hedging=policy) as client:
+            for _ in range(8):
+                client.call_contract_read(TOKEN, ABI, "get", [])
+        stats = policy.stats()
+        self.assertEqual((stats["hedged"], stats["budget_exhausted"]), (2, 6))
+        self.assertEqual(transport.calls, 10)
+
+    def test_unfunded_reads_stay_on_the_caller_thread(self):
+        """Test that reads with no hedge budget skip the worker pool."""
+        policy = HedgePolicy(initial_delay=0.05, max_extra_load=0.5)
+        threads = []
+
+        class ThreadTransport(StallingTransport):
+            def post(self, url, headers, content):
+                threads.append(threading.current_thread())
+                return super().post(url, headers, content)
+
+        with ZKTClient(transport=ThreadTransport(stall=0), hedging=policy) as client:
+            client.call_contract_read(TOKEN, ABI, "get", [])
+            client.call_contract_read(TOKEN, ABI, "get", [])
+        # Budget is 0.5 on the first read and 1.0 on the second
+        self.assertIs(threads[0], threading.current_thread())
+        self.assertIsNot(threads[1], threading.current_thread())
+        self.assertEqual(policy.stats()["budget_exhausted"], 0)
+
+    def test_hedge_needs_a_free_read_token(self):
+        """Test that hedging never waits on the shared reads/minute budget."""
+        limiter = SharedRateLimiter(":memory:", reads_per_minute=60, read_burst=1)
+        self.addCleanup(limiter.close)
+        policy = HedgePolicy(initial_delay=0.01, max_extra_load=1.0)
+        transport = StallingTransport(slow=0.1)
+        with ZKTClient(transport=transport, hedging=policy, rate_limiter=limiter) as client:
+            client.call_contract_read(TOKEN, ABI, "get", [])
+        self.assertEqual(transport.calls, 1)
+        self.assertEqual(policy.stats()["hedged"], 0)
+
+    def test_async_loser_is_cancelled(self):
+        """Test that apost cancels the slower request."""
+        policy = HedgePolicy(initial_delay=0.05, max_extra_load=1.0)
+        transport = StallingTransport(slow=5.0)
+        client = ZKTClient(transport=transport, hedging=policy)
+
+        async def _run():
+            result = await client.acall_contract_read(TOKEN, ABI, "get", [])
+            await asyncio.sleep(0)
+            return result
+
+        started = time.perf_counter()
+        self.assertEqual(asyncio.run(_run()), '{"success": true, "output": "1"}')
+        self.assertLess(time.perf_counter() - started, 1.0)
+        self.assertEqual(transport.cancelled, 1)
+        self.assertEqual(policy.stats()["hedge_won"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
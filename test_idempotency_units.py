@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+
+"""Unit tests for idempotent write submission."""
+
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+sys.path.insert(0, '.')
+
+import stability_toolkit
+from stability_idempotency import IdempotencyConflict, IdempotencyStore, SQLiteIdempotencyStore
+from stability_toolkit import StabilityToolkit, ZKTClient, call_contract_read, call_contract_write
+from test_toolkit_units import FakeTransport
+
+ABI = ["function set(uint256 v)"]
+
+
+class SlowTransport(FakeTransport):
+    """FakeTransport that takes a while to answer."""
+
+    def post(self, url, headers, content):
+        time.sleep(0.2)
+        return super().post(url, headers, content)
+
+
+class TestIdempotencyStore(unittest.TestCase):
+    """Tests for the in-memory and SQLite stores."""
+
+    def test_completed_result_is_replayed_until_window_ends(self):
+        """Test begin/complete and expiry of the replay window."""
+        store = IdempotencyStore(window=0.2)
+        self.assertIsNone(store.begin("k"))
+        store.complete("k", '{"success": true, "hash": "0x1"}')
+        self.assertEqual(store.begin("k"), '{"success": true, "hash": "0x1"}')
+        time.sleep(0.25)
+        self.assertIsNone(store.begin("k"))
+
+    def test_failures_release_the_key(self):
+        """Test that errors and rejected writes can be retried."""
+        store = IdempotencyStore()
+        for result in ("Error: timed out", '{"success": false, "error": "reverted"}'):
+            self.assertIsNone(store.begin("k"))
+            store.complete("k", result)
+        self.assertIsNone(store.begin("k"))
+
+    def test_in_flight_duplicate_times_out(self):
+        """Test that a duplicate gives up if the first submission never finishes."""
+        store = IdempotencyStore(wait_timeout=0.1)
+        store.begin("k")
+        with self.assertRaises(IdempotencyConflict):
+            store.begin("k")
+
+    def test_reused_key_with_other_fingerprint_conflicts(self):
+        """Test that a fingerprint mismatch raises for pending and completed keys."""
+        for path in (None, ":memory:"):
+            with self.subTest(store="memory" if path is None else "sqlite"):
+                store = IdempotencyStore() if path is None else SQLiteIdempotencyStore(path)
+                self.assertIsNone(store.begin("k", "a"))
+                with self.assertRaises(IdempotencyConflict):
+                    store.begin("k", "b")
+                store.complete("k", '{"success": true}')
+                self.assertEqual(store.begin("k", "a"), '{"success": true}')
+                with self.assertRaises(IdempotencyConflict):
+                    store.begin("k", "b")
+                store.close()
+
+    def test_sqlite_store_upgrades_old_files(self):
+        """Test that a store file from before fingerprints gains the column."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "idempotency.db")
+            conn = sqlite3.connect(path)
+            conn.execute(
+                "CREATE TABLE idempotency (key TEXT PRIMARY KEY, result TEXT, "
+                "claimed_at REAL NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.close()
+            store = SQLiteIdempotencyStore(path)
+            self.assertIsNone(store.begin("k", "a"))
+            with self.assertRaises(IdempotencyConflict):
+                store.begin("k", "b")
+            store.close()
+
+    def test_sqlite_store_is_shared_between_instances(self):
+        """Test that two stores on one file see each other's results."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "idempotency.db")
+            first, second = SQLiteIdempotencyStore(path), SQLiteIdempotencyStore(path, wait_timeout=0.1)
+            self.assertIsNone(first.begin("k"))
+            with self.assertRaises(IdempotencyConflict):
+                second.begin("k")
+            first.complete("k", '{"success": true}')
+            self.assertEqual(second.begin("k"), '{"success": true}')
+            first.close()
+            second.close()
+
+
+class TestIdempotentWrites(unittest.TestCase):
+    """Tests for duplicate suppression in the client and module functions."""
+
+    def test_explicit_key_suppresses_retry(self):
+        """Test that a retried write with the same key is not sent again."""
+        transport = FakeTransport('{"success": true, "hash": "0xtx"}')
+        client = ZKTClient(api_key="test-key", transport=transport, idempotency=IdempotencyStore())
+        to = "0x" + "ab" * 20
+
+        first = client.call_contract_write(to, ABI, "set", [1], idempotency_key="order-1", id=1)
+        second = client.call_contract_write(to, ABI, "set", [1], idempotency_key="order-1", id=2)
+        client.call_contract_write(to, ABI, "set", [3], idempotency_key="order-2")
+
+        self.assertEqual(first, '{"success": true, "hash": "0xtx"}')
+        self.assertEqual(json.loads(second), {"success": True, "hash": "0xtx", "replayed": True})
+        self.assertEqual([p["arguments"] for _, _, p in transport.requests], [[1], [3]])
+        self.assertEqual(client.metrics.snapshot()["duplicates_suppressed"], 1)
+
+    def test_explicit_key_is_scoped_to_api_key_and_payload(self):
+        """Test that a reused key conflicts for other payloads and never crosses API keys."""
+        store = IdempotencyStore()
+        transport = FakeTransport('{"success": true, "hash": "0x1"}')
+        first = ZKTClient(api_key="keyA", transport=transport, idempotency=store)
+        second = ZKTClient(api_key="keyB", transport=transport, idempotency=store)
+
+        self.assertIn("0x1", first.post_zkt_v1("one", idempotency_key="k1"))
+        conflict = first.post_zkt_v1("two", idempotency_key="k1")
+        self.assertTrue(conflict.startswith("Error: This idempotency key was already used"))
+        second.post_zkt_v1("three", idempotency_key="k1")
+        self.assertEqual([p["arguments"] for _, _, p in transport.requests], ["one", "three"])
+
+        async def _run():
+            return await first.apost_zkt_v1("four", idempotency_key="k1")
+
+        self.assertTrue(asyncio.run(_run()).startswith("Error: This idempotency key"))
+
+    def test_concurrent_duplicates_share_one_submission(self):
+        """Test that a duplicate arriving mid-flight waits for the first result."""
+        transport = SlowTransport('{"success": true, "hash": "0xtx"}')
+        client = ZKTClient(api_key="test-key", transport=transport, idempotency=IdempotencyStore())
+        results = []
+
+        def submit(id):
+            results.append(client.call_contract_write("0x" + "ab" * 20, ABI, "set", [1], id=id))
+
+        threads = [threading.Thread(target=submit, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(transport.requests), 1)
+        self.assertEqual(sorted(json.loads(r).get("replayed", False) for r in results), [False, True, True, True])
+        self.assertTrue(all(json.loads(r)["hash"] == "0xtx" for r in results))
+
+    def test_derived_keys_can_be_disabled(self):
+        """Test that identical writes go through without derived keys."""
+        transport = FakeTransport()
+        client = ZKTClient(transport=transport, idempotency=IdempotencyStore(), derive_idempotency_keys=False)
+        client.post_zkt_v1("hello")
+        client.post_zkt_v1("hello")
+        self.assertEqual(len(transport.requests), 2)
+
+    def test_explicit_key_without_store_still_dedupes(self):
+        """Test that an explicit key is honoured when no store is configured."""
+        transport = FakeTransport('{"success": true, "hash": "0xtx"}')
+        client = ZKTClient(api_key="fallback-key", transport=transport)
+        client.post_zkt_v1("hello", idempotency_key="once")
+        replay = client.post_zkt_v1("hello", idempotency_key="once")
+        client.post_zkt_v1("hello")
+        client.post_zkt_v1("hello")
+        self.assertTrue(json.loads(replay)["replayed"])
+        self.assertEqual(len(transport.requests), 3)
+
+        toolkit = StabilityToolkit(structured=True)
+        tool = {t.name: t for t in toolkit.get_tools()}["StabilityWriteContractTool"]
+        call = {"to": "0x" + "ab" * 20, "abi": ABI, "method": "set", "arguments": [1], "idempotency_key": "tool-1"}
+        with patch('stability_toolkit._default_async_client', return_value=client):
+            tool.invoke(call)
+            tool.invoke(call)
+        self.assertEqual(len(transport.requests), 4)
+
+    @patch('stability_toolkit.requests')
+    def test_module_functions_use_module_store(self, mock_requests):
+        """Test that module-level writes are deduplicated and reads are not."""
+        stability_toolkit.set_idempotency_store(IdempotencyStore())
+        self.addCleanup(stability_toolkit.set_idempotency_store, None)
+        response = Mock()
+        response.text = '{"success": true, "hash": "0xtx"}'
+        mock_requests.post.return_value = response
+
+        call_contract_write("0xABC", ABI, "set", [1], api_key="test-key")
+        call_contract_write("0xABC", ABI, "set", [1], api_key="test-key")
+        call_contract_write("0xABC", ABI, "set", [1], api_key="other-key")
+        call_contract_read("0xABC", ABI, "get", [], api_key="test-key")
+        call_contract_read("0xABC", ABI, "get", [], api_key="test-key")
+
+        self.assertEqual(mock_requests.post.call_count, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
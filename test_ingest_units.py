@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+
+"""Unit tests for resumable JSONL bulk ingestion."""
+
+import hashlib
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+sys.path.insert(0, '.')
+
+import stability_ingest
+from stability_ingest import BulkIngest, iter_jsonl
+from stability_toolkit import ZKTClient
+from stability_transport import TransportResponse
+
+
+class AnchorTransport:
+    """Answers each message with a hash of it; ``fail`` lists messages to reject."""
+
+    def __init__(self, fail=(), crash_after=None):
+        self.fail = set(fail)
+        self.crash_after = crash_after
+        self.sent = []
+        self._lock = threading.Lock()
+
+    def post(self, url, headers, content):
+        message = json.loads(content)["arguments"]
+        with self._lock:
+            if self.crash_after is not None and len(self.sent) >= self.crash_after:
+                raise KeyboardInterrupt
+            self.sent.append(message)
+        if message in self.fail:
+            return TransportResponse(200, '{"success": false, "error": "rejected"}')
+        digest = hashlib.sha256(message.encode()).hexdigest()[:16]
+        return TransportResponse(200, json.dumps({"success": True, "hash": "0x" + digest}))
+
+    def close(self):
+        pass
+
+
+def record(i):
+    return json.dumps({"id": i, "digest": f"d{i}"})
+
+
+class TestBulkIngest(unittest.TestCase):
+    """Tests for BulkIngest."""
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.input = os.path.join(tmpdir.name, "records.jsonl")
+        self.results = os.path.join(tmpdir.name, "records.results.jsonl")
+        lines = [record(i) for i in range(1, 21)]
+        lines.insert(5, "")  # blank line 6
+        with open(self.input, "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def read_results(self):
+        with open(self.results) as f:
+            entries = [json.loads(line) for line in f]
+        return {entry["line"]: entry for entry in entries}
+
+    def ingest(self, transport, **kwargs):
+        kwargs.setdefault("max_concurrency", 4)
+        return BulkIngest(self.input, self.results, client=ZKTClient(transport=transport), **kwargs).run()
+
+    def test_iter_jsonl_resumes_at_offset(self):
+        """Test that lines can be read from a saved offset."""
+        lines = list(iter_jsonl(self.input))
+        self.assertEqual(len(lines), 21)
+        line, start, _, text = lines[10]
+        self.assertEqual(list(iter_jsonl(self.input, start, line))[0], lines[10])
+
+    def test_every_line_is_mapped_to_its_hash(self):
+        """Test that results map each record line to its tx hash."""
+        transport = AnchorTransport()
+        summary = self.ingest(transport)
+
+        self.assertEqual(summary["submitted"], 20)
+        self.assertEqual(summary["succeeded"], 20)
+        results = self.read_results()
+        self.assertNotIn(6, results)
+        digest = hashlib.sha256(record(1).encode()).hexdigest()[:16]
+        self.assertEqual(results[1]["tx_hash"], "0x" + digest)
+        with open(self.results + ".checkpoint") as f:
+            checkpoint = json.load(f)
+        self.assertEqual((checkpoint["line"], checkpoint["settled"], checkpoint["failed"]), (22, {}, {}))
+
+        # Nothing left to do on a second run
+        self.assertEqual(self.ingest(transport)["submitted"], 0)
+
+    def test_failed_lines_are_retried_on_resume(self):
+        """Test that only rejected lines are sent again."""
+        summary = self.ingest(AnchorTransport(fail={record(3), record(15)}))
+        self.assertEqual((summary["failed"], summary["remaining_failed"]), (2, 2))
+
+        transport = AnchorTransport()
+        summary = self.ingest(transport)
+        self.assertEqual(sorted(transport.sent), sorted([record(3), record(15)]))
+        self.assertEqual(summary["remaining_failed"], 0)
+        self.assertTrue(self.read_results()[15]["ok"])
+
+    def test_crash_resumes_without_resending(self):
+        """Test that an interrupted run picks up exactly the unsent lines."""
+        first = AnchorTransport(crash_after=9)
+        with self.assertRaises(KeyboardInterrupt):
+            self.ingest(first, max_concurrency=1, checkpoint_every=4)
+        with open(self.results, "a") as f:
+            f.write('{"line": 99, "ok"')  # torn write
+
+        second = AnchorTransport()
+        self.ingest(second, max_concurrency=3)
+
+        self.assertEqual(sorted(first.sent + second.sent), sorted(record(i) for i in range(1, 21)))
+        self.assertEqual(len(self.read_results()), 20)
+
+    def test_stops_after_consecutive_errors(self):
+        """Test that a run of failures aborts resumably."""
+        transport = AnchorTransport(fail={record(i) for i in range(1, 21)})
+        summary = self.ingest(transport, max_concurrency=1, max_consecutive_errors=3)
+        self.assertTrue(summary["aborted"])
+        self.assertEqual(len(transport.sent), 3)
+
+    def test_cli_anchors_field(self):
+        """Test the command line entry point with --field."""
+        transport = AnchorTransport()
+        with patch.object(stability_ingest, "ZKTClient", lambda *a, **k: ZKTClient(transport=transport)):
+            with redirect_stdout(io.StringIO()) as out:
+                code = stability_ingest.main([self.input, "--results", self.results, "--field", "digest"])
+        self.assertEqual(code, 0)
+        self.assertEqual(json.loads(out.getvalue())["succeeded"], 20)
+        self.assertEqual(sorted(transport.sent), sorted(f"d{i}" for i in range(1, 21)))
+
+
+if __name__ == '__main__':
+    unittest.main()
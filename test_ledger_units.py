@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+
+"""Unit tests for the local transaction ledger."""
+
+import asyncio
+import io
+import json
+import sys
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import Mock, patch
+
+sys.path.insert(0, '.')
+
+import stability_toolkit
+from stability_ledger import TransactionLedger, api_key_alias, payload_hash
+from stability_toolkit import ZKTClient, call_contract_read, call_contract_write, deploy_contract, post_zkt_v1
+from test_toolkit_units import FakeTransport
+
+
+class TestTransactionLedger(unittest.TestCase):
+    """Tests for TransactionLedger and its toolkit integration."""
+
+    def setUp(self):
+        self.ledger = TransactionLedger(":memory:")
+        stability_toolkit.set_ledger(self.ledger)
+        self.addCleanup(stability_toolkit.set_ledger, None)
+
+    def _respond(self, text):
+        response = Mock()
+        response.text = text
+        return response
+
+    @patch('stability_toolkit.requests')
+    def test_writes_are_recorded_and_reads_are_not(self, mock_requests):
+        """Test that module-level writes, messages and deploys are recorded."""
+        mock_requests.post.return_value = self._respond('{"success": true, "hash": "0xtx1"}')
+        abi = ["function setMessage(string _msg)"]
+
+        post_zkt_v1("hello", api_key="test-api-key-1234567890")
+        call_contract_write("0xABCDEF", abi, "setMessage", ["hi"], api_key="test-api-key-1234567890")
+        call_contract_read("0xABCDEF", abi, "getMessage", [], api_key="test-api-key-1234567890")
+        mock_requests.post.return_value = self._respond('{"success": true, "contractAddress": "0xNEW"}')
+        deploy_contract("contract Test {}", api_key="test-api-key-1234567890")
+
+        self.assertEqual(self.ledger.count(), 3)
+        write = self.ledger.query(contract="0xabcdef", method="setMessage")[0]
+        self.assertEqual(write["kind"], "call_contract_write")
+        self.assertEqual(write["tx_hash"], "0xtx1")
+        self.assertEqual(write["success"], 1)
+        self.assertEqual(write["api_key_alias"], api_key_alias("test-api-key-1234567890"))
+        self.assertEqual(write["payload_hash"], payload_hash(json.loads(write["payload"])))
+        self.assertEqual(self.ledger.query(kind="deploy_contract")[0]["contract_address"], "0xnew")
+        self.assertEqual(self.ledger.get_by_tx_hash("0xtx1")["id"], write["id"])
+
+    def test_client_writes_are_recorded(self):
+        """Test that ZKTClient writes go to its ledger."""
+        ledger = TransactionLedger(":memory:")
+        client = ZKTClient("test-api-key", transport=FakeTransport('{"hash": "0xtx2"}'), ledger=ledger)
+
+        client.call_contract_write("0x1", [], "set", [1])
+        client.call_contract_read("0x1", [], "get", [])
+
+        self.assertEqual(ledger.count(), 1)
+        self.assertEqual(ledger.query()[0]["tx_hash"], "0xtx2")
+        self.assertEqual(self.ledger.count(), 0)
+
+    def test_short_keys_get_distinct_aliases(self):
+        """Test that short API keys are told apart without being stored."""
+        self.assertNotEqual(api_key_alias("key-one"), api_key_alias("key-two"))
+        self.assertNotIn("key-one", api_key_alias("key-one"))
+
+    def test_async_writes_are_recorded_off_the_event_loop(self):
+        """Test that the async path inserts in a worker thread and logs failures to stderr, not stdout."""
+        ledger = TransactionLedger(":memory:")
+        client = ZKTClient("test-api-key", transport=FakeTransport('{"hash": "0xtx3"}'), ledger=ledger)
+        threads = []
+        record = ledger.record
+
+        def _record(*args, **kwargs):
+            threads.append(threading.current_thread())
+            return record(*args, **kwargs)
+
+        async def _write():
+            await client.acall_contract_write("0x1", [], "set", [1])
+            return threading.current_thread()
+
+        with patch.object(ledger, "record", _record):
+            loop_thread = asyncio.run(_write())
+        self.assertEqual(ledger.query()[0]["tx_hash"], "0xtx3")
+        self.assertNotIn(loop_thread, threads)
+
+        stdout = io.StringIO()
+        with patch.object(ledger, "record", side_effect=OSError("disk full")), \
+                patch("sys.stdout", stdout), self.assertLogs("stability_toolkit", "WARNING") as logs:
+            self.assertEqual(asyncio.run(client.acall_contract_write("0x1", [], "set", [2])), '{"hash": "0xtx3"}')
+        self.assertEqual(stdout.getvalue(), "")
+        self.assertIn("disk full", logs.output[0])
+
+    def test_time_range_queries(self):
+        """Test since/until filters and newest-first ordering."""
+        now = time.time()
+        payload = {"to": "0x1", "abi": [], "method": "set", "arguments": [], "id": 1, "wait": True}
+        for days_ago in (10, 3, 1):
+            self.ledger.record(payload, '{"hash": "0x%d"}' % days_ago, now - days_ago * 86400, 0.1)
+
+        last_week = self.ledger.query(contract="0x1", method="set", since=datetime.now() - timedelta(days=7))
+
+        self.assertEqual([r["tx_hash"] for r in last_week], ["0x1", "0x3"])
+        self.assertEqual(self.ledger.count(until=now - 5 * 86400), 1)
+
+    def test_contract_method_query_uses_index(self):
+        """Test that contract/method/time lookups do not scan the table."""
+        plan = self.ledger._conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM transactions WHERE contract_address = ? "
+            "AND method = ? AND created_at >= ? ORDER BY created_at DESC",
+            ("0x1", "set", 0),
+        ).fetchall()
+        self.assertIn("idx_transactions_contract_method_time", " ".join(str(row) for row in plan))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+
+"""Unit tests for Merkle-batched anchoring."""
+
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+sys.path.insert(0, '.')
+
+import stability_merkle
+from stability_merkle import MerkleAnchor, build_tree, leaf_hash, merkle_root, verify_proof
+from stability_toolkit import ZKTClient
+from stability_transport import TransportResponse
+
+
+class AnchorTransport:
+    """Records anchored payloads; answers with a hash, or a failure while ``failing``."""
+
+    def __init__(self):
+        self.payloads = []
+        self.failing = False
+        self._lock = threading.Lock()
+
+    def post(self, url, headers, content):
+        payload = json.loads(content)
+        with self._lock:
+            self.payloads.append(payload)
+            count = len(self.payloads)
+        if self.failing:
+            return TransportResponse(200, '{"success": false, "error": "quota exceeded"}')
+        return TransportResponse(200, json.dumps({"success": True, "hash": "0x%064x" % count}))
+
+    def close(self):
+        pass
+
+
+class TestMerkleTree(unittest.TestCase):
+    """Tests for tree building and proof verification."""
+
+    def test_every_proof_verifies(self):
+        """Test that each leaf's proof reaches the root, for even and odd sizes."""
+        for size in range(1, 18):
+            with self.subTest(size=size):
+                messages = [f"record-{i}" for i in range(size)]
+                levels = build_tree([leaf_hash(m) for m in messages])
+                root = levels[-1][0].hex()
+                for index, message in enumerate(messages):
+                    proof = stability_merkle._proof(levels, index)
+                    self.assertTrue(verify_proof(message, proof, root))
+                    self.assertFalse(verify_proof(message + "!", proof, root))
+
+    def test_unpaired_node_is_not_duplicated(self):
+        """Test that [a, b, c] and [a, b, c, c] have different roots."""
+        a, b, c = (leaf_hash(m) for m in "abc")
+        self.assertNotEqual(merkle_root([a, b, c]), merkle_root([a, b, c, c]))
+
+    def test_inner_node_is_not_a_leaf(self):
+        """Test that an inner node cannot be presented as a leaf of a shorter proof."""
+        levels = build_tree([leaf_hash(m) for m in "abcd"])
+        inner = levels[1][0]
+        proof = [("R", levels[1][1].hex())]
+        self.assertFalse(verify_proof(inner, proof, levels[-1][0].hex()))
+
+
+class TestMerkleAnchor(unittest.TestCase):
+    """Tests for MerkleAnchor."""
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.path = os.path.join(tmpdir.name, "anchors.db")
+        self.transport = AnchorTransport()
+        self.client = ZKTClient("test-key", transport=self.transport)
+
+    def anchor(self, **options):
+        anchor = MerkleAnchor(self.path, client=self.client, **options)
+        self.addCleanup(anchor.close)
+        return anchor
+
+    def test_thousands_of_records_cost_one_write(self):
+        """Test that one flush anchors a whole batch with a single message."""
+        anchor = self.anchor()
+        messages = [json.dumps({"id": i}) for i in range(2500)]
+        anchor.add_many(messages)
+        self.assertEqual(self.transport.payloads, [])
+
+        batch = anchor.flush()
+        self.assertEqual(len(self.transport.payloads), 1)
+        self.assertEqual(json.loads(self.transport.payloads[0]["arguments"]),
+                         {"merkle_root": batch["root"], "leaves": 2500})
+        self.assertTrue(batch["ok"])
+        self.assertEqual(batch["tx_hash"], "0x%064x" % 1)
+
+        proof = anchor.proof(messages[1234])
+        self.assertEqual((proof["index"], proof["root"], proof["anchored"]), (1234, batch["root"], True))
+        self.assertLessEqual(len(proof["proof"]), 12)
+        self.assertTrue(verify_proof(messages[1234], proof["proof"], proof["root"]))
+        self.assertTrue(all(anchor.verify(m) for m in messages[::97]))
+        self.assertFalse(anchor.verify("never added"))
+        self.assertIsNone(anchor.flush())
+
+    def test_max_batch_splits_and_pending_survives_reopen(self):
+        """Test automatic flushing at max_batch and that queued leaves are durable."""
+        anchor = self.anchor(max_batch=100)
+        anchor.add_many(f"m{i}" for i in range(250))
+        self.assertEqual(len(self.transport.payloads), 2)
+        self.assertEqual(anchor.pending(), 50)
+        self.assertFalse(anchor.verify("m249"))
+        anchor.close()
+
+        reopened = self.anchor(max_batch=100)
+        self.assertEqual(reopened.pending(), 50)
+        self.assertEqual([b["leaves"] for b in reopened.flush_all()], [50])
+        self.assertTrue(reopened.verify("m249"))
+        self.assertEqual([b["leaves"] for b in reopened.batches()], [50, 100, 100])
+
+    def test_failed_anchor_is_retried_with_same_root(self):
+        """Test that a failed anchor leaves proofs unverified until retry succeeds."""
+        anchor = self.anchor()
+        anchor.add_many(["a", "b", "c"])
+        self.transport.failing = True
+        failed = anchor.flush()
+        self.assertFalse(failed["ok"])
+        self.assertFalse(anchor.verify("b"))
+        self.assertIsNotNone(anchor.proof("b"))
+
+        self.transport.failing = False
+        retried = anchor.retry()
+        self.assertEqual([(b["batch"], b["root"], b["ok"]) for b in retried], [(failed["batch"], failed["root"], True)])
+        self.assertTrue(anchor.verify("b"))
+        self.assertEqual(anchor.retry(), [])
+
+    def test_contract_anchor(self):
+        """Test anchoring the root through a contract write."""
+        abi = ["function anchor(bytes32 root)"]
+        anchor = self.anchor(contract=("0x" + "cd" * 20, abi, "anchor"))
+        anchor.add("record")
+        batch = anchor.flush()
+        payload = self.transport.payloads[0]
+        self.assertEqual((payload["method"], payload["arguments"]), ("anchor", ["0x" + batch["root"]]))
+        self.assertEqual(batch["root"], leaf_hash("record").hex())
+
+    def test_context_manager_flushes(self):
+        """Test that leaving the ``with`` block anchors what is pending."""
+        with MerkleAnchor(self.path, client=self.client) as anchor:
+            anchor.add("x")
+            anchor.add("y")
+        self.assertEqual(len(self.transport.payloads), 1)
+        self.assertTrue(self.anchor().verify("y"))
+
+    def test_cli_anchor_and_verify(self):
+        """Test the anchor and verify commands."""
+        records = os.path.join(os.path.dirname(self.path), "records.jsonl")
+        with open(records, "w") as f:
+            f.write('{"id": 1}\n\n{"id": 2}\n')
+        argv = ["--db", self.path]
+        with patch.object(stability_merkle, "ZKTClient", lambda api_key: self.client), redirect_stdout(io.StringIO()) as out:
+            self.assertEqual(stability_merkle.main(argv + ["anchor", records]), 0)
+            self.assertEqual(stability_merkle.main(argv + ["verify", '{"id": 2}']), 0)
+            self.assertEqual(stability_merkle.main(argv + ["verify", '{"id": 3}']), 1)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(json.loads(lines[0])[0]["leaves"], 2)
+        self.assertEqual(json.loads(lines[1])["index"], 1)
+        self.assertEqual(len(self.transport.payloads), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
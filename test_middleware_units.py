@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+
+"""Unit tests for the request/response middleware chain."""
+
+import asyncio
+import importlib.util
+import json
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, '.')
+
+from stability_middleware import Middleware, MiddlewareChain
+from stability_toolkit import ZKTClient
+from test_toolkit_units import FakeTransport
+
+try:
+    from stability_toolkit import StabilityToolkit
+except ImportError:  # pragma: no cover
+    StabilityToolkit = None
+
+# Load the community wrapper by path so it cannot clash with an installed langchain_community
+_WRAPPER_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    'libs', 'community', 'langchain_community', 'utilities', 'stability.py',
+)
+_spec = importlib.util.spec_from_file_location("stability_community_wrapper", _WRAPPER_PATH)
+stability_wrapper = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(stability_wrapper)
+
+TOKEN = "0x" + "ab" * 20
+ABI = ["function get() view returns (uint256)"]
+
+
+class Recorder(Middleware):
+    """Logs each hook call under ``name`` into a shared list."""
+
+    def __init__(self, name, log):
+        self.name = name
+        self.log = log
+
+    def before_send(self, request):
+        self.log.append((self.name, "before", request.kind))
+
+    def after_receive(self, request, result):
+        self.log.append((self.name, "after", result))
+
+
+class AuthHeader(Middleware):
+    def before_send(self, request):
+        request.headers["Authorization"] = "Bearer token"
+
+
+class Redact:
+    """Duck-typed middleware that blanks a payload field and tags the result."""
+
+    def before_send(self, request):
+        request.payload = dict(request.payload, arguments=["<redacted>"])
+
+    def after_receive(self, request, result):
+        return result.replace("true", "TRUE")
+
+
+class Fallback(Middleware):
+    def on_error(self, request, error):
+        return json.dumps({"success": False, "fallback": type(error).__name__})
+
+
+class TestMiddlewareChain(unittest.TestCase):
+    """Tests for MiddlewareChain with ZKTClient."""
+
+    def test_hooks_wrap_in_order(self):
+        """Test before_send runs in order and after_receive in reverse."""
+        log = []
+        client = ZKTClient(transport=FakeTransport(), middleware=[Recorder("outer", log)])
+        client.use(Recorder("inner", log))
+        client.call_contract_read(TOKEN, ABI, "get", [])
+        self.assertEqual(log, [
+            ("outer", "before", "call_contract_read"),
+            ("inner", "before", "call_contract_read"),
+            ("inner", "after", '{"success": true}'),
+            ("outer", "after", '{"success": true}'),
+        ])
+
+    def test_headers_and_payload_changes_are_sent(self):
+        """Test that before_send can add headers and replace the payload."""
+        transport = FakeTransport()
+        client = ZKTClient(transport=transport, middleware=[AuthHeader(), Redact()])
+        result = client.call_contract_write(TOKEN, ABI, "set", [42])
+        _, headers, payload = transport.requests[0]
+        self.assertEqual(headers["Authorization"], "Bearer token")
+        self.assertEqual(headers["Content-Type"], "application/json")
+        self.assertEqual(payload["arguments"], ["<redacted>"])
+        self.assertEqual(result, '{"success": TRUE}')
+
+        # Per-request headers never leak into the shared defaults
+        ZKTClient(transport=transport).post_zkt_v1("hello")
+        self.assertNotIn("Authorization", transport.requests[1][1])
+
+    def test_on_error_can_recover(self):
+        """Test that on_error sees the exception and may supply the result."""
+        fallback = Fallback()
+        client = ZKTClient(transport=FakeTransport(error=ConnectionError("reset")), middleware=[fallback])
+        result = client.call_contract_read(TOKEN, ABI, "get", [])
+        self.assertEqual(json.loads(result), {"success": False, "fallback": "ConnectionError"})
+        self.assertEqual(client.metrics.snapshot()["errors"], 1)
+
+        client.middleware.remove(fallback)
+        self.assertTrue(client.call_contract_read(TOKEN, ABI, "get", []).startswith("Error: reset"))
+
+    def test_async_hooks_are_awaited(self):
+        """Test that async callers await a-prefixed hooks and fall back to sync ones."""
+        log = []
+
+        class AsyncAudit:
+            async def abefore_send(self, request):
+                await asyncio.sleep(0)
+                log.append("abefore")
+
+            async def aafter_receive(self, request, result):
+                log.append("aafter")
+
+        client = ZKTClient(transport=FakeTransport(), middleware=[AsyncAudit(), Recorder("sync", log)])
+        asyncio.run(client.acall_contract_read(TOKEN, ABI, "get", []))
+        self.assertEqual(log, [
+            "abefore", ("sync", "before", "call_contract_read"), ("sync", "after", '{"success": true}'), "aafter",
+        ])
+        # Sync callers skip hooks that only exist in async form
+        log.clear()
+        client.call_contract_read(TOKEN, ABI, "get", [])
+        self.assertEqual([entry[1] for entry in log], ["before", "after"])
+
+    def test_rejects_objects_without_hooks(self):
+        """Test that registering something with no hooks fails early."""
+        with self.assertRaises(TypeError):
+            MiddlewareChain([object()])
+        self.assertFalse(MiddlewareChain())
+
+    @unittest.skipUnless(StabilityToolkit, "langchain not installed")
+    def test_toolkit_use_creates_client(self):
+        """Test that StabilityToolkit.use routes tools through a client with the hook."""
+        log = []
+        with patch("stability_toolkit.create_transport", return_value=FakeTransport()):
+            toolkit = StabilityToolkit(api_key="test-api-key", middleware=[Recorder("toolkit", log)])
+        self.assertIsNotNone(toolkit.client)
+        read_tool = toolkit.get_tools()[1]
+        read_tool.invoke(json.dumps({"to": TOKEN, "abi": ABI, "method": "get", "arguments": []}))
+        self.assertEqual([entry[1] for entry in log], ["before", "after"])
+
+
+class TestWrapperMiddleware(unittest.TestCase):
+    """Tests for middleware on the community StabilityAPIWrapper."""
+
+    @patch.object(stability_wrapper, 'requests')
+    def test_wrapper_runs_hooks(self, mock_requests):
+        """Test headers, payload and result changes through the wrapper."""
+        mock_requests.post.return_value.text = '{"success": true}'
+        log = []
+        wrapper = stability_wrapper.StabilityAPIWrapper(api_key="test-api-key", middleware=[Recorder("w", log)])
+        wrapper.use(AuthHeader())
+        wrapper.use(Redact())
+
+        result = wrapper.call_contract_write(TOKEN, ABI, "set", [42])
+
+        kwargs = mock_requests.post.call_args.kwargs
+        self.assertEqual(kwargs["headers"]["Authorization"], "Bearer token")
+        self.assertEqual(kwargs["json"]["arguments"], ["<redacted>"])
+        self.assertEqual(result, '{"success": TRUE}')
+        self.assertEqual(log[0], ("w", "before", "call_contract_write"))
+        self.assertEqual(log[1], ("w", "after", '{"success": TRUE}'))
+
+    @patch.object(stability_wrapper, 'requests')
+    def test_wrapper_on_error(self, mock_requests):
+        """Test that wrapper on_error hooks can replace the error string."""
+        mock_requests.post.side_effect = TimeoutError("slow")
+        wrapper = stability_wrapper.StabilityAPIWrapper(api_key="test-api-key", middleware=[Fallback()])
+        self.assertEqual(json.loads(wrapper.post_zkt_v1("hi")), {"success": False, "fallback": "TimeoutError"})
+
+
+if __name__ == '__main__':
+    unittest.main()
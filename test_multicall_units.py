@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+
+"""Unit tests for multicall read aggregation."""
+
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, '.')
+
+from stability_cache import DiskCache
+
+ETH_ABI_AVAILABLE = importlib.util.find_spec("eth_abi") is not None
+
+if ETH_ABI_AVAILABLE:
+    import eth_abi
+    import stability_multicall
+    from stability_multicall import MulticallReader, parse_function_abi, encode_call, decode_result
+
+BALANCE_ABI = ["function balanceOf(address owner) view returns (uint256)"]
+HOLDERS = ["0x" + f"{i:040x}" for i in range(1, 8)]
+
+
+def fake_chain(max_batch=None):
+    """Return a call_contract_read stand-in that executes aggregate3 locally."""
+    calls = []
+
+    def _read(to, abi, method, arguments, id=1, api_key=None):
+        calls.append((to, method, arguments))
+        if method != "aggregate3":
+            holder = arguments[0]
+            return json.dumps({"success": True, "output": str(int(holder, 16) * 10)})
+        batch = arguments[0]
+        if max_batch is not None and len(batch) > max_batch:
+            return json.dumps({"success": False, "error": "request too large"})
+        output = []
+        for target, _, calldata in batch:
+            (holder,) = eth_abi.decode(["address"], bytes.fromhex(calldata[10:]))
+            if int(holder, 16) == 5:
+                output.append([False, "0x"])
+                continue
+            encoded = eth_abi.encode(["uint256"], [int(holder, 16) * 10])
+            output.append([True, "0x" + encoded.hex()])
+        return json.dumps({"success": True, "output": output})
+
+    return _read, calls
+
+
+@unittest.skipIf(not ETH_ABI_AVAILABLE, "eth-abi is required for multicall tests")
+class TestMulticallReader(unittest.TestCase):
+    """Tests for MulticallReader."""
+
+    def setUp(self):
+        patcher = patch.dict(stability_multicall._deployed, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _calls(self):
+        return [
+            {"to": "0x00000000000000000000000000000000000000aa", "abi": BALANCE_ABI,
+             "method": "balanceOf", "arguments": [holder]}
+            for holder in HOLDERS
+        ]
+
+    def test_parse_function_abi(self):
+        """Test parsing of human-readable signatures with tuples and arrays."""
+        name, inputs, outputs = parse_function_abi(
+            "function f((address to, uint v)[] calls, string memory s) view returns (bool ok, bytes32)"
+        )
+        self.assertEqual(name, "f")
+        self.assertEqual(inputs, ["(address,uint256)[]", "string"])
+        self.assertEqual(outputs, ["bool", "bytes32"])
+
+    def test_encode_and_decode(self):
+        """Test calldata encoding and result decoding."""
+        calldata = encode_call("balanceOf", ["address"], [HOLDERS[0]])
+        self.assertTrue(calldata.startswith("0x70a08231"))
+        encoded = "0x" + eth_abi.encode(["uint256", "bytes"], [7, b"\x01"]).hex()
+        self.assertEqual(decode_result(["uint256", "bytes"], encoded), [7, "0x01"])
+
+    def test_reads_are_aggregated_and_split(self):
+        """Test that reads are packed into aggregate3 calls of bounded size."""
+        read, calls = fake_chain()
+        reader = MulticallReader(aggregator="0xagg", max_calls_per_batch=3)
+
+        with patch('stability_toolkit.call_contract_read', side_effect=read):
+            results = reader.read(self._calls())
+
+        # 3 + 3 + 1, each aggregated so every result has the same shape
+        self.assertEqual([c[1] for c in calls], ["aggregate3"] * 3)
+        self.assertEqual(len(results), 7)
+        self.assertEqual(results[0], {"ok": True, "result": 10})
+        self.assertFalse(results[4]["ok"])
+        self.assertEqual(results[6]["result"], 70)
+
+    def test_rejected_batch_is_halved(self):
+        """Test that a batch rejected by the endpoint is split and retried."""
+        read, calls = fake_chain(max_batch=2)
+        reader = MulticallReader(aggregator="0xagg")
+
+        with patch('stability_toolkit.call_contract_read', side_effect=read):
+            results = reader.read(self._calls())
+
+        self.assertEqual([r.get("result") for r in results], [10, 20, 30, 40, None, 60, 70])
+        self.assertTrue(all(stability_multicall._batch_error(json.dumps({"success": False, "error": error}))[1]
+                            for error in ("413 Request Entity Too Large", "calldata limit exceeded",
+                                          "exceeds block gas limit", "execution reverted")))
+        self.assertNotIn("balanceOf", [c[1] for c in calls])
+
+        # When even one call is rejected, it is read directly
+        read, calls = fake_chain(max_batch=0)
+        with patch('stability_toolkit.call_contract_read', side_effect=read):
+            results = reader.read(self._calls()[:2])
+        self.assertEqual(results, [{"ok": True, "result": 10}, {"ok": True, "result": 20}])
+        self.assertEqual([c[1] for c in calls], ["aggregate3", "aggregate3", "balanceOf", "aggregate3", "balanceOf"])
+
+    def test_direct_reads_match_aggregated_shape(self):
+        """Test that a direct read returns the same values as decode_result for rich outputs."""
+        abi = ["function info(uint256 id) view returns ((address owner, uint64 amount) entry, bytes32 tag, bool live)"]
+        owner, tag = "0x" + "AbCd" * 10, "0x" + "EF" * 32
+        outputs = ["(address,uint64)", "bytes32", "bool"]
+        encoded = "0x" + eth_abi.encode(outputs, [(owner, 7), bytes.fromhex(tag[2:]), True]).hex()
+        aggregated = decode_result(outputs, encoded)
+
+        def _read(to, abi, method, arguments, id=1, api_key=None):
+            if method == "aggregate3":
+                return json.dumps({"success": False, "error": "request too large"})
+            return json.dumps({"success": True, "output": [[owner, "7"], tag, "true"]})
+
+        call = {"to": "0x" + "aa" * 20, "abi": abi, "method": "info", "arguments": [1]}
+        with patch('stability_toolkit.call_contract_read', side_effect=_read):
+            results = MulticallReader(aggregator="0xagg").read([call])
+        self.assertEqual(results, [{"ok": True, "result": aggregated}])
+
+    def test_reverted_batch_is_halved(self):
+        """Test that a reverting aggregate3 call is split to isolate the bad call."""
+        read, calls = fake_chain()
+
+        def _read(to, abi, method, arguments, id=1, api_key=None):
+            if method == "aggregate3" and len(arguments[0]) > 4:
+                calls.append((to, method, arguments))
+                return json.dumps({"success": False, "error": "execution reverted: out of gas"})
+            return read(to, abi, method, arguments, id, api_key)
+
+        with patch('stability_toolkit.call_contract_read', side_effect=_read):
+            results = MulticallReader(aggregator="0xagg").read(self._calls())
+        self.assertEqual([r.get("result") for r in results], [10, 20, 30, 40, None, 60, 70])
+        self.assertEqual(len(calls), 3)
+
+    def test_outage_is_not_split(self):
+        """Test that transport, outage and validation errors fail the batch in one request."""
+        for response in ("Error: Connection refused", '{"success": false, "error": "service unavailable"}',
+                         "<html>502 Bad Gateway</html>", '{"success": false, "error": "Invalid payload"}',
+                         '{"success": false, "error": "rate limit exceeded"}',
+                         '{"success": false, "error": "invalid argument size"}'):
+            with self.subTest(response=response):
+                reader = MulticallReader(aggregator="0xagg")
+                with patch('stability_toolkit.call_contract_read', return_value=response) as mock_read:
+                    results = reader.read(self._calls())
+                self.assertEqual(mock_read.call_count, 1)
+                self.assertEqual(len(results), 7)
+                self.assertTrue(all(not r["ok"] and r["error"] for r in results))
+
+    def test_aggregator_is_deployed_when_missing(self):
+        """Test that an aggregator is deployed once per API key and reused across readers and processes."""
+        read, _ = fake_chain()
+        deployed = json.dumps({"success": True, "contractAddress": "0xnew"})
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        cache = DiskCache(os.path.join(tmpdir.name, "cache.db"))
+        self.addCleanup(cache.close)
+
+        with patch('stability_toolkit.call_contract_read', side_effect=read), \
+                patch('stability_toolkit.deploy_contract', return_value=deployed) as mock_deploy:
+            reader = MulticallReader(api_key="key-a", cache=cache)
+            reader.read(self._calls()[:2])
+            reader.read(self._calls()[:2])
+            MulticallReader(api_key="key-a").read(self._calls()[:2])
+            self.assertEqual(mock_deploy.call_count, 1)
+
+            # A new process only has the shared cache
+            stability_multicall._deployed.clear()
+            self.assertEqual(MulticallReader(api_key="key-a", cache=cache).ensure_aggregator(), "0xnew")
+            self.assertEqual(mock_deploy.call_count, 1)
+
+            MulticallReader(api_key="key-b", cache=cache).ensure_aggregator()
+            self.assertEqual(mock_deploy.call_count, 2)
+
+        self.assertEqual(reader.aggregator, "0xnew")
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
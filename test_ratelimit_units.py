@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+
+"""Unit tests for the host-wide rate limiter."""
+
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest.mock import Mock, patch
+
+sys.path.insert(0, '.')
+
+import stability_toolkit
+from stability_ratelimit import RateLimitExceeded, SharedRateLimiter, WriteQuotaExceeded
+from stability_toolkit import ZKTClient, call_contract_write
+from test_toolkit_units import FakeTransport
+
+
+def _take_reads(path, count, results):
+    limiter = SharedRateLimiter(path, reads_per_minute=60, read_burst=10, max_wait=0)
+    granted = 0
+    for _ in range(count):
+        try:
+            limiter.acquire_read("shared-key")
+            granted += 1
+        except RateLimitExceeded:
+            pass
+    limiter.close()
+    results.put(granted)
+
+
+class TestSharedRateLimiter(unittest.TestCase):
+    """Tests for SharedRateLimiter and its toolkit integration."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, "ratelimit.db")
+
+    def test_read_bucket_is_shared_across_processes(self):
+        """Test that processes using one file draw from one read budget."""
+        SharedRateLimiter(self.path).close()
+        results = multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(target=_take_reads, args=(self.path, 8, results))
+            for _ in range(3)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(30)
+        granted = sum(results.get(timeout=5) for _ in workers)
+
+        # Burst of 10 plus at most a token or two refilled while the workers ran
+        self.assertGreaterEqual(granted, 10)
+        self.assertLessEqual(granted, 12)
+
+    def test_read_waits_for_refill(self):
+        """Test that an empty bucket waits instead of failing."""
+        limiter = SharedRateLimiter(self.path, reads_per_minute=600, read_burst=1)
+        self.addCleanup(limiter.close)
+
+        self.assertEqual(limiter.acquire_read("key"), 0.0)
+        self.assertGreater(limiter.acquire_read("key"), 0.0)
+        self.assertGreater(asyncio.run(limiter.aacquire_read("key")), 0.0)
+
+    def test_write_quota_is_shared_between_instances(self):
+        """Test that two limiters on one file count writes together."""
+        first = SharedRateLimiter(self.path, writes_per_month=3)
+        second = SharedRateLimiter(self.path, writes_per_month=3)
+        self.addCleanup(first.close)
+        self.addCleanup(second.close)
+
+        self.assertEqual(first.acquire_write("key"), 2)
+        self.assertEqual(second.acquire_write("key"), 1)
+        self.assertEqual(first.acquire_write("key"), 0)
+        with self.assertRaises(WriteQuotaExceeded):
+            second.acquire_write("key")
+        self.assertEqual(second.status("key")["writes_remaining"], 0)
+        self.assertEqual(first.acquire_write("other-key"), 2)
+
+    def test_api_key_is_not_stored(self):
+        """Test that the state file holds only a digest of the key."""
+        limiter = SharedRateLimiter(self.path)
+        limiter.acquire_write("secret-api-key-1234567890")
+        limiter.close()
+        with open(self.path, "rb") as f:
+            self.assertNotIn(b"secret-api-key-1234567890", f.read())
+
+    @patch('stability_toolkit.requests')
+    def test_toolkit_refuses_writes_over_quota(self, mock_requests):
+        """Test that module functions and the client honour the shared quota."""
+        limiter = SharedRateLimiter(self.path, writes_per_month=1, reads_per_minute=60, read_burst=1, max_wait=0)
+        self.addCleanup(limiter.close)
+        stability_toolkit.set_rate_limiter(limiter)
+        self.addCleanup(stability_toolkit.set_rate_limiter, None)
+        response = Mock()
+        response.text = '{"success": true}'
+        mock_requests.post.return_value = response
+        abi = ["function setMessage(string _msg)"]
+
+        self.assertEqual(call_contract_write("0xABC", abi, "setMessage", ["hi"], api_key="test-key"), '{"success": true}')
+        result = call_contract_write("0xABC", abi, "setMessage", ["again"], api_key="test-key")
+        self.assertTrue(result.startswith("Error: Monthly write quota"))
+        self.assertEqual(mock_requests.post.call_count, 1)
+
+        transport = FakeTransport('{"success": true, "output": "hi"}')
+        client = ZKTClient(api_key="test-key", transport=transport)
+        self.assertEqual(client.call_contract_read("0xABC", abi, "getMessage", []), '{"success": true, "output": "hi"}')
+        self.assertTrue(client.call_contract_read("0xABC", abi, "getMessage", []).startswith("Error: Read rate limit"))
+        self.assertEqual(len(transport.requests), 1)
+        self.assertEqual(client.metrics.snapshot()["rate_limited"], 1)
+
+    def test_failed_send_gives_the_write_back(self):
+        """Test that a write whose transport raised is not counted against the quota."""
+        limiter = SharedRateLimiter(self.path, writes_per_month=5)
+        self.addCleanup(limiter.close)
+        abi = ["function setMessage(string _msg)"]
+        failing = ZKTClient(api_key="test-key", transport=FakeTransport(error=ConnectionError("down")), rate_limiter=limiter)
+        working = ZKTClient(api_key="test-key", transport=FakeTransport(), rate_limiter=limiter)
+
+        self.assertTrue(failing.call_contract_write("0xABC", abi, "setMessage", ["a"]).startswith("Error:"))
+        self.assertTrue(asyncio.run(failing.acall_contract_write("0xABC", abi, "setMessage", ["b"])).startswith("Error:"))
+        self.assertEqual(limiter.writes_used("test-key"), 0)
+        working.call_contract_write("0xABC", abi, "setMessage", ["c"])
+        asyncio.run(working.acall_contract_write("0xABC", abi, "setMessage", ["d"]))
+        self.assertEqual(limiter.writes_used("test-key"), 2)
+
+    def test_async_quota_runs_off_the_event_loop(self):
+        """Test that async reads and writes do their SQLite work in a worker thread."""
+        limiter = SharedRateLimiter(self.path)
+        self.addCleanup(limiter.close)
+        threads = []
+        try_read, acquire_write = limiter._try_read, limiter.acquire_write
+
+        def _tracked(method):
+            def wrapper(*args):
+                threads.append(threading.current_thread())
+                return method(*args)
+            return wrapper
+
+        async def _run():
+            with patch.object(limiter, "_try_read", _tracked(try_read)), \
+                    patch.object(limiter, "acquire_write", _tracked(acquire_write)):
+                await limiter.aacquire_read("key")
+                await limiter.aacquire_write("key")
+            return threading.current_thread()
+
+        loop_thread = asyncio.run(_run())
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(loop_thread, threads)
+
+
+if __name__ == '__main__':
+    unittest.main()
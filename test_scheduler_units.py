@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+
+"""Unit tests for priority lanes and tenant-fair request scheduling."""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, '.')
+
+from stability_ratelimit import SharedRateLimiter
+from stability_scheduler import RequestScheduler, request_class
+from stability_toolkit import ZKTClient
+from test_toolkit_units import FakeTransport
+
+TOKEN = "0x" + "ab" * 20
+ABI = ["function set(uint256 v)", "function get() view returns (uint256)"]
+
+
+def run_queued(scheduler, requests):
+    """Queue ``(priority, tenant, label)`` requests behind a held slot and return the grant order."""
+
+    async def _run():
+        order = []
+
+        async def _request(priority, tenant, label):
+            with request_class(priority=priority, tenant=tenant):
+                async with scheduler.aslot():
+                    order.append(label)
+
+        blocker = scheduler.aslot()
+        await blocker.__aenter__()
+        tasks = [asyncio.create_task(_request(*request)) for request in requests]
+        await asyncio.sleep(0.01)
+        await blocker.__aexit__(None, None, None)
+        await asyncio.gather(*tasks)
+        return order
+
+    return asyncio.run(_run())
+
+
+class TestRequestScheduler(unittest.TestCase):
+    """Tests for RequestScheduler."""
+
+    def test_interactive_requests_jump_the_bulk_queue(self):
+        """Test strict priority between lanes and FIFO within a tenant."""
+        scheduler = RequestScheduler(max_in_flight=1)
+        order = run_queued(scheduler, [
+            ("bulk", "etl", "b0"), ("bulk", "etl", "b1"), ("normal", "app", "n0"), ("interactive", "agent", "i0"),
+        ])
+        self.assertEqual(order, ["i0", "n0", "b0", "b1"])
+
+    def test_tenants_share_a_lane_by_weight(self):
+        """Test weighted fair queueing between tenants in one lane."""
+        scheduler = RequestScheduler(max_in_flight=1, tenant_weights={"agents": 3})
+        requests = [("normal", "backfill", f"b{i}") for i in range(8)]
+        requests += [("normal", "agents", f"a{i}") for i in range(8)]
+        order = run_queued(scheduler, requests)
+
+        first_eight = order[:8]
+        self.assertEqual(sum(label.startswith("a") for label in first_eight), 6)
+        self.assertEqual([label for label in order if label.startswith("b")], [f"b{i}" for i in range(8)])
+
+    def test_admissions_are_paced(self):
+        """Test that requests_per_minute spaces out grants."""
+        scheduler = RequestScheduler(requests_per_minute=600)
+        started = time.perf_counter()
+        for _ in range(4):
+            with scheduler.slot():
+                pass
+        self.assertGreater(time.perf_counter() - started, 0.25)
+
+    def test_cancelled_waiter_leaves_queue(self):
+        """Test that cancelling a queued request frees nothing it never held."""
+        scheduler = RequestScheduler(max_in_flight=1)
+
+        async def _run():
+            blocker = scheduler.aslot()
+            await blocker.__aenter__()
+
+            async def _wait():
+                async with scheduler.aslot():
+                    pass
+
+            task = asyncio.create_task(_wait())
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            await blocker.__aexit__(None, None, None)
+
+        asyncio.run(_run())
+        stats = scheduler.stats()
+        self.assertEqual(stats["in_flight"], 0)
+        self.assertEqual(stats["queued"], {"normal": 0})
+
+    def test_bulk_writes_are_deferred_near_quota(self):
+        """Test that bulk writes wait for the next window once only the reserve is left."""
+        limiter = SharedRateLimiter(":memory:", writes_per_month=3)
+        self.addCleanup(limiter.close)
+        scheduler = RequestScheduler(rate_limiter=limiter, write_reserve=1)
+        transport = FakeTransport('{"success": true, "hash": "0xtx"}')
+        client = ZKTClient(api_key="test-key", transport=transport, rate_limiter=limiter, scheduler=scheduler)
+
+        with request_class(priority="bulk", tenant="etl"):
+            client.call_contract_write(TOKEN, ABI, "set", [1])
+            client.call_contract_write(TOKEN, ABI, "set", [2])
+            deferred = client.call_contract_write(TOKEN, ABI, "set", [3])
+            client.call_contract_read(TOKEN, ABI, "get", [])
+        with request_class(priority="interactive", tenant="agent"):
+            client.call_contract_write(TOKEN, ABI, "set", [4])
+
+        self.assertTrue(deferred.startswith("Error: low-priority write deferred"))
+        self.assertEqual([p.get("arguments") for _, _, p in transport.requests], [[1], [2], [], [4]])
+        self.assertEqual(scheduler.deferred()[0]["payload"]["arguments"], [3])
+        self.assertEqual(scheduler.deferred()[0]["tenant"], "etl")
+        self.assertEqual(client.metrics.snapshot()["writes_deferred"], 1)
+
+        # Still over the reserve, so flushing defers the write again
+        scheduler.flush_deferred(client.post)
+        self.assertEqual(len(scheduler.deferred()), 1)
+
+    def test_deferred_writes_survive_restart(self):
+        """Test that deferred writes reload from deferred_path and leave it once flushed."""
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        path = os.path.join(tmpdir.name, "deferred.jsonl")
+        scheduler = RequestScheduler(deferred_path=path)
+        with request_class(tenant="etl"):
+            scheduler.defer({"method": "set", "arguments": [1]})
+            scheduler.defer({"method": "set", "arguments": [2]})
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('{"payload": {"meth')  # torn by a crash
+
+        restarted = RequestScheduler(deferred_path=path)
+        self.assertEqual([e["payload"]["arguments"] for e in restarted.deferred()], [[1], [2]])
+        self.assertEqual(restarted.deferred()[0]["tenant"], "etl")
+
+        def _send(payload, api_key):
+            if payload["arguments"] == [2]:
+                raise ConnectionError("reset")
+            return "ok"
+
+        with self.assertRaises(ConnectionError):
+            restarted.flush_deferred(_send)
+        self.assertEqual([e["payload"]["arguments"] for e in RequestScheduler(deferred_path=path).deferred()], [[2]])
+
+        self.assertEqual(restarted.flush_deferred(lambda payload, api_key: "ok"), ["ok"])
+        self.assertEqual(RequestScheduler(deferred_path=path).deferred(), [])
+        self.assertEqual(os.path.getsize(path), 0)
+
+    def test_deferred_writes_resume_in_the_next_window(self):
+        """Test that a key's first send in a new month resubmits its deferred writes under that key."""
+        limiter = SharedRateLimiter(":memory:", writes_per_month=2)
+        self.addCleanup(limiter.close)
+        scheduler = RequestScheduler(rate_limiter=limiter, write_reserve=1)
+        transport = FakeTransport('{"success": true, "hash": "0xtx"}')
+        client = ZKTClient(api_key="test-key", transport=transport, rate_limiter=limiter, scheduler=scheduler)
+
+        with request_class(priority="bulk", tenant="etl"):
+            client.call_contract_write(TOKEN, ABI, "set", [1], api_key="other-key")
+            client.call_contract_write(TOKEN, ABI, "set", [2], api_key="other-key")
+        entry = scheduler.deferred()[0]
+        self.assertNotIn("other-key", str(entry))
+
+        # Same month: nothing is resent
+        client.call_contract_read(TOKEN, ABI, "get", [], api_key="other-key")
+        self.assertEqual(len(scheduler.deferred()), 1)
+
+        # The write was deferred last month, and the new month's quota is fresh
+        entry["deferred_at"] -= 40 * 86400
+        fresh = SharedRateLimiter(":memory:", writes_per_month=2)
+        self.addCleanup(fresh.close)
+        scheduler.rate_limiter = client.rate_limiter = fresh
+        client.call_contract_read(TOKEN, ABI, "get", [])
+        self.assertEqual(len(scheduler.deferred()), 1)
+
+        transport.requests.clear()
+        asyncio.run(client.acall_contract_read(TOKEN, ABI, "get", [], api_key="other-key"))
+        self.assertEqual(scheduler.deferred(), [])
+        self.assertEqual([(url.rsplit("/", 1)[-1], p.get("arguments")) for url, _, p in transport.requests],
+                         [("other-key", [2]), ("other-key", [])])
+        self.assertEqual(fresh.writes_used("other-key"), 1)
+
+    def test_read_many_keeps_request_class(self):
+        """Test that worker threads inherit the caller's priority and tenant."""
+        scheduler = RequestScheduler()
+        client = ZKTClient(transport=FakeTransport(), scheduler=scheduler)
+        with request_class(priority="bulk", tenant="etl"):
+            client.read_many([{"to": TOKEN, "abi": ABI, "method": "get", "arguments": []}] * 5)
+        self.assertEqual(scheduler.stats()["granted"], {"etl": 5})
+
+
+if __name__ == '__main__':
+    unittest.main()
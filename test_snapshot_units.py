@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+
+"""Unit tests for streaming contract-read snapshots."""
+
+import csv
+import json
+import os
+import sys
+import tempfile
+import unittest
+from decimal import Decimal
+
+sys.path.insert(0, '.')
+
+from stability_snapshot import SnapshotJob, decode_read
+from stability_toolkit import ZKTClient
+from stability_transport import TransportResponse
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+TOKEN = "0x" + "ab" * 20
+ABI = [
+    "function balanceOf(address owner) view returns (uint256)",
+    "function getReserves() view returns (uint112 reserve0, uint112 reserve1, uint32 updated)",
+    "function slot(uint64 i) view returns (uint64, bool)",
+]
+
+
+def holder(i):
+    return "0x" + f"{i:040x}"
+
+
+class BalanceTransport:
+    """Answers balanceOf for holder ``i`` with ``i * 10**18`` and rejects holder 0."""
+
+    def post(self, url, headers, content):
+        payload = json.loads(content)
+        if payload["method"] == "getReserves":
+            return TransportResponse(200, json.dumps({"success": True, "output": ["1", "2", "3"]}))
+        if payload["method"] == "slot":
+            i = payload["arguments"][0]
+            return TransportResponse(200, json.dumps({"success": True, "output": [str(i * 2), i % 2 == 0]}))
+        i = int(payload["arguments"][0], 16)
+        if i == 0:
+            return TransportResponse(200, '{"success": false, "error": "execution reverted"}')
+        balance = 2 ** 256 - 1 if i == 99 else i * 10 ** 18
+        return TransportResponse(200, json.dumps({"success": True, "output": str(balance)}))
+
+    def close(self):
+        pass
+
+
+class TestDecodeRead(unittest.TestCase):
+    """Tests for decode_read."""
+
+    def test_output_shapes(self):
+        """Test single, wrapped and multi-value outputs."""
+        self.assertEqual(decode_read(["uint256"], '{"success": true, "output": "0x10"}'), ([16], None))
+        self.assertEqual(decode_read(["uint256"], '{"success": true, "output": ["7"]}'), ([7], None))
+        self.assertEqual(
+            decode_read(["uint8", "bool"], '{"success": true, "output": "[\\"1\\", \\"true\\"]"}'), ([1, True], None)
+        )
+        self.assertEqual(decode_read(["uint8"], '{"success": false, "error": "bad"}'), (None, "bad"))
+        self.assertEqual(decode_read(["uint8"], "Error: timed out"), (None, "Error: timed out"))
+
+
+class TestSnapshotJob(unittest.TestCase):
+    """Tests for SnapshotJob.export."""
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.dir = tmpdir.name
+        self.transport = BalanceTransport()
+        self.client = ZKTClient(transport=self.transport)
+
+    def test_csv_streams_in_chunks(self):
+        """Test that a generator is read chunk by chunk into exact decimal columns."""
+        path = os.path.join(self.dir, "balances.csv")
+        holders = (holder(i) for i in range(7))
+        stats = SnapshotJob(
+            TOKEN, ABI, "balanceOf", holders, client=self.client, chunk_size=3,
+            argument_names=["holder"], output_names=["balance"],
+        ).export(path)
+
+        self.assertEqual(stats, {"rows": 7, "errors": 1, "chunks": 3, "format": "csv"})
+        with open(path, newline="") as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(list(rows[0]), ["index", "to", "holder", "ok", "balance", "error"])
+        self.assertEqual((rows[0]["ok"], rows[0]["balance"], rows[0]["error"]), ("false", "", "execution reverted"))
+        self.assertEqual((rows[6]["holder"], rows[6]["balance"]), (holder(6), str(6 * 10 ** 18)))
+
+    @unittest.skipUnless(pyarrow, "pyarrow not installed")
+    def test_parquet_has_typed_columns(self):
+        """Test decimal256 for wide integers, int64/uint64 and bool for narrow ones."""
+        path = os.path.join(self.dir, "balances.parquet")
+        SnapshotJob(TOKEN, ABI, "balanceOf", [holder(i) for i in (1, 2, 99)], client=self.client).export(path)
+        table = pyarrow.parquet.read_table(path)
+
+        self.assertEqual(table.schema.field("value").type, pyarrow.decimal256(76, 0))
+        self.assertEqual(table.schema.field("index").type, pyarrow.int64())
+        self.assertEqual(table.column("value").to_pylist()[:2], [Decimal(10 ** 18), Decimal(2 * 10 ** 18)])
+        # max uint256 has 78 digits and cannot be stored exactly
+        self.assertIsNone(table.column("value").to_pylist()[2])
+        self.assertIn("exceeds 76 digits", table.column("error").to_pylist()[2])
+
+        path = os.path.join(self.dir, "slots.parquet")
+        SnapshotJob(TOKEN, ABI, "slot", [[i] for i in range(4)], client=self.client).export(path)
+        table = pyarrow.parquet.read_table(path)
+        self.assertEqual(table.schema.field("arg0").type, pyarrow.uint64())
+        self.assertEqual(table.column("value0").to_pylist(), [0, 2, 4, 6])
+        self.assertEqual(table.column("value1").to_pylist(), [True, False, True, False])
+
+    @unittest.skipUnless(pyarrow, "pyarrow not installed")
+    def test_arrow_per_row_contracts(self):
+        """Test dict items reading a different contract per row into an Arrow file."""
+        path = os.path.join(self.dir, "reserves.arrow")
+        pairs = [{"to": "0x" + f"{i:02x}" * 20} for i in range(1, 4)]
+        stats = SnapshotJob(None, ABI, "getReserves", pairs, client=self.client,
+                            output_names=["reserve0", "reserve1", "updated"]).export(path)
+        self.assertEqual(stats["errors"], 0)
+        table = pyarrow.ipc.open_file(path).read_all()
+        self.assertEqual(table.column("to").to_pylist(), [p["to"] for p in pairs])
+        self.assertEqual(table.column("updated").to_pylist(), [3, 3, 3])
+
+    def test_empty_input_writes_header(self):
+        """Test that no items still give a file with the method's columns."""
+        path = os.path.join(self.dir, "empty.csv")
+        stats = SnapshotJob(TOKEN, ABI, "balanceOf", iter([]), client=self.client).export(path)
+        self.assertEqual(stats["rows"], 0)
+        with open(path) as f:
+            self.assertEqual(f.read().strip(), "index,to,arg0,ok,value,error")
+
+    def test_unknown_format_is_rejected(self):
+        """Test that an unrecognised extension raises."""
+        with self.assertRaises(ValueError):
+            SnapshotJob(TOKEN, ABI, "balanceOf", [], client=self.client).export(os.path.join(self.dir, "x.xlsx"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+
+"""Unit tests for the Python MCP server."""
+
+import asyncio
+import importlib.util
+import json
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, '.')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stability-mcp'))
+
+MCP_AVAILABLE = importlib.util.find_spec("mcp") is not None
+
+if MCP_AVAILABLE:
+    import stability_mcp
+    import uvicorn
+    from mcp import ClientSession
+    from mcp.client.sse import sse_client
+    from mcp.client.streamable_http import StreamableHTTPTransport
+    try:
+        from mcp.client.streamable_http import streamable_http_client
+    except ImportError:  # older mcp releases
+        from mcp.client.streamable_http import streamablehttp_client as streamable_http_client
+    from mcp.shared.memory import create_connected_server_and_client_session
+
+from stability_idempotency import IdempotencyStore
+from stability_transport import TransportResponse
+
+
+class FakeAsyncTransport:
+    """Transport that records payloads and answers after an optional delay."""
+
+    def __init__(self, text, delay=0.0):
+        self.text = text
+        self.delay = delay
+        self.payloads = []
+        self.cancelled = 0
+
+    async def apost(self, url, headers, content):
+        payload = json.loads(content)
+        self.payloads.append(payload)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        text = self.text(payload) if callable(self.text) else self.text
+        return TransportResponse(200, text)
+
+    def close(self):
+        pass
+
+
+def call_tool(name, arguments, progress=None):
+    """Call a tool through an in-memory MCP client session."""
+
+    async def _run():
+        async def _on_progress(value, total, message):
+            if progress is not None:
+                progress.append((value, total, message))
+
+        async with create_connected_server_and_client_session(stability_mcp.app) as session:
+            result = await session.call_tool(name, arguments, progress_callback=_on_progress)
+            # Progress notifications are delivered asynchronously
+            await asyncio.sleep(0.05)
+            return result.content[0].text
+
+    return asyncio.run(_run())
+
+
+@unittest.skipIf(not MCP_AVAILABLE, "mcp is required for MCP server tests")
+class TestStabilityMCPProgress(unittest.TestCase):
+    """Tests for progress notifications on writes and deploys."""
+
+    def setUp(self):
+        self.transport = FakeAsyncTransport('{"success": true, "hash": "0xabc"}')
+        for attribute, value in (('transport', self.transport), ('idempotency', IdempotencyStore())):
+            patcher = patch.object(stability_mcp.client, attribute, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_write_returns_hash_without_waiting(self):
+        """Test that writes return as soon as the hash is known."""
+        progress = []
+
+        text = call_tool("write_contract", {
+            "contract_address": "0x1",
+            "method_name": "set",
+            "method_args": "[1]",
+            "abi": '["function set(uint256 v)"]',
+        }, progress)
+
+        payload = self.transport.payloads[0]
+        self.assertFalse(payload["wait"])
+        self.assertEqual(payload["arguments"], [1])
+        self.assertIn("0xabc", text)
+        self.assertIn("pending", text)
+        self.assertEqual([p[0] for p in progress], [0, 1])
+
+    def test_retried_write_is_not_resubmitted(self):
+        """Test that only a retry with the same idempotency key returns the first result."""
+        arguments = {
+            "contract_address": "0x1",
+            "method_name": "set",
+            "method_args": "[1]",
+            "abi": '["function set(uint256 v)"]',
+            "idempotency_key": "retry-me",
+        }
+
+        first = call_tool("write_contract", arguments)
+        second = call_tool("write_contract", arguments)
+        reused = call_tool("write_contract", dict(arguments, method_args="[2]"))
+        call_tool("post_message", {"message": "hello"})
+        call_tool("post_message", {"message": "hello"})
+
+        self.assertNotIn("replayed", first)
+        self.assertIn('"replayed": true', second)
+        self.assertIn("0xabc", second)
+        self.assertIn("already used for a different request", reused)
+        # Without a key, identical writes are legitimate repeats and both go out
+        self.assertEqual([p.get("arguments") for p in self.transport.payloads], [[1], "hello", "hello"])
+
+    def test_deploy_reports_confirmation(self):
+        """Test the full submitted -> hash -> confirmed progress sequence."""
+        progress = []
+        receipts = [None, {"status": "0x1", "contractAddress": "0xdead"}]
+
+        with patch.object(stability_mcp, '_fetch_receipt', side_effect=receipts), \
+                patch.object(stability_mcp, 'CONFIRMATION_POLL_INTERVAL', 0.01):
+            text = call_tool("deploy_contract", {
+                "solidity_code": "contract Test {}",
+                "wait_for_confirmation": True,
+            }, progress)
+
+        self.assertIn("confirmed", text)
+        self.assertIn("0xdead", text)
+        self.assertEqual(progress[-1][0], stability_mcp.PROGRESS_STAGES)
+        self.assertTrue(all(a[0] < b[0] for a, b in zip(progress, progress[1:])))
+
+    def test_receipt_polls_go_through_the_client(self):
+        """Test that receipt polls are counted and tolerate non-JSON bodies."""
+        bodies = iter(["<html>502 Bad Gateway</html>", '{"jsonrpc": "2.0", "result": {"status": "0x1"}}'])
+        self.transport.text = lambda payload: next(bodies)
+        before = stability_mcp.client.metrics.snapshot().get("requests", 0)
+
+        self.assertIsNone(asyncio.run(stability_mcp._fetch_receipt("0xabc")))
+        self.assertEqual(asyncio.run(stability_mcp._fetch_receipt("0xabc")), {"status": "0x1"})
+        self.assertEqual(self.transport.payloads[0]["method"], "eth_getTransactionReceipt")
+        self.assertEqual(stability_mcp.client.metrics.snapshot()["requests"], before + 2)
+
+
+@unittest.skipIf(not MCP_AVAILABLE, "mcp is required for MCP server tests")
+class TestStabilityMCPCancellation(unittest.TestCase):
+    """Tests for deadlines and client cancellation."""
+
+    def setUp(self):
+        self.transport = FakeAsyncTransport('{"output": "slow"}', delay=5.0)
+        patcher = patch.object(stability_mcp.client, 'transport', self.transport)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.before = stability_mcp.metrics.snapshot()
+
+    def _delta(self, name):
+        return stability_mcp.metrics.snapshot().get(name, 0) - self.before.get(name, 0)
+
+    def test_deadline_aborts_request(self):
+        """Test that a per-call deadline aborts the HTTP request."""
+        text = call_tool("read_contract", {
+            "contract_address": "0x1",
+            "method_name": "slow",
+            "timeout_seconds": 0.05,
+        })
+
+        self.assertIn("timed out", text)
+        self.assertEqual(self.transport.cancelled, 1)
+        self.assertEqual(self._delta("timeouts"), 1)
+        self.assertEqual(self._delta("in_flight"), 0)
+
+    def test_cancellation_releases_slot(self):
+        """Test that cancelling a call aborts the request and frees its slot."""
+
+        async def _run():
+            task = asyncio.ensure_future(stability_mcp.call_tool(
+                "read_contract", {"contract_address": "0x1", "method_name": "slow"}
+            ))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            self.assertEqual(stability_mcp.call_slots()._value, stability_mcp.MAX_CONCURRENT_CALLS)
+
+        asyncio.run(_run())
+
+        self.assertEqual(self.transport.cancelled, 1)
+        self.assertEqual(self._delta("cancelled"), 1)
+        self.assertEqual(self._delta("in_flight"), 0)
+
+    def test_bad_timeout_is_an_error_result(self):
+        """Test that a non-numeric timeout_seconds returns the standard error and is counted."""
+        # Called directly: newer mcp releases reject it against the input schema first
+        result = asyncio.run(stability_mcp.call_tool("read_contract", {
+            "contract_address": "0x1",
+            "method_name": "slow",
+            "timeout_seconds": "soon",
+        }))
+        self.assertEqual(result.content[0].text, "❌ Error: timeout_seconds must be a number, got 'soon'")
+        self.assertEqual(self._delta("errors"), 1)
+        self.assertEqual(self.transport.cancelled, 0)
+
+
+@unittest.skipIf(not MCP_AVAILABLE, "mcp is required for MCP server tests")
+class TestStabilityMCPBatchRead(unittest.TestCase):
+    """Tests for the read_contracts_batch tool."""
+
+    def setUp(self):
+        def respond(payload):
+            if payload["method"] == "broken":
+                return '{"success": false, "error": "execution reverted"}'
+            return json.dumps({"success": True, "output": payload["arguments"][0]})
+
+        self.transport = FakeAsyncTransport(respond, delay=0.01)
+        patcher = patch.object(stability_mcp.client, 'transport', self.transport)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_batch_results_in_input_order(self):
+        """Test that every read is sent once and results keep input order."""
+        reads = [
+            {"contract_address": "0x1", "method_name": "balanceOf", "method_args": [f"0x{i}"]}
+            for i in range(10)
+        ]
+        reads.insert(3, {"contract_address": "0x1", "method_name": "broken", "method_args": "[0]"})
+
+        results = json.loads(call_tool("read_contracts_batch", {"reads": reads}))
+
+        self.assertEqual(len(self.transport.payloads), 11)
+        self.assertEqual(len(results), 11)
+        self.assertFalse(results[3]["ok"])
+        self.assertEqual(results[3]["error"], "execution reverted")
+        outputs = [r["result"]["output"] for r in results if r["ok"]]
+        self.assertEqual(outputs, [f"0x{i}" for i in range(10)])
+
+    def test_batch_size_is_capped(self):
+        """Test that oversized batches are rejected before any request is sent."""
+        reads = [{"contract_address": "0x1", "method_name": "m"}] * (stability_mcp.MAX_BATCH_READS + 1)
+
+        text = call_tool("read_contracts_batch", {"reads": reads})
+
+        self.assertIn("at most", text)
+        self.assertEqual(self.transport.payloads, [])
+
+
+class ConcurrencyTransport(FakeAsyncTransport):
+    """Tracks the most calls in flight at once, overall and per contract address."""
+
+    def __init__(self, delay):
+        super().__init__('{"success": true, "output": "1"}', delay)
+        self.in_flight = {}
+        self.peak = {}
+        self.total = self.peak_total = 0
+
+    async def apost(self, url, headers, content):
+        to = json.loads(content).get("to")
+        self.in_flight[to] = self.in_flight.get(to, 0) + 1
+        self.total += 1
+        self.peak[to] = max(self.peak.get(to, 0), self.in_flight[to])
+        self.peak_total = max(self.peak_total, self.total)
+        try:
+            return await super().apost(url, headers, content)
+        finally:
+            self.in_flight[to] -= 1
+            self.total -= 1
+
+
+@unittest.skipIf(not MCP_AVAILABLE, "mcp is required for MCP server tests")
+class TestStabilityMCPHttp(unittest.TestCase):
+    """Tests for the shared HTTP (streamable HTTP and SSE) server mode."""
+
+    def setUp(self):
+        self.transport = ConcurrencyTransport(delay=0.1)
+        for target, attribute, value in (
+            (stability_mcp.client, 'transport', self.transport),
+            (stability_mcp, 'MAX_CONCURRENT_CALLS_PER_CLIENT', 1),
+        ):
+            patcher = patch.object(target, attribute, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        config = uvicorn.Config(stability_mcp.create_http_app(), host="127.0.0.1", port=0, log_level="warning")
+        server = uvicorn.Server(config)
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        deadline = time.monotonic() + 5
+        while not server.started and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(server.started)
+        self.addCleanup(thread.join, 5)
+        self.addCleanup(setattr, server, 'should_exit', True)
+        self.base = "http://127.0.0.1:%d" % server.servers[0].sockets[0].getsockname()[1]
+
+    async def _calls(self, connect, address, count):
+        async with connect() as streams:
+            async with ClientSession(streams[0], streams[1]) as session:
+                await session.initialize()
+                results = await asyncio.gather(*(
+                    session.call_tool("read_contract", {"contract_address": address, "method_name": "get"})
+                    for _ in range(count)
+                ))
+        return [result.content[0].text for result in results]
+
+    def test_clients_share_server_with_own_limits(self):
+        """Test that two HTTP clients run side by side while each is held to its own limit."""
+
+        async def _run():
+            return await asyncio.gather(
+                self._calls(lambda: streamable_http_client(self.base + "/mcp"), "0xa", 3),
+                self._calls(lambda: streamable_http_client(self.base + "/mcp"), "0xb", 3),
+            )
+
+        first, second = asyncio.run(_run())
+        self.assertTrue(all("successful" in text for text in first + second))
+        self.assertEqual(len(self.transport.payloads), 6)
+        self.assertEqual((self.transport.peak["0xa"], self.transport.peak["0xb"]), (1, 1))
+        self.assertEqual(self.transport.peak_total, 2)
+
+    def test_progress_reaches_post_only_clients(self):
+        """Test that write progress arrives on the call's own stream over /mcp."""
+        self.transport.text = '{"success": true, "hash": "0xabc"}'
+        progress = []
+
+        async def _on_progress(value, total, message):
+            progress.append(value)
+
+        async def _run():
+            async with streamable_http_client(self.base + "/mcp") as streams:
+                async with ClientSession(streams[0], streams[1]) as session:
+                    await session.initialize()
+                    result = await session.call_tool("write_contract", {
+                        "contract_address": "0x1",
+                        "method_name": "set",
+                        "method_args": "[1]",
+                        "abi": '["function set(uint256 v)"]',
+                    }, progress_callback=_on_progress)
+                    await asyncio.sleep(0.05)
+                    return result.content[0].text
+
+        async def _no_get_stream(transport, client, writer):
+            pass
+
+        # Without the standalone GET stream, only the POST's own stream carries notifications
+        with patch.object(StreamableHTTPTransport, 'handle_get_stream', _no_get_stream):
+            text = asyncio.run(_run())
+        self.assertIn("0xabc", text)
+        self.assertEqual(progress, [0, 1])
+
+    def test_sse_transport(self):
+        """Test that legacy SSE clients reach the same tools and shared client."""
+        texts = asyncio.run(self._calls(lambda: sse_client(self.base + "/sse"), "0xc", 1))
+        self.assertIn("successful", texts[0])
+        self.assertEqual(self.transport.payloads[0]["to"], "0xc")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -3,7 +3,11 @@
 """Comprehensive unit tests for Stability Toolkit."""
 
 import unittest
+import asyncio
 import json
+import random
+import threading
+import time
 from unittest.mock import Mock, patch, MagicMock
 import sys
 import os
@@ -17,8 +21,45 @@ from stability_toolkit import (
     call_contract_read, 
     call_contract_write, 
     deploy_contract,
-    _post_request
+    _post_request,
+    ZKTClient,
 )
+from stability_transport import TransportResponse, RequestsTransport, create_transport
+
+
+class FakeTransport:
+    """In-memory transport that records requests and echoes a fixed response."""
+
+    def __init__(self, text='{"success": true}', error=None):
+        self.text = text
+        self.error = error
+        self.requests = []
+
+    def post(self, url, headers, content):
+        self.requests.append((url, headers, json.loads(content)))
+        if self.error:
+            raise self.error
+        return TransportResponse(200, self.text)
+
+    async def apost(self, url, headers, content):
+        return self.post(url, headers, content)
+
+    def close(self):
+        pass
+
+
+class EchoTransport(FakeTransport):
+    """Answers each request with its own id after a random delay, so replies finish out of order."""
+
+    def post(self, url, headers, content):
+        payload = json.loads(content)
+        time.sleep(random.uniform(0, 0.01))
+        return TransportResponse(200, json.dumps({"success": True, "output": payload["id"]}))
+
+    async def apost(self, url, headers, content):
+        payload = json.loads(content)
+        await asyncio.sleep(random.uniform(0, 0.01))
+        return TransportResponse(200, json.dumps({"success": True, "output": payload["id"]}))
 
 class TestStabilityToolkitUnits(unittest.TestCase):
     """Comprehensive unit tests for Stability Toolkit."""
@@ -221,6 +262,137 @@ class TestStabilityToolkitUnits(unittest.TestCase):
                 "try-it-out"
             )
 
+class TestZKTClient(unittest.TestCase):
+    """Unit tests for the pooled ZKT client."""
+
+    def test_call_contract_read_uses_transport(self):
+        """Test that reads are sent through the client's transport."""
+        transport = FakeTransport('{"output": "Hello"}')
+        client = ZKTClient("test-api-key", transport=transport)
+
+        result = client.call_contract_read("0x1234", ["function getMessage()"], "getMessage", [])
+
+        url, headers, payload = transport.requests[0]
+        self.assertEqual(url, "https://rpc.stabilityprotocol.com/zkt/test-api-key")
+        self.assertEqual(headers, {"Content-Type": "application/json"})
+        self.assertEqual(payload["method"], "getMessage")
+        self.assertEqual(result, '{"output": "Hello"}')
+        self.assertEqual(client.metrics.snapshot()["requests"], 1)
+
+    def test_post_error_is_sanitized(self):
+        """Test that transport errors are returned without the raw API key."""
+        api_key = "secret-api-key-1234567890"
+        transport = FakeTransport(error=Exception(f"failed for {api_key}"))
+        client = ZKTClient(api_key, transport=transport)
+
+        result = client.post_zkt_v1("hello")
+
+        self.assertTrue(result.startswith("Error:"))
+        self.assertNotIn(api_key, result)
+        self.assertEqual(client.metrics.snapshot()["errors"], 1)
+
+    def test_read_many_preserves_order(self):
+        """Test that concurrent reads return results in input order."""
+        client = ZKTClient("test-api-key", transport=EchoTransport())
+        calls = [
+            {"to": "0x1", "abi": [], "method": "m", "arguments": [i], "id": i}
+            for i in range(20)
+        ]
+
+        results = client.read_many(calls, max_concurrency=4)
+        async_results = asyncio.run(client.aread_many(calls, max_concurrency=4))
+
+        self.assertEqual([json.loads(r)["output"] for r in results], list(range(20)))
+        self.assertEqual([json.loads(r)["output"] for r in async_results], list(range(20)))
+
+    def test_create_transport(self):
+        """Test transport selection by name."""
+        self.assertIsInstance(create_transport("http1"), RequestsTransport)
+        fake = FakeTransport()
+        self.assertIs(create_transport(fake), fake)
+        with self.assertRaises(ValueError):
+            create_transport("carrier-pigeon")
+
+    def test_toolkit_with_transport_uses_client(self):
+        """Test that toolkit tools route through a shared client when configured."""
+        toolkit = StabilityToolkit(transport=FakeTransport())
+        write_tool = toolkit.get_tools()[0]
+
+        write_tool.invoke({"arguments": "Test message"})
+
+        _, _, payload = toolkit.client.transport.requests[0]
+        self.assertEqual(payload, {"arguments": "Test message"})
+
+    def test_async_tools_run_concurrently_on_event_loop(self):
+        """Test that ainvoke awaits the client instead of using executor threads."""
+        class SlowAsyncTransport(FakeTransport):
+            def post(self, url, headers, content):
+                raise AssertionError("async tools must not use the sync path")
+
+            async def apost(self, url, headers, content):
+                self.requests.append((url, headers, json.loads(content)))
+                self.threads.add(threading.get_ident())
+                await asyncio.sleep(0.2)
+                return TransportResponse(200, self.text)
+
+        transport = SlowAsyncTransport('{"success": true, "output": "hi"}')
+        transport.threads = set()
+        toolkit = StabilityToolkit(transport=transport)
+        read_tool = toolkit.get_tools()[1]
+        call = json.dumps({"to": "0x" + "ab" * 20, "abi": ["function getMessage() view returns (string)"],
+                           "method": "getMessage", "arguments": []})
+
+        async def run():
+            started = time.perf_counter()
+            results = await asyncio.gather(*(read_tool.ainvoke({"arguments": call}) for _ in range(10)))
+            return results, time.perf_counter() - started, threading.get_ident()
+
+        results, elapsed, loop_thread = asyncio.run(run())
+
+        self.assertEqual(results, ['{"success": true, "output": "hi"}'] * 10)
+        self.assertLess(elapsed, 1.0)
+        self.assertEqual(transport.threads, {loop_thread})
+        self.assertEqual(len(transport.requests), 10)
+
+    def test_read_tool_batch_coalesces_and_preserves_order(self):
+        """Test that batch/abatch share one read engine, de-duplicate and keep order."""
+        class EchoTransport(FakeTransport):
+            def post(self, url, headers, content):
+                payload = json.loads(content)
+                self.requests.append((url, headers, payload))
+                time.sleep(0.05)
+                return TransportResponse(200, json.dumps({"output": payload["arguments"][0]}))
+
+            async def apost(self, url, headers, content):
+                payload = json.loads(content)
+                self.requests.append((url, headers, payload))
+                await asyncio.sleep(0.05)
+                return TransportResponse(200, json.dumps({"output": payload["arguments"][0]}))
+
+        abi = ["function balanceOf(address owner) view returns (uint256)"]
+        holders = ["0x%040x" % (i % 100) for i in range(300)]
+        inputs = [
+            {"arguments": json.dumps({"to": "0x" + "ab" * 20, "abi": abi, "method": "balanceOf",
+                                      "arguments": [holder]})}
+            for holder in holders
+        ] + [{"arguments": "not json"}]
+        expected = [json.dumps({"output": holder}) for holder in holders]
+
+        toolkit = StabilityToolkit(transport=EchoTransport())
+        read_tool = toolkit.get_tools()[1]
+        started = time.perf_counter()
+        results = read_tool.batch(inputs)
+        self.assertLess(time.perf_counter() - started, 1.0)
+        self.assertEqual(results[:-1], expected)
+        self.assertTrue(results[-1].startswith("Error:"))
+        self.assertEqual(len(toolkit.client.transport.requests), 100)
+
+        toolkit.client.transport.requests.clear()
+        results = asyncio.run(read_tool.abatch(inputs, config={"max_concurrency": 100}))
+        self.assertEqual(results[:-1], expected)
+        self.assertEqual(len(toolkit.client.transport.requests), 100)
+
+
 if __name__ == '__main__':
     print("🧪 Running Comprehensive Stability Toolkit Unit Tests")
     print("=" * 60)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+
+"""Unit tests for local pre-flight validation and the structured tools."""
+
+import json
+import sys
+import unittest
+
+sys.path.insert(0, '.')
+
+from stability_toolkit import StabilityToolkit
+from stability_validation import ValidationError, validate_contract_call, validate_deploy
+from test_toolkit_units import FakeTransport
+
+TOKEN = "0x" + "ab" * 20
+HOLDER = "0x" + "cd" * 20
+ABI = [
+    "function balanceOf(address owner) view returns (uint256)",
+    "function transfer(address to, uint256 amount) returns (bool)",
+    "function setFlags(bool[2] flags, bytes32 tag)",
+    "event Transfer(address indexed from, address indexed to, uint256 value)",
+]
+
+
+class TestValidation(unittest.TestCase):
+    """Tests for stability_validation."""
+
+    def test_valid_calls_resolve_function(self):
+        """Test that well-formed calls pass and return the resolved signature."""
+        function = validate_contract_call(TOKEN, ABI, "balanceOf", [HOLDER])
+        self.assertEqual(function["inputs"], ["address"])
+        self.assertEqual(function["outputs"], ["uint256"])
+        validate_contract_call(TOKEN, ABI, "transfer", [HOLDER, "1000"])
+        validate_contract_call(TOKEN, ABI, "setFlags", [[True, "false"], "0x" + "00" * 32])
+        validate_contract_call(TOKEN, json.dumps([{
+            "type": "function", "name": "decimals", "inputs": [], "outputs": [{"type": "uint8"}],
+        }]), "decimals", [])
+
+    def test_bad_calls_are_rejected(self):
+        """Test each kind of malformed call raises ValidationError."""
+        cases = [
+            (("0x1234567890abcdef", ABI, "balanceOf", [HOLDER]), "address"),
+            ((TOKEN, [], "balanceOf", [HOLDER]), "ABI"),
+            ((TOKEN, ["function broken(uint"], "broken", [1]), "Invalid ABI entry"),
+            ((TOKEN, ABI, "Transfer", [HOLDER, HOLDER, 1]), "not found"),
+            ((TOKEN, ABI, "balanceOf", []), "takes 1 argument"),
+            ((TOKEN, ABI, "balanceOf", ["0x1234"]), "arguments[0]"),
+            ((TOKEN, ABI, "transfer", [HOLDER, -1]), "out of range"),
+            ((TOKEN, ABI, "transfer", [HOLDER, "lots"]), "integer"),
+            ((TOKEN, ABI, "setFlags", [[True], "0x00"]), "2 item"),
+            ((TOKEN, ABI, "setFlags", [[True, False], "0x00"]), "32 byte"),
+        ]
+        for args, message in cases:
+            with self.subTest(args=args):
+                with self.assertRaises(ValidationError) as ctx:
+                    validate_contract_call(*args)
+                self.assertIn(message, str(ctx.exception))
+
+    def test_deploy_checks_declared_constructor(self):
+        """Test constructor arity is checked only when the source declares one."""
+        validate_deploy("contract Test {}", ["hello"])
+        source = "contract Box { // constructor() ignored\n constructor(string memory s, uint8 v) {} }"
+        validate_deploy(source, ["hi", 7])
+        with self.assertRaises(ValidationError):
+            validate_deploy(source, ["hi"])
+        with self.assertRaises(ValidationError):
+            validate_deploy(source, ["hi", 256])
+        with self.assertRaises(ValidationError):
+            validate_deploy("", [])
+
+    def test_deploy_with_several_contracts_skips_constructor(self):
+        """Test that a constructor is not checked when it may belong to another contract."""
+        source = (
+            "contract Base { constructor(uint256 v) {} }\n"
+            "contract Child is Base(1) {}"
+        )
+        validate_deploy(source, [])
+        validate_deploy(source, ["not", "checked"])
+        two = "contract A { constructor(uint8 v) {} } contract B { constructor(string memory s) {} }"
+        validate_deploy(two, ["hi"])
+
+
+class TestStructuredTools(unittest.TestCase):
+    """Tests for the args_schema tools."""
+
+    def setUp(self):
+        self.toolkit = StabilityToolkit(structured=True, transport=FakeTransport('{"success": true}'))
+        self.tools = {tool.name: tool for tool in self.toolkit.get_tools()}
+
+    def test_schemas_expose_typed_fields(self):
+        """Test that tools take fields instead of a JSON string."""
+        self.assertEqual(list(self.tools["StabilityReadTool"].args), ["to", "abi", "method", "arguments"])
+        self.assertIn("wait", self.tools["StabilityWriteContractTool"].args)
+        self.assertEqual(list(self.tools["StabilityWriteTool"].args), ["message"])
+
+    def test_invalid_calls_never_reach_transport(self):
+        """Test that rejected calls return an error without sending anything."""
+        result = self.tools["StabilityWriteContractTool"].invoke(
+            {"to": TOKEN, "abi": ABI, "method": "transfer", "arguments": [HOLDER]}
+        )
+        self.assertTrue(result.startswith("Error: Method 'transfer' takes 2"))
+        self.assertEqual(self.toolkit.client.transport.requests, [])
+
+        result = self.tools["StabilityReadTool"].invoke(
+            {"to": TOKEN, "abi": ABI, "method": "balanceOf", "arguments": [HOLDER]}
+        )
+        self.assertEqual(result, '{"success": true}')
+        _, _, payload = self.toolkit.client.transport.requests[0]
+        self.assertEqual(payload["arguments"], [HOLDER])
+
+    def test_json_tools_validate_too(self):
+        """Test that the JSON-string tools run the same pre-flight checks."""
+        toolkit = StabilityToolkit(transport=FakeTransport())
+        read_tool = toolkit.get_tools()[1]
+        result = read_tool.invoke({"arguments": json.dumps(
+            {"to": "0xnope", "abi": ABI, "method": "balanceOf", "arguments": [HOLDER]}
+        )})
+        self.assertTrue(result.startswith("Error: to must be"))
+        self.assertEqual(toolkit.client.transport.requests, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
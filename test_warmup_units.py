@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+
+"""Unit tests for connection pre-warming and keep-alive pings against a local stub endpoint."""
+
+import asyncio
+import socket
+import sys
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+sys.path.insert(0, '.')
+
+from stability_toolkit import ZKTClient
+from stability_transport import RequestsTransport, _is_connected, httpx
+
+CALL = {"to": "0x" + "ab" * 20, "abi": ["function get() view returns (uint256)"], "method": "get", "arguments": []}
+
+
+class KeepAliveEndpoint(BaseHTTPRequestHandler):
+    """HTTP/1.1 ZKT stand-in that counts connections and ``HEAD`` pings."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_HEAD(self):
+        with self.server.lock:
+            self.server.pings += 1
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        reply = b'{"success": true, "output": "1"}'
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+
+class TestConnectionWarmup(unittest.TestCase):
+    """Tests for ZKTClient warm_connections and keepalive_interval."""
+
+    def setUp(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveEndpoint)
+        server.daemon_threads = True
+        server.lock, server.connections, server.pings = threading.Lock(), 0, 0
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = "http://127.0.0.1:%d/zkt/{}" % server.server_address[1]
+        patcher = patch("stability_toolkit.API_URL_TEMPLATE", url)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.server = server
+
+    def client(self, **options):
+        client = ZKTClient(api_key="test-key", **options)
+        self.addCleanup(client.close)
+        return client
+
+    def test_prewarmed_connections_serve_first_requests(self):
+        """Test that construction opens the pool and the first calls reuse it."""
+        client = self.client(warm_connections=3)
+        self.assertEqual(self.server.connections, 3)
+        client.read_many([CALL] * 3, max_concurrency=3)
+        metrics = client.metrics.snapshot()
+        self.assertEqual(metrics["connections_prewarmed"], 3)
+        self.assertEqual(metrics["connections_warm"], 3)
+        self.assertNotIn("connections_cold", metrics)
+        self.assertEqual(self.server.connections, 3)
+
+    def test_cold_then_warm_without_prewarming(self):
+        """Test that the first request opens a connection and the next reuses it."""
+        client = self.client()
+        client.call_contract_read(**CALL)
+        client.call_contract_read(**CALL)
+        metrics = client.metrics.snapshot()
+        self.assertEqual((metrics["connections_cold"], metrics["connections_warm"]), (1, 1))
+
+    def test_keepalive_pings_idle_connections(self):
+        """Test that idle pooled connections are pinged and not reopened."""
+        client = self.client(warm_connections=2, keepalive_interval=0.05)
+        deadline = time.monotonic() + 2
+        while "keepalive_pings" not in client.metrics.snapshot() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        client.close()
+        self.assertGreaterEqual(self.server.pings, 2)
+        self.assertGreaterEqual(client.metrics.snapshot()["keepalive_pings"], 1)
+        self.assertEqual(self.server.connections, 2)
+
+    def test_warm_failure_is_counted_not_raised(self):
+        """Test that an unreachable endpoint does not fail construction."""
+        with patch("stability_toolkit.API_URL_TEMPLATE", "http://127.0.0.1:1/zkt/{}"):
+            client = self.client(warm_connections=2)
+        self.assertEqual(client.metrics.snapshot()["warm_errors"], 1)
+
+    def test_warm_with_urllib3_1_connections(self):
+        """Test warming pools whose connections predate ``is_connected`` (urllib3 1.x)."""
+        sockets = []
+        self.addCleanup(lambda: [sock.close() for sock in sockets])
+
+        class Legacy:
+            """urllib3 1.x-style connection: only ``sock``, set by ``connect``."""
+
+            sock = None
+
+            def connect(self):
+                self.sock, self.peer = socket.socketpair()
+                sockets.extend((self.sock, self.peer))
+
+        conns = [Legacy(), Legacy()]
+
+        class Pool:
+            def _get_conn(self):
+                return conns.pop(0)
+
+            def _put_conn(self, conn):
+                conns.append(conn)
+
+        transport = RequestsTransport()
+        self.addCleanup(transport.close)
+        with patch.object(transport, "_pool", lambda url: Pool()):
+            self.assertEqual(transport.warm("http://127.0.0.1/", 2), 2)
+            self.assertEqual(transport.warm("http://127.0.0.1/", 2), 0)
+
+        # Closing the peer makes the idle socket readable, i.e. dropped
+        conns[0].peer.close()
+        self.assertEqual([_is_connected(conn) for conn in conns], [False, True])
+
+    @unittest.skipUnless(httpx, "httpx not installed")
+    def test_httpx_reports_reuse(self):
+        """Test warm/cold attribution over the httpx transport, sync and async."""
+        client = self.client(transport="httpx", warm_connections=1)
+        client.call_contract_read(**CALL)
+        self.assertEqual(client.metrics.snapshot()["connections_warm"], 1)
+
+        async def _run():
+            await client.acall_contract_read(**CALL)
+            await client.acall_contract_read(**CALL)
+            await client.transport.aclose()
+
+        asyncio.run(_run())
+        metrics = client.metrics.snapshot()
+        # The async client is warmed on its loop before its first request
+        self.assertEqual(metrics["connections_warm"], 3)
+        self.assertNotIn("connections_cold", metrics)
+
+    @unittest.skipUnless(httpx, "httpx not installed")
+    def test_keepalive_reaches_the_async_client(self):
+        """Test that keep-alive pings also go through the live async client's connections."""
+        client = self.client(transport="httpx", warm_connections=1)
+
+        async def _run():
+            await client.acall_contract_read(**CALL)
+            pings = self.server.pings
+            # What the keep-alive thread does while the loop is idle
+            await asyncio.to_thread(client.warm, ping=True)
+            deadline = time.monotonic() + 2
+            while self.server.pings < pings + 2 and time.monotonic() < deadline:
+                await asyncio.sleep(0.01)
+            connections = self.server.connections
+            await client.acall_contract_read(**CALL)
+            await client.transport.aclose()
+            return self.server.pings - pings, connections
+
+        pings, connections = asyncio.run(_run())
+        # One HEAD from the sync client and one from the async client, both on open connections
+        self.assertEqual(pings, 2)
+        self.assertEqual(connections, 2)
+        self.assertEqual(self.server.connections, 2)
+
+
+    @unittest.skipUnless(httpx, "httpx not installed")
+    def test_async_client_is_closed(self):
+        """Test that aclose and ``async with`` close httpx's async client, and close drops it."""
+
+        async def _run():
+            async with ZKTClient(api_key="test-key", transport="httpx") as client:
+                await client.acall_contract_read(**CALL)
+                opened = client.transport._async_clients[asyncio.get_running_loop()]
+            return client, opened
+
+        client, opened = asyncio.run(_run())
+        self.assertTrue(opened.is_closed)
+        self.assertEqual(len(client.transport._async_clients), 0)
+
+        client = self.client(transport="httpx")
+        asyncio.run(client.acall_contract_read(**CALL))
+        client.close()
+        self.assertEqual(len(client.transport._async_clients), 0)
+
+    @unittest.skipUnless(httpx, "httpx not installed")
+    def test_loops_keep_their_own_async_clients(self):
+        """Test that two loops using one transport at once do not close each other's clients."""
+        client = self.client(transport="httpx")
+        barrier = threading.Barrier(2)
+        results = {}
+
+        async def _reads(name):
+            await client.acall_contract_read(**CALL)
+            mine = client.transport._async_clients[asyncio.get_running_loop()]
+            await asyncio.to_thread(barrier.wait, 5)
+            await client.acall_contract_read(**CALL)
+            await asyncio.to_thread(barrier.wait, 5)
+            results[name] = (mine, mine.is_closed, client.transport._async_clients[asyncio.get_running_loop()])
+            await asyncio.to_thread(barrier.wait, 5)
+
+        threads = [threading.Thread(target=asyncio.run, args=(_reads(name),)) for name in ("a", "b")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+
+        (first, first_closed, first_now), (second, second_closed, second_now) = results["a"], results["b"]
+        self.assertIsNot(first, second)
+        self.assertFalse(first_closed or second_closed)
+        self.assertIs(first_now, first)
+        self.assertIs(second_now, second)
+        # Two loops, one connection each, and the second reads reused them
+        metrics = client.metrics.snapshot()
+        self.assertEqual((metrics["connections_cold"], metrics["connections_warm"]), (2, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
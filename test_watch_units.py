@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+
+"""Unit tests for the polling contract-state watcher."""
+
+import asyncio
+import json
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, '.')
+
+from stability_toolkit import ZKTClient
+from stability_transport import TransportResponse
+from stability_watch import ContractWatcher
+
+TOKEN = "0x" + "ab" * 20
+ABI = ["function balanceOf(address owner) view returns (uint256)", "function paused() view returns (bool)"]
+HOLDER = "0x" + "01" * 20
+
+
+class StateTransport:
+    """Answers reads from ``state[method]`` and counts requests per method."""
+
+    def __init__(self, **state):
+        self.state = state
+        self.calls = {}
+        self._lock = threading.Lock()
+
+    def post(self, url, headers, content):
+        method = json.loads(content)["method"]
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+            value = self.state[method]
+        if isinstance(value, Exception):
+            return TransportResponse(200, json.dumps({"success": False, "error": str(value)}))
+        return TransportResponse(200, json.dumps({"success": True, "output": value}))
+
+    async def apost(self, url, headers, content):
+        return self.post(url, headers, content)
+
+    def close(self):
+        pass
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return predicate()
+
+
+class TestContractWatcher(unittest.TestCase):
+    """Tests for ContractWatcher."""
+
+    def setUp(self):
+        self.transport = StateTransport(balanceOf="100", paused=False)
+        self.watcher = ContractWatcher(ZKTClient(transport=self.transport), interval=0.02, max_interval=0.02)
+        self.addCleanup(self.watcher.stop)
+
+    def test_subscribers_share_one_poll(self):
+        """Test that identical reads are polled once for every subscriber."""
+        first = self.watcher.watch(TOKEN, ABI, "balanceOf", [HOLDER])
+        second = self.watcher.watch(TOKEN.upper().replace("0X", "0x"), ABI, "balanceOf", [HOLDER], interval=1.0)
+        self.watcher.start()
+        self.assertEqual(first.get(timeout=2).value, "100")
+        self.assertEqual(second.get(timeout=2).value, "100")
+        self.assertTrue(wait_for(lambda: self.watcher.stats()["polls"] >= 5))
+        self.assertEqual(self.watcher.stats()["targets"], 1)
+        self.assertEqual(self.transport.calls["balanceOf"], self.watcher.stats()["polls"])
+
+    def test_events_only_on_change(self):
+        """Test that unchanged values are silent and a change carries the previous value."""
+        subscription = self.watcher.watch(TOKEN, ABI, "balanceOf", [HOLDER])
+        self.watcher.start()
+        initial = subscription.get(timeout=2)
+        self.assertIsNone(initial.previous)
+        self.assertTrue(wait_for(lambda: self.watcher.stats()["unchanged"] >= 3))
+        self.assertIsNone(subscription.get(timeout=0))
+
+        self.transport.state["balanceOf"] = "250"
+        event = subscription.get(timeout=2)
+        self.assertEqual((event.previous, event.value), ("100", "250"))
+        self.assertEqual(self.watcher.stats()["changes"], 2)
+
+    def test_stable_values_back_off(self):
+        """Test that the poll interval grows while nothing changes."""
+        watcher = ContractWatcher(ZKTClient(transport=self.transport), interval=0.01, max_interval=0.16, backoff=2.0)
+        self.addCleanup(watcher.stop)
+        watcher.watch(TOKEN, ABI, "paused")
+        watcher.start()
+        time.sleep(0.5)
+        # Without backoff this would be about 50 polls
+        self.assertLess(watcher.stats()["polls"], 12)
+
+    def test_errors_are_not_changes(self):
+        """Test that failed reads emit nothing and recovery resumes normally."""
+        self.transport.state["paused"] = RuntimeError("execution reverted")
+        subscription = self.watcher.watch(TOKEN, ABI, "paused")
+        self.watcher.start()
+        self.assertTrue(wait_for(lambda: self.watcher.stats()["errors"] >= 2))
+        self.assertIsNone(subscription.get(timeout=0))
+        self.transport.state["paused"] = True
+        self.assertIs(subscription.get(timeout=2).value, True)
+
+    def test_callbacks_sync_and_async(self):
+        """Test callback delivery, including coroutines and callbacks that raise."""
+        seen = []
+
+        async def async_callback(event):
+            await asyncio.sleep(0)
+            seen.append(("async", event.value))
+
+        def failing_callback(event):
+            raise ValueError("boom")
+
+        self.watcher.watch(TOKEN, ABI, "paused", callback=lambda event: seen.append(("sync", event.value)))
+        self.watcher.watch(TOKEN, ABI, "paused", callback=async_callback)
+        self.watcher.watch(TOKEN, ABI, "paused", callback=failing_callback)
+        self.watcher.start()
+        self.assertTrue(wait_for(lambda: len(seen) == 2))
+        self.assertEqual(sorted(seen), [("async", False), ("sync", False)])
+        self.assertEqual(self.watcher.stats()["callback_errors"], 1)
+
+    def test_async_iteration_and_close(self):
+        """Test ``async for`` under ``run()`` and that closing stops the poll."""
+        watcher = self.watcher
+
+        async def _run():
+            runner = asyncio.create_task(watcher.run())
+            subscription = watcher.watch(TOKEN, ABI, "balanceOf", [HOLDER])
+            values = []
+            async for event in subscription:
+                values.append(event.value)
+                if len(values) == 1:
+                    self.transport.state["balanceOf"] = "7"
+                else:
+                    subscription.close()
+            self.assertEqual(watcher.stats()["targets"], 0)
+            polls = watcher.stats()["polls"]
+            await asyncio.sleep(0.1)
+            self.assertEqual(watcher.stats()["polls"], polls)
+            watcher.stop()
+            await runner
+            return values
+
+        self.assertEqual(asyncio.run(_run()), ["100", "7"])
+
+
+if __name__ == '__main__':
+    unittest.main()